@@ -1,7 +1,101 @@
 # Importações necessárias para o código
+import os
 import random
 from datetime import datetime, date
-from database import cursor, conn  
+from database import conexao, transacao, intervalo_do_dia, checkpoint, replicar_catalogo
+from catalogo import catalogo
+from gravacao import escrever
+from busca import buscar_alimentos, resolver_alimento
+from arquivamento import pagina_arquivada, registros_arquivados
+from importacao import importar_alimentos, resumo_importacao
+from ranking import CRITERIOS, ranking_usuario
+from recomendacao import alimentos_recomendados
+
+# Consultas quentes sobre refeicoes. Todas filtram por (email_usuario, data) com
+# intervalos semiabertos para usar o índice idx_refeicoes_usuario_data.
+SQL_REFEICOES_DO_DIA = '''
+    SELECT r.alimento, r.quantidade_gramas, a.calorias
+    FROM refeicoes r
+    JOIN alimentos a ON r.alimento = a.nome
+    WHERE r.email_usuario = ? AND r.data >= ? AND r.data < ?
+'''
+
+# Totais do dia já agregados (mantidos pelos triggers de totais_diarios)
+SQL_TOTAIS_DO_DIA = '''
+    SELECT calorias, proteinas, carboidratos, gorduras, refeicoes
+    FROM totais_diarios
+    WHERE email_usuario = ? AND dia = ?
+'''
+
+# Paginação por chave (keyset) do histórico, ordenado por (data, id) decrescente.
+# O índice (email_usuario, data) já inclui o id (rowid), então não há ordenação extra.
+SQL_HISTORICO_PRIMEIRA_PAGINA = '''
+    SELECT id, alimento, quantidade_gramas, calorias, data
+    FROM refeicoes
+    WHERE email_usuario = ?
+    ORDER BY data DESC, id DESC
+    LIMIT ?
+'''
+
+SQL_HISTORICO_PAGINA_SEGUINTE = '''
+    SELECT id, alimento, quantidade_gramas, calorias, data
+    FROM refeicoes
+    WHERE email_usuario = ? AND (data, id) < (?, ?)
+    ORDER BY data DESC, id DESC
+    LIMIT ?
+'''
+
+SQL_HISTORICO_PAGINA_ANTERIOR = '''
+    SELECT id, alimento, quantidade_gramas, calorias, data
+    FROM refeicoes
+    WHERE email_usuario = ? AND (data, id) > (?, ?)
+    ORDER BY data ASC, id ASC
+    LIMIT ?
+'''
+
+# Refeições exibidas por página no histórico
+REFEICOES_POR_PAGINA = 100
+
+# Meta calórica diária (kcal por kg de peso) de cada dieta; as demais usam 30 kcal/kg
+METAS_CALORICAS_POR_KG = {
+    "Low carb": 25,
+    "Cetogênica": 27,
+    "Hiperproteica": 30,
+    "Bulking": 35
+}
+
+# Margem em torno da meta calórica dentro da qual o dia conta como "dentro da meta"
+TOLERANCIA_META = 0.1
+
+# Períodos oferecidos nos menus de ranking: rótulo -> janela em dias (0 = histórico todo)
+PERIODOS_RANKING = {
+    "Todo o histórico": 0,
+    "Últimos 7 dias": 7,
+    "Últimos 30 dias": 30,
+    "Últimos 365 dias": 365,
+}
+
+# Critérios oferecidos nos menus de ranking: rótulo -> critério de ranking.CRITERIOS
+CRITERIOS_RANKING = {
+    "Quantidade (g)": 'gramas',
+    "Calorias (kcal)": 'calorias',
+    "Nº de refeições": 'frequencia',
+}
+
+
+def meta_calorica(dieta, peso):
+    """Meta calórica diária (kcal) de uma dieta para o peso informado."""
+    return METAS_CALORICAS_POR_KG.get(dieta, 30) * peso
+
+
+def situacao_calorica(calorias, meta):
+    """Classifica as calorias de um dia como 'abaixo', 'dentro' ou 'acima' da meta."""
+    if calorias < meta * (1 - TOLERANCIA_META):
+        return 'abaixo'
+    if calorias > meta * (1 + TOLERANCIA_META):
+        return 'acima'
+    return 'dentro'
+
 
 class Comida:
     """Classe principal para gerenciar operações relacionadas a alimentos"""
@@ -14,6 +108,7 @@ class Comida:
             email_usuario (str): Email do usuário que será associado às operações
         """
         self.email_usuario = email_usuario
+        self.ultima_gravacao = None
     
     def registrar_refeicao(self, alimento, quantidade):
         """
@@ -25,24 +120,31 @@ class Comida:
             
         Returns:
             tuple: (bool, str) Indicando sucesso/falha e mensagem correspondente
+
+        Com a gravação em grupo ativa (ver gravacao.py), a refeição é confirmada
+        antes do commit; ``self.ultima_gravacao`` é o futuro que se resolve
+        quando ela estiver gravada no disco.
         """
         try:
-            # Verifica se o alimento existe no banco de dados
-            cursor.execute("SELECT calorias FROM alimentos WHERE nome = ?", (alimento,))
-            resultado = cursor.fetchone()
+            # Verifica se o alimento existe no catálogo (cache em memória),
+            # aceitando o nome digitado sem acentos ou hífens
+            resultado = catalogo.obter(alimento) or catalogo.obter(resolver_alimento(alimento) or "")
             if not resultado:
+                sugestoes = buscar_alimentos(alimento, k=3)
+                if sugestoes:
+                    return False, f"Alimento não cadastrado. Você quis dizer: {', '.join(sugestoes)}?"
                 return False, "Alimento não cadastrado"
-            
+            alimento = resultado[0]
+
             # Calcula as calorias consumidas com base na quantidade (em gramas)
-            calorias = (quantidade / 100) * resultado[0]
-            
+            calorias = (quantidade / 100) * resultado[1]
+
             # Insere a refeição no banco de dados com data/hora atual
             data = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            cursor.execute('''
+            self.ultima_gravacao = escrever('''
                 INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data)
                 VALUES (?, ?, ?, ?, ?)
-            ''', (self.email_usuario, alimento, quantidade, calorias, data))
-            conn.commit()
+            ''', (self.email_usuario, alimento, quantidade, calorias, data), usuario=self.email_usuario)
             return True, "Refeição registrada com sucesso"
             
         except Exception as e:
@@ -50,24 +152,184 @@ class Comida:
             print(f"Erro ao registrar refeição: {e}")
             return False, f"Erro ao registrar: {str(e)}"
         
+    def refeicoes_do_dia(self, dia=None):
+        """
+        Obtém as refeições de um dia com as calorias por 100g de cada alimento
+
+        Args:
+            dia (date, opcional): Dia desejado. Padrão: hoje
+
+        Returns:
+            list: Tuplas (alimento, quantidade_gramas, calorias_por_100g)
+        """
+        inicio, fim = intervalo_do_dia(dia)
+        with conexao(self.email_usuario) as conn:
+            return conn.execute(SQL_REFEICOES_DO_DIA, (self.email_usuario, inicio, fim)).fetchall()
+
+    def totais_do_dia(self, dia=None):
+        """
+        Obtém os totais nutricionais de um dia a partir de totais_diarios
+
+        Args:
+            dia (date, opcional): Dia desejado. Padrão: hoje
+
+        Returns:
+            tuple: (calorias, proteinas, carboidratos, gorduras, refeicoes) ou None
+                se não houver refeições no dia
+        """
+        inicio, _ = intervalo_do_dia(dia)
+        with conexao(self.email_usuario) as conn:
+            return conn.execute(SQL_TOTAIS_DO_DIA, (self.email_usuario, inicio)).fetchone()
+
+    def contar_refeicoes_do_dia(self, dia=None):
+        """
+        Conta quantas refeições o usuário registrou em um dia
+
+        Args:
+            dia (date, opcional): Dia desejado. Padrão: hoje
+
+        Returns:
+            int: Número de refeições registradas
+        """
+        totais = self.totais_do_dia(dia)
+        return totais[4] if totais else 0
+
+    def registrar_refeicao_interativa(self):
+        """
+        Registra uma refeição pelo menu de texto, sugerindo alimentos enquanto o usuário digita
+
+        Se o nome digitado não for encontrado, mostra os alimentos mais parecidos
+        (por prefixo ou tolerando erros de digitação) para o usuário escolher.
+        """
+        print("\n=== Registrar refeição ===")
+        texto = input("Alimento (pode digitar só o começo do nome): ").strip()
+        if not texto:
+            print("❌ Digite o nome do alimento.")
+            return
+
+        alimento = resolver_alimento(texto)
+        if not alimento:
+            sugestoes = buscar_alimentos(texto, k=5)
+            if not sugestoes:
+                print("❌ Nenhum alimento encontrado com esse nome.")
+                return
+            print("Alimentos encontrados:")
+            for i, sugestao in enumerate(sugestoes, 1):
+                print(f"{i}. {sugestao}")
+            escolha = input("Escolha o número do alimento (ou Enter para cancelar): ").strip()
+            if not (escolha.isdigit() and 1 <= int(escolha) <= len(sugestoes)):
+                print("Operação cancelada.")
+                return
+            alimento = sugestoes[int(escolha) - 1]
+
+        try:
+            quantidade = float(input(f"Quantidade de {alimento} (gramas): "))
+            if quantidade <= 0:
+                print("❌ A quantidade deve ser maior que zero.")
+                return
+        except ValueError:
+            print("❌ Digite um número válido para a quantidade.")
+            return
+
+        sucesso, mensagem = self.registrar_refeicao(alimento, quantidade)
+        print(f"✅ {mensagem}" if sucesso else f"❌ {mensagem}")
+
+    def registrar_refeicoes_em_lote(self, itens, tamanho_lote=1000):
+        """
+        Registra muitas refeições de uma vez (ex.: importação de apps parceiros)
+
+        Os nomes dos alimentos são resolvidos pelo catálogo em memória e
+        as inserções são feitas com executemany em blocos de ``tamanho_lote``
+        linhas, todos dentro de uma única transação (um único fsync).
+
+        Args:
+            itens (iterable): Tuplas (alimento, quantidade_gramas, data). ``data``
+                pode ser datetime, string "AAAA-MM-DD HH:MM:SS" ou None (agora)
+            tamanho_lote (int): Número de linhas por chamada de executemany
+
+        Returns:
+            list: Um (bool, str) por item, na mesma ordem da entrada. Itens
+                inválidos (formato, alimento, quantidade ou data) são recusados
+                um a um, sem impedir a gravação dos demais
+        """
+        itens = list(itens)
+        resultados = [None] * len(itens)
+
+        # Valida cada item e calcula as calorias antes de abrir a transação
+        linhas, posicoes = [], []
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for i, item in enumerate(itens):
+            if not isinstance(item, (tuple, list)) or len(item) != 3:
+                resultados[i] = (False, "Item inválido (use alimento, quantidade e data)")
+                continue
+            alimento, quantidade, data = item
+            if not isinstance(alimento, str):
+                resultados[i] = (False, "Nome do alimento inválido")
+                continue
+            item_catalogo = catalogo.obter(alimento)
+            if not item_catalogo:
+                resultados[i] = (False, "Alimento não cadastrado")
+                continue
+            try:
+                quantidade = float(quantidade)
+            except (TypeError, ValueError):
+                resultados[i] = (False, "Quantidade inválida")
+                continue
+            if quantidade <= 0:
+                resultados[i] = (False, "A quantidade deve ser maior que zero")
+                continue
+            if data is None:
+                data = agora
+            elif isinstance(data, datetime):
+                data = data.strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                try:
+                    data = datetime.strptime(data, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d %H:%M:%S")
+                except (TypeError, ValueError):
+                    resultados[i] = (False, "Data inválida (use AAAA-MM-DD HH:MM:SS)")
+                    continue
+
+            calorias = (quantidade / 100) * item_catalogo[1]
+            linhas.append((self.email_usuario, item_catalogo[0], quantidade, calorias, data))
+            posicoes.append(i)
+
+        try:
+            with transacao(self.email_usuario) as conn:
+                for inicio in range(0, len(linhas), tamanho_lote):
+                    conn.executemany('''
+                        INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', linhas[inicio:inicio + tamanho_lote])
+        except Exception as e:
+            # A transação foi desfeita: nenhuma linha válida chegou a ser gravada
+            print(f"Erro ao registrar refeições em lote: {e}")
+            for i in posicoes:
+                resultados[i] = (False, f"Erro ao registrar: {str(e)}")
+            return resultados
+
+        # Uma carga grande enche o WAL: o checkpoint passivo o copia agora, sem
+        # esperar leitores, em vez de deixar o trabalho para o próximo commit interativo
+        if len(linhas) >= tamanho_lote:
+            checkpoint('PASSIVE', usuario=self.email_usuario)
+
+        for i in posicoes:
+            resultados[i] = (True, "Refeição registrada com sucesso")
+        return resultados
+
     # Ver refeições registradas
 
     def verificar_registro_diario(self):
-        hoje = datetime.now().strftime("%Y-%m-%d")
+        inicio, fim = intervalo_do_dia()
         
         # Verifica refeições registradas no dia
-        cursor.execute('''
-            SELECT COUNT(*) FROM refeicoes 
-            WHERE email_usuario = ? AND data LIKE ?
-        ''', (self.email_usuario, f"{hoje}%"))
-        refeicoes_count = cursor.fetchone()[0]
-        
+        refeicoes_count = self.contar_refeicoes_do_dia()
+
         # Verifica registro de consumo de água no dia
-        cursor.execute('''
-            SELECT COUNT(*) FROM consumos_agua 
-            WHERE email_usuario = ? AND data LIKE ?
-        ''', (self.email_usuario, f"{hoje}%"))
-        agua_count = cursor.fetchone()[0]
+        with conexao(self.email_usuario) as conn:
+            agua_count = conn.execute('''
+                SELECT COUNT(*) FROM consumos_agua 
+                WHERE email_usuario = ? AND data >= ? AND data < ?
+            ''', (self.email_usuario, inicio, fim)).fetchone()[0]
         
         # Mensagens de aviso
         if refeicoes_count == 0:
@@ -81,112 +343,133 @@ class Comida:
 
         # Ver refeições
 
-    def ver_refeicoes(self):
-        cursor.execute('''
-            SELECT alimento, quantidade_gramas, data
-            FROM refeicoes
-            WHERE email_usuario = ?
-            ORDER BY data DESC
-        ''', (self.email_usuario,))
-        
-        refeicoes = cursor.fetchall()
+    def pagina_refeicoes(self, apos=None, antes=None, limite=REFEICOES_POR_PAGINA, incluir_arquivo=False):
+        """
+        Obtém uma página do histórico de refeições, da mais recente para a mais antiga
+
+        A paginação é por chave (keyset): em vez de OFFSET, cada página começa
+        logo depois da chave (data, id) da última linha da página anterior, então
+        o custo de cada página não depende do tamanho do histórico.
+
+        Args:
+            apos (tuple, opcional): Chave (data, id); retorna as refeições mais antigas que ela
+            antes (tuple, opcional): Chave (data, id); retorna as refeições mais recentes que ela
+            limite (int): Tamanho da página
+            incluir_arquivo (bool): Junta as refeições já arquivadas (ver arquivamento.py)
+
+        Returns:
+            list: Tuplas (id, alimento, quantidade_gramas, calorias, data), sempre em ordem decrescente
+        """
+        with conexao(self.email_usuario) as conn:
+            if antes is not None:
+                linhas = conn.execute(SQL_HISTORICO_PAGINA_ANTERIOR,
+                                      (self.email_usuario, antes[0], antes[1], limite)).fetchall()[::-1]
+            elif apos is not None:
+                linhas = conn.execute(SQL_HISTORICO_PAGINA_SEGUINTE,
+                                      (self.email_usuario, apos[0], apos[1], limite)).fetchall()
+            else:
+                linhas = conn.execute(SQL_HISTORICO_PRIMEIRA_PAGINA, (self.email_usuario, limite)).fetchall()
+        if not incluir_arquivo:
+            return linhas
+
+        # Junta com a mesma página do arquivo; uma linha nos dois lugares (arquivamento interrompido) vale uma vez
+        arquivadas = pagina_arquivada(self.email_usuario, apos=apos, antes=antes, limite=limite)
+        juntas = sorted({linha[0]: linha for linha in arquivadas + linhas}.values(), key=self.chave_refeicao)
+        if antes is not None:
+            return juntas[:limite][::-1]
+        return juntas[::-1][:limite]
+
+    @staticmethod
+    def chave_refeicao(linha):
+        """Retorna a chave de paginação (data, id) de uma linha de ``pagina_refeicoes``."""
+        return linha[4], linha[0]
+
+    def ver_refeicoes(self, limite=20):
+        """
+        Exibe o histórico de refeições no terminal, uma página por vez
+
+        Args:
+            limite (int): Refeições exibidas por página
+        """
+        refeicoes = self.pagina_refeicoes(limite=limite, incluir_arquivo=True)
 
         print("\n=== Suas Refeições Registradas ===")
         if not refeicoes:
             print("Nenhuma refeição registrada ainda.\n")
             print("💡 Lembre-se: não registrar suas refeições pode prejudicar o acompanhamento da sua alimentação.")
             print("💧 Além disso, manter-se hidratado é essencial para o bom funcionamento do organismo.\n")
-        else:
-            for alimento, quantidade, data in refeicoes:
+            return
+
+        while refeicoes:
+            for _, alimento, quantidade, _, data in refeicoes:
                 print(f"{data} - {alimento} ({quantidade}g)")
-            print("\n✅ Ótimo! Registrar suas refeições ajuda a manter uma alimentação equilibrada.")
-            print("💧 Dica: beba água regularmente para manter-se hidratado e saudável.\n")
+            if len(refeicoes) < limite:
+                break
+            if input("\nEnter para ver refeições mais antigas ou 's' para parar: ").strip().lower() == 's':
+                break
+            refeicoes = self.pagina_refeicoes(apos=self.chave_refeicao(refeicoes[-1]), limite=limite,
+                                              incluir_arquivo=True)
+
+        print("\n✅ Ótimo! Registrar suas refeições ajuda a manter uma alimentação equilibrada.")
+        print("💧 Dica: beba água regularmente para manter-se hidratado e saudável.\n")
 
 
     def ver_alimentos_recomendados(self):
         """
-        Exibe 4 alimentos aleatórios recomendados com base na dieta do usuário
-        
-        Obtém a dieta do usuário do banco de dados e recomenda alimentos adequados
+        Exibe alimentos recomendados para a dieta do usuário
+
+        As sugestões vêm de recomendacao.alimentos_recomendados (a mesma usada
+        pela interface gráfica): só alimentos cadastrados, sem os consumidos
+        nos últimos dias
         """
-        # Obtém a dieta do usuário do banco de dados
-        cursor.execute("SELECT dieta FROM usuarios WHERE email = ?", (self.email_usuario,))
-        resultado = cursor.fetchone()
+        resultado = alimentos_recomendados(self.email_usuario)
         if not resultado:
             print("❌ Usuário não encontrado.")
             return
 
-        dieta_usuario = resultado[0]
-
-        # Dicionário com alimentos recomendados para cada tipo de dieta
-        recomendacoes = {
-            "Low carb": [
-                "Ovos", "Abacate", "Peixes", "Nozes", "Couve-flor", "Espinafre", "Brócolis", "Azeite de oliva",
-                "Amêndoas", "Queijo", "Cogumelos", "Carne bovina", "Salmão", "Aspargos", "Alface", "Cenoura",
-                "Tomate", "Pepino", "Pimentão", "Berinjela", "Abobrinha", "Castanha-do-pará", "Aipo", "Azeitona",
-                "Sementes de chia", "Sementes de linhaça", "Coco", "Framboesa", "Morango", "Repolho", "Alcachofra",
-                "Cebola", "Algo", "Rúcula", "Manjericão", "Salsinha", "Endívia", "Alcaparras", "Pimenta", "Ervilha-torta",
-                "Limão", "Laranja", "Carne de porco", "Frango", "Iogurte natural", "Ricota", "Chá verde", "Água com gás",
-                "Vinagre de maçã", "Café"
-            ],
-            "Cetogênica": [
-                "Bacon", "Queijo cheddar", "Carne de cordeiro", "Manteiga", "Nata", "Óleo de coco", "Salmão selvagem",
-                "Ovos caipiras", "Espinafre", "Couve", "Brócolis", "Couve-flor", "Abacate", "Nozes", "Castanhas",
-                "Sementes de abóbora", "Azeitonas", "Chá de hortelã", "Café sem açúcar", "Queijo parmesão",
-                "Frango caipira", "Carne moída", "Camarão", "Atum", "Aspargos", "Abobrinha", "Cogumelos", "Algo",
-                "Cebola", "Pimenta", "Ervas frescas", "Alface", "Rúcula", "Salsa", "Manjericão", "Nata fresca",
-                "Creme de leite", "Óleo MCT", "Chá de camomila", "Queijo mozzarella", "Carne bovina", "Carne de porco",
-                "Peixes gordurosos", "Sementes de chia", "Sementes de linhaça", "Abacate", "Limão", "Vinagre de maçã",
-                "Água mineral"
-            ],
-            "Hiperproteica": [
-                "Peito de frango", "Clara de ovo", "Carne magra", "Peixes", "Queijo cottage", "Iogurte grego",
-                "Atum", "Carne bovina magra", "Salmão", "Ovos inteiros", "Tofu", "Tempeh", "Lentilhas", "Feijão",
-                "Quinoa", "Amêndoas", "Nozes", "Sementes de abóbora", "Camarão", "Proteína isolada", "Leite desnatado",
-                "Ricota", "Brócolis", "Couve-flor", "Espinafre", "Cenoura", "Abobrinha", "Alface", "Tomate",
-                "Pepino", "Pimentão", "Azeite de oliva", "Chá verde", "Água"
-            ],
-            "Bulking": [
-                "Arroz integral", "Batata doce", "Aveia", "Massas integrais", "Carne vermelha", "Peito de frango",
-                "Ovos", "Salmão", "Atum", "Quinoa", "Feijão", "Grão-de-bico", "Lentilha", "Leite integral",
-                "Iogurte natural", "Queijo", "Nozes", "Amêndoas", "Castanha-do-pará", "Abacate", "Banana",
-                "Morangos", "Espinafre", "Brócolis", "Cenoura", "Abobrinha", "Tomate", "Pepino", "Pimentão",
-                "Azeite de oliva", "Manteiga de amendoim", "Chá verde", "Água", "Mel", "Chocolate amargo",
-                "Batata inglesa", "Milho", "Pão integral", "Sementes de chia", "Sementes de linhaça", "Ervilha"
-            ]
-        }
-
-        # Obtém a lista de alimentos recomendados para a dieta do usuário
-        alimentos_recomendados = recomendacoes.get(dieta_usuario, [])
-
-        if not alimentos_recomendados:
+        dieta_usuario, recomendados = resultado
+        if not recomendados:
             print("❌ Nenhum alimento recomendado encontrado para esta dieta.")
             return
 
-        # Seleciona 4 alimentos aleatórios da lista
-        aleatorios = random.sample(alimentos_recomendados, k=4)
-
         # Exibe os alimentos recomendados
-        print(f"\n🍽️ 4 Alimentos aleatórios recomendados para a dieta {dieta_usuario}:")
-        for alimento in aleatorios:
-            print(f"- {alimento}")
+        print(f"\n🍽️ {len(recomendados)} Alimentos aleatórios recomendados para a dieta {dieta_usuario}:")
+        for nome, calorias, *_ in recomendados:
+            print(f"- {nome.capitalize()} ({calorias:.0f} kcal/100 g)")
+
+    def ranking_alimentos(self, janela=0, criterio='gramas'):
+        """
+        Obtém os 10 alimentos mais consumidos pelo usuário
+
+        Os totais vêm dos contadores do ranking (ver ranking.py) e incluem as
+        refeições já arquivadas.
+
+        Args:
+            janela (int): Últimos 7, 30 ou 365 dias, ou 0 para o histórico todo
+            criterio (str): 'gramas', 'calorias' ou 'frequencia' (número de refeições)
+
+        Returns:
+            list: Tuplas (alimento, total no critério), do maior total para o menor
+        """
+        linhas = ranking_usuario(self.email_usuario, janela=janela, criterio=criterio)
+        coluna = 1 + list(CRITERIOS).index(criterio)
+        return [(linha[0], linha[coluna]) for linha in linhas]
 
     def ranking_alimentos_mais_consumidos(self):
         """
         Exibe um ranking dos 10 alimentos mais consumidos pelo usuário (em gramas)
         
-        Mostra os alimentos ordenados pela quantidade total consumida
-        """
-        print("\n🏆 Ranking dos alimentos mais consumidos:")
-        cursor.execute('''
-            SELECT alimento, SUM(quantidade_gramas) as total_gramas
-            FROM refeicoes
-            WHERE email_usuario = ?
-            GROUP BY alimento
-            ORDER BY total_gramas DESC
-            LIMIT 10
-        ''', (self.email_usuario,))
-        ranking = cursor.fetchall()
+        Pergunta o período e mostra os alimentos ordenados pela quantidade total consumida
+        """
+        periodos = list(PERIODOS_RANKING.items())
+        for i, (rotulo, _) in enumerate(periodos, 1):
+            print(f"{i}. {rotulo}")
+        escolha = input("Período do ranking (Enter para todo o histórico): ").strip()
+        rotulo, janela = periodos[int(escolha) - 1] if escolha in {str(i) for i in range(1, len(periodos) + 1)} \
+            else periodos[0]
+
+        print(f"\n🏆 Ranking dos alimentos mais consumidos ({rotulo.lower()}):")
+        ranking = self.ranking_alimentos(janela=janela)
 
         if not ranking:
             print("❌ Nenhuma refeição registrada para gerar o ranking.")
@@ -218,15 +501,16 @@ class Adm_alimentar(Comida):
             print("❌ Digite um número válido para calorias.")
             return
 
-        # Verifica se o alimento já existe
-        cursor.execute("SELECT * FROM alimentos WHERE nome = ?", (nome,))
-        if cursor.fetchone():
-            print("❌ Alimento já cadastrado!")
-            return
+        with transacao() as conn:
+            # Verifica se o alimento já existe
+            if conn.execute("SELECT * FROM alimentos WHERE nome = ?", (nome,)).fetchone():
+                print("❌ Alimento já cadastrado!")
+                return
 
-        # Insere o novo alimento
-        cursor.execute("INSERT INTO alimentos (nome, calorias) VALUES (?, ?)", (nome, calorias))
-        conn.commit()
+            # Insere o novo alimento
+            conn.execute("INSERT INTO alimentos (nome, calorias) VALUES (?, ?)", (nome, calorias))
+        replicar_catalogo()
+        catalogo.invalidar()
         print(f"✅ Alimento '{nome}' cadastrado com sucesso.")
 
     @staticmethod
@@ -237,8 +521,7 @@ class Adm_alimentar(Comida):
         Exibe nome e calorias por 100g de cada alimento
         """
         print("\n=== Lista de alimentos cadastrados ===")
-        cursor.execute("SELECT nome, calorias FROM alimentos")
-        alimentos = cursor.fetchall()
+        alimentos = catalogo.listar()
         if alimentos:
             for a in alimentos:
                 print(f"- {a[0]} | {a[1]} cal por 100g")
@@ -254,28 +537,59 @@ class Adm_alimentar(Comida):
         """
         print("\n=== Excluir alimento ===")
         nome = input("Nome do alimento para excluir: ").strip().lower()
-        cursor.execute("SELECT * FROM alimentos WHERE nome = ?", (nome,))
-        if not cursor.fetchone():
-            print("❌ Alimento não encontrado.")
-            return
-        cursor.execute("DELETE FROM alimentos WHERE nome = ?", (nome,))
-        conn.commit()
+        with transacao() as conn:
+            if not conn.execute("SELECT * FROM alimentos WHERE nome = ?", (nome,)).fetchone():
+                print("❌ Alimento não encontrado.")
+                return
+            conn.execute("DELETE FROM alimentos WHERE nome = ?", (nome,))
+        replicar_catalogo()
+        catalogo.invalidar()
         print(f"✅ Alimento '{nome}' excluído com sucesso.")
 
+    @staticmethod
+    def importar_tabela_alimentos():
+        """
+        Importa uma tabela de composição de alimentos (CSV ou JSON, ex.: TACO)
+
+        Solicita o caminho do arquivo e mostra o resumo da importação
+        (ver importacao.importar_alimentos)
+        """
+        print("\n=== Importar tabela de alimentos ===")
+        caminho = input("Caminho do arquivo (.csv ou .json): ").strip()
+        if not os.path.isfile(caminho):
+            print("❌ Arquivo não encontrado.")
+            return
+        codificacao = input("Codificação do arquivo (Enter para UTF-8): ").strip() or 'utf-8-sig'
+        try:
+            resultado = importar_alimentos(caminho, codificacao=codificacao)
+        except (ValueError, LookupError, UnicodeDecodeError) as erro:
+            print(f"❌ Não foi possível importar: {erro}")
+            return
+        print(f"✅ {resumo_importacao(resultado)}")
+
 
 class Registros(Comida):
     """Classe para gerenciar registros diários e lembretes (herda de Comida)"""
     
-    def pegar_registros_do_dia(self):
+    def pegar_registros_do_dia(self, dia=None, incluir_arquivo=False):
         """
-        Obtém todos os registros alimentares do dia atual
+        Obtém todos os registros alimentares de um dia
         
+        Args:
+            dia (date, opcional): Dia desejado. Padrão: hoje
+            incluir_arquivo (bool): Procura também nos registros já arquivados
+
         Returns:
-            list: Lista de registros do dia atual
+            list: Lista de registros do dia
         """
-        hoje = date.today()
-        cursor.execute("SELECT * FROM registro_refeicoes WHERE email = ? AND data = ?", (self.email_usuario, str(hoje)))
-        registros = cursor.fetchall()
+        dia = dia or date.today()
+        with conexao(self.email_usuario) as conn:
+            registros = conn.execute("SELECT * FROM registro_refeicoes WHERE email = ? AND data = ?",
+                                     (self.email_usuario, str(dia))).fetchall()
+        if incluir_arquivo:
+            ids = {registro[0] for registro in registros}
+            registros += [registro for registro in registros_arquivados(self.email_usuario, dia)
+                          if registro[0] not in ids]
         return registros
 
     def submenu_lembretes(self):
@@ -296,6 +610,40 @@ class Registros(Comida):
         print("Lembrete: Beba pelo menos 2 litros de água ao longo do dia.")
         input("\nPressione Enter para voltar ao menu principal...")
 
+    def resumo_do_dia(self, dia=None):
+        """
+        Calcula o resumo nutricional de um dia, comparando as calorias com a meta da dieta
+
+        Args:
+            dia (date, opcional): Dia desejado. Padrão: hoje
+
+        Returns:
+            dict: Chaves dieta, refeicoes, calorias, meta_calorias e situacao
+                ('abaixo', 'dentro' ou 'acima' da meta; None sem refeições no dia),
+                ou None se o usuário não existir
+        """
+        # Obtém dados do usuário (dieta, peso, altura)
+        with conexao(self.email_usuario) as conn:
+            resultado = conn.execute("SELECT dieta, peso, altura FROM usuarios WHERE email = ?",
+                                     (self.email_usuario,)).fetchone()
+        if not resultado:
+            return None
+        dieta_usuario, peso, altura = resultado
+
+        # Obtém os totais já agregados do dia
+        totais = self.totais_do_dia(dia)
+        calorias_totais = round(totais[0], 2) if totais else 0
+        meta_calorias = meta_calorica(dieta_usuario, peso)
+        situacao = situacao_calorica(calorias_totais, meta_calorias) if totais else None
+
+        return {
+            'dieta': dieta_usuario,
+            'refeicoes': totais[4] if totais else 0,
+            'calorias': calorias_totais,
+            'meta_calorias': meta_calorias,
+            'situacao': situacao,
+        }
+
     def encerrar_dia(self):
         """
         Calcula e exibe um resumo nutricional do dia
@@ -303,54 +651,23 @@ class Registros(Comida):
         Compara as calorias consumidas com a meta calórica baseada na dieta
         """
         print("\n📅 Encerramento do Dia")
-        hoje = date.today().strftime("%Y-%m-%d")
 
-        # Obtém dados do usuário (dieta, peso, altura)
-        cursor.execute("SELECT dieta, peso, altura FROM usuarios WHERE email = ?", (self.email_usuario,))
-        resultado = cursor.fetchone()
-        if not resultado:
+        resumo = self.resumo_do_dia()
+        if not resumo:
             print("❌ Usuário não encontrado.")
             return
-        dieta_usuario, peso, altura = resultado
-
-        # Obtém todas as refeições registradas hoje
-        cursor.execute('''
-            SELECT r.alimento, r.quantidade_gramas, a.calorias
-            FROM refeicoes r
-            JOIN alimentos a ON r.alimento = a.nome
-            WHERE r.email_usuario = ? AND date(r.data) = ?
-        ''', (self.email_usuario, hoje))
-        refeicoes_hoje = cursor.fetchall()
-
-        if not refeicoes_hoje:
+        if resumo['situacao'] is None:
             print("❌ Nenhuma refeição registrada para hoje.")
             return
 
-        # Calcula o total de calorias consumidas
-        calorias_totais = 0
-        for alimento, quantidade, cal_100g in refeicoes_hoje:
-            calorias_totais += (cal_100g * quantidade) / 100
-
-        calorias_totais = round(calorias_totais, 2)
-
-        # Define metas calóricas baseadas no tipo de dieta
-        metas = {
-            "Low carb": 25 * peso,
-            "Cetogênica": 27 * peso,
-            "Hiperproteica": 30 * peso,
-            "Bulking": 35 * peso
-        }
-
-        meta_calorias = metas.get(dieta_usuario, 30 * peso)
-
         # Exibe o resumo e feedback
-        print(f"\nDieta: {dieta_usuario}")
-        print(f"Calorias consumidas hoje: {calorias_totais} kcal")
-        print(f"Meta calórica diária aproximada: {meta_calorias} kcal")
+        print(f"\nDieta: {resumo['dieta']}")
+        print(f"Calorias consumidas hoje: {resumo['calorias']} kcal")
+        print(f"Meta calórica diária aproximada: {resumo['meta_calorias']} kcal")
 
-        if calorias_totais < meta_calorias * 0.9:
+        if resumo['situacao'] == 'abaixo':
             print("⚠️ Você consumiu menos calorias que o recomendado para sua dieta hoje.")
-        elif calorias_totais > meta_calorias * 1.1:
+        elif resumo['situacao'] == 'acima':
             print("⚠️ Você consumiu mais calorias que o recomendado para sua dieta hoje.")
         else:
             print("✅ Consumo calórico dentro da meta para hoje. Bom trabalho!")
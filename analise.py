@@ -0,0 +1,320 @@
+# Importações necessárias para o código
+import math
+import sys
+from array import array
+from datetime import date, timedelta
+from itertools import accumulate, groupby
+from operator import itemgetter
+from statistics import StatisticsError, linear_regression, median
+
+import database
+from database import conexao, pools_de_dados, usando_pool
+from alimentacao import meta_calorica, situacao_calorica
+
+# Janelas (em dias) das médias móveis e da adesão à meta
+JANELAS_ANALISE = (7, 30, 90)
+
+# Nutrientes de totais_diarios, na ordem das colunas
+NUTRIENTES = ('calorias', 'proteinas', 'carboidratos', 'gorduras')
+
+# Energia por grama de cada macronutriente, para a divisão das calorias
+KCAL_POR_GRAMA = {'proteinas': 4, 'carboidratos': 4, 'gorduras': 9}
+
+# Escore z modificado (mediana/MAD) a partir do qual um dia é considerado atípico
+LIMITE_DIA_ATIPICO = 3.5
+
+# Dias usados para a tendência de calorias
+DIAS_TENDENCIA = 90
+
+DIAS_DA_SEMANA = ('segunda', 'terça', 'quarta', 'quinta', 'sexta', 'sábado', 'domingo')
+
+_SQL_SERIE_USUARIO = '''
+    SELECT dia, calorias, proteinas, carboidratos, gorduras, refeicoes
+    FROM totais_diarios
+    WHERE email_usuario = ? AND dia <= ?
+    ORDER BY dia
+'''
+
+# Totais diários de todos os usuários de um banco, na ordem da chave primária:
+# uma única varredura, sem ordenação temporária
+_SQL_SERIES_TODOS = '''
+    SELECT email_usuario, dia, calorias, proteinas, carboidratos, gorduras, refeicoes
+    FROM totais_diarios
+    WHERE dia <= ?
+    ORDER BY email_usuario, dia
+'''
+
+
+class SerieDiaria:
+    """
+    Totais diários de um usuário em vetores contíguos (``array``), um elemento
+    por dia do calendário, de ``inicio`` até ``fim``. Dias sem refeições
+    ficam com zero e ``registrado`` igual a 0.
+    """
+
+    def __init__(self, linhas, fim):
+        """
+        Args:
+            linhas (list): Tuplas (dia, calorias, proteinas, carboidratos, gorduras, refeicoes)
+                de totais_diarios, em ordem de dia
+            fim (date): Último dia da série (o dia de referência da análise)
+        """
+        self.fim = fim
+        self.inicio = date.fromisoformat(linhas[0][0]) if linhas else fim
+        tamanho = (fim - self.inicio).days + 1
+        self.calorias = array('d', bytes(8 * tamanho))
+        self.proteinas = array('d', bytes(8 * tamanho))
+        self.carboidratos = array('d', bytes(8 * tamanho))
+        self.gorduras = array('d', bytes(8 * tamanho))
+        self.refeicoes = array('l', bytes(array('l').itemsize * tamanho))
+        self.registrado = array('b', bytes(tamanho))
+        base = self.inicio.toordinal()
+        for dia, calorias, proteinas, carboidratos, gorduras, refeicoes in linhas:
+            i = date.fromisoformat(dia).toordinal() - base
+            self.calorias[i] = calorias
+            self.proteinas[i] = proteinas
+            self.carboidratos[i] = carboidratos
+            self.gorduras[i] = gorduras
+            self.refeicoes[i] = refeicoes
+            self.registrado[i] = refeicoes > 0
+
+    def __len__(self):
+        return len(self.calorias)
+
+    def vetor(self, nutriente):
+        """Vetor diário de um nutriente ('calorias', 'proteinas', 'carboidratos' ou 'gorduras')."""
+        return getattr(self, nutriente)
+
+    def dia(self, indice):
+        """Data correspondente a uma posição dos vetores."""
+        return self.inicio + timedelta(days=indice)
+
+
+def _somas_acumuladas(vetor):
+    """Somas prefixadas: a soma de vetor[i:j] é acumulado[j] - acumulado[i]."""
+    return array('d', accumulate(vetor, initial=0.0))
+
+
+def medias_moveis(serie, janela, nutriente='calorias'):
+    """
+    Média móvel de um nutriente nos ``janela`` dias que terminam em cada dia da série.
+
+    A média considera só os dias com refeições registradas: um dia sem
+    registro é falta de dado, não jejum. Calculada com somas prefixadas,
+    em O(n) para todas as posições.
+
+    Args:
+        serie (SerieDiaria): Série do usuário
+        janela (int): Tamanho da janela em dias
+        nutriente (str): 'calorias', 'proteinas', 'carboidratos' ou 'gorduras'
+
+    Returns:
+        array: Uma média por dia da série (NaN onde a janela não tem registros)
+    """
+    somas = _somas_acumuladas(serie.vetor(nutriente))
+    contagens = _somas_acumuladas(serie.registrado)
+    medias = array('d', bytes(8 * len(serie)))
+    for j in range(1, len(serie) + 1):
+        i = max(0, j - janela)
+        dias = contagens[j] - contagens[i]
+        medias[j - 1] = (somas[j] - somas[i]) / dias if dias else math.nan
+    return medias
+
+
+def _janela(serie, janela, dentro_da_meta):
+    """Médias e adesão nos últimos ``janela`` dias da série."""
+    inicio = max(0, len(serie) - janela)
+    dias_registrados = sum(serie.registrado[inicio:])
+    resumo = {'janela': janela, 'dias_registrados': dias_registrados}
+    if not dias_registrados:
+        return resumo | {nutriente: None for nutriente in NUTRIENTES} | {'adesao': None, 'divisao_macros': None}
+    for nutriente in NUTRIENTES:
+        resumo[nutriente] = round(sum(serie.vetor(nutriente)[inicio:]) / dias_registrados, 1)
+    resumo['adesao'] = round(100 * sum(dentro_da_meta[inicio:]) / dias_registrados, 1)
+    energia = {macro: resumo[macro] * kcal for macro, kcal in KCAL_POR_GRAMA.items()}
+    total = sum(energia.values())
+    resumo['divisao_macros'] = {macro: round(100 * kcal / total, 1) for macro, kcal in energia.items()} if total else None
+    return resumo
+
+
+def _padrao_semanal(serie):
+    """Média de calorias por dia da semana (só dias com registro)."""
+    padrao = {}
+    primeiro = serie.inicio.weekday()
+    for deslocamento in range(7):
+        dias = sum(serie.registrado[deslocamento::7])
+        nome = DIAS_DA_SEMANA[(primeiro + deslocamento) % 7]
+        padrao[nome] = round(sum(serie.calorias[deslocamento::7]) / dias, 1) if dias else None
+    return {nome: padrao[nome] for nome in DIAS_DA_SEMANA}
+
+
+def _dias_atipicos(serie):
+    """Dias cujas calorias se afastam da mediana do histórico mais que LIMITE_DIA_ATIPICO (escore z modificado)."""
+    registrados = [i for i, marcado in enumerate(serie.registrado) if marcado]
+    if len(registrados) < 3:
+        return []
+    valores = [serie.calorias[i] for i in registrados]
+    mediana = median(valores)
+    mad = median([abs(valor - mediana) for valor in valores])
+    if not mad:
+        return []
+    escala = 0.6745 / mad
+    return [
+        (serie.dia(i).isoformat(), round(valor, 1), round(escore, 2))
+        for i, valor in zip(registrados, valores)
+        if abs(escore := (valor - mediana) * escala) > LIMITE_DIA_ATIPICO
+    ]
+
+
+def _tendencia(serie):
+    """Variação das calorias em kcal por semana nos últimos DIAS_TENDENCIA dias (regressão linear)."""
+    inicio = max(0, len(serie) - DIAS_TENDENCIA)
+    posicoes = [i for i in range(inicio, len(serie)) if serie.registrado[i]]
+    try:
+        return round(linear_regression(posicoes, [serie.calorias[i] for i in posicoes]).slope * 7, 1)
+    except StatisticsError:
+        return None
+
+
+def analisar_serie(serie, dieta, peso):
+    """
+    Calcula as métricas de uma série diária.
+
+    Args:
+        serie (SerieDiaria): Série do usuário
+        dieta (str): Dieta do usuário (define a meta calórica)
+        peso (float): Peso atual do usuário em kg
+
+    Returns:
+        dict: Chaves dieta, meta_calorias, dias_registrados, janelas (médias, adesão
+            e divisão de macros dos últimos 7, 30 e 90 dias), padrao_semanal,
+            dias_atipicos (tuplas (dia, calorias, escore)) e tendencia_semanal (kcal/semana)
+    """
+    meta = meta_calorica(dieta, peso)
+    dentro_da_meta = array('b', [
+        marcado and situacao_calorica(calorias, meta) == 'dentro'
+        for calorias, marcado in zip(serie.calorias, serie.registrado)
+    ])
+    return {
+        'dieta': dieta,
+        'meta_calorias': meta,
+        'dias_registrados': sum(serie.registrado),
+        'janelas': [_janela(serie, janela, dentro_da_meta) for janela in JANELAS_ANALISE],
+        'padrao_semanal': _padrao_semanal(serie),
+        'dias_atipicos': _dias_atipicos(serie),
+        'tendencia_semanal': _tendencia(serie),
+    }
+
+
+def carregar_serie(email, hoje=None):
+    """
+    Carrega em vetores os totais diários de um usuário até ``hoje``.
+
+    Lê totais_diarios (já agregada por dia e com os meses arquivados) numa
+    varredura da chave primária: cinco anos de histórico são no máximo 1.827 linhas.
+
+    Args:
+        email (str): E-mail do usuário
+        hoje (date, opcional): Último dia da série. Padrão: hoje
+
+    Returns:
+        SerieDiaria: Série do usuário (vazia se ele não tiver refeições)
+    """
+    hoje = hoje or date.today()
+    with conexao(email) as conn:
+        linhas = conn.execute(_SQL_SERIE_USUARIO, (email, hoje.isoformat())).fetchall()
+    return SerieDiaria(linhas, hoje)
+
+
+def analisar_usuario(email, hoje=None):
+    """
+    Métricas nutricionais do histórico de um usuário (ver analisar_serie).
+
+    A meta usa o peso e a dieta atuais do usuário para todo o período.
+
+    Args:
+        email (str): E-mail do usuário
+        hoje (date, opcional): Dia de referência das janelas. Padrão: hoje
+
+    Returns:
+        dict: Métricas do usuário, ou None se ele não existir
+    """
+    with conexao(email) as conn:
+        usuario = conn.execute("SELECT dieta, peso FROM usuarios WHERE email = ?", (email,)).fetchone()
+    if not usuario:
+        return None
+    dieta, peso = usuario
+    return analisar_serie(carregar_serie(email, hoje), dieta, peso)
+
+
+def analisar_todos(hoje=None):
+    """
+    Calcula as métricas de todos os usuários numa única passada por banco.
+
+    Cada banco é lido por uma só varredura de totais_diarios em ordem de
+    usuário e dia, intercalada com a lista de usuários; as linhas de cada
+    usuário viram uma série, são analisadas e descartadas, então a memória
+    fica limitada ao histórico de um usuário.
+
+    Args:
+        hoje (date, opcional): Dia de referência das janelas. Padrão: hoje
+
+    Yields:
+        tuple: (email, métricas) de cada usuário
+    """
+    hoje = hoje or date.today()
+    for pool in pools_de_dados():
+        with usando_pool(pool), conexao() as conn:
+            usuarios = conn.execute("SELECT email, dieta, peso FROM usuarios ORDER BY email")
+            series = groupby(conn.execute(_SQL_SERIES_TODOS, (hoje.isoformat(),)), key=itemgetter(0))
+            proxima = next(series, None)
+            # Intercala as duas consultas, ambas em ordem de e-mail
+            for email, dieta, peso in usuarios:
+                while proxima and proxima[0] < email:
+                    proxima = next(series, None)
+                linhas = []
+                if proxima and proxima[0] == email:
+                    linhas = [linha[1:] for linha in proxima[1]]
+                    proxima = next(series, None)
+                yield email, analisar_serie(SerieDiaria(linhas, hoje), dieta, peso)
+
+
+def resumo_analise(metricas):
+    """Formata as métricas de um usuário em linhas de texto para o terminal."""
+    linhas = [f"Dieta: {metricas['dieta']} | Meta: {metricas['meta_calorias']:.0f} kcal/dia | "
+              f"{metricas['dias_registrados']} dia(s) com registro"]
+    for janela in metricas['janelas']:
+        if janela['calorias'] is None:
+            linhas.append(f"Últimos {janela['janela']:>2} dias: sem registros")
+            continue
+        macros = janela['divisao_macros'] or {}
+        linhas.append(f"Últimos {janela['janela']:>2} dias: {janela['calorias']:.0f} kcal/dia, "
+                      f"P {janela['proteinas']:.0f} g, C {janela['carboidratos']:.0f} g, G {janela['gorduras']:.0f} g "
+                      f"({' / '.join(f'{valor:.0f}%' for valor in macros.values())}) | "
+                      f"adesão {janela['adesao']:.0f}% em {janela['dias_registrados']} dia(s)")
+    semana = ', '.join(f"{nome} {valor:.0f}" for nome, valor in metricas['padrao_semanal'].items() if valor is not None)
+    if semana:
+        linhas.append(f"Média por dia da semana (kcal): {semana}")
+    if metricas['tendencia_semanal'] is not None:
+        linhas.append(f"Tendência ({DIAS_TENDENCIA} dias): {metricas['tendencia_semanal']:+.0f} kcal/semana")
+    if metricas['dias_atipicos']:
+        linhas.append("Dias atípicos: " + ', '.join(f"{dia} ({calorias:.0f} kcal)"
+                                                    for dia, calorias, _ in metricas['dias_atipicos'][-10:]))
+    return linhas
+
+
+# Uso: python analise.py [email]  (sem e-mail, uma linha por usuário)
+if __name__ == "__main__":
+    database.verificar_esquema()
+    if len(sys.argv) > 1:
+        metricas = analisar_usuario(sys.argv[1])
+        if not metricas:
+            sys.exit(f"Usuário não encontrado: {sys.argv[1]}")
+        print('\n'.join(resumo_analise(metricas)))
+        sys.exit(0)
+    for email, metricas in analisar_todos():
+        mensal = metricas['janelas'][1]
+        if mensal['calorias'] is None:
+            print(f"{email}: sem registros nos últimos {mensal['janela']} dias")
+        else:
+            print(f"{email}: {mensal['calorias']:.0f} kcal/dia em {mensal['janela']} dias, adesão {mensal['adesao']:.0f}%")
@@ -0,0 +1,363 @@
+# Importações necessárias para o código
+import gzip
+import json
+import secrets
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from database import verificar_esquema
+from gravacao import ativar_pelo_ambiente
+from alimentacao import Comida, Registros, REFEICOES_POR_PAGINA
+from analise import analisar_usuario
+from cardapio import plano_do_usuario
+from busca import buscar_alimentos
+from ranking import TOP_PADRAO, ranking_geral, ranking_usuario
+from membros import Usuario
+from suportinho import Suporte, MENSAGENS_POR_PAGINA
+
+# Endereço padrão do servidor
+ENDERECO_PADRAO = ('127.0.0.1', 8080)
+# Respostas maiores que isso são comprimidas com gzip (se o cliente aceitar)
+TAMANHO_MINIMO_GZIP = 1024
+# Tempo (s) que uma conexão keep-alive ociosa fica aberta
+TIMEOUT_CONEXAO = 30
+# Tamanho máximo aceito no corpo de uma requisição
+TAMANHO_MAXIMO_CORPO = 64 * 1024
+# Mesma senha fixa do menu do administrador
+SENHA_ADMIN = "admin123"
+
+
+class ErroApi(Exception):
+    """Erro com status HTTP, devolvido ao cliente como {"erro": mensagem}."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class Sessoes:
+    """Tokens de sessão em memória: token -> e-mail do usuário (ou Sessoes.ADMIN)."""
+
+    ADMIN = object()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tokens = {}
+
+    def criar(self, dono):
+        token = secrets.token_urlsafe(24)
+        with self._lock:
+            self._tokens[token] = dono
+        return token
+
+    def dono(self, token):
+        with self._lock:
+            return self._tokens.get(token)
+
+
+class ManipuladorApi(BaseHTTPRequestHandler):
+    """Trata as requisições da API JSON do Nutrismart.
+
+    Fala HTTP/1.1, então a conexão fica aberta entre requisições (keep-alive)
+    até o cliente fechá-la ou passar ``TIMEOUT_CONEXAO`` segundos ociosa; cada
+    conexão é atendida por uma thread do ThreadingHTTPServer, que pega uma
+    conexão do pool do banco só durante cada requisição.
+
+    Rotas (as marcadas com * exigem "Authorization: Bearer <token>"):
+        POST /login                      {email, senha} -> {token}
+        POST /admin/login                {senha} -> {token}
+        GET  /alimentos?busca=&k=        sugestões de alimentos
+      * POST /refeicoes                  {alimento, quantidade}
+      * GET  /refeicoes?apos=&antes=&arquivo=sim  página do histórico (keyset)
+      * GET  /dia                        resumo do dia
+      * GET  /analise                    médias de 7/30/90 dias, adesão à meta, padrão semanal e dias atípicos
+      * GET  /plano?dias=                plano alimentar (padrão 7 dias) com porções que buscam as metas de kcal e macros
+      * GET  /ranking?janela=&criterio=&k=&geral=sim  alimentos mais consumidos (janela 0/7/30/365 dias;
+                                         criterio gramas/calorias/frequencia; geral = todos os usuários)
+      * POST /suporte                    {mensagem}
+      * GET  /suporte                    mensagens do usuário e respostas
+      * GET  /admin/suporte?termo=...    busca de mensagens (administrador)
+      * POST /admin/suporte/<id>/resposta {resposta} (administrador)
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = TIMEOUT_CONEXAO
+    server_version = "Nutrismart"
+    # Cabeçalhos e corpo saem em escritas separadas: sem TCP_NODELAY o corpo
+    # esperaria o ACK atrasado do cliente (~40 ms) em conexões keep-alive
+    disable_nagle_algorithm = True
+
+    # --- Infraestrutura --- #
+    def log_message(self, formato, *args):
+        """Silencia o log de cada requisição (o padrão escreve em stderr)."""
+        if self.server.verboso:
+            super().log_message(formato, *args)
+
+    def do_GET(self):
+        self._despachar('GET')
+
+    def do_POST(self):
+        self._despachar('POST')
+
+    def _despachar(self, metodo):
+        """Encontra a rota, executa e envia a resposta (ou o erro) em JSON."""
+        partes = urlsplit(self.path)
+        caminho = partes.path.rstrip('/') or '/'
+        self.consulta = {chave: valores[-1] for chave, valores in parse_qs(partes.query).items()}
+        try:
+            corpo = self._ler_corpo()
+            segmentos = caminho.strip('/').split('/')
+            if segmentos[:2] == ['admin', 'suporte'] and len(segmentos) == 4 and segmentos[3] == 'resposta':
+                rota, argumentos = ROTAS.get((metodo, '/admin/suporte/<id>/resposta')), (segmentos[2],)
+            else:
+                rota, argumentos = ROTAS.get((metodo, caminho)), ()
+            if rota is None:
+                raise ErroApi(404, "Rota não encontrada")
+            status, resposta = rota(self, corpo, *argumentos)
+        except ErroApi as erro:
+            status, resposta = erro.status, {'erro': erro.mensagem}
+        except Exception as erro:
+            print(f"Erro na API ({metodo} {caminho}): {erro}")
+            status, resposta = 500, {'erro': "Erro interno"}
+        self._enviar_json(status, resposta)
+
+    def _ler_corpo(self):
+        """Lê o corpo JSON da requisição (sempre, para manter a conexão keep-alive alinhada)."""
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            self.close_connection = True
+            raise ErroApi(413, "Corpo da requisição grande demais")
+        if not tamanho:
+            return {}
+        try:
+            corpo = json.loads(self.rfile.read(tamanho))
+        except ValueError:
+            raise ErroApi(400, "JSON inválido") from None
+        if not isinstance(corpo, dict):
+            raise ErroApi(400, "O corpo deve ser um objeto JSON")
+        return corpo
+
+    def _enviar_json(self, status, resposta):
+        """Serializa a resposta, comprime com gzip se valer a pena e a envia."""
+        dados = json.dumps(resposta, ensure_ascii=False).encode('utf-8')
+        comprimido = (len(dados) >= TAMANHO_MINIMO_GZIP
+                      and 'gzip' in self.headers.get('Accept-Encoding', ''))
+        if comprimido:
+            dados = gzip.compress(dados, compresslevel=5)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.send_header('Vary', 'Accept-Encoding')
+        if comprimido:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _usuario(self):
+        """E-mail dono do token da requisição."""
+        dono = self.server.sessoes.dono(self._token())
+        if dono is None or dono is Sessoes.ADMIN:
+            raise ErroApi(401, "Faça login para continuar")
+        return dono
+
+    def _exigir_admin(self):
+        if self.server.sessoes.dono(self._token()) is not Sessoes.ADMIN:
+            raise ErroApi(403, "Acesso restrito ao administrador")
+
+    def _token(self):
+        autorizacao = self.headers.get('Authorization', '')
+        return autorizacao[7:] if autorizacao.startswith('Bearer ') else None
+
+    # --- Rotas --- #
+    def login(self, corpo):
+        usuario = Usuario.autenticar(str(corpo.get('email', '')), str(corpo.get('senha', '')))
+        if usuario is None:
+            raise ErroApi(401, "E-mail ou senha incorretos")
+        return 200, {'token': self.server.sessoes.criar(usuario.email)}
+
+    def login_admin(self, corpo):
+        if corpo.get('senha') != SENHA_ADMIN:
+            raise ErroApi(401, "Senha incorreta")
+        return 200, {'token': self.server.sessoes.criar(Sessoes.ADMIN)}
+
+    def sugerir_alimentos(self, corpo):
+        k = _inteiro(self.consulta.get('k', 5), 'k', 1, 50)
+        return 200, {'alimentos': buscar_alimentos(self.consulta.get('busca', ''), k=k)}
+
+    def registrar_refeicao(self, corpo):
+        comida = Comida(self._usuario())
+        try:
+            quantidade = float(corpo.get('quantidade'))
+        except (TypeError, ValueError):
+            raise ErroApi(400, "Quantidade inválida") from None
+        if quantidade <= 0:
+            raise ErroApi(400, "A quantidade deve ser maior que zero")
+        sucesso, mensagem = comida.registrar_refeicao(str(corpo.get('alimento', '')), quantidade)
+        if not sucesso:
+            raise ErroApi(422, mensagem)
+        comida.ultima_gravacao.result()
+        return 201, {'mensagem': mensagem}
+
+    def historico(self, corpo):
+        comida = Comida(self._usuario())
+        limite = _inteiro(self.consulta.get('limite', REFEICOES_POR_PAGINA), 'limite', 1, 1000)
+        apos, antes = _cursor(self.consulta.get('apos')), _cursor(self.consulta.get('antes'))
+        pagina = comida.pagina_refeicoes(apos=apos, antes=antes, limite=limite,
+                                         incluir_arquivo=self.consulta.get('arquivo') == 'sim')
+        refeicoes = [{'id': id_, 'alimento': alimento, 'quantidade_gramas': quantidade,
+                      'calorias': calorias, 'data': data}
+                     for id_, alimento, quantidade, calorias, data in pagina]
+        cursores = {}
+        if pagina:
+            cursores = {'anterior': f"{pagina[0][0]}|{pagina[0][4]}", 'seguinte': f"{pagina[-1][0]}|{pagina[-1][4]}"}
+        return 200, {'refeicoes': refeicoes, 'cursores': cursores}
+
+    def resumo_dia(self, corpo):
+        resumo = Registros(self._usuario()).resumo_do_dia()
+        if resumo is None:
+            raise ErroApi(404, "Usuário não encontrado")
+        return 200, resumo
+
+    def analise(self, corpo):
+        metricas = analisar_usuario(self._usuario())
+        if metricas is None:
+            raise ErroApi(404, "Usuário não encontrado")
+        return 200, metricas
+
+    def plano(self, corpo):
+        dias = _inteiro(self.consulta.get('dias', 7), 'dias', 1, 31)
+        try:
+            plano = plano_do_usuario(self._usuario(), dias)
+        except ValueError as erro:
+            raise ErroApi(422, str(erro)) from None
+        if plano is None:
+            raise ErroApi(404, "Usuário não encontrado")
+        return 200, plano
+
+    def ranking(self, corpo):
+        email = self._usuario()
+        k = _inteiro(self.consulta.get('k', TOP_PADRAO), 'k', 1, 100)
+        janela = _inteiro(self.consulta.get('janela', 0), 'janela', 0, None)
+        criterio = self.consulta.get('criterio', 'gramas')
+        try:
+            if self.consulta.get('geral') == 'sim':
+                linhas = ranking_geral(k, janela, criterio)
+            else:
+                linhas = ranking_usuario(email, k, janela, criterio)
+        except ValueError as erro:
+            raise ErroApi(400, str(erro)) from None
+        return 200, {'ranking': [{'alimento': alimento, 'total_gramas': gramas, 'calorias': calorias,
+                                  'refeicoes': refeicoes} for alimento, gramas, calorias, refeicoes in linhas]}
+
+    def enviar_suporte(self, corpo):
+        email = self._usuario()
+        try:
+            Suporte.enviar_mensagem(email, str(corpo.get('mensagem', ''))).result()
+        except ValueError as erro:
+            raise ErroApi(400, str(erro)) from None
+        return 201, {'mensagem': "Mensagem enviada"}
+
+    def mensagens_suporte(self, corpo):
+        mensagens = Suporte.mensagens_do_usuario(self._usuario())
+        return 200, {'mensagens': [{'id': id_, 'mensagem': mensagem, 'resposta': resposta, 'data_hora': data}
+                                   for id_, mensagem, resposta, data in mensagens]}
+
+    def buscar_suporte(self, corpo):
+        self._exigir_admin()
+        respondidas = {'sim': True, 'nao': False}.get(self.consulta.get('respondidas'))
+        pagina = _inteiro(self.consulta.get('pagina', 0), 'pagina', 0, 10 ** 6)
+        mensagens = Suporte.buscar_mensagens(termo=self.consulta.get('termo'), respondidas=respondidas,
+                                             email=self.consulta.get('email'),
+                                             deslocamento=pagina * MENSAGENS_POR_PAGINA)
+        return 200, {'mensagens': [{'id': id_, 'email': email, 'mensagem': mensagem, 'resposta': resposta,
+                                    'data_hora': data, 'trecho': trecho}
+                                   for id_, email, mensagem, resposta, data, trecho in mensagens]}
+
+    def responder_suporte(self, corpo, id_mensagem):
+        self._exigir_admin()
+        resposta = str(corpo.get('resposta', '')).strip()
+        if not resposta:
+            raise ErroApi(400, "Digite uma resposta")
+        if not Suporte.responder(_inteiro(id_mensagem, 'id', 1, None), resposta).result():
+            raise ErroApi(404, "Mensagem não encontrada")
+        return 200, {'mensagem': "Resposta enviada"}
+
+
+# Tabela de rotas: (método, caminho) -> função de ManipuladorApi
+ROTAS = {
+    ('POST', '/login'): ManipuladorApi.login,
+    ('POST', '/admin/login'): ManipuladorApi.login_admin,
+    ('GET', '/alimentos'): ManipuladorApi.sugerir_alimentos,
+    ('POST', '/refeicoes'): ManipuladorApi.registrar_refeicao,
+    ('GET', '/refeicoes'): ManipuladorApi.historico,
+    ('GET', '/dia'): ManipuladorApi.resumo_dia,
+    ('GET', '/analise'): ManipuladorApi.analise,
+    ('GET', '/plano'): ManipuladorApi.plano,
+    ('GET', '/ranking'): ManipuladorApi.ranking,
+    ('POST', '/suporte'): ManipuladorApi.enviar_suporte,
+    ('GET', '/suporte'): ManipuladorApi.mensagens_suporte,
+    ('GET', '/admin/suporte'): ManipuladorApi.buscar_suporte,
+    ('POST', '/admin/suporte/<id>/resposta'): ManipuladorApi.responder_suporte,
+}
+
+
+def _inteiro(valor, nome, minimo, maximo):
+    """Converte um parâmetro para int dentro dos limites, ou responde 400."""
+    try:
+        numero = int(valor)
+    except (TypeError, ValueError):
+        raise ErroApi(400, f"Parâmetro '{nome}' inválido") from None
+    if numero < minimo or (maximo is not None and numero > maximo):
+        raise ErroApi(400, f"Parâmetro '{nome}' fora do intervalo permitido")
+    return numero
+
+
+def _cursor(texto):
+    """Converte o cursor "id|data" do histórico na chave (data, id) de Comida.pagina_refeicoes."""
+    if not texto:
+        return None
+    id_, _, data = texto.partition('|')
+    return data, _inteiro(id_, 'cursor', 1, None)
+
+
+class ServidorApi(ThreadingHTTPServer):
+    """ThreadingHTTPServer com as sessões da API; uma thread por conexão keep-alive."""
+
+    daemon_threads = True
+    # Fila de conexões pendentes; o padrão (5) descarta SYNs sob carga e o cliente espera 1 s
+    request_queue_size = 128
+
+    def __init__(self, endereco=ENDERECO_PADRAO, verboso=False):
+        super().__init__(endereco, ManipuladorApi)
+        self.sessoes = Sessoes()
+        self.verboso = verboso
+
+
+def iniciar_servidor(endereco=ENDERECO_PADRAO, verboso=False):
+    """
+    Inicia o servidor numa thread própria (usado pelo teste de carga).
+
+    Returns:
+        ServidorApi: Servidor em execução; ``shutdown()`` o encerra
+    """
+    servidor = ServidorApi(endereco, verboso)
+    threading.Thread(target=servidor.serve_forever, name="nutrismart-api", daemon=True).start()
+    return servidor
+
+
+# Inicia a API (python api.py [porta])
+if __name__ == "__main__":
+    verificar_esquema()
+    ativar_pelo_ambiente()
+    porta = int(sys.argv[1]) if len(sys.argv) > 1 else ENDERECO_PADRAO[1]
+    servidor = ServidorApi((ENDERECO_PADRAO[0], porta), verboso=True)
+    print(f"API do Nutrismart em http://{ENDERECO_PADRAO[0]}:{porta}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("Encerrando a API...")
+    finally:
+        servidor.server_close()
@@ -0,0 +1,387 @@
+# Importações necessárias para o código
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import database
+
+# Dias mantidos no banco principal: meses inteiros anteriores a essa janela vão para o arquivo
+RETENCAO_DIAS = 90
+# Páginas livres devolvidas ao sistema por transação do VACUUM incremental
+PAGINAS_POR_PASSO_VACUUM = 2000
+# Intervalo padrão da manutenção periódica (arquivamento + compactação)
+INTERVALO_MANUTENCAO_HORAS = 24
+
+# Tabelas arquivadas: colunas copiadas (a primeira é o id e a última a data) e coluna do e-mail.
+# No arquivo, cada mês vira uma tabela <tabela>_AAAA_MM com a mesma estrutura.
+TABELAS_ARQUIVADAS = {
+    'refeicoes': (('id', 'email_usuario', 'alimento', 'quantidade_gramas', 'calorias', 'data'), 'email_usuario'),
+    'registro_refeicoes': (('id', 'email', 'refeicao', 'calorias', 'data'), 'email'),
+}
+
+_SQL_TABELA_ARQUIVO = {
+    'refeicoes': '''
+        CREATE TABLE IF NOT EXISTS {nome} (
+            id INTEGER PRIMARY KEY,
+            email_usuario TEXT NOT NULL,
+            alimento TEXT NOT NULL,
+            quantidade_gramas REAL NOT NULL,
+            calorias REAL NOT NULL,
+            data TEXT NOT NULL
+        )
+    ''',
+    'registro_refeicoes': '''
+        CREATE TABLE IF NOT EXISTS {nome} (
+            id INTEGER PRIMARY KEY,
+            email TEXT NOT NULL,
+            refeicao TEXT NOT NULL,
+            calorias INTEGER,
+            data TEXT NOT NULL
+        )
+    ''',
+}
+
+
+def caminho_arquivo(pool=None):
+    """
+    Caminho do arquivo com os dados frios de um banco (ex.: nutricao.db -> nutricao_arquivo.db).
+
+    Cada fragmento tem o seu próprio arquivo.
+    """
+    pool = pool or database.pool_atual()
+    return f"{os.path.splitext(pool.caminho)[0]}_arquivo.db"
+
+
+def nome_tabela(tabela, mes):
+    """Nome da tabela do arquivo que guarda ``mes`` ("AAAA-MM") de ``tabela``."""
+    return f"{tabela}_{mes.replace('-', '_')}"
+
+
+def _abrir_arquivo(pool, escrita=False):
+    """
+    Abre o arquivo de dados frios de ``pool``.
+
+    Returns:
+        sqlite3.Connection: Conexão em autocommit, ou None se o arquivo ainda não existir (leitura)
+    """
+    caminho = caminho_arquivo(pool)
+    if escrita:
+        return sqlite3.connect(caminho, timeout=30, isolation_level=None)
+    if not os.path.exists(caminho):
+        return None
+    return sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, timeout=30, isolation_level=None)
+
+
+def _meses_no_arquivo(arquivo, tabela):
+    """Meses ("AAAA-MM") de ``tabela`` presentes no arquivo, do mais antigo ao mais recente."""
+    nomes = arquivo.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ?",
+        (f"{tabela}_[0-9][0-9][0-9][0-9]_[0-9][0-9]",)).fetchall()
+    return sorted(nome[len(tabela) + 1:].replace('_', '-') for (nome,) in nomes)
+
+
+def corte_retencao(retencao_dias=RETENCAO_DIAS, hoje=None):
+    """
+    Primeiro dia que continua no banco principal.
+
+    É o início do mês que contém ``hoje - retencao_dias``: só meses completos
+    vão para o arquivo, então cada mês arquivado fica numa única tabela.
+
+    Returns:
+        str: Data "AAAA-MM-DD"
+    """
+    hoje = hoje or date.today()
+    return (hoje - timedelta(days=retencao_dias)).replace(day=1).strftime("%Y-%m-%d")
+
+
+def arquivar(retencao_dias=RETENCAO_DIAS, tamanho_lote=database.TAMANHO_LOTE_MIGRACAO, hoje=None):
+    """
+    Move para o arquivo as linhas de refeicoes e registro_refeicoes mais antigas que a retenção.
+
+    Trabalha em lotes de ``tamanho_lote`` linhas, cada um em duas etapas:
+    primeiro copia o lote para as tabelas mensais do arquivo (e faz commit
+    lá), depois apaga o lote do banco principal numa transação curta. Se o
+    processo cair entre as duas etapas, as linhas ficam nos dois lugares por
+    um tempo (as consultas que juntam os dois descartam a repetição) e a
+    próxima execução termina o trabalho; nenhuma linha se perde.
+
+    Os totais de totais_diarios dos meses arquivados são mantidos.
+
+    Args:
+        retencao_dias (int): Dias mantidos no banco principal (arredondado para o início do mês)
+        tamanho_lote (int): Linhas por transação
+        hoje (date, opcional): Data de referência. Padrão: hoje
+
+    Returns:
+        dict: Linhas movidas por tabela (somando todos os fragmentos)
+    """
+    corte = corte_retencao(retencao_dias, hoje)
+    movidas = dict.fromkeys(TABELAS_ARQUIVADAS, 0)
+    for pool in database.pools_de_dados():
+        arquivo = _abrir_arquivo(pool, escrita=True)
+        try:
+            for tabela in TABELAS_ARQUIVADAS:
+                movidas[tabela] += _arquivar_tabela(pool, arquivo, tabela, corte, tamanho_lote)
+        finally:
+            arquivo.close()
+    return movidas
+
+
+def _arquivar_tabela(pool, arquivo, tabela, corte, tamanho_lote):
+    """Move as linhas de ``tabela`` anteriores a ``corte`` de um banco para o seu arquivo."""
+    colunas, coluna_email = TABELAS_ARQUIVADAS[tabela]
+    lista_colunas = ", ".join(colunas)
+    marcadores = ", ".join("?" * len(colunas))
+    ultimo_id, movidas = 0, 0
+    while True:
+        with pool.conexao() as conn:
+            linhas = conn.execute(f"SELECT {lista_colunas} FROM {tabela} WHERE id > ? AND data < ? "
+                                  f"ORDER BY id LIMIT ?", (ultimo_id, corte, tamanho_lote)).fetchall()
+        if not linhas:
+            return movidas
+
+        por_mes = {}
+        for linha in linhas:
+            por_mes.setdefault(linha[-1][:7], []).append(linha)
+
+        # 1) Copia o lote para o arquivo (repetir a cópia não duplica nada)
+        arquivo.execute("BEGIN IMMEDIATE")
+        try:
+            for mes, do_mes in por_mes.items():
+                nome = nome_tabela(tabela, mes)
+                arquivo.execute(_SQL_TABELA_ARQUIVO[tabela].format(nome=nome))
+                arquivo.execute(f"CREATE INDEX IF NOT EXISTS idx_{nome}_usuario_data ON {nome} ({coluna_email}, data)")
+                arquivo.executemany(f"INSERT OR REPLACE INTO {nome} ({lista_colunas}) VALUES ({marcadores})", do_mes)
+        except BaseException:
+            arquivo.rollback()
+            raise
+        arquivo.commit()
+
+        # 2) Apaga o lote do banco principal, com o marcador que preserva totais_diarios
+        agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with pool.transacao() as conn:
+            conn.execute("INSERT INTO arquivamento_em_curso (id) VALUES (1)")
+            conn.executemany(f"DELETE FROM {tabela} WHERE id = ?", ((linha[0],) for linha in linhas))
+            for mes, do_mes in por_mes.items():
+                conn.execute('''
+                    INSERT INTO meses_arquivados (tabela, mes, linhas, arquivado_em) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (tabela, mes) DO UPDATE SET
+                        linhas = linhas + excluded.linhas,
+                        arquivado_em = excluded.arquivado_em
+                ''', (tabela, mes, len(do_mes), agora))
+            conn.execute("DELETE FROM arquivamento_em_curso")
+
+        ultimo_id = linhas[-1][0]
+        movidas += len(linhas)
+        time.sleep(database.PAUSA_ENTRE_LOTES)
+
+
+def compactar(paginas_por_passo=PAGINAS_POR_PASSO_VACUUM, pausa=database.PAUSA_ENTRE_LOTES):
+    """
+    Devolve ao sistema as páginas livres dos bancos principais (VACUUM incremental).
+
+    Cada passo é uma transação curta de ``PRAGMA incremental_vacuum`` com
+    até ``paginas_por_passo`` páginas, com uma pausa entre os passos para as
+    escritas do sistema passarem. Bancos sem auto_vacuum incremental (criados
+    antes dele) são pulados: veja ``converter_para_vacuum_incremental``.
+
+    Returns:
+        int: Páginas liberadas (somando todos os fragmentos)
+    """
+    liberadas = 0
+    for pool in database.pools_de_dados():
+        with pool.conexao() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                print(f"{pool.caminho} não usa auto_vacuum incremental; "
+                      f"execute 'python arquivamento.py converter' uma vez.")
+                continue
+        while True:
+            with pool.conexao() as conn:
+                livres = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not livres:
+                    break
+                passo = min(livres, paginas_por_passo)
+                # O pragma libera uma página a cada passo da instrução: executescript
+                # roda até o fim (execute pararia na primeira), numa transação própria
+                conn.executescript(f"PRAGMA incremental_vacuum({passo});")
+            liberadas += passo
+            time.sleep(pausa)
+        # Em WAL o arquivo só encolhe quando as páginas voltam do WAL para o banco
+        pool.checkpoint('TRUNCATE')
+    return liberadas
+
+
+def converter_para_vacuum_incremental():
+    """
+    Ativa o auto_vacuum incremental nos bancos criados sem ele.
+
+    Exige um VACUUM completo, que reescreve o arquivo inteiro e bloqueia as
+    escritas enquanto roda: deve ser feito uma única vez, fora do horário de uso.
+
+    Returns:
+        int: Número de bancos convertidos
+    """
+    convertidos = 0
+    for pool in database.pools_de_dados():
+        with pool.conexao() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                continue
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        convertidos += 1
+    return convertidos
+
+
+# --- Consultas ao arquivo --- #
+
+def pagina_arquivada(email, apos=None, antes=None, limite=100):
+    """
+    Página das refeições arquivadas de um usuário, com as chaves de Comida.pagina_refeicoes.
+
+    Os meses são percorridos a partir da chave e a busca para assim que a
+    página enche, então uma página custa poucas consultas indexadas mesmo
+    com anos de histórico arquivado.
+
+    Args:
+        email (str): E-mail do usuário
+        apos (tuple, opcional): Chave (data, id); retorna refeições mais antigas que ela
+        antes (tuple, opcional): Chave (data, id); retorna refeições mais recentes que ela
+        limite (int): Tamanho da página
+
+    Returns:
+        list: Tuplas (id, alimento, quantidade_gramas, calorias, data), em ordem decrescente
+    """
+    arquivo = _abrir_arquivo(database.pool_para(email))
+    if arquivo is None:
+        return []
+    try:
+        meses = _meses_no_arquivo(arquivo, 'refeicoes')
+        if antes is not None:
+            meses = [mes for mes in meses if mes >= antes[0][:7]]
+            filtro, ordem, chave = "AND (data, id) > (?, ?)", "ASC", tuple(antes)
+        else:
+            meses = [mes for mes in meses if apos is None or mes <= apos[0][:7]][::-1]
+            filtro, ordem, chave = ("AND (data, id) < (?, ?)", "DESC", tuple(apos)) if apos else ("", "DESC", ())
+
+        linhas = []
+        for mes in meses:
+            linhas += arquivo.execute(f'''
+                SELECT id, alimento, quantidade_gramas, calorias, data
+                FROM {nome_tabela('refeicoes', mes)}
+                WHERE email_usuario = ? {filtro}
+                ORDER BY data {ordem}, id {ordem}
+                LIMIT ?
+            ''', (email, *chave, limite - len(linhas))).fetchall()
+            if len(linhas) >= limite:
+                break
+    finally:
+        arquivo.close()
+    return linhas[::-1] if antes is not None else linhas
+
+
+def registros_arquivados(email, dia):
+    """
+    Linhas arquivadas de registro_refeicoes de um usuário num dia.
+
+    Returns:
+        list: Tuplas (id, email, refeicao, calorias, data), como em ``SELECT *``
+    """
+    arquivo = _abrir_arquivo(database.pool_para(email))
+    if arquivo is None:
+        return []
+    try:
+        mes = str(dia)[:7]
+        if mes not in _meses_no_arquivo(arquivo, 'registro_refeicoes'):
+            return []
+        return arquivo.execute(f"SELECT * FROM {nome_tabela('registro_refeicoes', mes)} WHERE email = ? AND data = ?",
+                               (email, str(dia))).fetchall()
+    finally:
+        arquivo.close()
+
+
+def lotes_arquivados(pool, tabela, colunas, apos_id=0, tamanho_lote=database.TAMANHO_LOTE_MIGRACAO):
+    """
+    Gera, em lotes, as linhas arquivadas de ``tabela`` de um banco com id maior que ``apos_id``.
+
+    Args:
+        pool (PoolConexoes): Banco (principal ou fragmento) dono do arquivo
+        tabela (str): 'refeicoes' ou 'registro_refeicoes'
+        colunas (str): Colunas ou expressões do SELECT
+        apos_id (int): Só linhas com id maior que este
+        tamanho_lote (int): Linhas por lote
+
+    Yields:
+        list: Linhas de um lote, em ordem de mês e de id
+    """
+    arquivo = _abrir_arquivo(pool)
+    if arquivo is None:
+        return
+    try:
+        for mes in _meses_no_arquivo(arquivo, tabela):
+            ultimo_id = apos_id
+            while True:
+                linhas = arquivo.execute(f"SELECT {colunas} FROM {nome_tabela(tabela, mes)} "
+                                         f"WHERE id > ? ORDER BY id LIMIT ?", (ultimo_id, tamanho_lote)).fetchall()
+                if not linhas:
+                    break
+                yield linhas
+                ultimo_id = linhas[-1][0]
+    finally:
+        arquivo.close()
+
+
+class ManutencaoPeriodica:
+    """Roda ``arquivar`` e ``compactar`` numa thread própria a cada ``intervalo_horas``.
+
+    Alternativa a agendar ``python arquivamento.py`` no cron do servidor.
+    """
+
+    def __init__(self, intervalo_horas=INTERVALO_MANUTENCAO_HORAS, retencao_dias=RETENCAO_DIAS):
+        """
+        Args:
+            intervalo_horas (float): Tempo entre duas manutenções (a primeira roda ao iniciar)
+            retencao_dias (int): Dias mantidos no banco principal
+        """
+        self.intervalo_horas = intervalo_horas
+        self.retencao_dias = retencao_dias
+        self.execucoes = 0
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._trabalhar, name="nutrismart-manutencao", daemon=True)
+        self._thread.start()
+
+    def _trabalhar(self):
+        """Laço da thread: executa a manutenção e espera o próximo horário até ser parada."""
+        while not self._parar.is_set():
+            try:
+                arquivar(self.retencao_dias)
+                compactar()
+            except Exception as erro:
+                print(f"Erro na manutenção do banco: {erro}")
+            self.execucoes += 1
+            self._parar.wait(self.intervalo_horas * 3600)
+
+    def parar(self):
+        """Interrompe a espera e termina a thread (depois do passo em andamento)."""
+        self._parar.set()
+        self._thread.join()
+
+
+# Uso:
+#   python arquivamento.py [dias]   arquiva o que passou da retenção e compacta o banco
+#   python arquivamento.py compactar   só o VACUUM incremental
+#   python arquivamento.py converter   ativa o auto_vacuum incremental num banco antigo (VACUUM completo)
+if __name__ == "__main__":
+    import sys
+
+    database.verificar_esquema()
+    if sys.argv[1:] == ["compactar"]:
+        print(f"{compactar()} página(s) liberada(s).")
+    elif sys.argv[1:] == ["converter"]:
+        print(f"{converter_para_vacuum_incremental()} banco(s) convertido(s) para auto_vacuum incremental.")
+    else:
+        dias = int(sys.argv[1]) if sys.argv[1:] else RETENCAO_DIAS
+        for tabela, linhas in arquivar(dias).items():
+            print(f"{tabela}: {linhas} linha(s) arquivada(s) em {caminho_arquivo()}.")
+        print(f"{compactar()} página(s) liberada(s).")
@@ -0,0 +1,358 @@
+# Importações necessárias para o código
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import time
+from datetime import datetime
+
+import database
+
+# Pasta padrão dos backups
+DIRETORIO_BACKUPS = 'backups'
+# Páginas copiadas por passo do backup online e pausa entre os passos
+PAGINAS_POR_PASSO = 256
+PAUSA_ENTRE_PASSOS = 0.002
+# Bytes do resumo guardado de cada página (para achar as páginas alteradas no incremental)
+TAMANHO_RESUMO_PAGINA = 8
+# Recomeços tolerados (journal de rollback) antes de copiar tudo num passo só
+MAX_RECOMECOS = 3
+# Cada página de um incremental é gravada como (número da página, conteúdo)
+_CABECALHO_PAGINA = struct.Struct('>I')
+
+
+class _CopiaRecomecada(Exception):
+    """Interrompe um backup em passos que o SQLite recomeçou vezes demais."""
+
+
+def copiar_online(origem, destino, paginas_por_passo=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS):
+    """
+    Copia um banco em uso para ``destino`` com a API de backup do SQLite.
+
+    A cópia é feita em passos de ``paginas_por_passo`` páginas com uma pausa
+    entre eles. Em WAL, uma transação de leitura fica aberta durante a cópia:
+    ela fixa a versão copiada, então as escritas das outras conexões seguem
+    normalmente e não fazem o backup recomeçar (o WAL só não é zerado até o
+    fim). No journal de rollback, as escritas passam entre um passo e outro
+    e o SQLite recomeça a cópia se o banco mudar; depois de ``MAX_RECOMECOS``
+    recomeços a cópia é refeita num passo só, que segura as escritas até o
+    fim mas sempre termina.
+
+    Args:
+        origem (str): Caminho do banco
+        destino (str): Caminho do arquivo de saída (sobrescrito)
+        paginas_por_passo (int): Páginas por passo (-1 copia tudo de uma vez)
+        pausa (float): Segundos de pausa entre os passos
+    """
+    if os.path.exists(destino):
+        os.remove(destino)
+    fonte = sqlite3.connect(origem, timeout=30, isolation_level=None)
+    alvo = sqlite3.connect(destino, isolation_level=None)
+
+    recomecos, anterior = 0, None
+
+    def entre_passos(status, restantes, total):
+        nonlocal recomecos, anterior
+        if anterior is not None and restantes > anterior:
+            recomecos += 1
+            if recomecos > MAX_RECOMECOS:
+                raise _CopiaRecomecada()
+        anterior = restantes
+        if restantes and pausa:
+            time.sleep(pausa)
+
+    try:
+        wal = fonte.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal'
+        if wal:
+            fonte.execute("BEGIN")
+            fonte.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        try:
+            fonte.backup(alvo, pages=paginas_por_passo, progress=entre_passos)
+        except _CopiaRecomecada:
+            fonte.backup(alvo, pages=-1)
+        if wal:
+            fonte.execute("COMMIT")
+        # A cópia fica num arquivo só (sem -wal), pronta para comprimir e comparar
+        alvo.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        alvo.close()
+        fonte.close()
+
+
+def contar_linhas(caminho):
+    """
+    Número de linhas de cada tabela de um banco (tabelas virtuais de fora).
+
+    Returns:
+        dict: tabela -> quantidade de linhas
+    """
+    con = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True)
+    try:
+        tabelas = [nome for (nome,) in con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            "AND sql NOT LIKE 'CREATE VIRTUAL TABLE%' ORDER BY name")]
+        return {tabela: con.execute(f'SELECT COUNT(*) FROM "{tabela}"').fetchone()[0] for tabela in tabelas}
+    finally:
+        con.close()
+
+
+def _tamanho_pagina(caminho):
+    """Tamanho de página gravado no cabeçalho do arquivo de um banco."""
+    with open(caminho, 'rb') as arquivo:
+        tamanho, = struct.unpack('>H', arquivo.read(18)[16:18])
+    return 65536 if tamanho == 1 else tamanho
+
+
+def _paginas(caminho):
+    """Gera (número, conteúdo) de cada página do arquivo de um banco, a partir de 1."""
+    tamanho_pagina = _tamanho_pagina(caminho)
+    with open(caminho, 'rb') as arquivo:
+        numero = 1
+        while True:
+            pagina = arquivo.read(tamanho_pagina)
+            if not pagina:
+                return
+            yield numero, pagina
+            numero += 1
+
+
+def _resumo(pagina):
+    return hashlib.blake2b(pagina, digest_size=TAMANHO_RESUMO_PAGINA).digest()
+
+
+def _sha256(caminho):
+    soma = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+            soma.update(bloco)
+    return soma.hexdigest()
+
+
+def _ler_manifesto(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def ultimo_manifesto(caminho_banco=None, diretorio=DIRETORIO_BACKUPS):
+    """
+    Manifesto do backup mais recente de um banco, ou None se não houver.
+
+    Os backups de cada banco (principal, fragmentos, arquivo) têm o nome do
+    arquivo como prefixo, então cada um forma a sua própria cadeia.
+    """
+    prefixo = os.path.splitext(os.path.basename(caminho_banco or database.pool_atual().caminho))[0] + '-'
+    if not os.path.isdir(diretorio):
+        return None
+    nomes = sorted(nome for nome in os.listdir(diretorio)
+                   if nome.startswith(prefixo) and nome.endswith('.json')
+                   and nome[len(prefixo):len(prefixo) + 8].isdigit())
+    return os.path.join(diretorio, nomes[-1]) if nomes else None
+
+
+def fazer_backup(caminho_banco=None, diretorio=DIRETORIO_BACKUPS, incremental=False,
+                 paginas_por_passo=PAGINAS_POR_PASSO, pausa=PAUSA_ENTRE_PASSOS):
+    """
+    Faz um backup do banco sem parar o sistema.
+
+    O backup completo é a cópia online (``copiar_online``) comprimida com
+    gzip. O incremental faz a mesma cópia, mas grava só as páginas que
+    mudaram desde o backup anterior da cadeia (o mesmo conteúdo que o WAL
+    teria carregado entre os dois); se não houver backup anterior, ou o
+    tamanho de página mudou, um completo é feito no lugar.
+
+    Cada backup gera três arquivos em ``diretorio``: os dados (.db.gz ou
+    .paginas.gz), o resumo de cada página (.resumos, usado pelo próximo
+    incremental) e o manifesto (.json), com o backup base, o número de
+    linhas de cada tabela e o SHA-256 do banco completo naquele momento.
+
+    Args:
+        caminho_banco (str, opcional): Banco a copiar. Padrão: o banco principal
+        diretorio (str): Pasta dos backups
+        incremental (bool): Grava só as páginas alteradas desde o último backup
+        paginas_por_passo (int): Páginas por passo da cópia online
+        pausa (float): Segundos de pausa entre os passos
+
+    Returns:
+        str: Caminho do manifesto criado
+    """
+    caminho_banco = caminho_banco or database.pool_atual().caminho
+    os.makedirs(diretorio, exist_ok=True)
+    nome = f"{os.path.splitext(os.path.basename(caminho_banco))[0]}-{datetime.now():%Y%m%d-%H%M%S-%f}"
+    base = ultimo_manifesto(caminho_banco, diretorio) if incremental else None
+    copia = os.path.join(diretorio, nome + '.copia')
+
+    inicio = time.perf_counter()
+    copiar_online(caminho_banco, copia, paginas_por_passo, pausa)
+    duracao_copia = time.perf_counter() - inicio
+    try:
+        tamanho_pagina = _tamanho_pagina(copia)
+        if base is not None and _ler_manifesto(base)['tamanho_pagina'] != tamanho_pagina:
+            base = None
+
+        resumos, alteradas = [], 0
+        if base is not None:
+            with open(base[:-len('.json')] + '.resumos', 'rb') as arquivo:
+                resumos_base = arquivo.read()
+            destino_dados = os.path.join(diretorio, nome + '.paginas.gz')
+            with gzip.open(destino_dados, 'wb', compresslevel=6) as saida:
+                for numero, pagina in _paginas(copia):
+                    resumo = _resumo(pagina)
+                    resumos.append(resumo)
+                    posicao = (numero - 1) * TAMANHO_RESUMO_PAGINA
+                    if resumos_base[posicao:posicao + TAMANHO_RESUMO_PAGINA] != resumo:
+                        saida.write(_CABECALHO_PAGINA.pack(numero))
+                        saida.write(pagina)
+                        alteradas += 1
+        else:
+            destino_dados = os.path.join(diretorio, nome + '.db.gz')
+            with open(copia, 'rb') as entrada, gzip.open(destino_dados, 'wb', compresslevel=6) as saida:
+                shutil.copyfileobj(entrada, saida, 1024 * 1024)
+            resumos = [_resumo(pagina) for _, pagina in _paginas(copia)]
+            alteradas = len(resumos)
+
+        with open(os.path.join(diretorio, nome + '.resumos'), 'wb') as arquivo:
+            arquivo.write(b''.join(resumos))
+        manifesto = {
+            'tipo': 'incremental' if base is not None else 'completo',
+            'banco': os.path.abspath(caminho_banco),
+            'base': os.path.basename(base) if base is not None else None,
+            'dados': os.path.basename(destino_dados),
+            'criado_em': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'tamanho_pagina': tamanho_pagina,
+            'paginas': len(resumos),
+            'paginas_gravadas': alteradas,
+            'bytes_banco': os.path.getsize(copia),
+            'bytes_gravados': os.path.getsize(destino_dados),
+            'segundos_copia': round(duracao_copia, 3),
+            'segundos_total': round(time.perf_counter() - inicio, 3),
+            'sha256': _sha256(copia),
+            'linhas': contar_linhas(copia),
+        }
+    finally:
+        os.remove(copia)
+
+    caminho_manifesto = os.path.join(diretorio, nome + '.json')
+    with open(caminho_manifesto, 'w', encoding='utf-8') as arquivo:
+        json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+    return caminho_manifesto
+
+
+def restaurar(manifesto, destino):
+    """
+    Reconstrói o banco do momento de um backup: o completo da cadeia mais os incrementais até ele.
+
+    O sistema não pode estar usando ``destino``: o arquivo (e o -wal/-shm
+    dele, que não valeriam para o banco restaurado) é substituído.
+
+    Args:
+        manifesto (str): Caminho do manifesto (.json) do backup desejado
+        destino (str): Caminho do banco restaurado
+
+    Returns:
+        dict: O manifesto do backup restaurado
+    """
+    diretorio = os.path.dirname(manifesto)
+    cadeia = [_ler_manifesto(manifesto)]
+    while cadeia[-1]['tipo'] != 'completo':
+        cadeia.append(_ler_manifesto(os.path.join(diretorio, cadeia[-1]['base'])))
+    cadeia.reverse()
+
+    temporario = destino + '.restaurando'
+    with gzip.open(os.path.join(diretorio, cadeia[0]['dados']), 'rb') as entrada, open(temporario, 'wb') as saida:
+        shutil.copyfileobj(entrada, saida, 1024 * 1024)
+    for incremental in cadeia[1:]:
+        tamanho_pagina = incremental['tamanho_pagina']
+        with gzip.open(os.path.join(diretorio, incremental['dados']), 'rb') as entrada, \
+                open(temporario, 'r+b') as saida:
+            while True:
+                cabecalho = entrada.read(_CABECALHO_PAGINA.size)
+                if not cabecalho:
+                    break
+                numero, = _CABECALHO_PAGINA.unpack(cabecalho)
+                saida.seek((numero - 1) * tamanho_pagina)
+                saida.write(entrada.read(tamanho_pagina))
+            saida.truncate(incremental['paginas'] * tamanho_pagina)
+
+    for sufixo in ('-wal', '-shm'):
+        if os.path.exists(destino + sufixo):
+            os.remove(destino + sufixo)
+    os.replace(temporario, destino)
+    return cadeia[-1]
+
+
+def verificar(caminho_banco, manifesto):
+    """
+    Confere um banco restaurado contra o manifesto do backup.
+
+    Roda ``PRAGMA integrity_check`` e compara o SHA-256 do arquivo e o
+    número de linhas de cada tabela com os do momento do backup.
+
+    Args:
+        caminho_banco (str): Banco a conferir
+        manifesto (dict): Manifesto do backup (como devolvido por ``restaurar``)
+
+    Returns:
+        list: Problemas encontrados (vazia se o banco confere)
+    """
+    problemas = []
+    con = sqlite3.connect(f"file:{caminho_banco}?mode=ro", uri=True)
+    try:
+        resultado = [linha[0] for linha in con.execute("PRAGMA integrity_check")]
+    finally:
+        con.close()
+    if resultado != ['ok']:
+        problemas += [f"integrity_check: {linha}" for linha in resultado]
+    if _sha256(caminho_banco) != manifesto['sha256']:
+        problemas.append("SHA-256 diferente do registrado no backup")
+    linhas = contar_linhas(caminho_banco)
+    for tabela in sorted(set(linhas) | set(manifesto['linhas'])):
+        esperado, encontrado = manifesto['linhas'].get(tabela), linhas.get(tabela)
+        if esperado != encontrado:
+            problemas.append(f"{tabela}: {encontrado} linha(s), esperado {esperado}")
+    return problemas
+
+
+def bancos_do_sistema():
+    """Caminhos de todos os bancos do sistema: principal, fragmentos e arquivos de dados frios."""
+    from arquivamento import caminho_arquivo
+
+    pools = [database.pool_atual()] + [pool for pool in database.pools_de_dados()
+                                       if pool is not database.pool_atual()]
+    caminhos = [pool.caminho for pool in pools]
+    return caminhos + [caminho_arquivo(pool) for pool in pools if os.path.exists(caminho_arquivo(pool))]
+
+
+# Uso:
+#   python backup.py completo [pasta]        backup completo de todos os bancos
+#   python backup.py incremental [pasta]     só as páginas alteradas desde o último backup
+#   python backup.py restaurar <manifesto.json> <destino.db>   restaura e confere
+#   python backup.py verificar <manifesto.json>   restaura num arquivo temporário e confere
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    comando, argumentos = (sys.argv[1], sys.argv[2:]) if sys.argv[1:] else ('completo', [])
+    if comando in ('completo', 'incremental'):
+        pasta = argumentos[0] if argumentos else DIRETORIO_BACKUPS
+        for caminho in bancos_do_sistema():
+            dados = _ler_manifesto(fazer_backup(caminho, pasta, incremental=comando == 'incremental'))
+            print(f"{caminho}: backup {dados['tipo']} com {dados['paginas_gravadas']} de {dados['paginas']} "
+                  f"página(s), {dados['bytes_gravados'] / 2 ** 20:.1f} MB gravados, "
+                  f"cópia a {dados['bytes_banco'] / 2 ** 20 / max(dados['segundos_copia'], 1e-6):.0f} MB/s")
+    elif comando in ('restaurar', 'verificar'):
+        with tempfile.TemporaryDirectory() as temporario:
+            destino = argumentos[1] if comando == 'restaurar' else os.path.join(temporario, 'verificacao.db')
+            dados = restaurar(argumentos[0], destino)
+            problemas = verificar(destino, dados)
+        if problemas:
+            print("❌ Backup com problemas:")
+            for problema in problemas:
+                print(f"  - {problema}")
+            sys.exit(1)
+        print(f"✅ Banco de {dados['criado_em']} restaurado e conferido ({sum(dados['linhas'].values())} linhas).")
+    else:
+        print(f"Comando desconhecido: {comando}")
+        sys.exit(2)
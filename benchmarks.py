@@ -0,0 +1,1420 @@
+# Benchmarks de desempenho do Nutrismart
+#
+# Cada benchmark cria um banco temporário, então o nutricao.db real nunca é tocado.
+# Uso: python benchmarks.py [nome_do_benchmark ...]
+import datetime
+import heapq
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import database
+import alimentacao
+from alimentacao import Comida
+from tarefas import TarefasInterface, MonitorLatencia
+
+
+def preparar_banco_temporario(tamanho_pool=database.TAMANHO_POOL, perfil=None):
+    """
+    Cria um banco vazio em um diretório temporário e aponta o pool global para ele.
+
+    Returns:
+        tempfile.TemporaryDirectory: Diretório que deve ser limpo ao final do benchmark
+    """
+    diretorio = tempfile.TemporaryDirectory()
+    database.configurar_banco(os.path.join(diretorio.name, 'bench.db'), tamanho_pool, perfil)
+    database.migrar()
+    with database.transacao() as conn:
+        conn.execute("INSERT INTO alimentos (nome, calorias, proteinas, carboidratos, gorduras) "
+                     "VALUES ('arroz', 130, 2.7, 28, 0.3)")
+    return diretorio
+
+
+def benchmark_refeicoes_concorrentes(registros_por_thread=200):
+    """Mede a vazão de Comida.registrar_refeicao com 1, 4 e 16 threads."""
+    print("\n=== Registro concorrente de refeições ===")
+    for n_threads in (1, 4, 16):
+        diretorio = preparar_banco_temporario(tamanho_pool=n_threads)
+        erros = []
+
+        def trabalhador(indice):
+            comida = Comida(f"usuario{indice}@teste.com")
+            for _ in range(registros_por_thread):
+                sucesso, mensagem = comida.registrar_refeicao("arroz", 100)
+                if not sucesso:
+                    erros.append(mensagem)
+
+        threads = [threading.Thread(target=trabalhador, args=(i,)) for i in range(n_threads)]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - inicio
+
+        total = n_threads * registros_por_thread
+        print(f"{n_threads:>3} thread(s): {total} refeições em {duracao:.2f}s "
+              f"({total / duracao:,.0f} refeições/s, {len(erros)} erro(s))")
+        database.configurar_banco()
+        diretorio.cleanup()
+
+
+def benchmark_registro_em_lote(total=20000, tamanho_lote=1000):
+    """Compara refeições/s entre registrar_refeicao item a item e registrar_refeicoes_em_lote."""
+    print("\n=== Registro de refeições: item a item x em lote ===")
+    itens = [("arroz", 50 + i % 200, f"2024-01-{1 + i % 28:02d} 12:00:00") for i in range(total)]
+
+    diretorio = preparar_banco_temporario()
+    comida = Comida("importacao@teste.com")
+    amostra = total // 10  # o caminho item a item é lento demais para o volume todo
+    inicio = time.perf_counter()
+    for alimento, quantidade, _ in itens[:amostra]:
+        comida.registrar_refeicao(alimento, quantidade)
+    duracao = time.perf_counter() - inicio
+    print(f"item a item: {amostra} refeições em {duracao:.2f}s ({amostra / duracao:,.0f} refeições/s)")
+    database.configurar_banco()
+    diretorio.cleanup()
+
+    diretorio = preparar_banco_temporario()
+    comida = Comida("importacao@teste.com")
+    inicio = time.perf_counter()
+    resultados = comida.registrar_refeicoes_em_lote(itens, tamanho_lote=tamanho_lote)
+    duracao = time.perf_counter() - inicio
+    sucessos = sum(1 for sucesso, _ in resultados if sucesso)
+    print(f"em lote ({tamanho_lote}/lote): {sucessos} refeições em {duracao:.2f}s "
+          f"({sucessos / duracao:,.0f} refeições/s)")
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def benchmark_busca_alimentos(total=100000, consultas=2000):
+    """Mede construção do índice e latência da busca de alimentos com um catálogo grande."""
+    from busca import IndiceBusca
+
+    print(f"\n=== Busca de alimentos ({total} itens) ===")
+    gerador = random.Random(42)
+    silabas = ["ba", "na", "ar", "roz", "fei", "jão", "gra", "bi", "co", "fran", "go", "ma", "çã",
+               "to", "ma", "te", "lei", "te", "pão", "quei", "jo", "ce", "nou", "ra", "bró", "co", "lis"]
+    nomes = {" ".join("".join(gerador.choice(silabas) for _ in range(gerador.randint(2, 4)))
+                      for _ in range(gerador.randint(1, 3))) for _ in range(total)}
+    nomes = sorted(nomes)
+
+    inicio = time.perf_counter()
+    indice = IndiceBusca(nomes)
+    print(f"construção do índice: {time.perf_counter() - inicio:.2f}s")
+
+    amostra = [gerador.choice(nomes) for _ in range(consultas)]
+    casos = {
+        'prefixo': [nome[:gerador.randint(2, 6)] for nome in amostra],
+        'com erro': [nome[:2] + nome[3:] for nome in amostra],
+    }
+    for caso, textos in casos.items():
+        tempos = []
+        for texto in textos:
+            inicio = time.perf_counter()
+            indice.buscar(texto, k=5)
+            tempos.append(time.perf_counter() - inicio)
+        tempos.sort()
+        print(f"{caso:<9} p50 {tempos[len(tempos) // 2] * 1000:.3f} ms | "
+              f"p99 {tempos[int(len(tempos) * 0.99)] * 1000:.3f} ms")
+
+
+def benchmark_historico_paginado(tamanhos=(1000, 100000, 1000000)):
+    """Compara o tempo de abrir o histórico: tudo de uma vez x primeira página (keyset)."""
+    print("\n=== Abertura do histórico de refeições ===")
+    for total in tamanhos:
+        diretorio = preparar_banco_temporario()
+        email = "historico@teste.com"
+        with database.transacao() as conn:
+            conn.executemany(
+                "INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+                "VALUES (?, 'arroz', 100, 130, ?)",
+                ((email, f"20{10 + i // 500000:02d}-{1 + i // 40000 % 12:02d}-{1 + i % 28:02d} 12:00:00")
+                 for i in range(total)))
+        comida = Comida(email)
+
+        inicio = time.perf_counter()
+        with database.conexao() as conn:
+            conn.execute("SELECT id, alimento, quantidade_gramas, calorias, data FROM refeicoes "
+                         "WHERE email_usuario = ? ORDER BY data DESC, id DESC", (email,)).fetchall()
+        tudo = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        pagina = comida.pagina_refeicoes()
+        primeira = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        comida.pagina_refeicoes(apos=Comida.chave_refeicao(pagina[-1]))
+        seguinte = time.perf_counter() - inicio
+
+        print(f"{total:>9} refeições: tudo {tudo * 1000:9.1f} ms | primeira página {primeira * 1000:.2f} ms | "
+              f"página seguinte {seguinte * 1000:.2f} ms")
+        database.configurar_banco()
+        diretorio.cleanup()
+
+
+def benchmark_arquivamento(total=1000000, usuarios=200, meses=24, retencao_dias=90):
+    """
+    Arquivamento de ``meses`` meses de histórico com retenção de ``retencao_dias``.
+
+    Mede o tamanho do banco principal antes e depois (arquivamento + VACUUM
+    incremental), confere que totais_diarios não mudou e compara a primeira
+    página do histórico só com os dados quentes e com o arquivo; o ranking,
+    mantido por contadores, deve continuar igual depois do arquivamento.
+    """
+    import arquivamento
+
+    print(f"\n=== Arquivamento de {total:,} refeições ({meses} meses, retenção de {retencao_dias} dias) ===")
+    diretorio = preparar_banco_temporario()
+    caminho = database.pool_atual().caminho
+    hoje = datetime.date.today()
+    dias = [hoje - datetime.timedelta(days=d) for d in range(meses * 30)]
+    with database.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+            "VALUES (?, 'arroz', 100, 130, ?)",
+            ((f"usuario{i % usuarios}@teste.com", f"{dias[-1 - i * len(dias) // total]} 12:00:00")
+             for i in range(total)))
+        conn.executemany("INSERT INTO registro_refeicoes (email, refeicao, calorias, data) VALUES (?, 'almoço', 500, ?)",
+                         ((f"usuario{i % usuarios}@teste.com", str(dias[i % len(dias)])) for i in range(total // 10)))
+    database.checkpoint()
+
+    def medir(comida, **kwargs):
+        inicio = time.perf_counter()
+        for _ in range(20):
+            comida.pagina_refeicoes(**kwargs)
+        pagina = (time.perf_counter() - inicio) / 20
+        inicio = time.perf_counter()
+        ranking = comida.ranking_alimentos()
+        return pagina, time.perf_counter() - inicio, ranking
+
+    def totais():
+        with database.conexao() as conn:
+            return conn.execute("SELECT COUNT(*), ROUND(SUM(calorias), 2) FROM totais_diarios").fetchone()
+
+    comida = Comida("usuario7@teste.com")
+    tamanho_antes, totais_antes = os.path.getsize(caminho), totais()
+    pagina_antes, ranking_antes, top_antes = medir(comida)
+
+    inicio = time.perf_counter()
+    movidas = arquivamento.arquivar(retencao_dias)
+    tempo_arquivar = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    liberadas = arquivamento.compactar()
+    tempo_compactar = time.perf_counter() - inicio
+
+    tamanho_depois = os.path.getsize(caminho)
+    pagina_quente, ranking_quente, top_depois = medir(comida)
+    pagina_junta, _, _ = medir(comida, incluir_arquivo=True)
+    print(f"arquivadas: {movidas['refeicoes']:,} refeições e {movidas['registro_refeicoes']:,} registros "
+          f"em {tempo_arquivar:.1f}s | VACUUM incremental: {liberadas:,} páginas em {tempo_compactar:.1f}s")
+    print(f"banco principal: {tamanho_antes / 2 ** 20:.1f} MB -> {tamanho_depois / 2 ** 20:.1f} MB | "
+          f"arquivo: {os.path.getsize(arquivamento.caminho_arquivo()) / 2 ** 20:.1f} MB")
+    print(f"totais_diarios preservados: {'sim' if totais() == totais_antes else 'NÃO'} ({totais_antes[0]:,} dias)")
+    print(f"primeira página: {pagina_antes * 1000:.2f} ms antes | {pagina_quente * 1000:.2f} ms depois | "
+          f"{pagina_junta * 1000:.2f} ms com o arquivo")
+    print(f"ranking: {ranking_antes * 1000:.2f} ms antes | {ranking_quente * 1000:.2f} ms depois | "
+          f"preservado: {'sim' if top_depois == top_antes else 'NÃO'}")
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def benchmark_gravacao_em_grupo(n_threads=16, registros_por_thread=300,
+                                configuracoes=(None, (50, 10), (200, 50), (1000, 100)),
+                                perfis=('wal', 'padrao')):
+    """
+    Vazão e tempo até a durabilidade das refeições, com commit individual x gravação em grupo.
+
+    Cada configuração é (max_escritas, max_espera_ms) do GravadorEmGrupo; None
+    é o caminho padrão, um commit por refeição.
+    """
+    import gravacao
+
+    print(f"\n=== Gravação em grupo ({n_threads} threads x {registros_por_thread} refeições) ===")
+    for perfil in perfis:
+        for configuracao in configuracoes:
+            diretorio = preparar_banco_temporario(tamanho_pool=n_threads, perfil=perfil)
+            if configuracao:
+                gravacao.ativar_gravacao_em_grupo(*configuracao)
+            tempos = []
+
+            def trabalhador(indice):
+                comida = Comida(f"usuario{indice}@teste.com")
+                for _ in range(registros_por_thread):
+                    enviado = time.perf_counter()
+                    comida.registrar_refeicao("arroz", 100)
+                    comida.ultima_gravacao.add_done_callback(
+                        lambda _, enviado=enviado: tempos.append(time.perf_counter() - enviado))
+
+            threads = [threading.Thread(target=trabalhador, args=(i,)) for i in range(n_threads)]
+            inicio = time.perf_counter()
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            gravador = gravacao.gravador_atual()
+            grupos = None
+            if gravador:
+                gravador.descarregar()
+                grupos = gravador.grupos_gravados
+            duracao = time.perf_counter() - inicio
+            gravacao.desativar_gravacao_em_grupo()
+
+            tempos.sort()
+            total = n_threads * registros_por_thread
+            rotulo = f"grupo {configuracao[0]}/{configuracao[1]} ms" if configuracao else "commit individual"
+            print(f"{perfil:<7} {rotulo:<18} {total / duracao:9,.0f} refeições/s | "
+                  f"durável em p50 {tempos[len(tempos) // 2] * 1000:6.1f} ms, "
+                  f"p99 {tempos[int(len(tempos) * 0.99)] * 1000:6.1f} ms"
+                  + (f" | {grupos} commits" if grupos is not None else f" | {total} commits"))
+            database.configurar_banco()
+            diretorio.cleanup()
+
+
+def benchmark_servico_assincrono(clientes=500, operacoes_por_cliente=20, usuarios=100):
+    """
+    Gerador de carga contra uma instância local do ServicoNutrismart.
+
+    ``clientes`` corrotinas simultâneas fazem login e depois uma mistura de
+    operações (metade registros de refeição, o resto ranking, encerramento
+    do dia e suporte). Mede p50/p99 por operação, com commit individual e com
+    gravação em grupo.
+    """
+    import asyncio
+    import gravacao
+    from servico import ServicoNutrismart, ServicoSobrecarregado
+
+    print(f"\n=== Serviço assíncrono ({clientes} clientes x {operacoes_por_cliente} operações) ===")
+    mistura = ['registrar'] * 10 + ['ranking'] * 4 + ['encerrar_dia'] * 4 + ['suporte'] * 2
+
+    async def cliente(servico, indice, tempos, gerador):
+        email = f"usuario{indice % usuarios}@teste.com"
+        for numero in range(operacoes_por_cliente + 1):
+            operacao = 'login' if numero == 0 else gerador.choice(mistura)
+            inicio = time.perf_counter()
+            try:
+                if operacao == 'login':
+                    await servico.login(email, "senha123")
+                elif operacao == 'registrar':
+                    await servico.registrar_refeicao(email, "arroz", 100)
+                elif operacao == 'ranking':
+                    await servico.ranking_alimentos(email)
+                elif operacao == 'encerrar_dia':
+                    await servico.encerrar_dia(email)
+                else:
+                    await servico.enviar_mensagem_suporte(email, "Dúvida sobre a minha dieta")
+            except ServicoSobrecarregado:
+                tempos.setdefault('recusadas', []).append(0)
+                continue
+            tempos.setdefault(operacao, []).append(time.perf_counter() - inicio)
+
+    async def rodar():
+        servico = ServicoNutrismart()
+        tempos, gerador = {}, random.Random(7)
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(servico, i, tempos, gerador) for i in range(clientes)))
+        duracao = time.perf_counter() - inicio
+        servico.fechar()
+        return tempos, duracao
+
+    for modo in ("commit individual", "gravação em grupo"):
+        diretorio = preparar_banco_temporario()
+        with database.transacao() as conn:
+            conn.executemany(
+                "INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, "
+                "resposta_seguranca) VALUES (?, 'senha123', 70, 1.75, 'M', 'Bulking', 22.9, 'p', 'r')",
+                ((f"usuario{i}@teste.com",) for i in range(usuarios)))
+        if modo == "gravação em grupo":
+            gravacao.ativar_gravacao_em_grupo()
+
+        tempos, duracao = asyncio.run(rodar())
+        gravacao.desativar_gravacao_em_grupo()
+
+        total = sum(len(lista) for lista in tempos.values())
+        print(f"{modo}: {total / duracao:,.0f} operações/s, {len(tempos.get('recusadas', []))} recusada(s)")
+        for operacao, lista in sorted(tempos.items()):
+            if operacao == 'recusadas':
+                continue
+            lista.sort()
+            print(f"  {operacao:<13} {len(lista):6} | p50 {lista[len(lista) // 2] * 1000:7.1f} ms | "
+                  f"p99 {lista[int(len(lista) * 0.99)] * 1000:7.1f} ms")
+        database.configurar_banco()
+        diretorio.cleanup()
+
+
+def benchmark_api_http(clientes=16, requisicoes_por_cliente=200, refeicoes=2000):
+    """
+    Teste de carga da API HTTP (api.py) em localhost.
+
+    ``clientes`` threads fazem login e uma mistura de requisições (registro
+    de refeição, página do histórico, resumo do dia, ranking e busca de
+    alimentos), reaproveitando a conexão (keep-alive) ou abrindo uma nova a
+    cada requisição. Mostra também o tamanho de uma página grande do
+    histórico com e sem gzip.
+    """
+    import http.client
+    import json
+    from api import iniciar_servidor
+
+    print(f"\n=== API HTTP ({clientes} clientes x {requisicoes_por_cliente} requisições) ===")
+    diretorio = preparar_banco_temporario()
+    with database.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, "
+            "resposta_seguranca) VALUES (?, 'senha123', 70, 1.75, 'F', 'Low carb', 22.9, 'p', 'r')",
+            ((f"usuario{i}@teste.com",) for i in range(clientes)))
+        conn.executemany(
+            "INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+            "VALUES (?, 'arroz', 100, 130, ?)",
+            ((f"usuario{i % clientes}@teste.com", f"2024-01-{1 + i % 28:02d} 12:00:00")
+             for i in range(refeicoes * clientes)))
+    servidor = iniciar_servidor(('127.0.0.1', 0))
+    porta = servidor.server_address[1]
+
+    def requisitar(conexao, metodo, caminho, corpo=None, token=None, gzip_aceito=True):
+        cabecalhos = {'Accept-Encoding': 'gzip'} if gzip_aceito else {}
+        if token:
+            cabecalhos['Authorization'] = f"Bearer {token}"
+        dados = None
+        if corpo is not None:
+            dados = json.dumps(corpo)
+            cabecalhos['Content-Type'] = 'application/json'
+        conexao.request(metodo, caminho, body=dados, headers=cabecalhos)
+        resposta = conexao.getresponse()
+        conteudo = resposta.read()
+        if resposta.status >= 400:
+            raise RuntimeError(f"{metodo} {caminho}: {resposta.status} {conteudo[:80]}")
+        return resposta, conteudo
+
+    conexao = http.client.HTTPConnection('127.0.0.1', porta)
+    _, conteudo = requisitar(conexao, 'POST', '/login', {'email': 'usuario0@teste.com', 'senha': 'senha123'})
+    token = json.loads(conteudo)['token']
+    for gzip_aceito in (False, True):
+        resposta, conteudo = requisitar(conexao, 'GET', '/refeicoes?limite=1000', token=token,
+                                        gzip_aceito=gzip_aceito)
+        print(f"histórico (1000 refeições) {'com gzip' if gzip_aceito else 'sem gzip'}: {len(conteudo):,} bytes")
+    conexao.close()
+
+    rotas = [('POST', '/refeicoes', {'alimento': 'arroz', 'quantidade': 150})] * 3 + [
+        ('GET', '/refeicoes?limite=100', None), ('GET', '/dia', None),
+        ('GET', '/ranking', None), ('GET', '/alimentos?busca=arr', None)]
+
+    for modo in ("keep-alive", "conexão nova por requisição"):
+        tempos, erros = [], []
+
+        def cliente(indice):
+            gerador = random.Random(indice)
+            conexao = http.client.HTTPConnection('127.0.0.1', porta)
+            _, conteudo = requisitar(conexao, 'POST', '/login',
+                                     {'email': f"usuario{indice}@teste.com", 'senha': 'senha123'})
+            token = json.loads(conteudo)['token']
+            for _ in range(requisicoes_por_cliente):
+                metodo, caminho, corpo = gerador.choice(rotas)
+                if modo != "keep-alive":
+                    conexao.close()
+                    conexao = http.client.HTTPConnection('127.0.0.1', porta)
+                inicio = time.perf_counter()
+                try:
+                    requisitar(conexao, metodo, caminho, corpo, token)
+                except Exception as erro:
+                    erros.append(erro)
+                    continue
+                tempos.append(time.perf_counter() - inicio)
+            conexao.close()
+
+        threads = [threading.Thread(target=cliente, args=(i,)) for i in range(clientes)]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - inicio
+        tempos.sort()
+        print(f"{modo:<28} {len(tempos) / duracao:7,.0f} req/s | p50 {tempos[len(tempos) // 2] * 1000:6.2f} ms | "
+              f"p99 {tempos[int(len(tempos) * 0.99)] * 1000:6.2f} ms | {len(erros)} erro(s)")
+
+    servidor.shutdown()
+    servidor.server_close()
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def _processo_contencao(caminho, perfil, papel, indice, duracao, resultados):
+    """Corpo de cada processo do benchmark de contenção: lê ou grava até acabar o tempo."""
+    database.configurar_banco(caminho, 1, perfil)
+    gerador = random.Random(indice)
+    operacoes, erros, tempos = 0, 0, []
+    fim = time.perf_counter() + duracao
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        try:
+            if papel == 'leitor':
+                Comida(f"usuario{gerador.randrange(100)}@teste.com").pagina_refeicoes()
+            else:
+                sucesso, _ = Comida(f"escritor{indice}@teste.com").registrar_refeicao("arroz", 100)
+                if not sucesso:
+                    erros += 1
+                    continue
+        except Exception:
+            erros += 1
+            continue
+        tempos.append(time.perf_counter() - inicio)
+        operacoes += 1
+    tempos.sort()
+    p99 = tempos[int(len(tempos) * 0.99)] if tempos else 0.0
+    resultados.put((papel, operacoes, erros, p99))
+    database.configurar_banco()
+
+
+def benchmark_contencao_processos(leitores=4, escritores=2, duracao=3.0, refeicoes=50000):
+    """
+    Leituras e escritas simultâneas de vários processos no mesmo arquivo.
+
+    Roda ``leitores`` processos abrindo a primeira página do histórico e
+    ``escritores`` processos registrando refeições (um commit cada), primeiro
+    com os valores de fábrica do SQLite e depois com o perfil WAL.
+    """
+    import multiprocessing
+
+    print(f"\n=== Contenção entre processos ({leitores} leitores + {escritores} escritores, {duracao:.0f}s) ===")
+    contexto = multiprocessing.get_context('spawn')
+    for perfil in ('padrao', 'wal'):
+        diretorio = preparar_banco_temporario(perfil=perfil)
+        caminho = database.pool_atual().caminho
+        with database.transacao() as conn:
+            conn.executemany(
+                "INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+                "VALUES (?, 'arroz', 100, 130, ?)",
+                ((f"usuario{i % 100}@teste.com", f"2024-01-{1 + i % 28:02d} 12:00:00") for i in range(refeicoes)))
+        database.configurar_banco()
+
+        resultados = contexto.Queue()
+        papeis = ['leitor'] * leitores + ['escritor'] * escritores
+        processos = [contexto.Process(target=_processo_contencao,
+                                      args=(caminho, perfil, papel, indice, duracao, resultados))
+                     for indice, papel in enumerate(papeis)]
+        for processo in processos:
+            processo.start()
+        medidas = [resultados.get() for _ in processos]
+        for processo in processos:
+            processo.join()
+
+        for papel in ('leitor', 'escritor'):
+            do_papel = [m for m in medidas if m[0] == papel]
+            operacoes = sum(m[1] for m in do_papel)
+            erros = sum(m[2] for m in do_papel)
+            p99 = max(m[3] for m in do_papel)
+            print(f"{perfil:<7} {papel + 'es':<10} {operacoes / duracao:9,.0f} op/s | "
+                  f"p99 {p99 * 1000:7.1f} ms | {erros} erro(s)")
+        diretorio.cleanup()
+
+
+def _processo_escrita_fragmentada(diretorio, fragmentos, perfil, indice, usuarios, largada, duracao, resultados):
+    """Corpo de cada processo do benchmark de fragmentação: registra refeições de vários usuários."""
+    database.configurar_banco(os.path.join(diretorio, 'bench.db'), 1, perfil)
+    database.configurar_fragmentos(fragmentos, diretorio, tamanho=1, perfil=perfil)
+    gerador = random.Random(indice)
+    escritas, erros = 0, 0
+    largada.wait()
+    fim = time.perf_counter() + duracao
+    while time.perf_counter() < fim:
+        sucesso, _ = Comida(f"usuario{gerador.randrange(usuarios)}@teste.com").registrar_refeicao("arroz", 100)
+        if sucesso:
+            escritas += 1
+        else:
+            erros += 1
+    resultados.put((escritas, erros))
+    database.configurar_fragmentos(0)
+    database.configurar_banco()
+
+
+def benchmark_escrita_fragmentada(escritores=8, duracao=3.0, usuarios=1000, quantidades=(0, 1, 2, 4, 8),
+                                  perfis=('wal', 'padrao')):
+    """
+    Vazão de gravação de vários processos com 1, 2, 4 e 8 fragmentos.
+
+    ``escritores`` processos registram refeições (um commit cada) de usuários
+    aleatórios; 0 é o banco único, sem fragmentação. Como cada fragmento tem
+    seu próprio lock de escrita, a vazão total deve crescer com o número de
+    fragmentos até esbarrar no número de núcleos ou no disco. Com o perfil
+    'padrao' (fsync a cada commit) o ganho aparece mesmo com poucos núcleos;
+    com 'wal' a gravação é limitada pela CPU e só escala com mais núcleos.
+    """
+    import multiprocessing
+
+    print(f"\n=== Escrita fragmentada ({escritores} processos escritores, {duracao:.0f}s) ===")
+    contexto = multiprocessing.get_context('spawn')
+    for perfil in perfis:
+        for quantidade in quantidades:
+            diretorio = preparar_banco_temporario(tamanho_pool=1, perfil=perfil)
+            database.configurar_fragmentos(quantidade, diretorio.name, tamanho=1, perfil=perfil)
+            database.configurar_fragmentos(0)
+            database.configurar_banco()
+
+            largada, resultados = contexto.Barrier(escritores + 1), contexto.Queue()
+            processos = [contexto.Process(target=_processo_escrita_fragmentada,
+                                          args=(diretorio.name, quantidade, perfil, indice, usuarios, largada,
+                                                duracao, resultados))
+                         for indice in range(escritores)]
+            for processo in processos:
+                processo.start()
+            largada.wait()
+            medidas = [resultados.get() for _ in processos]
+            for processo in processos:
+                processo.join()
+
+            escritas = sum(m[0] for m in medidas)
+            erros = sum(m[1] for m in medidas)
+            rotulo = "banco único" if not quantidade else f"{quantidade} fragmento(s)"
+            print(f"{perfil:<7} {rotulo:<15} {escritas / duracao:9,.0f} escritas/s | {erros} erro(s)")
+            diretorio.cleanup()
+
+def benchmark_backup_online(total=500000, perfis=('wal', 'padrao'), passos=((256, 0.002), (-1, 0))):
+    """
+    Vazão do backup online (MB/s) e efeito dele na latência de registrar_refeicao.
+
+    Uma thread registra refeições sem parar enquanto o backup roda em passos
+    pacejados e depois de uma vez só; a linha "sem backup" é a referência.
+    Ao final, mede um backup incremental e a restauração com verificação.
+    """
+    import backup
+
+    print(f"\n=== Backup online ({total:,} refeições) ===")
+    for perfil in perfis:
+        diretorio = preparar_banco_temporario(perfil=perfil)
+        caminho = database.pool_atual().caminho
+        with database.transacao() as conn:
+            conn.executemany(
+                "INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+                "VALUES (?, 'arroz', 100, 130, ?)",
+                ((f"usuario{i % 100}@teste.com", f"2024-01-{1 + i % 28:02d} 12:00:00") for i in range(total)))
+        database.checkpoint()
+        pasta = os.path.join(diretorio.name, 'backups')
+
+        def medir_latencia(tarefa):
+            tempos, parar = [], threading.Event()
+
+            def escrever():
+                comida = Comida("escritor@teste.com")
+                while not parar.is_set():
+                    inicio = time.perf_counter()
+                    comida.registrar_refeicao("arroz", 100)
+                    tempos.append(time.perf_counter() - inicio)
+
+            escritor = threading.Thread(target=escrever)
+            escritor.start()
+            inicio = time.perf_counter()
+            resultado = tarefa()
+            duracao = time.perf_counter() - inicio
+            parar.set()
+            escritor.join()
+            tempos.sort()
+            return resultado, duracao, tempos
+
+        def linha(rotulo, tempos, extra=""):
+            print(f"{perfil:<7} {rotulo:<24} registrar_refeicao p50 {tempos[len(tempos) // 2] * 1000:6.2f} ms | "
+                  f"p99 {tempos[int(len(tempos) * 0.99)] * 1000:7.2f} ms | máx {tempos[-1] * 1000:7.1f} ms{extra}")
+
+        _, _, tempos = medir_latencia(lambda: time.sleep(2.0))
+        linha("sem backup", tempos)
+        for paginas, pausa in passos:
+            manifesto, duracao, tempos = medir_latencia(
+                lambda: backup.fazer_backup(caminho, pasta, paginas_por_passo=paginas, pausa=pausa))
+            with open(manifesto, encoding='utf-8') as arquivo:
+                dados = json.load(arquivo)
+            mb = dados['bytes_banco'] / 2 ** 20
+            rotulo = "backup de uma vez" if paginas < 0 else f"backup {paginas} pág/passo"
+            linha(rotulo, tempos, f" | cópia {mb / dados['segundos_copia']:5.0f} MB/s, "
+                                  f"{mb:.0f} MB -> {dados['bytes_gravados'] / 2 ** 20:.1f} MB gz em {duracao:.1f}s")
+
+        manifesto, duracao, tempos = medir_latencia(lambda: backup.fazer_backup(caminho, pasta, incremental=True))
+        with open(manifesto, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+        linha("backup incremental", tempos, f" | {dados['paginas_gravadas']} de {dados['paginas']} páginas, "
+                                            f"{dados['bytes_gravados'] / 2 ** 10:.0f} KB em {duracao:.1f}s")
+
+        inicio = time.perf_counter()
+        restaurado = os.path.join(diretorio.name, 'restaurado.db')
+        problemas = backup.verificar(restaurado, backup.restaurar(manifesto, restaurado))
+        print(f"{perfil:<7} restauração + verificação em {time.perf_counter() - inicio:.1f}s: "
+              f"{'ok' if not problemas else problemas}")
+        database.configurar_banco()
+        diretorio.cleanup()
+
+
+def benchmark_exportacao_colunar(total=500000, usuarios=1000, meses=12, novas=10000):
+    """
+    Exportação colunar (.npy por mês) contra ler o histórico inteiro com fetchall.
+
+    Compara linhas/s e o pico de memória (tracemalloc) das duas leituras,
+    mostra o tamanho em disco da exportação e mede uma exportação
+    incremental depois de ``novas`` refeições.
+    """
+    import tracemalloc
+    import exportacao
+
+    print(f"\n=== Exportação colunar ({total:,} refeições, {meses} meses) ===")
+    diretorio = preparar_banco_temporario()
+    with database.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+            "VALUES (?, 'arroz', 100, 130, ?)",
+            ((f"usuario{i % usuarios}@teste.com", f"2024-{1 + i * meses // total:02d}-{1 + i % 28:02d} 12:00:00")
+             for i in range(total)))
+    database.checkpoint()
+    pasta = os.path.join(diretorio.name, 'exportacao')
+
+    def medir(rotulo, tarefa):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        linhas = tarefa()
+        duracao = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{rotulo:<26} {linhas:>9,} linhas em {duracao:5.2f}s ({linhas / duracao:>9,.0f} linhas/s) | "
+              f"pico de memória {pico / 2 ** 20:6.1f} MB")
+
+    def fetchall():
+        with database.conexao() as conn:
+            return len(conn.execute(
+                "SELECT r.id, r.data, r.email_usuario, r.alimento, r.quantidade_gramas, r.calorias, "
+                "a.proteinas, a.carboidratos, a.gorduras FROM refeicoes r JOIN alimentos a ON a.nome = r.alimento"
+            ).fetchall())
+
+    medir("fetchall do join", fetchall)
+    medir("exportação completa", lambda: exportacao.exportar_refeicoes(pasta, completo=True)['exportadas'])
+    bytes_exportados = sum(os.path.getsize(os.path.join(raiz, nome))
+                           for raiz, _, nomes in os.walk(pasta) for nome in nomes)
+    print(f"banco: {os.path.getsize(database.pool_atual().caminho) / 2 ** 20:.1f} MB | "
+          f"exportação: {bytes_exportados / 2 ** 20:.1f} MB em .npy")
+
+    comida = Comida("usuario1@teste.com")
+    comida.registrar_refeicoes_em_lote([("arroz", 100, None)] * novas)
+    medir("exportação incremental", lambda: exportacao.exportar_refeicoes(pasta)['exportadas'])
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def benchmark_importacao_alimentos(total=50000, alterados=0.01, amostra=2000):
+    """
+    Importação de uma tabela de composição com ``total`` alimentos (CSV no formato da TACO).
+
+    Compara com o cadastro item a item (uma transação por alimento, como no
+    menu do administrador) e mede a reimportação da mesma tabela sem
+    mudanças e com ``alterados`` dos alimentos modificados.
+    """
+    import csv
+    import importacao
+    from catalogo import catalogo
+
+    print(f"\n=== Importação de tabela de alimentos ({total:,} itens) ===")
+    diretorio = preparar_banco_temporario()
+    caminho = os.path.join(diretorio.name, 'tabela.csv')
+    gerador = random.Random(42)
+    alimentos = [(f"Alimento {i}, cozido", gerador.uniform(20, 600), gerador.uniform(0, 30),
+                  gerador.uniform(0, 40), gerador.uniform(0, 20)) for i in range(total)]
+
+    def gravar_tabela():
+        with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+            escritor = csv.writer(arquivo, delimiter=';')
+            escritor.writerow(['Número', 'Descrição dos alimentos', 'Energia (kcal)', 'Energia (kJ)',
+                               'Proteína (g)', 'Carboidrato (g)', 'Lipídeos (g)'])
+            for i, (nome, calorias, proteinas, carboidratos, gorduras) in enumerate(alimentos):
+                escritor.writerow([i, nome] + [f"{valor:.1f}".replace('.', ',') for valor in
+                                              (calorias, calorias * 4.184, proteinas, carboidratos, gorduras)])
+
+    inicio = time.perf_counter()
+    for nome, calorias, *_ in alimentos[:amostra]:
+        with database.transacao() as conn:
+            conn.execute("INSERT INTO alimentos (nome, calorias) VALUES (?, ?)", (f"item {nome}", calorias))
+        database.replicar_catalogo()
+        catalogo.invalidar()
+    duracao = time.perf_counter() - inicio
+    print(f"item a item:            {amostra:>7,} alimentos em {duracao:5.2f}s ({amostra / duracao:>8,.0f} linhas/s)")
+
+    def importar(rotulo):
+        resultado = importacao.importar_alimentos(caminho)
+        print(f"{rotulo:<23} {importacao.resumo_importacao(resultado)}")
+
+    gravar_tabela()
+    importar("importação completa:")
+    importar("reimportação igual:")
+    for i in gerador.sample(range(total), int(total * alterados)):
+        alimentos[i] = alimentos[i][:1] + (alimentos[i][1] + 10,) + alimentos[i][2:]
+    gravar_tabela()
+    importar(f"{alterados:.0%} alterados:")
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def benchmark_ranking(total=500000, usuarios=1000, alimentos=2000, dias=730, consultas=200):
+    """
+    Ranking pelos contadores de ranking.py x agregação do histórico (GROUP BY).
+
+    Mede o custo dos triggers na gravação (a mesma carga com e sem eles), a
+    latência do top-10 por usuário e geral, no histórico todo e em 30 dias, e
+    o tempo de avançar as janelas na virada do dia.
+    """
+    import ranking
+
+    print(f"\n=== Ranking de alimentos ({total:,} refeições, {usuarios} usuários, {alimentos} alimentos) ===")
+    gerador = random.Random(42)
+    hoje = datetime.date.today()
+    refeicoes = [(f"usuario{gerador.randrange(usuarios)}@teste.com", f"alimento{int(gerador.paretovariate(1.2)) % alimentos}",
+                  gerador.randint(20, 400), gerador.uniform(20, 800),
+                  f"{hoje - datetime.timedelta(days=gerador.randrange(dias))} 12:00:00") for _ in range(total)]
+
+    def carregar():
+        inicio = time.perf_counter()
+        with database.transacao() as conn:
+            conn.executemany("INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+                             "VALUES (?, ?, ?, ?, ?)", refeicoes)
+        return total / (time.perf_counter() - inicio)
+
+    diretorio = preparar_banco_temporario()
+    with database.transacao() as conn:
+        for gatilho in ('inserida', 'excluida', 'alterada'):
+            conn.execute(f"DROP TRIGGER trg_ranking_refeicao_{gatilho}")
+    sem_contadores = carregar()
+    database.configurar_banco()
+    diretorio.cleanup()
+
+    diretorio = preparar_banco_temporario()
+    com_contadores = carregar()
+    print(f"gravação: {sem_contadores:,.0f} refeições/s sem contadores | {com_contadores:,.0f} com contadores")
+
+    def medir(funcao, repeticoes=consultas):
+        inicio = time.perf_counter()
+        for i in range(repeticoes):
+            funcao(f"usuario{i % usuarios}@teste.com")
+        return (time.perf_counter() - inicio) / repeticoes * 1000
+
+    def agregado(email, janela):
+        filtro = "AND data >= ?" if janela else ""
+        parametros = [str(hoje - datetime.timedelta(days=janela - 1))] if janela else []
+        with database.conexao() as conn:
+            if email is None:
+                return conn.execute(f"SELECT alimento, COUNT(*) AS n FROM refeicoes WHERE 1 {filtro} "
+                                    f"GROUP BY alimento ORDER BY n DESC LIMIT 10", parametros).fetchall()
+            return conn.execute(f"SELECT alimento, SUM(quantidade_gramas) AS g FROM refeicoes "
+                                f"WHERE email_usuario = ? {filtro} GROUP BY alimento ORDER BY g DESC LIMIT 10",
+                                [email] + parametros).fetchall()
+
+    for janela in (0, 30):
+        rotulo = "histórico todo" if janela == 0 else f"{janela} dias"
+        usuario_sql = medir(lambda email: agregado(email, janela))
+        usuario_contadores = medir(lambda email: ranking.ranking_usuario(email, janela=janela))
+        # O GROUP BY geral varre a tabela toda: poucas repetições bastam
+        geral_sql = medir(lambda email: agregado(None, janela), repeticoes=5)
+        geral_contadores = medir(lambda email: ranking.ranking_geral(janela=janela))
+        print(f"{rotulo:<15} top-10 do usuário: {usuario_sql:7.2f} ms GROUP BY | {usuario_contadores:.3f} ms contadores"
+              f" || geral: {geral_sql:7.1f} ms GROUP BY | {geral_contadores:.3f} ms contadores")
+
+    inicio = time.perf_counter()
+    ranking.rolar_janelas(hoje + datetime.timedelta(days=1))
+    print(f"virada do dia (avançar as janelas): {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def benchmark_analise_nutricional(anos=5, refeicoes_por_dia=4, usuarios=500, repeticoes=20):
+    """
+    Métricas de analise.py x agregações SQL sobre refeicoes, num histórico de ``anos`` anos.
+
+    Mede a análise completa de um usuário (médias de 7/30/90 dias, adesão,
+    padrão semanal, dias atípicos e tendência) contra as consultas GROUP BY
+    que calculariam só as médias e o padrão semanal, e a passada em lote
+    por ``usuarios`` usuários com o mesmo histórico.
+    """
+    import analise
+
+    dias = anos * 365
+    print(f"\n=== Análise nutricional ({anos} anos, {refeicoes_por_dia} refeições/dia, {usuarios} usuários) ===")
+    gerador = random.Random(42)
+    hoje = datetime.date.today()
+    diretorio = preparar_banco_temporario()
+    email = "usuario0@teste.com"
+    with database.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, "
+            "resposta_seguranca) VALUES (?, 'senha123', 70, 1.75, 'M', 'Hiperproteica', 22.9, 'p', 'r')",
+            ((f"usuario{i}@teste.com",) for i in range(usuarios)))
+        conn.executemany("INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+                         "VALUES (?, 'arroz', ?, ?, ?)",
+                         ((email, gramas, gramas * 1.3, f"{hoje - datetime.timedelta(days=dia)} {8 + 4 * n:02d}:00:00")
+                          for dia in range(dias) if gerador.random() < 0.9
+                          for n in range(refeicoes_por_dia) for gramas in (gerador.uniform(100, 600),)))
+        # Os demais usuários recebem os totais diários prontos: a análise só lê totais_diarios
+        conn.executemany("INSERT INTO totais_diarios VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         ((f"usuario{i}@teste.com", str(hoje - datetime.timedelta(days=dia)),
+                           calorias, calorias * 0.02, calorias * 0.21, calorias * 0.002, refeicoes_por_dia)
+                          for i in range(1, usuarios) for dia in range(dias) if gerador.random() < 0.9
+                          for calorias in (gerador.gauss(2100, 350),)))
+
+    def agregado():
+        with database.conexao() as conn:
+            medias = [conn.execute(
+                "SELECT AVG(c), AVG(p), AVG(cb), AVG(g) FROM ("
+                "  SELECT SUM(r.calorias) AS c, SUM(a.proteinas * r.quantidade_gramas / 100) AS p,"
+                "         SUM(a.carboidratos * r.quantidade_gramas / 100) AS cb,"
+                "         SUM(a.gorduras * r.quantidade_gramas / 100) AS g"
+                "  FROM refeicoes r JOIN alimentos a ON a.nome = r.alimento"
+                "  WHERE r.email_usuario = ? AND r.data >= ? GROUP BY substr(r.data, 1, 10))",
+                (email, str(hoje - datetime.timedelta(days=janela - 1)))).fetchone()
+                for janela in analise.JANELAS_ANALISE]
+            semana = conn.execute(
+                "SELECT s, AVG(c) FROM (SELECT strftime('%w', data) AS s, SUM(calorias) AS c FROM refeicoes "
+                "WHERE email_usuario = ? GROUP BY substr(data, 1, 10)) GROUP BY s", (email,)).fetchall()
+        return medias, semana
+
+    def medir(funcao):
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            resultado = funcao()
+        return resultado, (time.perf_counter() - inicio) / repeticoes * 1000
+
+    (medias, _), tempo_sql = medir(agregado)
+    metricas, tempo_analise = medir(lambda: analise.analisar_usuario(email))
+    for janela, (calorias, *_) in zip(metricas['janelas'], medias):
+        assert abs(janela['calorias'] - calorias) < 0.1, (janela, calorias)
+    print(f"um usuário: {tempo_sql:.1f} ms GROUP BY (só médias e dia da semana) | "
+          f"{tempo_analise:.1f} ms analise.py (todas as métricas)")
+
+    inicio = time.perf_counter()
+    analisados = sum(1 for _ in analise.analisar_todos())
+    decorrido = time.perf_counter() - inicio
+    print(f"lote: {analisados} usuários em {decorrido:.2f} s ({decorrido / analisados * 1000:.1f} ms/usuário)")
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def benchmark_fechamento_noturno(usuarios=200000, processos=(1, 2, 4), amostra=2000):
+    """
+    Fechamento do dia de todos os usuários (fechamento.py) x ``resumo_do_dia`` usuário a usuário.
+
+    Mede o fechamento com diferentes números de processos e confere a
+    retomada: um fechamento interrompido depois da primeira transação é
+    completado por uma segunda execução, com o mesmo resultado do
+    ``resumo_do_dia`` de cada usuário.
+    """
+    import fechamento
+    from alimentacao import Registros
+
+    print(f"\n=== Fechamento noturno ({usuarios:,} usuários, {os.cpu_count()} CPU(s)) ===")
+    gerador = random.Random(42)
+    ontem = datetime.date.today() - datetime.timedelta(days=1)
+    diretorio = preparar_banco_temporario()
+    with database.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, "
+            "resposta_seguranca) VALUES (?, 'senha123', ?, 1.75, 'F', ?, 22.9, 'p', 'r')",
+            ((f"usuario{i}@teste.com", gerador.uniform(50, 110),
+              gerador.choice(list(alimentacao.METAS_CALORICAS_POR_KG) + ['Outra'])) for i in range(usuarios)))
+        # Totais do dia prontos: o fechamento só lê totais_diarios
+        conn.executemany("INSERT INTO totais_diarios VALUES (?, ?, ?, ?, ?, ?, ?)",
+                         ((f"usuario{i}@teste.com", str(ontem), calorias, calorias * 0.05, calorias * 0.12,
+                           calorias * 0.03, gerador.randint(1, 6))
+                          for i in range(usuarios) if gerador.random() < 0.8
+                          for calorias in (gerador.uniform(800, 3500),)))
+
+    emails = [f"usuario{i}@teste.com" for i in gerador.sample(range(usuarios), amostra)]
+    inicio = time.perf_counter()
+    esperados = {email: Registros(email).resumo_do_dia(ontem) for email in emails}
+    por_usuario = (time.perf_counter() - inicio) / amostra
+    print(f"resumo_do_dia usuário a usuário: {por_usuario * 1000:.3f} ms/usuário "
+          f"(~{por_usuario * usuarios:.1f} s para todos)")
+
+    for quantidade in processos:
+        resultado = fechamento.fechar_dia(ontem, processos=quantidade, refazer=True)
+        print(f"{quantidade} processo(s): {resultado['segundos']:.2f} s "
+              f"({resultado['resumos'] / resultado['segundos']:,.0f} usuários/s)")
+
+    class Interrompido(Exception):
+        pass
+
+    def interromper(total):
+        raise Interrompido
+
+    with database.transacao() as conn:
+        conn.execute("DELETE FROM resumos_diarios")
+    try:
+        fechamento.fechar_dia(ontem, processos=processos[-1], ao_progredir=interromper)
+    except Interrompido:
+        pass
+    with database.conexao() as conn:
+        parciais = conn.execute("SELECT COUNT(*) FROM resumos_diarios").fetchone()[0]
+    retomada = fechamento.fechar_dia(ontem, processos=processos[-1])
+    assert parciais + retomada['resumos'] == usuarios, (parciais, retomada)
+    with database.conexao() as conn:
+        for email, esperado in esperados.items():
+            meta, calorias, refeicoes, situacao = conn.execute(
+                "SELECT meta_calorias, calorias, refeicoes, situacao FROM resumos_diarios "
+                "WHERE email_usuario = ? AND dia = ?", (email, str(ontem))).fetchone()
+            assert (meta, refeicoes, situacao) == (esperado['meta_calorias'], esperado['refeicoes'],
+                                                   esperado['situacao']), (email, esperado)
+            assert round(calorias, 2) == esperado['calorias'], (email, esperado)
+    print(f"retomada: {parciais:,} resumos antes da interrupção + {retomada['resumos']:,} na segunda execução; "
+          f"{fechamento.resumo_fechamento(ontem)}")
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def benchmark_plano_alimentar(alimentos=800, usuarios=1000, dias=7):
+    """
+    Planos alimentares de cardapio.py: tempo de uma semana, desvio das metas e lote de usuários.
+
+    O catálogo sintético mistura alimentos proteicos, ricos em carboidratos,
+    gordurosos, laticínios e vegetais, com calorias coerentes com os macros.
+    Compara o desvio com o de refeições de 3 alimentos sorteados em porções
+    fixas de 100 g, como as recomendações atuais.
+    """
+    import cardapio
+    from catalogo import catalogo
+
+    print(f"\n=== Plano alimentar ({alimentos} alimentos, {usuarios} usuários, {dias} dias) ===")
+    gerador = random.Random(42)
+    perfis = (  # faixas de (proteínas, carboidratos, gorduras) por 100 g
+        ((18, 32), (0, 2), (1, 20)), ((2, 12), (15, 80), (0, 6)), ((0, 20), (0, 20), (40, 100)),
+        ((3, 25), (2, 10), (1, 30)), ((1, 4), (2, 12), (0, 1)))
+    catalogo_sintetico = []
+    for i in range(alimentos):
+        proteinas, carboidratos, gorduras = (gerador.uniform(*faixa) for faixa in perfis[i % len(perfis)])
+        catalogo_sintetico.append((f"alimento{i}", round(4 * proteinas + 4 * carboidratos + 9 * gorduras, 1),
+                                   proteinas, carboidratos, gorduras))
+    diretorio = preparar_banco_temporario()
+    with database.transacao() as conn:
+        conn.execute("DELETE FROM alimentos")
+        conn.executemany("INSERT INTO alimentos (nome, calorias, proteinas, carboidratos, gorduras) "
+                         "VALUES (?, ?, ?, ?, ?)", catalogo_sintetico)
+        dietas = list(cardapio.DIVISAO_MACROS_POR_DIETA)
+        conn.executemany(
+            "INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, "
+            "resposta_seguranca) VALUES (?, 'senha123', ?, 1.75, 'F', ?, 22.9, 'p', 'r')",
+            ((f"usuario{i}@teste.com", gerador.uniform(50, 110), dietas[i % len(dietas)]) for i in range(usuarios)))
+    catalogo.invalidar()
+
+    def desvios(plano):
+        metas = plano['metas']
+        return {nutriente: sum(abs(dia['totais'][nutriente] - meta) / meta for dia in plano['dias']) / len(plano['dias'])
+                for nutriente, meta in metas.items()}
+
+    for dieta in dietas:
+        inicio = time.perf_counter()
+        plano = cardapio.gerar_plano(dieta, 70, dias=dias, semente=1)
+        decorrido = (time.perf_counter() - inicio) * 1000
+        metas = plano['metas']
+        sorteado = {'dias': [], 'metas': metas}
+        for _ in range(dias):
+            itens = [catalogo_sintetico[i] for i in gerador.sample(range(alimentos), 3 * len(cardapio.REFEICOES_DO_PLANO))]
+            sorteado['dias'].append({'totais': {nutriente: sum(item[j] for item in itens) for j, nutriente in
+                                                enumerate(('calorias', 'proteinas', 'carboidratos', 'gorduras'), 1)}})
+        otimizado, aleatorio = desvios(plano), desvios(sorteado)
+        print(f"{dieta:<14} {decorrido:6.1f} ms/semana | desvio médio diário: "
+              + ', '.join(f"{nutriente[:4]} {otimizado[nutriente]:5.1%} (sorteio {aleatorio[nutriente]:5.1%})"
+                          for nutriente in metas))
+
+    inicio = time.perf_counter()
+    gerados = sum(1 for _ in cardapio.gerar_planos(dias))
+    decorrido = time.perf_counter() - inicio
+    print(f"lote: {gerados} planos de {dias} dias em {decorrido:.1f} s ({decorrido / gerados * 1000:.1f} ms/plano)")
+    database.configurar_banco()
+    catalogo.invalidar()
+    diretorio.cleanup()
+
+
+def benchmark_recomendacoes(tamanhos=(50, 5000, 50000), consultas=2000, refeicoes_recentes=12):
+    """
+    Sugestões de alimentos por recomendacao.py conforme cresce a lista de cada dieta.
+
+    Mede o sorteio sobre o índice em memória (com e sem filtro de macros)
+    e a chamada completa, que também lê os alimentos consumidos nos últimos
+    dias; compara com o caminho antigo, que montava o dicionário de listas
+    e chamava random.sample a cada exibição.
+    """
+    import recomendacao
+    from catalogo import catalogo
+
+    print(f"\n=== Recomendações de alimentos ({consultas} consultas) ===")
+    gerador = random.Random(42)
+    hoje = datetime.datetime.now()
+    for tamanho in tamanhos:
+        diretorio = preparar_banco_temporario()
+        nomes = [f"alimento{i}" for i in range(tamanho)]
+        with database.transacao() as conn:
+            conn.executemany("INSERT INTO alimentos (nome, calorias, proteinas, carboidratos, gorduras) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             ((nome, gerador.uniform(10, 800), gerador.uniform(0, 40), gerador.uniform(0, 80),
+                               gerador.uniform(0, 60)) for nome in nomes))
+            conn.execute("INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, "
+                         "resposta_seguranca) VALUES ('usuario@teste.com', 'senha123', 70, 1.75, 'F', 'Low carb', "
+                         "22.9, 'p', 'r')")
+            conn.executemany("INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+                             "VALUES ('usuario@teste.com', ?, 100, 100, ?)",
+                             ((gerador.choice(nomes), hoje.strftime("%Y-%m-%d %H:%M:%S"))
+                              for _ in range(refeicoes_recentes)))
+        catalogo.invalidar()
+        recomendacao.associar_alimentos("Low carb", nomes)
+
+        def medir(funcao):
+            inicio = time.perf_counter()
+            for _ in range(consultas):
+                funcao()
+            return (time.perf_counter() - inicio) / consultas * 1e6
+
+        inicio = time.perf_counter()
+        indice = recomendacao.indice_recomendacoes()
+        montagem = (time.perf_counter() - inicio) * 1000
+        consumidos = recomendacao.consumidos_recentemente('usuario@teste.com')
+        antigo = medir(lambda: random.sample(list({"Low carb": list(nomes)}["Low carb"]), k=4))
+        sorteio = medir(lambda: indice.sortear("Low carb", 4, consumidos))
+        filtrado = medir(lambda: indice.sortear("Low carb", 4, consumidos, (300, 10, None, None)))
+        completo = medir(lambda: recomendacao.alimentos_recomendados('usuario@teste.com'))
+        print(f"{tamanho:>6} alimentos na dieta: índice montado em {montagem:6.1f} ms | dicionário + sample "
+              f"{antigo:8.1f} µs | sorteio {sorteio:5.1f} µs | com filtro {filtrado:5.1f} µs | "
+              f"chamada completa {completo:6.1f} µs")
+        database.configurar_banco()
+        catalogo.invalidar()
+        diretorio.cleanup()
+
+
+def benchmark_migracao_legada(total=1000000, tamanhos_lote=(database.TAMANHO_LOTE_MIGRACAO, None)):
+    """
+    Atualiza um banco anterior à coluna calorias enquanto outra thread continua gravando.
+
+    Compara o cálculo das calorias antigas (migração 3) em lotes com o mesmo cálculo numa
+    única transação (``None``): mede a duração da migração e a maior espera da
+    thread de escrita pelo lock do banco.
+    """
+    import sqlite3
+
+    print(f"\n=== Migração de um banco legado ({total} refeições) ===")
+    for tamanho_lote in tamanhos_lote:
+        diretorio = tempfile.TemporaryDirectory()
+        caminho = os.path.join(diretorio.name, 'legado.db')
+        con = sqlite3.connect(caminho)
+        con.executescript("""
+            CREATE TABLE alimentos (nome TEXT PRIMARY KEY, calorias REAL NOT NULL, proteinas REAL DEFAULT 0,
+                                    carboidratos REAL DEFAULT 0, gorduras REAL DEFAULT 0);
+            CREATE TABLE refeicoes (id INTEGER PRIMARY KEY AUTOINCREMENT, email_usuario TEXT NOT NULL,
+                                    alimento TEXT NOT NULL, quantidade_gramas REAL NOT NULL, data TEXT NOT NULL);
+            INSERT INTO alimentos (nome, calorias) VALUES ('arroz', 130);
+        """)
+        con.executemany(
+            "INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, data) VALUES (?, 'arroz', 100, ?)",
+            ((f"usuario{i % 1000}@teste.com", f"2024-01-{1 + i % 28:02d} 12:00:00") for i in range(total)))
+        con.commit()
+        con.close()
+        database.configurar_banco(caminho)
+
+        esperas, terminou = [], threading.Event()
+
+        def escritor():
+            while not terminou.is_set():
+                inicio = time.perf_counter()
+                with database.transacao() as conn:
+                    conn.execute("INSERT INTO suporte (email, mensagem) VALUES ('escritor@teste.com', 'teste')")
+                esperas.append(time.perf_counter() - inicio)
+                time.sleep(0.01)
+
+        # Só a migração 3 (cálculo das calorias) é medida; as demais rodam antes e depois
+        database.migrar(ate=2)
+        thread = threading.Thread(target=escritor)
+        thread.start()
+        inicio = time.perf_counter()
+        database.migrar(tamanho_lote or total, ate=3)
+        duracao = time.perf_counter() - inicio
+        terminou.set()
+        thread.join()
+        database.migrar()
+
+        rotulo = f"{tamanho_lote} por lote" if tamanho_lote else "transação única"
+        print(f"{rotulo:<17} migração {duracao:.2f}s | escritas durante a migração {len(esperas)} | "
+              f"maior espera pelo lock {max(esperas) * 1000:.0f} ms")
+        database.configurar_banco()
+        diretorio.cleanup()
+
+
+class LacoEventosSimulado:
+    """Laço de eventos mínimo com o mesmo ``after`` do Tk, para medir travamentos sem abrir janela."""
+
+    def __init__(self):
+        self._agenda = []
+        self._sequencia = 0
+
+    def after(self, ms, funcao):
+        heapq.heappush(self._agenda, (time.perf_counter() + ms / 1000, self._sequencia, funcao))
+        self._sequencia += 1
+
+    def rodar(self, duracao):
+        fim = time.perf_counter() + duracao
+        while self._agenda and time.perf_counter() < fim:
+            quando, _, funcao = self._agenda[0]
+            espera = quando - time.perf_counter()
+            if espera > 0:
+                time.sleep(min(espera, 0.001))
+                continue
+            heapq.heappop(self._agenda)
+            funcao()
+
+
+def benchmark_latencia_interface(total=200000, duracao=3.0, intervalo_ms=250):
+    """
+    Trava do laço de eventos com consultas pesadas na thread da interface x no ExecutorBanco.
+
+    A cada ``intervalo_ms`` um "tratador de botão" pede o ranking de um usuário
+    com ``total`` refeições; o MonitorLatencia mede o atraso dos tiques do laço.
+    """
+    print(f"\n=== Latência do laço de eventos ({total} refeições por consulta) ===")
+    diretorio = preparar_banco_temporario()
+    email = "ranking@teste.com"
+    with database.transacao() as conn:
+        conn.executemany(
+            "INSERT INTO refeicoes (email_usuario, alimento, quantidade_gramas, calorias, data) "
+            "VALUES (?, ?, 100, 130, '2024-01-01 12:00:00')",
+            ((email, f"alimento{i % 5000}") for i in range(total)))
+
+    def ranking():
+        # Agregação do histórico inteiro (o ranking antes dos contadores de ranking.py)
+        with database.conexao() as conn:
+            return conn.execute("SELECT alimento, SUM(quantidade_gramas) AS total FROM refeicoes "
+                                "WHERE email_usuario = ? GROUP BY alimento ORDER BY total DESC LIMIT 10",
+                                (email,)).fetchall()
+
+    for modo in ("na thread da interface", "no ExecutorBanco"):
+        laco = LacoEventosSimulado()
+        tarefas = TarefasInterface(laco)
+        monitor = MonitorLatencia(laco)
+
+        def tratador():
+            if modo == "na thread da interface":
+                ranking()
+            else:
+                tarefas.executar(ranking, ao_concluir=lambda linhas: None)
+            laco.after(intervalo_ms, tratador)
+
+        monitor.iniciar()
+        laco.after(intervalo_ms, tratador)
+        laco.rodar(duracao)
+        tarefas.executor.encerrar()
+        print(f"{modo:<24} {monitor.relatorio()}")
+
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def benchmark_navegacao_interface(voltas=20, refeicoes=5000):
+    """
+    Widgets existentes e latência de navegação entre menu, histórico, ranking e suporte.
+
+    A primeira visita constrói cada tela; as seguintes só a reexibem (tkraise)
+    e atualizam as linhas. Precisa de um display (em servidores, rode com xvfb-run).
+    """
+    import tkinter as tk
+    from interface import InterfaceNutrismart
+
+    print("\n=== Navegação na interface ===")
+    try:
+        root = tk.Tk()
+    except tk.TclError as erro:
+        print(f"sem display disponível ({erro}); benchmark ignorado")
+        return
+
+    diretorio = preparar_banco_temporario()
+    email = "navegacao@teste.com"
+    Comida(email).registrar_refeicoes_em_lote(
+        [("arroz", 50 + i % 200, f"2024-01-{1 + i % 28:02d} 12:00:00") for i in range(refeicoes)])
+
+    app = InterfaceNutrismart(root)
+    app.usuario_atual = email
+    app.descartar_telas()
+    telas = {
+        'menu': app.criar_menu_principal,
+        'histórico': app.mostrar_historico_refeicoes,
+        'ranking': app.mostrar_ranking_alimentos,
+        'suporte': app.mostrar_suporte,
+    }
+
+    def contar_widgets(widget):
+        return 1 + sum(contar_widgets(filho) for filho in widget.winfo_children())
+
+    def aguardar_tarefas():
+        limite = time.perf_counter() + 5
+        while app.tarefas._em_andamento and time.perf_counter() < limite:
+            root.update()
+        root.update()
+
+    primeira_visita, revisitas, widgets = {}, {nome: [] for nome in telas}, []
+    for volta in range(voltas):
+        for nome, mostrar in telas.items():
+            inicio = time.perf_counter()
+            mostrar()
+            root.update_idletasks()
+            duracao = time.perf_counter() - inicio
+            if volta == 0:
+                primeira_visita[nome] = duracao
+            else:
+                revisitas[nome].append(duracao)
+            aguardar_tarefas()
+        widgets.append(contar_widgets(root))
+
+    for nome in telas:
+        tempos = sorted(revisitas[nome])
+        print(f"{nome:<10} construção {primeira_visita[nome] * 1000:6.1f} ms | "
+              f"reexibição p50 {tempos[len(tempos) // 2] * 1000:5.2f} ms | máx {tempos[-1] * 1000:5.2f} ms")
+    print(f"widgets após a 1ª volta: {widgets[0]} | após a última: {widgets[-1]}")
+
+    root.destroy()
+    app.tarefas.executor.encerrar()
+    database.configurar_banco()
+    diretorio.cleanup()
+
+
+def _processo_altera_catalogo(caminho, comandos):
+    """Corpo do processo que altera o catálogo: executa ``comandos`` (SQL, parâmetros) numa transação."""
+    database.configurar_banco(caminho, 1)
+    with database.transacao() as conn:
+        for sql, parametros in comandos:
+            conn.execute(sql, parametros)
+    database.configurar_banco()
+
+
+def verificar_catalogo_entre_processos(limite=None):
+    """
+    Regressão do cache do catálogo: alterações feitas por outro processo têm de aparecer.
+
+    Carrega o catálogo e o índice de recomendações, deixa um segundo processo
+    cadastrar, alterar e excluir um alimento e associá-lo a uma dieta, trocá-lo
+    de dieta e removê-lo, e mede quanto tempo cada mudança leva para ser vista
+    por este processo. Falha (código de saída 1) se alguma passar de
+    ``limite`` segundos (padrão: duas vezes o intervalo de verificação).
+    """
+    import multiprocessing
+    from catalogo import catalogo, INTERVALO_VERIFICACAO_CATALOGO
+    from recomendacao import indice_recomendacoes
+
+    def recomendado(dieta):
+        return 'arroz' in [alimento[0] for alimento in indice_recomendacoes().alimentos(dieta)]
+
+    limite = limite or 2 * INTERVALO_VERIFICACAO_CATALOGO
+    print(f"\n=== Catálogo alterado por outro processo (verificação a cada {catalogo.intervalo_verificacao} s) ===")
+    contexto = multiprocessing.get_context('spawn')
+    diretorio = preparar_banco_temporario()
+    caminho = database.pool_atual().caminho
+    etapas = [
+        ('cadastro', [("INSERT INTO alimentos (nome, calorias) VALUES ('feijao', 76)", ())],
+         lambda: catalogo.obter('feijao') is not None),
+        ('alteração', [("UPDATE alimentos SET calorias = 80 WHERE nome = 'feijao'", ())],
+         lambda: (catalogo.obter('feijao') or (None, 0))[1] == 80),
+        ('exclusão', [("DELETE FROM alimentos WHERE nome = 'feijao'", ())],
+         lambda: catalogo.obter('feijao') is None),
+        ('associação', [("INSERT INTO dieta_alimentos (dieta, alimento) VALUES ('Bulking', 'arroz')", ())],
+         lambda: recomendado('Bulking')),
+        ('troca de dieta', [("UPDATE dieta_alimentos SET dieta = 'Low carb' "
+                             "WHERE dieta = 'Bulking' AND alimento = 'arroz'", ())],
+         lambda: recomendado('Low carb') and not recomendado('Bulking')),
+        ('remoção', [("DELETE FROM dieta_alimentos WHERE alimento = 'arroz'", ())],
+         lambda: not recomendado('Low carb')),
+    ]
+
+    falhas = []
+    catalogo.listar()
+    indice_recomendacoes()
+    for nome, comandos, visivel in etapas:
+        visivel()  # deixa os caches em dia antes da alteração
+        processo = contexto.Process(target=_processo_altera_catalogo, args=(caminho, comandos))
+        processo.start()
+        processo.join()
+        inicio = time.perf_counter()
+        while not visivel() and time.perf_counter() - inicio < limite:
+            time.sleep(0.05)
+        segundos = time.perf_counter() - inicio
+        status = "ok" if visivel() else "NÃO VISTO"
+        print(f"{nome:<15} {status:<10} {segundos:5.2f} s")
+        if not visivel():
+            falhas.append(nome)
+    catalogo.invalidar()
+    database.configurar_banco()
+    diretorio.cleanup()
+
+    if falhas:
+        print(f"❌ Alterações não vistas em {limite:.0f} s: {', '.join(falhas)}")
+        sys.exit(1)
+
+
+def verificar_planos_consulta():
+    """
+    Regressão de plano de execução: nenhuma consulta quente pode cair em SCAN.
+
+    Roda EXPLAIN QUERY PLAN nas consultas que o código executa (refeições e
+    totais do dia, histórico paginado e rankings por usuário e geral, em cada
+    critério) e falha (código de saída 1) se alguma delas varrer a tabela
+    inteira em vez de usar um índice.
+    """
+    import ranking
+
+    print("\n=== Planos de execução das consultas quentes ===")
+    inicio, fim = database.intervalo_do_dia()
+    consultas = {
+        'refeicoes_do_dia': (alimentacao.SQL_REFEICOES_DO_DIA, ('a@b.com', inicio, fim)),
+        'totais_do_dia': (alimentacao.SQL_TOTAIS_DO_DIA, ('a@b.com', inicio)),
+        'historico_inicio': (alimentacao.SQL_HISTORICO_PRIMEIRA_PAGINA, ('a@b.com', 100)),
+        'historico_seguinte': (alimentacao.SQL_HISTORICO_PAGINA_SEGUINTE, ('a@b.com', inicio, 1, 100)),
+        'historico_anterior': (alimentacao.SQL_HISTORICO_PAGINA_ANTERIOR, ('a@b.com', inicio, 1, 100)),
+    }
+    for criterio, coluna in ranking.CRITERIOS.items():
+        sql = ranking._SQL_TOP.format(coluna=coluna)
+        consultas[f'ranking_{criterio}'] = (sql, (0, 'a@b.com', 10))
+        consultas[f'ranking_geral_{criterio}'] = (sql, (0, ranking._TODOS_OS_USUARIOS, 10))
+
+    diretorio = preparar_banco_temporario()
+    falhas = []
+    with database.conexao() as conn:
+        for nome, (sql, parametros) in consultas.items():
+            plano = [linha[3] for linha in conn.execute("EXPLAIN QUERY PLAN " + sql, parametros)]
+            varreduras = [passo for passo in plano if passo.startswith("SCAN")]
+            status = "SCAN!" if varreduras else "ok"
+            print(f"{nome:<24} {status:<6} {' | '.join(plano)}")
+            if varreduras:
+                falhas.append(nome)
+    database.configurar_banco()
+    diretorio.cleanup()
+
+    if falhas:
+        print(f"❌ Consultas com varredura completa: {', '.join(falhas)}")
+        sys.exit(1)
+
+
+BENCHMARKS = {
+    'refeicoes_concorrentes': benchmark_refeicoes_concorrentes,
+    'registro_em_lote': benchmark_registro_em_lote,
+    'gravacao_em_grupo': benchmark_gravacao_em_grupo,
+    'servico_assincrono': benchmark_servico_assincrono,
+    'api_http': benchmark_api_http,
+    'contencao_processos': benchmark_contencao_processos,
+    'escrita_fragmentada': benchmark_escrita_fragmentada,
+    'busca_alimentos': benchmark_busca_alimentos,
+    'historico_paginado': benchmark_historico_paginado,
+    'arquivamento': benchmark_arquivamento,
+    'backup_online': benchmark_backup_online,
+    'exportacao_colunar': benchmark_exportacao_colunar,
+    'importacao_alimentos': benchmark_importacao_alimentos,
+    'ranking': benchmark_ranking,
+    'analise_nutricional': benchmark_analise_nutricional,
+    'fechamento_noturno': benchmark_fechamento_noturno,
+    'plano_alimentar': benchmark_plano_alimentar,
+    'recomendacoes': benchmark_recomendacoes,
+    'migracao_legada': benchmark_migracao_legada,
+    'latencia_interface': benchmark_latencia_interface,
+    'navegacao_interface': benchmark_navegacao_interface,
+    'catalogo_entre_processos': verificar_catalogo_entre_processos,
+    'planos_consulta': verificar_planos_consulta,
+}
+
+if __name__ == "__main__":
+    escolhidos = sys.argv[1:] or list(BENCHMARKS)
+    for nome in escolhidos:
+        BENCHMARKS[nome]()
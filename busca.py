@@ -0,0 +1,249 @@
+# Importações necessárias para o código
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+
+from catalogo import catalogo
+
+
+def normalizar_busca(texto):
+    """
+    Normaliza um texto para comparação na busca de alimentos.
+
+    Remove acentos, troca hífens por espaços e ignora maiúsculas, de modo que
+    "Grão-de-bico", "grao de bico" e "GRÃO DE BICO" fiquem iguais.
+
+    Args:
+        texto (str): Texto digitado ou nome do alimento
+
+    Returns:
+        str: Texto normalizado
+    """
+    sem_acentos = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in sem_acentos if not unicodedata.combining(c))
+    return " ".join(sem_acentos.replace("-", " ").lower().split())
+
+
+def trigramas(texto):
+    """Retorna o conjunto de trigramas de um texto já normalizado."""
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def distancia_edicao(a, b, limite):
+    """
+    Distância de Levenshtein entre ``a`` e ``b``, interrompida ao passar de ``limite``.
+
+    Returns:
+        int: A distância, ou ``limite + 1`` se ela for maior que o limite
+    """
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i]
+        for j, cb in enumerate(b, 1):
+            atual.append(min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        if min(atual) > limite:
+            return limite + 1
+        anterior = atual
+    return anterior[-1]
+
+
+class IndiceBusca:
+    """Índice de busca sobre os nomes do catálogo de alimentos.
+
+    Combina dois mecanismos:
+    - prefixos: uma lista ordenada com o nome normalizado e cada sufixo que
+      começa em uma palavra ("grao de bico", "de bico", "bico"); uma busca
+      binária encontra todos os nomes que começam com o texto digitado.
+    - erros de digitação: primeiro são testadas, na mesma lista ordenada,
+      todas as variações do texto a uma edição de distância (letra trocada,
+      faltando, sobrando ou invertida), só nas posições até onde o texto
+      ainda é prefixo válido. Se nada for encontrado, um
+      índice invertido trigrama -> alimentos fornece candidatos, que são
+      ordenados pela distância de edição.
+    """
+
+    ALFABETO = "abcdefghijklmnopqrstuvwxyz "
+
+    # Quantas entradas da faixa de prefixo são examinadas por consulta
+    MAX_CANDIDATOS_PREFIXO = 64
+    # Quantos candidatos por trigramas passam pelo cálculo de distância
+    MAX_CANDIDATOS_TRIGRAMA = 32
+    # Quantos trigramas (os mais raros) da consulta são usados para achar candidatos
+    MAX_TRIGRAMAS_CONSULTA = 4
+
+    def __init__(self, nomes):
+        """
+        Args:
+            nomes (iterable): Nomes dos alimentos, como estão gravados no banco
+        """
+        self.nomes = list(nomes)
+        self.normalizados = [normalizar_busca(nome) for nome in self.nomes]
+
+        entradas = []
+        self.trigramas = {}
+        self.exatos = {}
+        for indice, normalizado in enumerate(self.normalizados):
+            self.exatos.setdefault(normalizado, indice)
+            palavras = normalizado.split(" ")
+            for inicio in range(len(palavras)):
+                entradas.append((" ".join(palavras[inicio:]), inicio, indice))
+            for trigrama in trigramas(normalizado):
+                self.trigramas.setdefault(trigrama, []).append(indice)
+        entradas.sort()
+        self.chaves = [entrada[0] for entrada in entradas]
+        self.entradas = entradas
+
+    def _por_prefixo(self, consulta):
+        """Alimentos cujo nome (ou alguma palavra do nome) começa com ``consulta``."""
+        encontrados = []
+        posicao = bisect_left(self.chaves, consulta)
+        fim = min(posicao + self.MAX_CANDIDATOS_PREFIXO, len(self.chaves))
+        while posicao < fim and self.chaves[posicao].startswith(consulta):
+            _, inicio_palavra, indice = self.entradas[posicao]
+            # Nome inteiro começando com o texto vem antes de uma palavra do meio
+            encontrados.append(((inicio_palavra > 0, len(self.normalizados[indice])), indice))
+            posicao += 1
+        encontrados.sort()
+        return [indice for _, indice in encontrados]
+
+    def _prefixo_existe(self, prefixo):
+        """Indica se alguma chave começa com ``prefixo`` (uma busca binária)."""
+        posicao = bisect_left(self.chaves, prefixo)
+        return posicao < len(self.chaves) and self.chaves[posicao].startswith(prefixo)
+
+    def _maior_prefixo_valido(self, consulta):
+        """Tamanho do maior início de ``consulta`` que ainda é prefixo de alguma chave."""
+        baixo, alto = 0, len(consulta)
+        while baixo < alto:
+            meio = (baixo + alto + 1) // 2
+            if self._prefixo_existe(consulta[:meio]):
+                baixo = meio
+            else:
+                alto = meio - 1
+        return baixo
+
+    def _variacoes(self, consulta):
+        """Textos a uma edição de distância de ``consulta``, dos erros mais comuns aos menos comuns."""
+        # Uma edição depois do maior prefixo válido não tem como gerar correspondência
+        limite = self._maior_prefixo_valido(consulta)
+        partes = [(consulta[:i], consulta[i:]) for i in range(limite + 1)]
+        yield from (a + b[1] + b[0] + b[2:] for a, b in partes if len(b) > 1)
+        yield from (a + b[1:] for a, b in partes if b)
+        yield from (a + c + b[1:] for a, b in partes if b for c in self.ALFABETO if c != b[0])
+        yield from (a + c + b for a, b in partes for c in self.ALFABETO)
+
+    def _por_variacao(self, consulta, k):
+        """Alimentos que começam com o texto digitado corrigido em uma letra."""
+        encontrados, vistas = [], {consulta}
+        for variacao in self._variacoes(consulta):
+            if variacao in vistas or not variacao.strip():
+                continue
+            vistas.add(variacao)
+            if self._prefixo_existe(variacao):
+                encontrados.extend(self._por_prefixo(variacao)[:k])
+                if len(encontrados) >= k:
+                    break
+        return encontrados
+
+    def _por_similaridade(self, consulta):
+        """Alimentos parecidos com ``consulta``, tolerando erros de digitação."""
+        # Trigramas raros são mais seletivos: usa só os mais raros para gerar candidatos
+        listas = sorted((self.trigramas[t] for t in trigramas(consulta) if t in self.trigramas), key=len)
+        contagem = Counter()
+        for lista in listas[:self.MAX_TRIGRAMAS_CONSULTA]:
+            contagem.update(lista)
+        candidatos = [indice for indice, _ in contagem.most_common(self.MAX_CANDIDATOS_TRIGRAMA)]
+
+        limite = max(1, len(consulta) // 3)
+        ordenados = []
+        for indice in candidatos:
+            normalizado = self.normalizados[indice]
+            # Compara com o nome inteiro e com o início do nome do mesmo tamanho
+            distancia = min(distancia_edicao(consulta, normalizado, limite),
+                            distancia_edicao(consulta, normalizado[:len(consulta)], limite))
+            if distancia <= limite:
+                ordenados.append(((distancia, -contagem[indice], len(normalizado)), indice))
+        ordenados.sort()
+        return [indice for _, indice in ordenados]
+
+    def buscar(self, consulta, k=5):
+        """
+        Busca os ``k`` alimentos que melhor correspondem ao texto digitado.
+
+        Args:
+            consulta (str): Texto digitado pelo usuário
+            k (int): Número máximo de resultados
+
+        Returns:
+            list: Nomes dos alimentos, do mais relevante para o menos relevante
+        """
+        consulta = normalizar_busca(consulta)
+        if not consulta:
+            return []
+
+        # Sem correspondência exata de prefixo, tenta corrigir erros de digitação
+        encontrados = self._por_prefixo(consulta)
+        if not encontrados and len(consulta) > 2:
+            encontrados = self._por_variacao(consulta, k) or self._por_similaridade(consulta)
+
+        resultado = []
+        for indice in encontrados:
+            if indice not in resultado:
+                resultado.append(indice)
+                if len(resultado) == k:
+                    break
+        return [self.nomes[indice] for indice in resultado]
+
+    def resolver(self, texto):
+        """
+        Encontra o alimento cujo nome normalizado é igual ao texto digitado.
+
+        Returns:
+            str: Nome do alimento como está no banco, ou None
+        """
+        indice = self.exatos.get(normalizar_busca(texto))
+        return None if indice is None else self.nomes[indice]
+
+
+# Índice construído sob demanda e refeito quando o catálogo é recarregado
+_indice = None
+_geracao_indice = None
+
+
+def buscar_alimentos(consulta, k=5):
+    """
+    Busca alimentos do catálogo por prefixo e por similaridade.
+
+    Args:
+        consulta (str): Texto digitado (aceita acentos, hífens e erros de digitação)
+        k (int): Número máximo de sugestões
+
+    Returns:
+        list: Nomes dos alimentos encontrados, do mais para o menos relevante
+    """
+    return _indice_atual().buscar(consulta, k)
+
+
+def resolver_alimento(texto):
+    """
+    Converte o texto digitado no nome cadastrado, ignorando acentos e hífens.
+
+    Ex.: "grao de bico" -> "grão-de-bico".
+
+    Returns:
+        str: Nome do alimento como está no banco, ou None se não houver correspondência exata
+    """
+    return _indice_atual().resolver(texto)
+
+
+def _indice_atual():
+    """Retorna o índice de busca, reconstruindo-o se o catálogo mudou."""
+    global _indice, _geracao_indice
+    geracao = catalogo.geracao()
+    if _indice is None or _geracao_indice != geracao:
+        _indice = IndiceBusca(item[0] for item in catalogo.listar())
+        _geracao_indice = geracao
+    return _indice
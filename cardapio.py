@@ -0,0 +1,331 @@
+# Importações necessárias para o código
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import database
+from database import conexao, pools_de_dados, usando_pool
+from catalogo import catalogo, normalizar_nome
+from alimentacao import meta_calorica
+from analise import KCAL_POR_GRAMA
+from recomendacao import indice_recomendacoes
+
+# Refeições de cada dia do plano e a fração das calorias do dia que cada uma recebe
+REFEICOES_DO_PLANO = {
+    "Café da manhã": 0.25,
+    "Almoço": 0.35,
+    "Lanche": 0.15,
+    "Jantar": 0.25,
+}
+
+# Fração das calorias vinda de cada macronutriente, por dieta; as demais usam DIVISAO_MACROS_PADRAO
+DIVISAO_MACROS_POR_DIETA = {
+    "Low carb": {'proteinas': 0.30, 'carboidratos': 0.20, 'gorduras': 0.50},
+    "Cetogênica": {'proteinas': 0.20, 'carboidratos': 0.05, 'gorduras': 0.75},
+    "Hiperproteica": {'proteinas': 0.40, 'carboidratos': 0.35, 'gorduras': 0.25},
+    "Bulking": {'proteinas': 0.25, 'carboidratos': 0.50, 'gorduras': 0.25},
+}
+DIVISAO_MACROS_PADRAO = {'proteinas': 0.20, 'carboidratos': 0.50, 'gorduras': 0.30}
+
+# Alimentos por refeição e limites das porções (gramas)
+ALIMENTOS_POR_REFEICAO = 3
+PORCAO_MINIMA = 20
+PORCAO_MAXIMA = 400
+PASSO_PORCAO = 5
+
+# Alimentos sorteados do catálogo como candidatos de cada refeição
+CANDIDATOS_POR_REFEICAO = 40
+
+# Com menos alimentos recomendados (dieta_alimentos) que isso, o plano usa o catálogo todo
+MINIMO_ALIMENTOS_DA_DIETA = 4 * ALIMENTOS_POR_REFEICAO
+
+# Rodadas de troca de alimentos na busca local
+RODADAS_BUSCA_LOCAL = 3
+
+# Peso do erro de cada componente (calorias, proteínas, carboidratos, gorduras);
+# os erros são medidos em kcal, então um grama de gordura pesa mais que um de proteína
+PESOS_ERRO = (2.0, 1.0, 1.0, 1.0)
+
+_ESCALA = tuple(peso ** 0.5 for peso in PESOS_ERRO)
+_KCAL_COMPONENTES = (1, KCAL_POR_GRAMA['proteinas'], KCAL_POR_GRAMA['carboidratos'], KCAL_POR_GRAMA['gorduras'])
+
+# Vetores dos alimentos, reconstruídos quando o catálogo muda (ver _alimentos_atuais)
+_alimentos = None
+_geracao_alimentos = None
+
+
+def metas_do_dia(dieta, peso):
+    """
+    Metas diárias de calorias (a mesma de ``resumo_do_dia``) e de macronutrientes em gramas.
+
+    Args:
+        dieta (str): Dieta do usuário
+        peso (float): Peso em kg
+
+    Returns:
+        dict: Chaves calorias, proteinas, carboidratos e gorduras
+    """
+    calorias = meta_calorica(dieta, peso)
+    divisao = DIVISAO_MACROS_POR_DIETA.get(dieta, DIVISAO_MACROS_PADRAO)
+    metas = {'calorias': calorias}
+    for macro, fracao in divisao.items():
+        metas[macro] = round(calorias * fracao / KCAL_POR_GRAMA[macro], 1)
+    return metas
+
+
+def _vetor(calorias, proteinas, carboidratos, gorduras):
+    """Converte valores nutricionais em kcal ponderadas pelos pesos do erro."""
+    return tuple(valor * kcal * escala for valor, kcal, escala in
+                 zip((calorias, proteinas, carboidratos, gorduras), _KCAL_COMPONENTES, _ESCALA))
+
+
+def _alimentos_atuais():
+    """Nomes, vetores por grama e posição (por nome normalizado) dos alimentos com calorias do catálogo."""
+    global _alimentos, _geracao_alimentos
+    geracao = catalogo.geracao()
+    if _alimentos is None or _geracao_alimentos != geracao:
+        nomes, vetores, posicoes = [], [], {}
+        for nome, calorias, proteinas, carboidratos, gorduras in catalogo.listar():
+            if calorias and calorias > 0:
+                posicoes[normalizar_nome(nome)] = len(nomes)
+                nomes.append(nome)
+                vetores.append(_vetor(calorias / 100, (proteinas or 0) / 100, (carboidratos or 0) / 100,
+                                      (gorduras or 0) / 100))
+        _alimentos = (nomes, vetores, posicoes)
+        _geracao_alimentos = geracao
+    return _alimentos
+
+
+def _porcao_otima(vetor, residuo):
+    """Porção (g) que mais aproxima ``vetor * porção`` de ``residuo``, dentro dos limites, e o ganho obtido."""
+    produto = vetor[0] * residuo[0] + vetor[1] * residuo[1] + vetor[2] * residuo[2] + vetor[3] * residuo[3]
+    quadrado = vetor[0] * vetor[0] + vetor[1] * vetor[1] + vetor[2] * vetor[2] + vetor[3] * vetor[3]
+    porcao = min(max(produto / quadrado, PORCAO_MINIMA), PORCAO_MAXIMA)
+    return porcao, 2 * porcao * produto - porcao * porcao * quadrado
+
+
+def _residuo(alvo, vetores, itens):
+    """O que falta para o alvo com as porções atuais dos itens."""
+    residuo = list(alvo)
+    for indice, porcao in itens:
+        vetor = vetores[indice]
+        for j in range(4):
+            residuo[j] -= vetor[j] * porcao
+    return residuo
+
+
+def _ajustar_porcoes(alvo, vetores, itens, rodadas=4):
+    """Descida por coordenadas: reotimiza a porção de cada item com os demais fixos."""
+    for _ in range(rodadas):
+        for posicao, (indice, porcao) in enumerate(itens):
+            vetor = vetores[indice]
+            residuo = _residuo(alvo, vetores, itens)
+            for j in range(4):
+                residuo[j] += vetor[j] * porcao
+            itens[posicao] = (indice, _porcao_otima(vetor, residuo)[0])
+    return itens
+
+
+def planejar_refeicao(alvo, candidatos, vetores):
+    """
+    Escolhe alimentos e porções para uma refeição.
+
+    Guloso seguido de busca local: adiciona, um a um, o candidato cuja
+    porção ótima mais reduz o erro; depois ajusta as porções e tenta trocar
+    cada item por outro candidato enquanto o erro diminuir. As porções
+    finais são arredondadas para múltiplos de PASSO_PORCAO.
+
+    Args:
+        alvo (tuple): Metas da refeição já convertidas por _vetor
+        candidatos (list): Índices dos alimentos que podem entrar na refeição
+        vetores (list): Vetores por grama de todos os alimentos
+
+    Returns:
+        list: Tuplas (índice do alimento, gramas)
+    """
+    itens = []
+    residuo = list(alvo)
+    for _ in range(min(ALIMENTOS_POR_REFEICAO, len(candidatos))):
+        usados = {indice for indice, _ in itens}
+        ganho, indice, porcao = max((ganho, indice, porcao) for indice in candidatos if indice not in usados
+                                    for porcao, ganho in (_porcao_otima(vetores[indice], residuo),))
+        if ganho <= 0:
+            break
+        itens.append((indice, porcao))
+        residuo = _residuo(alvo, vetores, itens)
+
+    _ajustar_porcoes(alvo, vetores, itens)
+    for _ in range(RODADAS_BUSCA_LOCAL):
+        melhorou = False
+        for posicao, (atual, porcao) in enumerate(itens):
+            residuo = _residuo(alvo, vetores, itens)
+            vetor = vetores[atual]
+            for j in range(4):
+                residuo[j] += vetor[j] * porcao
+            usados = {indice for indice, _ in itens}
+            ganho_atual = _porcao_otima(vetor, residuo)[1]
+            ganho, indice, nova = max(((ganho, indice, nova) for indice in candidatos if indice not in usados
+                                       for nova, ganho in (_porcao_otima(vetores[indice], residuo),)),
+                                      default=(0, None, 0))
+            if ganho > ganho_atual * 1.0001:
+                itens[posicao] = (indice, nova)
+                melhorou = True
+        if not melhorou:
+            break
+        _ajustar_porcoes(alvo, vetores, itens)
+    return [(indice, max(PORCAO_MINIMA, round(porcao / PASSO_PORCAO) * PASSO_PORCAO)) for indice, porcao in itens]
+
+
+def _totais(itens):
+    """Calorias e gramas de macronutrientes de (vetor, gramas), desfazendo a conversão de _vetor."""
+    totais = [0.0] * 4
+    for vetor, gramas in itens:
+        for j in range(4):
+            totais[j] += vetor[j] * gramas
+    return {nutriente: round(total / (kcal * escala), 1) for nutriente, total, kcal, escala in
+            zip(('calorias', 'proteinas', 'carboidratos', 'gorduras'), totais, _KCAL_COMPONENTES, _ESCALA)}
+
+
+def gerar_plano(dieta, peso, dias=7, inicio=None, semente=None):
+    """
+    Gera um plano alimentar de ``dias`` dias que busca as metas de calorias e macronutrientes.
+
+    Cada refeição recebe sua fração das metas do dia (REFEICOES_DO_PLANO) e
+    é montada por ``planejar_refeicao`` a partir de CANDIDATOS_POR_REFEICAO
+    alimentos sorteados entre os recomendados para a dieta (ou do catálogo
+    todo, se a dieta tiver poucos), evitando repetir alimentos no mesmo dia.
+
+    Args:
+        dieta (str): Dieta do usuário
+        peso (float): Peso em kg
+        dias (int): Número de dias do plano
+        inicio (date, opcional): Primeiro dia do plano. Padrão: hoje
+        semente (int ou str, opcional): Semente do sorteio, para reproduzir um plano
+
+    Returns:
+        dict: Chaves dieta, metas (do dia) e dias; cada dia tem data, refeicoes
+            (refeicao, itens [(alimento, gramas)] e totais) e totais do dia
+
+    Raises:
+        ValueError: Se o catálogo não tiver alimentos com calorias
+    """
+    nomes, vetores, posicoes = _alimentos_atuais()
+    if not nomes:
+        raise ValueError("Nenhum alimento com calorias cadastrado para montar o plano")
+    da_dieta = [posicoes[chave] for chave in (normalizar_nome(alimento[0])
+                                             for alimento in indice_recomendacoes().alimentos(dieta))
+                if chave in posicoes]
+    universo = da_dieta if len(da_dieta) >= MINIMO_ALIMENTOS_DA_DIETA else range(len(nomes))
+    metas = metas_do_dia(dieta, peso)
+    inicio = inicio or date.today()
+    gerador = random.Random(semente)
+    amostra = min(CANDIDATOS_POR_REFEICAO, len(universo))
+    plano = []
+    for deslocamento in range(dias):
+        usados_no_dia = set()
+        refeicoes = []
+        for refeicao, fracao in REFEICOES_DO_PLANO.items():
+            alvo = _vetor(*(metas[nutriente] * fracao for nutriente in ('calorias', 'proteinas', 'carboidratos',
+                                                                         'gorduras')))
+            sorteados = gerador.sample(universo, amostra)
+            candidatos = [indice for indice in sorteados if indice not in usados_no_dia]
+            # Em catálogos pequenos, repetir um alimento no dia é melhor que ficar sem opções
+            if len(candidatos) < 2 * ALIMENTOS_POR_REFEICAO:
+                candidatos = sorteados
+            itens = planejar_refeicao(alvo, candidatos, vetores)
+            usados_no_dia.update(indice for indice, _ in itens)
+            refeicoes.append({
+                'refeicao': refeicao,
+                'itens': [(nomes[indice], gramas) for indice, gramas in itens],
+                'totais': _totais((vetores[indice], gramas) for indice, gramas in itens),
+            })
+        plano.append({
+            'data': (inicio + timedelta(days=deslocamento)).isoformat(),
+            'refeicoes': refeicoes,
+            'totais': {nutriente: round(sum(refeicao['totais'][nutriente] for refeicao in refeicoes), 1)
+                       for nutriente in metas},
+        })
+    return {'dieta': dieta, 'metas': metas, 'dias': plano}
+
+
+def plano_do_usuario(email, dias=7, semente=None):
+    """
+    Plano alimentar de um usuário, com a dieta e o peso cadastrados.
+
+    Returns:
+        dict: Plano (ver gerar_plano), ou None se o usuário não existir
+    """
+    with conexao(email) as conn:
+        usuario = conn.execute("SELECT dieta, peso FROM usuarios WHERE email = ?", (email,)).fetchone()
+    if not usuario:
+        return None
+    return gerar_plano(*usuario, dias=dias, semente=semente)
+
+
+def gerar_planos(dias=7, inicio=None):
+    """
+    Gera planos para todos os usuários, lendo cada banco uma vez.
+
+    Os vetores do catálogo são montados uma só vez e reaproveitados; cada
+    plano usa o e-mail como semente, então rodar o lote de novo reproduz os
+    mesmos planos enquanto o catálogo não mudar.
+
+    Yields:
+        tuple: (email, plano) de cada usuário
+    """
+    for pool in pools_de_dados():
+        with usando_pool(pool), conexao() as conn:
+            usuarios = conn.execute("SELECT email, dieta, peso FROM usuarios ORDER BY email").fetchall()
+        for email, dieta, peso in usuarios:
+            yield email, gerar_plano(dieta, peso, dias=dias, inicio=inicio, semente=email)
+
+
+def formatar_plano(plano):
+    """Linhas de texto do plano para o terminal."""
+    metas = plano['metas']
+    linhas = [f"Dieta: {plano['dieta']} | Meta diária: {metas['calorias']:.0f} kcal, P {metas['proteinas']:.0f} g, "
+              f"C {metas['carboidratos']:.0f} g, G {metas['gorduras']:.0f} g"]
+    for dia in plano['dias']:
+        totais = dia['totais']
+        linhas.append(f"\n{dia['data']}: {totais['calorias']:.0f} kcal, P {totais['proteinas']:.0f} g, "
+                      f"C {totais['carboidratos']:.0f} g, G {totais['gorduras']:.0f} g")
+        for refeicao in dia['refeicoes']:
+            itens = ', '.join(f"{alimento} {gramas} g" for alimento, gramas in refeicao['itens'])
+            linhas.append(f"  {refeicao['refeicao']}: {itens}")
+    return linhas
+
+
+def mostrar_plano_semanal(email):
+    """Menu do usuário: gera e exibe o plano alimentar da semana."""
+    print("\n=== Plano alimentar da semana ===")
+    try:
+        plano = plano_do_usuario(email)
+    except ValueError as erro:
+        print(f"❌ {erro}")
+        return
+    if not plano:
+        print("❌ Usuário não encontrado.")
+        return
+    print('\n'.join(formatar_plano(plano)))
+    input("\nPressione Enter para voltar ao menu principal...")
+
+
+# Uso: python cardapio.py <email> [dias]  |  python cardapio.py --todos [dias]  (lote para todos os usuários)
+if __name__ == "__main__":
+    database.verificar_esquema()
+    if len(sys.argv) < 2:
+        sys.exit("Uso: python cardapio.py <email> [dias] | python cardapio.py --todos [dias]")
+    dias = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    try:
+        if sys.argv[1] == '--todos':
+            inicio = time.perf_counter()
+            gerados = sum(1 for _ in gerar_planos(dias))
+            print(f"{gerados} plano(s) de {dias} dia(s) gerado(s) em {time.perf_counter() - inicio:.1f} s.")
+            sys.exit(0)
+        plano = plano_do_usuario(sys.argv[1], dias)
+    except ValueError as erro:
+        sys.exit(str(erro))
+    if not plano:
+        sys.exit(f"Usuário não encontrado: {sys.argv[1]}")
+    print('\n'.join(formatar_plano(plano)))
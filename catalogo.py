@@ -0,0 +1,137 @@
+# Importações necessárias para o código
+import threading
+import time
+
+import database
+from database import conexao
+
+# Segundos entre consultas a versao_catalogo no catálogo global: alterações feitas
+# por outros processos (importação, menu do administrador, recomendacao.py) aparecem
+# nesse prazo, ao custo de uma busca por chave primária a cada intervalo
+INTERVALO_VERIFICACAO_CATALOGO = 2.0
+
+
+def normalizar_nome(nome):
+    """
+    Normaliza o nome de um alimento para uso como chave do catálogo.
+
+    Segue a mesma regra usada no cadastro (minúsculas, sem espaços nas pontas)
+    e também colapsa espaços repetidos no meio do nome.
+
+    Args:
+        nome (str): Nome digitado pelo usuário
+
+    Returns:
+        str: Nome normalizado
+    """
+    return " ".join(nome.split()).lower()
+
+
+class CatalogoAlimentos:
+    """Cache em memória, compartilhado pelo processo, da tabela alimentos.
+
+    O catálogo é pequeno e muda pouco (só pelo cadastro e exclusão de
+    alimentos), então é carregado uma vez e servido da memória. Os caminhos de
+    escrita do administrador chamam ``invalidar()``, e o cache também consulta
+    a tabela versao_catalogo a cada ``intervalo_verificacao`` segundos para
+    enxergar alterações feitas por outros processos.
+    """
+
+    def __init__(self, intervalo_verificacao=None):
+        """
+        Args:
+            intervalo_verificacao (float, opcional): Segundos entre verificações da
+                versão do catálogo no banco. None desativa a verificação (só
+                ``invalidar()`` recarrega o cache)
+        """
+        self.intervalo_verificacao = intervalo_verificacao
+        self._lock = threading.Lock()
+        self._itens = None
+        self._versao = None
+        self._pool = None
+        self._ultima_verificacao = 0.0
+        self._geracao = 0
+
+    def _carregar(self):
+        """Lê a tabela alimentos inteira e a versão atual do catálogo."""
+        with conexao() as conn:
+            linhas = conn.execute(
+                "SELECT nome, calorias, proteinas, carboidratos, gorduras FROM alimentos ORDER BY nome"
+            ).fetchall()
+            versao = conn.execute("SELECT versao FROM versao_catalogo WHERE id = 1").fetchone()
+
+        self._itens = {normalizar_nome(linha[0]): linha for linha in linhas}
+        self._versao = versao[0] if versao else None
+        self._pool = database.pool_atual()
+        self._ultima_verificacao = time.monotonic()
+        self._geracao += 1
+
+    def _desatualizado(self):
+        """Indica se o cache precisa ser recarregado antes de responder."""
+        if self._itens is None or self._pool is not database.pool_atual():
+            return True
+        if self.intervalo_verificacao is None:
+            return False
+        if time.monotonic() - self._ultima_verificacao < self.intervalo_verificacao:
+            return False
+
+        with conexao() as conn:
+            versao = conn.execute("SELECT versao FROM versao_catalogo WHERE id = 1").fetchone()
+        self._ultima_verificacao = time.monotonic()
+        if (versao[0] if versao else None) != self._versao:
+            self._itens = None
+            return True
+        return False
+
+    def _itens_atuais(self):
+        """Retorna o dicionário de itens, recarregando-o se necessário."""
+        itens = self._itens
+        if itens is not None and not self._desatualizado():
+            return itens
+        with self._lock:
+            if self._desatualizado():
+                self._carregar()
+            return self._itens
+
+    def obter(self, nome):
+        """
+        Busca um alimento pelo nome.
+
+        Args:
+            nome (str): Nome do alimento (normalizado internamente)
+
+        Returns:
+            tuple: (nome, calorias, proteinas, carboidratos, gorduras) ou None
+        """
+        return self._itens_atuais().get(normalizar_nome(nome))
+
+    def listar(self):
+        """
+        Lista todos os alimentos do catálogo em ordem alfabética.
+
+        Returns:
+            list: Tuplas (nome, calorias, proteinas, carboidratos, gorduras)
+        """
+        return list(self._itens_atuais().values())
+
+    def geracao(self):
+        """
+        Número que muda a cada recarga do catálogo.
+
+        Usado por estruturas derivadas (como o índice de busca) para saber
+        quando precisam ser reconstruídas.
+
+        Returns:
+            int: Geração atual do cache
+        """
+        self._itens_atuais()
+        return self._geracao
+
+    def invalidar(self):
+        """Descarta o cache; a próxima consulta recarrega o catálogo do banco."""
+        with self._lock:
+            self._itens = None
+
+
+# Catálogo global usado por todo o sistema
+catalogo = CatalogoAlimentos(INTERVALO_VERIFICACAO_CATALOGO)
@@ -1,22 +1,519 @@
+import os
+import queue
 import sqlite3
-from datetime import datetime
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 
-# Conexão com banco SQLite
-conn = sqlite3.connect('nutricao.db')
-cursor = conn.cursor()
+# Caminho padrão do banco SQLite
+CAMINHO_BANCO = 'nutricao.db'
+TAMANHO_POOL = 8
 
-def criar_tabelas():
+
+class PerfilArmazenamento:
+    """Configuração de armazenamento aplicada a cada conexão aberta pelo pool.
+
+    Reúne os PRAGMAs que decidem como o SQLite grava e lê o arquivo:
+
+    - journal_mode: 'WAL' deixa leitores e um escritor trabalharem ao mesmo
+      tempo; 'DELETE' é o journal de rollback padrão do SQLite, em que uma
+      escrita bloqueia todas as leituras durante o commit.
+    - synchronous: 'NORMAL' em WAL só faz fsync nos checkpoints (um commit
+      recente pode se perder numa queda de energia, mas o banco nunca fica
+      corrompido); 'FULL' faz fsync a cada commit.
+    - cache_size_kb, mmap_size, temp_store: memória usada para páginas,
+      leitura do arquivo por mmap e tabelas temporárias (GROUP BY, ORDER BY).
+    - busy_timeout_ms: quanto uma conexão espera por um lock antes de
+      desistir com "database is locked".
+    - auto_vacuum: 'INCREMENTAL' deixa ``PRAGMA incremental_vacuum`` devolver
+      ao sistema as páginas livres (ex.: depois do arquivamento) aos poucos;
+      só vale para bancos novos ou depois de um VACUUM completo.
+
+    Política de checkpoint (só em WAL): o SQLite copia o WAL para o banco
+    sozinho, sem bloquear ninguém, sempre que ele passa de
+    ``paginas_autocheckpoint`` páginas; ``journal_size_limit`` devolve o
+    espaço do arquivo -wal depois disso; e ``checkpoint()`` (chamado pelas
+    cargas em lote e ao fechar o pool) trunca o WAL de uma vez.
     """
-    Cria as tabelas necessárias no banco de dados caso não existam.
-    
-    Cria as tabelas:
+
+    def __init__(self, journal_mode='WAL', synchronous='NORMAL', cache_size_kb=16384,
+                 mmap_size=64 * 1024 * 1024, temp_store='MEMORY', busy_timeout_ms=30000,
+                 paginas_autocheckpoint=1000, journal_size_limit=64 * 1024 * 1024, auto_vacuum='INCREMENTAL'):
+        """
+        Args:
+            journal_mode (str): 'WAL' ou 'DELETE'
+            synchronous (str): 'OFF', 'NORMAL', 'FULL' ou 'EXTRA'
+            cache_size_kb (int): Cache de páginas por conexão, em KiB
+            mmap_size (int): Bytes do arquivo lidos por mmap (0 desativa)
+            temp_store (str): 'DEFAULT', 'FILE' ou 'MEMORY'
+            busy_timeout_ms (int): Espera máxima por um lock, em milissegundos
+            paginas_autocheckpoint (int): Tamanho do WAL (páginas) que dispara o checkpoint automático
+            journal_size_limit (int): Tamanho (bytes) ao qual o WAL é reduzido após um checkpoint
+            auto_vacuum (str): 'NONE', 'FULL' ou 'INCREMENTAL'
+        """
+        self.journal_mode = journal_mode.upper()
+        self.synchronous = synchronous.upper()
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.temp_store = temp_store.upper()
+        self.busy_timeout_ms = busy_timeout_ms
+        self.paginas_autocheckpoint = paginas_autocheckpoint
+        self.journal_size_limit = journal_size_limit
+        self.auto_vacuum = auto_vacuum.upper()
+
+    def aplicar(self, con):
+        """Executa os PRAGMAs do perfil numa conexão recém-aberta."""
+        con.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        # Precisa vir antes de qualquer escrita para valer num banco novo
+        con.execute(f"PRAGMA auto_vacuum = {self.auto_vacuum}")
+        con.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        con.execute(f"PRAGMA synchronous = {self.synchronous}")
+        con.execute(f"PRAGMA cache_size = {-int(self.cache_size_kb)}")
+        con.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        con.execute(f"PRAGMA temp_store = {self.temp_store}")
+        if self.journal_mode == 'WAL':
+            con.execute(f"PRAGMA wal_autocheckpoint = {int(self.paginas_autocheckpoint)}")
+            con.execute(f"PRAGMA journal_size_limit = {int(self.journal_size_limit)}")
+
+    def __repr__(self):
+        return (f"PerfilArmazenamento(journal_mode={self.journal_mode!r}, synchronous={self.synchronous!r}, "
+                f"cache_size_kb={self.cache_size_kb}, mmap_size={self.mmap_size}, "
+                f"temp_store={self.temp_store!r}, busy_timeout_ms={self.busy_timeout_ms}, "
+                f"auto_vacuum={self.auto_vacuum!r})")
+
+
+# Perfis disponíveis; 'padrao' reproduz os valores de fábrica do SQLite (usado para comparação)
+PERFIS = {
+    'wal': PerfilArmazenamento(),
+    'padrao': PerfilArmazenamento(journal_mode='DELETE', synchronous='FULL', cache_size_kb=2000,
+                                  mmap_size=0, temp_store='DEFAULT', auto_vacuum='NONE'),
+}
+
+# Perfil usado quando nenhum é informado (pode ser trocado pela variável NUTRISMART_PERFIL_BANCO)
+PERFIL_PADRAO = os.environ.get('NUTRISMART_PERFIL_BANCO', 'wal')
+
+
+class PoolConexoes:
+    """Pool limitado de conexões SQLite, com uma conexão por thread de trabalho.
+
+    Cada thread que entra em ``conexao()`` recebe uma conexão exclusiva do pool
+    e a mantém enquanto estiver dentro do bloco ``with``. Chamadas aninhadas na
+    mesma thread reutilizam a mesma conexão, então funções que abrem
+    ``transacao()`` podem chamar outras funções do sistema sem esgotar o pool.
+    """
+
+    def __init__(self, caminho=CAMINHO_BANCO, tamanho=TAMANHO_POOL, timeout=30.0, perfil=None):
+        """
+        Args:
+            caminho (str): Caminho do arquivo do banco de dados
+            tamanho (int): Número máximo de conexões abertas ao mesmo tempo
+            timeout (float): Segundos de espera por uma conexão livre do pool
+            perfil (PerfilArmazenamento ou str, opcional): Perfil de armazenamento
+                (objeto ou nome em PERFIS); o padrão é PERFIL_PADRAO
+        """
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self.timeout = timeout
+        if not isinstance(perfil, PerfilArmazenamento):
+            perfil = PERFIS[perfil or PERFIL_PADRAO]
+        self.perfil = perfil
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._todas = []
+
+    def _nova_conexao(self):
+        """Abre uma conexão nova em modo autocommit (transações são explícitas) e aplica o perfil."""
+        con = sqlite3.connect(self.caminho, timeout=self.perfil.busy_timeout_ms / 1000,
+                              check_same_thread=False, isolation_level=None)
+        self.perfil.aplicar(con)
+        self._todas.append(con)
+        return con
+
+    def _adquirir(self):
+        """Retira uma conexão livre do pool, criando uma nova se ainda houver vaga."""
+        try:
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._criadas < self.tamanho:
+                self._criadas += 1
+                return self._nova_conexao()
+
+        try:
+            return self._livres.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"Nenhuma conexão livre no pool após {self.timeout}s") from None
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão do pool para a thread atual.
+
+        Yields:
+            sqlite3.Connection: Conexão exclusiva da thread até o fim do bloco
+        """
+        con = getattr(self._local, 'con', None)
+        if con is not None:
+            self._local.profundidade += 1
+            try:
+                yield con
+            finally:
+                self._local.profundidade -= 1
+            return
+
+        con = self._adquirir()
+        self._local.con = con
+        self._local.profundidade = 1
+        self._local.em_transacao = False
+        try:
+            yield con
+        finally:
+            self._local.con = None
+            self._local.profundidade = 0
+            if con.in_transaction:
+                con.rollback()
+            self._livres.put(con)
+
+    @contextmanager
+    def transacao(self):
+        """Executa o bloco dentro de uma transação de escrita.
+
+        Faz commit ao final do bloco ou rollback se ocorrer uma exceção.
+        Transações aninhadas na mesma thread são absorvidas pela mais externa.
+
+        Yields:
+            sqlite3.Connection: Conexão com a transação aberta
+        """
+        with self.conexao() as con:
+            if self._local.em_transacao:
+                yield con
+                return
+
+            con.execute("BEGIN IMMEDIATE")
+            self._local.em_transacao = True
+            try:
+                yield con
+            except BaseException:
+                con.rollback()
+                raise
+            else:
+                con.commit()
+            finally:
+                self._local.em_transacao = False
+
+    def checkpoint(self, modo='TRUNCATE'):
+        """
+        Copia o conteúdo do WAL para o arquivo do banco.
+
+        Args:
+            modo (str): 'PASSIVE' (não espera ninguém), 'FULL', 'RESTART' ou
+                'TRUNCATE' (espera os leitores e zera o arquivo -wal)
+
+        Returns:
+            tuple: (ocupado, paginas_no_wal, paginas_copiadas), ou None fora do modo WAL
+        """
+        if self.perfil.journal_mode != 'WAL':
+            return None
+        with self.conexao() as con:
+            return con.execute(f"PRAGMA wal_checkpoint({modo.upper()})").fetchone()
+
+    def fechar(self):
+        """Fecha todas as conexões criadas pelo pool (truncando o WAL antes, se houver)."""
+        with self._lock:
+            if self._todas and self.perfil.journal_mode == 'WAL':
+                try:
+                    self._todas[0].execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                except sqlite3.Error:
+                    pass
+            for con in self._todas:
+                con.close()
+            self._todas.clear()
+            self._criadas = 0
+            self._livres = queue.LifoQueue()
+
+
+# Pool global usado por todos os módulos do sistema
+_pool = PoolConexoes()
+
+
+def configurar_banco(caminho=CAMINHO_BANCO, tamanho=TAMANHO_POOL, perfil=None):
+    """
+    Troca o banco de dados usado pelo sistema (ex.: para benchmarks ou testes).
+
+    Fecha as conexões do pool atual e cria um novo pool apontando para ``caminho``,
+    com o perfil de armazenamento ``perfil`` (nome em PERFIS ou PerfilArmazenamento).
+    """
+    global _pool
+    _pool.fechar()
+    _pool = PoolConexoes(caminho, tamanho, perfil=perfil)
+    return _pool
+
+
+def pool_atual():
+    """Retorna o pool global em uso (muda quando ``configurar_banco`` é chamado)."""
+    return _pool
+
+
+def conexao(usuario=None, id_registro=None):
+    """
+    Atalho para ``PoolConexoes.conexao`` do pool que guarda os dados pedidos.
+
+    Sem fragmentação é sempre o pool global; com ela, ``usuario`` (e-mail) ou
+    ``id_registro`` (id de refeição ou mensagem) escolhem o fragmento. Sem
+    nenhum dos dois, a conexão é com o banco principal (catálogo).
+    """
+    return pool_para(usuario, id_registro).conexao()
+
+
+def transacao(usuario=None, id_registro=None):
+    """Atalho para ``PoolConexoes.transacao``, com o mesmo roteamento de ``conexao``."""
+    return pool_para(usuario, id_registro).transacao()
+
+
+# --- Armazenamento fragmentado --- #
+# Com a fragmentação ativa, os dados de cada usuário (perfil, refeições,
+# totais e suporte) ficam em um de N arquivos, escolhido pelo hash do e-mail;
+# o banco principal guarda o catálogo de alimentos, replicado em cada
+# fragmento (as consultas de refeições fazem JOIN com ele). Cada fragmento tem
+# seu próprio lock de escrita, então a vazão de gravação cresce com N.
+
+# Os ids de refeições e mensagens do fragmento i começam em i << BITS_ID_FRAGMENTO:
+# continuam únicos no sistema todo e indicam em qual arquivo estão
+BITS_ID_FRAGMENTO = 40
+TABELAS_COM_ID_FRAGMENTADO = ('refeicoes', 'registro_refeicoes', 'suporte')
+
+_fragmentos = []
+_executor_fragmentos = None
+_roteamento = threading.local()
+
+
+def configurar_fragmentos(quantidade, diretorio='.', prefixo='nutricao_fragmento', tamanho=TAMANHO_POOL,
+                          perfil=None):
+    """
+    Ativa (ou, com ``quantidade`` 0, desativa) o armazenamento fragmentado.
+
+    Cria ou abre os arquivos ``<prefixo>_<i>.db`` em ``diretorio``, aplica as
+    migrações em cada um, reserva a faixa de ids de cada fragmento e copia o
+    catálogo de alimentos do banco principal.
+
+    Args:
+        quantidade (int): Número de fragmentos (não pode mudar depois que houver dados)
+        diretorio (str): Pasta dos arquivos dos fragmentos
+        prefixo (str): Início do nome dos arquivos
+        tamanho (int): Conexões por fragmento
+        perfil (PerfilArmazenamento ou str, opcional): Perfil de armazenamento dos fragmentos
+
+    Returns:
+        list: Pools de conexão dos fragmentos
+    """
+    global _fragmentos, _executor_fragmentos
+    for pool in _fragmentos:
+        pool.fechar()
+    if _executor_fragmentos is not None:
+        _executor_fragmentos.shutdown()
+        _executor_fragmentos = None
+    _fragmentos = []
+    if not quantidade:
+        return _fragmentos
+
+    pools = [PoolConexoes(os.path.join(diretorio, f"{prefixo}_{indice}.db"), tamanho, perfil=perfil)
+             for indice in range(quantidade)]
+    for indice, pool in enumerate(pools):
+        with usando_pool(pool):
+            migrar()
+            with transacao() as conn:
+                for tabela in TABELAS_COM_ID_FRAGMENTADO:
+                    conn.execute(
+                        "INSERT INTO sqlite_sequence (name, seq) SELECT ?, ? "
+                        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?)",
+                        (tabela, indice << BITS_ID_FRAGMENTO, tabela))
+    _fragmentos = pools
+    replicar_catalogo()
+    return _fragmentos
+
+
+def fragmentado():
+    """Indica se o armazenamento fragmentado está ativo."""
+    return bool(_fragmentos)
+
+
+def fragmento_de(email):
+    """
+    Número do fragmento que guarda os dados de um usuário.
+
+    Usa CRC-32 do e-mail normalizado (o ``hash()`` do Python muda a cada execução).
+    """
+    return zlib.crc32(email.strip().lower().encode('utf-8')) % len(_fragmentos)
+
+
+def pool_para(usuario=None, id_registro=None):
+    """
+    Pool de conexões que guarda os dados de ``usuario`` ou do registro ``id_registro``.
+
+    Returns:
+        PoolConexoes: Pool do fragmento, ou o pool global sem fragmentação
+    """
+    fixado = getattr(_roteamento, 'pool', None)
+    if fixado is not None:
+        return fixado
+    if _fragmentos:
+        if usuario is not None:
+            return _fragmentos[fragmento_de(usuario)]
+        if id_registro is not None:
+            try:
+                indice = int(id_registro) >> BITS_ID_FRAGMENTO
+            except (TypeError, ValueError):
+                indice = 0
+            return _fragmentos[indice if 0 <= indice < len(_fragmentos) else 0]
+    return _pool
+
+
+def pools_de_dados():
+    """Pools que guardam dados de usuários: os fragmentos, ou só o pool global."""
+    return list(_fragmentos) or [_pool]
+
+
+@contextmanager
+def usando_pool(pool):
+    """Faz ``conexao()``/``transacao()`` da thread atual usarem ``pool`` dentro do bloco (ex.: migrações)."""
+    anterior = getattr(_roteamento, 'pool', None)
+    _roteamento.pool = pool
+    try:
+        yield pool
+    finally:
+        _roteamento.pool = anterior
+
+
+def replicar_catalogo():
+    """
+    Copia a tabela alimentos do banco principal para todos os fragmentos.
+
+    Chamada depois de cada alteração no catálogo; não faz nada sem fragmentação.
+    """
+    if not _fragmentos:
+        return
+    with _pool.conexao() as conn:
+        alimentos = conn.execute("SELECT nome, calorias, proteinas, carboidratos, gorduras FROM alimentos").fetchall()
+    nomes = {linha[0] for linha in alimentos}
+    for pool in _fragmentos:
+        with pool.transacao() as conn:
+            conn.executemany("INSERT OR REPLACE INTO alimentos (nome, calorias, proteinas, carboidratos, gorduras) "
+                             "VALUES (?, ?, ?, ?, ?)", alimentos)
+            for (nome,) in conn.execute("SELECT nome FROM alimentos").fetchall():
+                if nome not in nomes:
+                    conn.execute("DELETE FROM alimentos WHERE nome = ?", (nome,))
+
+
+def _consultar_arquivo(caminho, sql, parametros):
+    """Executa uma consulta somente leitura em um arquivo (roda nos processos do scatter-gather)."""
+    con = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, timeout=30)
+    try:
+        return con.execute(sql, parametros).fetchall()
+    finally:
+        con.close()
+
+
+def consultar_todos(sql, parametros=(), chave=None, decrescente=False, limite=None):
+    """
+    Executa uma consulta em todos os bancos com dados de usuários e junta os resultados.
+
+    Com fragmentação, cada fragmento é consultado em paralelo num pool de
+    processos (scatter-gather); as listas são concatenadas e, se ``chave``
+    for informada, reordenadas e cortadas em ``limite`` linhas. Para paginar,
+    cada fragmento deve devolver ``deslocamento + limite`` linhas.
+
+    Args:
+        sql (str): Consulta somente leitura
+        parametros (tuple): Parâmetros da consulta
+        chave (callable, opcional): Chave de ordenação das linhas juntadas
+        decrescente (bool): Ordena do maior para o menor
+        limite (int, opcional): Máximo de linhas devolvidas
+
+    Returns:
+        list: Linhas de todos os fragmentos
+    """
+    global _executor_fragmentos
+    if not _fragmentos:
+        with _pool.conexao() as conn:
+            linhas = conn.execute(sql, parametros).fetchall()
+    else:
+        if _executor_fragmentos is None:
+            import multiprocessing
+            _executor_fragmentos = ProcessPoolExecutor(max_workers=len(_fragmentos),
+                                                       mp_context=multiprocessing.get_context('spawn'))
+        partes = _executor_fragmentos.map(_consultar_arquivo, [pool.caminho for pool in _fragmentos],
+                                          [sql] * len(_fragmentos), [tuple(parametros)] * len(_fragmentos))
+        linhas = [linha for parte in partes for linha in parte]
+    if chave is not None:
+        linhas.sort(key=chave, reverse=decrescente)
+    return linhas[:limite] if limite is not None else linhas
+
+
+def checkpoint(modo='TRUNCATE', usuario=None):
+    """Atalho para ``PoolConexoes.checkpoint`` do pool global (ou do fragmento de ``usuario``)."""
+    return pool_para(usuario).checkpoint(modo)
+
+
+# Versões de esquema aplicadas (uma linha por migração) e progresso das migrações em lotes
+_SQL_TABELAS_CONTROLE = (
+    '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        versao INTEGER PRIMARY KEY,
+        descricao TEXT NOT NULL,
+        aplicada_em TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS schema_progresso (
+        versao INTEGER PRIMARY KEY,
+        ultimo_id INTEGER NOT NULL
+    )
+    ''',
+)
+
+# Linhas processadas por transação nas migrações de dados longas
+TAMANHO_LOTE_MIGRACAO = 10000
+# Pausa (s) entre os lotes, para que escritas de outros processos consigam o lock
+PAUSA_ENTRE_LOTES = 0.02
+
+# Migrações registradas, em ordem: (versao, descricao, funcao, em_lotes)
+MIGRACOES = []
+
+
+def migracao(versao, descricao, em_lotes=False):
+    """
+    Registra a função decorada como a migração número ``versao``.
+
+    Migrações comuns recebem um cursor e rodam dentro da mesma transação que
+    grava a versão em schema_version: ou são aplicadas por inteiro, ou não são.
+    Migrações ``em_lotes`` recebem o tamanho do lote e abrem as próprias
+    transações, uma por lote, guardando o progresso em schema_progresso para
+    poderem ser retomadas se o processo for interrompido.
+
+    Todas devem ser idempotentes, pois bancos criados antes do controle de
+    versão passam por elas mesmo já tendo parte do esquema.
+    """
+    def registrar(funcao):
+        MIGRACOES.append((versao, descricao, funcao, em_lotes))
+        return funcao
+    return registrar
+
+
+@migracao(1, "tabelas base")
+def _migracao_tabelas_base(cursor):
+    """
+    Cria as tabelas principais do sistema:
     - usuarios: Armazena informações dos usuários
     - alimentos: Armazena dados nutricionais dos alimentos
     - refeicoes: Registra as refeições dos usuários
     - registro_refeicoes: Tabela legada mantida para compatibilidade
     - suporte: Armazena mensagens de suporte
-    
-    A função não retorna valores, mas faz commit das alterações no banco.
     """
     # Tabela de usuários
     cursor.execute('''
@@ -80,44 +577,796 @@ def criar_tabelas():
         )
     ''')
 
-    conn.commit()
 
-def migrar_dados():
+@migracao(2, "coluna calorias em refeicoes")
+def _migracao_coluna_calorias(cursor):
     """
-    Realiza migração de dados para a nova estrutura do banco.
-    
-    Adiciona a coluna 'calorias' na tabela refeicoes se não existir e
-    calcula os valores com base nos alimentos registrados.
-    
-    Caso ocorra erro durante a migração, faz rollback das alterações.
+    Adiciona a coluna 'calorias' em bancos anteriores a ela.
+
+    O cálculo das calorias das refeições antigas fica para a migração 3, em
+    lotes; aqui só se marca o ponto de partida dela.
     """
-    try:
-        # Adiciona coluna calorias se não existir
-        cursor.execute("PRAGMA table_info(refeicoes)")
-        colunas = [col[1] for col in cursor.fetchall()]
-        
-        if 'calorias' not in colunas:
-            cursor.execute('ALTER TABLE refeicoes ADD COLUMN calorias REAL NOT NULL DEFAULT 0')
-            
-            # Calcula calorias para registros existentes
-            cursor.execute('''
+    cursor.execute("PRAGMA table_info(refeicoes)")
+    colunas = [col[1] for col in cursor.fetchall()]
+
+    if 'calorias' not in colunas:
+        cursor.execute('ALTER TABLE refeicoes ADD COLUMN calorias REAL NOT NULL DEFAULT 0')
+        cursor.execute("INSERT OR IGNORE INTO schema_progresso (versao, ultimo_id) VALUES (3, 0)")
+
+
+@migracao(3, "calorias das refeições antigas", em_lotes=True)
+def _migracao_calcular_calorias(tamanho_lote):
+    """
+    Calcula as calorias das refeições gravadas antes da coluna existir.
+
+    Percorre refeicoes em ordem de id, ``tamanho_lote`` linhas por transação,
+    para não bloquear as escritas do sistema durante minutos em bancos grandes.
+    Só roda se a migração 2 acabou de criar a coluna.
+    """
+    while True:
+        with transacao() as conn:
+            progresso = conn.execute("SELECT ultimo_id FROM schema_progresso WHERE versao = 3").fetchone()
+            if progresso is None:
+                return
+            fim = conn.execute(
+                "SELECT MAX(id) FROM (SELECT id FROM refeicoes WHERE id > ? ORDER BY id LIMIT ?)",
+                (progresso[0], tamanho_lote)).fetchone()[0]
+            if fim is None:
+                conn.execute("DELETE FROM schema_progresso WHERE versao = 3")
+                print("Migração de dados concluída com sucesso!")
+                return
+
+            conn.execute('''
                 UPDATE refeicoes 
                 SET calorias = (
                     SELECT (refeicoes.quantidade_gramas/100) * alimentos.calorias 
                     FROM alimentos 
                     WHERE alimentos.nome = refeicoes.alimento
                 )
-                WHERE EXISTS (
+                WHERE id > ? AND id <= ?
+                AND EXISTS (
                     SELECT 1 FROM alimentos 
                     WHERE alimentos.nome = refeicoes.alimento
                 )
-            ''')
-            conn.commit()
-            print("Migração de dados concluída com sucesso!")
-            
-    except Exception as e:
-        print(f"Erro durante migração: {e}")
-        conn.rollback()
+            ''', (progresso[0], fim))
+            conn.execute("UPDATE schema_progresso SET ultimo_id = ? WHERE versao = 3", (fim,))
+        time.sleep(PAUSA_ENTRE_LOTES)
+
+
+@migracao(4, "índices por usuário e data")
+def _migracao_indices(cursor):
+    """Cria os índices usados pelas consultas por usuário e dia."""
+    # Índices para as consultas "refeições do usuário no dia" e histórico
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_refeicoes_usuario_data
+        ON refeicoes (email_usuario, data)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_registro_refeicoes_email_data
+        ON registro_refeicoes (email, data)
+    ''')
+
+
+@migracao(5, "totais diários")
+def _migracao_totais_diarios(cursor):
+    """
+    Cria totais_diarios, os triggers que a mantêm e a preenche a partir do histórico.
+
+    O preenchimento é uma única agregação na mesma transação que cria os
+    triggers: dividi-lo em lotes abriria uma janela em que refeições
+    alteradas por outros processos seriam contadas duas vezes ou nenhuma.
+    """
+    # Totais nutricionais por usuário e dia, atualizados a cada refeição
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS totais_diarios (
+            email_usuario TEXT NOT NULL,
+            dia TEXT NOT NULL,
+            calorias REAL NOT NULL DEFAULT 0,
+            proteinas REAL NOT NULL DEFAULT 0,
+            carboidratos REAL NOT NULL DEFAULT 0,
+            gorduras REAL NOT NULL DEFAULT 0,
+            refeicoes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (email_usuario, dia)
+        ) WITHOUT ROWID
+    ''')
+    criar_triggers_totais(cursor)
+
+    # Preenche os totais diários de bancos criados antes da tabela existir
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM totais_diarios)")
+    tem_totais = cursor.fetchone()[0]
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM refeicoes)")
+    tem_refeicoes = cursor.fetchone()[0]
+    if tem_refeicoes and not tem_totais:
+        reconstruir_totais_diarios()
+        print("Totais diários calculados a partir do histórico de refeições.")
+
+
+@migracao(6, "versão do catálogo de alimentos")
+def _migracao_versao_catalogo(cursor):
+    """Cria o contador incrementado a cada alteração em alimentos (invalida caches em memória)."""
+    # Versão do catálogo de alimentos, usada para invalidar caches em memória
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versao_catalogo (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            versao INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO versao_catalogo (id, versao) VALUES (1, 0)")
+    for evento in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_versao_catalogo_{evento.lower()}
+            AFTER {evento} ON alimentos
+            BEGIN
+                UPDATE versao_catalogo SET versao = versao + 1 WHERE id = 1;
+            END
+        ''')
+
+
+@migracao(7, "busca nas mensagens de suporte")
+def _migracao_busca_suporte(cursor):
+    """Cria o índice por usuário e data e o índice de busca textual (FTS5) de suporte."""
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_suporte_email_data
+        ON suporte (email, data_hora)
+    ''')
+    criar_indice_busca_suporte(cursor)
+
+
+@migracao(8, "arquivamento de refeições antigas")
+def _migracao_arquivamento(cursor):
+    """
+    Prepara o banco para o arquivamento de refeições antigas (ver arquivamento.py).
+
+    - meses_arquivados: meses de cada tabela que já foram para o arquivo
+    - arquivamento_em_curso: marcador preenchido só dentro da transação do
+      arquivamento; enquanto ele existe, o trigger de exclusão não desconta
+      de totais_diarios as refeições apagadas (os totais delas são mantidos)
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS meses_arquivados (
+            tabela TEXT NOT NULL,
+            mes TEXT NOT NULL,
+            linhas INTEGER NOT NULL,
+            arquivado_em TEXT NOT NULL,
+            PRIMARY KEY (tabela, mes)
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS arquivamento_em_curso (
+            id INTEGER PRIMARY KEY CHECK (id = 1)
+        )
+    ''')
+    cursor.execute("DROP TRIGGER IF EXISTS trg_totais_refeicao_excluida")
+    cursor.execute(f'''
+        CREATE TRIGGER trg_totais_refeicao_excluida
+        AFTER DELETE ON refeicoes
+        WHEN NOT EXISTS (SELECT 1 FROM arquivamento_em_curso)
+        BEGIN
+            {_SQL_SUBTRAIR_TOTAIS.format(linha='OLD')}
+        END
+    ''')
+
+
+@migracao(9, "contadores do ranking de alimentos")
+def _migracao_ranking(cursor):
+    """
+    Cria os contadores do ranking de alimentos (ver ranking.py), os triggers que os mantêm e os preenche.
+
+    - ranking_consumo: gramas, calorias e número de refeições por (janela,
+      usuário, alimento); a janela 0 é o histórico todo, e o usuário '' é a
+      soma de todos os usuários (ranking geral)
+    - consumo_diario_alimentos: os mesmos contadores por dia, guardados só
+      enquanto o dia estiver dentro da maior janela; é o que sai de cada
+      janela quando o dia de referência avança
+    - janelas_ranking / referencia_ranking: janelas mantidas (em dias) e o dia
+      em relação ao qual elas estão calculadas
+    """
+    cursor.execute("CREATE TABLE IF NOT EXISTS janelas_ranking (janela INTEGER PRIMARY KEY)")
+    cursor.executemany("INSERT OR IGNORE INTO janelas_ranking (janela) VALUES (?)",
+                       [(janela,) for janela in JANELAS_RANKING])
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS referencia_ranking (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            dia TEXT NOT NULL
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO referencia_ranking (id, dia) VALUES (1, ?)", (date.today().isoformat(),))
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ranking_consumo (
+            janela INTEGER NOT NULL,
+            email_usuario TEXT NOT NULL,
+            alimento TEXT NOT NULL,
+            gramas REAL NOT NULL DEFAULT 0,
+            calorias REAL NOT NULL DEFAULT 0,
+            refeicoes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (janela, email_usuario, alimento)
+        ) WITHOUT ROWID
+    ''')
+    # Um índice por critério: o top-k é lido em ordem, parando após k linhas
+    for coluna in ('gramas', 'calorias', 'refeicoes'):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_ranking_{coluna} "
+                       f"ON ranking_consumo (janela, email_usuario, {coluna} DESC)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS consumo_diario_alimentos (
+            dia TEXT NOT NULL,
+            email_usuario TEXT NOT NULL,
+            alimento TEXT NOT NULL,
+            gramas REAL NOT NULL DEFAULT 0,
+            calorias REAL NOT NULL DEFAULT 0,
+            refeicoes INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, email_usuario, alimento)
+        ) WITHOUT ROWID
+    ''')
+    criar_triggers_ranking(cursor)
+    reconstruir_ranking_consumo()
+
+
+@migracao(10, "resumos diários do fechamento em lote")
+def _migracao_resumos_diarios(cursor):
+    """
+    Cria resumos_diarios, preenchida pelo fechamento noturno (ver fechamento.py).
+
+    Uma linha por usuário e dia com a meta da dieta, os totais consumidos e a
+    situação em relação à meta ('abaixo', 'dentro', 'acima' ou NULL sem
+    refeições). As próprias linhas marcam o progresso do fechamento: ao ser
+    retomado, ele só processa os usuários que ainda não têm resumo do dia.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS resumos_diarios (
+            email_usuario TEXT NOT NULL,
+            dia TEXT NOT NULL,
+            dieta TEXT NOT NULL,
+            meta_calorias REAL NOT NULL,
+            calorias REAL NOT NULL DEFAULT 0,
+            proteinas REAL NOT NULL DEFAULT 0,
+            carboidratos REAL NOT NULL DEFAULT 0,
+            gorduras REAL NOT NULL DEFAULT 0,
+            refeicoes INTEGER NOT NULL DEFAULT 0,
+            situacao TEXT,
+            PRIMARY KEY (email_usuario, dia)
+        ) WITHOUT ROWID
+    ''')
+    # Relatórios do fechamento consultam um dia para todos os usuários
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_resumos_diarios_dia ON resumos_diarios (dia, situacao)")
+
+
+# Alimentos recomendados de cada dieta quando a relação dieta_alimentos foi criada
+# (as listas que antes ficavam no menu de texto e na interface gráfica)
+_RECOMENDACOES_INICIAIS = {
+    "Low carb": [
+        "Ovos", "Abacate", "Peixes", "Nozes", "Couve-flor", "Espinafre", "Brócolis", "Azeite de oliva",
+        "Amêndoas", "Queijo", "Cogumelos", "Carne bovina", "Salmão", "Aspargos", "Alface", "Cenoura",
+        "Tomate", "Pepino", "Pimentão", "Berinjela", "Abobrinha", "Castanha-do-pará", "Aipo", "Azeitona",
+        "Sementes de chia", "Sementes de linhaça", "Coco", "Framboesa", "Morango", "Repolho", "Alcachofra",
+        "Cebola", "Alho", "Rúcula", "Manjericão", "Salsinha", "Endívia", "Alcaparras", "Pimenta", "Ervilha-torta",
+        "Limão", "Laranja", "Carne de porco", "Frango", "Iogurte natural", "Ricota", "Chá verde", "Água com gás",
+        "Vinagre de maçã", "Café"
+    ],
+    "Cetogênica": [
+        "Bacon", "Queijo cheddar", "Carne de cordeiro", "Manteiga", "Nata", "Óleo de coco", "Salmão selvagem",
+        "Ovos caipiras", "Espinafre", "Couve", "Brócolis", "Couve-flor", "Abacate", "Nozes", "Castanhas",
+        "Sementes de abóbora", "Azeitonas", "Chá de hortelã", "Café sem açúcar", "Queijo parmesão",
+        "Frango caipira", "Carne moída", "Camarão", "Atum", "Aspargos", "Abobrinha", "Cogumelos", "Alho",
+        "Cebola", "Pimenta", "Ervas frescas", "Alface", "Rúcula", "Salsa", "Manjericão", "Nata fresca",
+        "Creme de leite", "Óleo MCT", "Chá de camomila", "Queijo mozzarella", "Carne bovina", "Carne de porco",
+        "Peixes gordurosos", "Sementes de chia", "Sementes de linhaça", "Limão", "Vinagre de maçã",
+        "Água mineral"
+    ],
+    "Hiperproteica": [
+        "Peito de frango", "Clara de ovo", "Carne magra", "Peixes", "Queijo cottage", "Iogurte grego",
+        "Atum", "Carne bovina magra", "Salmão", "Ovos inteiros", "Tofu", "Tempeh", "Lentilhas", "Feijão",
+        "Quinoa", "Amêndoas", "Nozes", "Sementes de abóbora", "Camarão", "Proteína isolada", "Leite desnatado",
+        "Ricota", "Brócolis", "Couve-flor", "Espinafre", "Cenoura", "Abobrinha", "Alface", "Tomate",
+        "Pepino", "Pimentão", "Azeite de oliva", "Chá verde", "Água"
+    ],
+    "Bulking": [
+        "Arroz integral", "Batata doce", "Aveia", "Massas integrais", "Carne vermelha", "Peito de frango",
+        "Ovos", "Salmão", "Atum", "Quinoa", "Feijão", "Grão-de-bico", "Lentilha", "Leite integral",
+        "Iogurte natural", "Queijo", "Nozes", "Amêndoas", "Castanha-do-pará", "Abacate", "Banana",
+        "Morangos", "Espinafre", "Brócolis", "Cenoura", "Abobrinha", "Tomate", "Pepino", "Pimentão",
+        "Azeite de oliva", "Manteiga de amendoim", "Chá verde", "Água", "Mel", "Chocolate amargo",
+        "Batata inglesa", "Milho", "Pão integral", "Sementes de chia", "Sementes de linhaça", "Ervilha"
+    ],
+}
+
+
+@migracao(11, "alimentos recomendados por dieta")
+def _migracao_dieta_alimentos(cursor):
+    """
+    Cria dieta_alimentos (dieta -> nome em alimentos) e a preenche com as listas antigas.
+
+    Os nomes seguem a normalização do cadastro (minúsculas). Só os que
+    existirem em alimentos são recomendados (ver recomendacao.py). Como a
+    relação faz parte do catálogo, alterá-la também incrementa versao_catalogo.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dieta_alimentos (
+            dieta TEXT NOT NULL,
+            alimento TEXT NOT NULL,
+            PRIMARY KEY (dieta, alimento)
+        ) WITHOUT ROWID
+    ''')
+    for evento in ("INSERT", "UPDATE", "DELETE"):
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_versao_catalogo_dieta_{evento.lower()}
+            AFTER {evento} ON dieta_alimentos
+            BEGIN
+                UPDATE versao_catalogo SET versao = versao + 1 WHERE id = 1;
+            END
+        ''')
+    cursor.executemany("INSERT OR IGNORE INTO dieta_alimentos (dieta, alimento) VALUES (?, ?)",
+                       [(dieta, " ".join(nome.split()).lower())
+                        for dieta, nomes in _RECOMENDACOES_INICIAIS.items() for nome in nomes])
+
+
+@migracao(12, "totais diários acompanham os macronutrientes do catálogo")
+def _migracao_totais_por_alimento(cursor):
+    """
+    Cria os triggers que corrigem totais_diarios quando um alimento muda.
+
+    Os totais de proteínas, carboidratos e gorduras são calculados com os
+    valores atuais de alimentos (ver criar_triggers_totais). Sem estes
+    triggers, alterar os macronutrientes de um alimento já consumido (como faz
+    a importação de tabelas) deixava os totais com os valores antigos, e
+    excluir depois a refeição subtraía valores diferentes dos somados.
+    Inclusões, exclusões e renomeações de alimentos são tratadas da mesma
+    forma: sai a contribuição das refeições com o nome antigo e entra a das
+    refeições com o nome novo.
+    """
+    # Refeições de um alimento, lidas pelos triggers abaixo
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_refeicoes_alimento ON refeicoes (alimento)")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_totais_alimento_inserido
+        AFTER INSERT ON alimentos
+        BEGIN
+            {_SQL_AJUSTAR_TOTAIS_DO_ALIMENTO.format(linha='NEW', sinal='+')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_totais_alimento_excluido
+        AFTER DELETE ON alimentos
+        BEGIN
+            {_SQL_AJUSTAR_TOTAIS_DO_ALIMENTO.format(linha='OLD', sinal='-')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_totais_alimento_alterado
+        AFTER UPDATE OF nome, proteinas, carboidratos, gorduras ON alimentos
+        WHEN OLD.nome IS NOT NEW.nome OR OLD.proteinas IS NOT NEW.proteinas
+             OR OLD.carboidratos IS NOT NEW.carboidratos OR OLD.gorduras IS NOT NEW.gorduras
+        BEGIN
+            {_SQL_AJUSTAR_TOTAIS_DO_ALIMENTO.format(linha='OLD', sinal='-')}
+            {_SQL_AJUSTAR_TOTAIS_DO_ALIMENTO.format(linha='NEW', sinal='+')}
+        END
+    ''')
+
+
+# Versão do esquema esperada por este código
+VERSAO_ESQUEMA = max(versao for versao, *_ in MIGRACOES)
+
+
+def versao_esquema():
+    """
+    Retorna a versão atual do esquema do banco.
+
+    Returns:
+        int: Maior versão registrada em schema_version (0 em bancos sem controle de versão)
+    """
+    with conexao() as conn:
+        try:
+            return conn.execute("SELECT MAX(versao) FROM schema_version").fetchone()[0] or 0
+        except sqlite3.OperationalError:
+            return 0
+
+
+def migrar(tamanho_lote=TAMANHO_LOTE_MIGRACAO, ate=None):
+    """
+    Aplica, em ordem, as migrações ainda não registradas em schema_version.
+
+    Pode ser interrompida e executada de novo: migrações concluídas não são
+    repetidas e migrações em lotes continuam de onde pararam.
+
+    Args:
+        tamanho_lote (int): Linhas por transação nas migrações em lotes
+        ate (int, opcional): Última versão a aplicar (padrão: todas)
+
+    Returns:
+        int: Versão do esquema ao final
+    """
+    with transacao() as conn:
+        for sql in _SQL_TABELAS_CONTROLE:
+            conn.execute(sql)
+
+    atual = versao_esquema()
+    for versao, descricao, funcao, em_lotes in MIGRACOES:
+        if versao <= atual:
+            continue
+        if ate is not None and versao > ate:
+            break
+        if em_lotes:
+            funcao(tamanho_lote)
+        with transacao() as conn:
+            # Outro processo pode ter aplicado a mesma migração enquanto esperávamos o lock
+            if conn.execute("SELECT 1 FROM schema_version WHERE versao = ?", (versao,)).fetchone():
+                continue
+            if not em_lotes:
+                funcao(conn.cursor())
+            conn.execute("INSERT INTO schema_version (versao, descricao, aplicada_em) VALUES (?, ?, ?)",
+                         (versao, descricao, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+    return versao_esquema()
+
+
+def verificar_esquema():
+    """
+    Verificação feita na inicialização: uma única consulta à versão do esquema.
+
+    Só quando o banco está atrasado (banco novo ou criado por uma versão
+    anterior do sistema) as migrações pendentes são aplicadas.
+
+    Returns:
+        int: Versão do esquema em uso
+    """
+    versao = versao_esquema()
+    if versao < VERSAO_ESQUEMA:
+        versao = migrar()
+    return versao
+
+def criar_indice_busca_suporte(cursor):
+    """
+    Cria o índice FTS5 sobre mensagem e resposta da tabela suporte.
+
+    O índice usa a própria tabela suporte como conteúdo (não duplica o texto)
+    e é mantido por triggers. Se o SQLite não tiver FTS5, nada é criado e a
+    busca de suporte usa LIKE.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor dentro de uma transação aberta
+    """
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'suporte_fts'")
+    ja_existia = cursor.fetchone() is not None
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS suporte_fts USING fts5(
+                mensagem, resposta,
+                content='suporte', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        return
+
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_suporte_fts_inserido AFTER INSERT ON suporte
+        BEGIN
+            INSERT INTO suporte_fts (rowid, mensagem, resposta) VALUES (NEW.id, NEW.mensagem, NEW.resposta);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_suporte_fts_excluido AFTER DELETE ON suporte
+        BEGIN
+            INSERT INTO suporte_fts (suporte_fts, rowid, mensagem, resposta)
+            VALUES ('delete', OLD.id, OLD.mensagem, OLD.resposta);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_suporte_fts_alterado AFTER UPDATE OF mensagem, resposta ON suporte
+        BEGIN
+            INSERT INTO suporte_fts (suporte_fts, rowid, mensagem, resposta)
+            VALUES ('delete', OLD.id, OLD.mensagem, OLD.resposta);
+            INSERT INTO suporte_fts (rowid, mensagem, resposta) VALUES (NEW.id, NEW.mensagem, NEW.resposta);
+        END
+    ''')
+
+    # Indexa as mensagens que já existiam antes do índice ser criado
+    if not ja_existia:
+        cursor.execute("INSERT INTO suporte_fts (suporte_fts) VALUES ('rebuild')")
+
+# Trechos usados pelos triggers de totais_diarios. {linha} é NEW ou OLD.
+_SQL_SOMAR_TOTAIS = '''
+    INSERT INTO totais_diarios (email_usuario, dia, calorias, proteinas, carboidratos, gorduras, refeicoes)
+    SELECT {linha}.email_usuario, substr({linha}.data, 1, 10), {linha}.calorias,
+           IFNULL(a.proteinas, 0) * {linha}.quantidade_gramas / 100,
+           IFNULL(a.carboidratos, 0) * {linha}.quantidade_gramas / 100,
+           IFNULL(a.gorduras, 0) * {linha}.quantidade_gramas / 100,
+           1
+    FROM (SELECT {linha}.alimento AS nome) AS item
+    LEFT JOIN alimentos a ON a.nome = item.nome
+    WHERE true
+    ON CONFLICT (email_usuario, dia) DO UPDATE SET
+        calorias = calorias + excluded.calorias,
+        proteinas = proteinas + excluded.proteinas,
+        carboidratos = carboidratos + excluded.carboidratos,
+        gorduras = gorduras + excluded.gorduras,
+        refeicoes = refeicoes + 1;
+'''
+
+_SQL_SUBTRAIR_TOTAIS = '''
+    UPDATE totais_diarios SET
+        calorias = calorias - {linha}.calorias,
+        proteinas = proteinas - IFNULL((SELECT proteinas FROM alimentos WHERE nome = {linha}.alimento), 0)
+                    * {linha}.quantidade_gramas / 100,
+        carboidratos = carboidratos - IFNULL((SELECT carboidratos FROM alimentos WHERE nome = {linha}.alimento), 0)
+                       * {linha}.quantidade_gramas / 100,
+        gorduras = gorduras - IFNULL((SELECT gorduras FROM alimentos WHERE nome = {linha}.alimento), 0)
+                   * {linha}.quantidade_gramas / 100,
+        refeicoes = refeicoes - 1
+    WHERE email_usuario = {linha}.email_usuario AND dia = substr({linha}.data, 1, 10);
+    DELETE FROM totais_diarios
+    WHERE email_usuario = {linha}.email_usuario AND dia = substr({linha}.data, 1, 10) AND refeicoes <= 0;
+'''
+
+# Trecho dos triggers de alimentos: soma (sinal '+') ou subtrai (sinal '-') os macronutrientes
+# de {linha} (NEW ou OLD) nos dias em que o alimento foi consumido. Refeições já arquivadas
+# não estão mais em refeicoes, e os totais dos seus dias ficam como estão
+_SQL_AJUSTAR_TOTAIS_DO_ALIMENTO = '''
+    UPDATE totais_diarios SET
+        proteinas = totais_diarios.proteinas {sinal} ajuste.proteinas,
+        carboidratos = totais_diarios.carboidratos {sinal} ajuste.carboidratos,
+        gorduras = totais_diarios.gorduras {sinal} ajuste.gorduras
+    FROM (
+        SELECT email_usuario, substr(data, 1, 10) AS dia,
+               IFNULL({linha}.proteinas, 0) * SUM(quantidade_gramas) / 100 AS proteinas,
+               IFNULL({linha}.carboidratos, 0) * SUM(quantidade_gramas) / 100 AS carboidratos,
+               IFNULL({linha}.gorduras, 0) * SUM(quantidade_gramas) / 100 AS gorduras
+        FROM refeicoes
+        WHERE alimento = {linha}.nome
+        GROUP BY email_usuario, substr(data, 1, 10)
+    ) AS ajuste
+    WHERE totais_diarios.email_usuario = ajuste.email_usuario AND totais_diarios.dia = ajuste.dia;
+'''
+
+# Agregação completa usada para reconstruir totais_diarios do zero
+_SQL_AGREGAR_TOTAIS = '''
+    SELECT r.email_usuario, substr(r.data, 1, 10) AS dia,
+           SUM(r.calorias) AS calorias,
+           SUM(IFNULL(a.proteinas, 0) * r.quantidade_gramas / 100) AS proteinas,
+           SUM(IFNULL(a.carboidratos, 0) * r.quantidade_gramas / 100) AS carboidratos,
+           SUM(IFNULL(a.gorduras, 0) * r.quantidade_gramas / 100) AS gorduras,
+           COUNT(*) AS refeicoes
+    FROM refeicoes r
+    LEFT JOIN alimentos a ON a.nome = r.alimento
+    GROUP BY r.email_usuario, dia
+'''
+
+def criar_triggers_totais(cursor):
+    """
+    Cria os triggers que mantêm totais_diarios sincronizada com refeicoes.
+
+    Inserções somam a refeição ao total do dia, exclusões subtraem e
+    atualizações fazem as duas coisas. Os macronutrientes são calculados a
+    partir dos valores atuais da tabela alimentos; quando eles mudam, os
+    triggers da migração 12 corrigem os totais dos dias afetados.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor dentro de uma transação aberta
+    """
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_totais_refeicao_inserida
+        AFTER INSERT ON refeicoes
+        BEGIN
+            {_SQL_SOMAR_TOTAIS.format(linha='NEW')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_totais_refeicao_excluida
+        AFTER DELETE ON refeicoes
+        BEGIN
+            {_SQL_SUBTRAIR_TOTAIS.format(linha='OLD')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_totais_refeicao_alterada
+        AFTER UPDATE OF email_usuario, alimento, quantidade_gramas, calorias, data ON refeicoes
+        BEGIN
+            {_SQL_SUBTRAIR_TOTAIS.format(linha='OLD')}
+            {_SQL_SOMAR_TOTAIS.format(linha='NEW')}
+        END
+    ''')
+
+def reconstruir_totais_diarios():
+    """
+    Recalcula totais_diarios do zero a partir de refeicoes.
+
+    Compara o resultado com os valores mantidos pelos triggers antes de
+    substituí-los, o que permite detectar divergências (drift). Os meses já
+    arquivados não estão mais em refeicoes e seus totais ficam como estão.
+
+    Returns:
+        int: Número de pares (usuário, dia) que estavam divergentes
+    """
+    with transacao() as conn:
+        nao_arquivados = ""
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'meses_arquivados'").fetchone():
+            nao_arquivados = "WHERE substr(dia, 1, 7) NOT IN " \
+                             "(SELECT mes FROM meses_arquivados WHERE tabela = 'refeicoes')"
+        conn.execute("DROP TABLE IF EXISTS temp.totais_recalculados")
+        conn.execute(f"CREATE TEMP TABLE totais_recalculados AS "
+                     f"SELECT * FROM ({_SQL_AGREGAR_TOTAIS}) {nao_arquivados}")
+
+        colunas = "email_usuario, dia, ROUND(calorias, 4), ROUND(proteinas, 4), " \
+                  "ROUND(carboidratos, 4), ROUND(gorduras, 4), refeicoes"
+        divergentes = conn.execute(f'''
+            SELECT COUNT(*) FROM (
+                SELECT email_usuario, dia FROM (
+                    SELECT {colunas} FROM totais_diarios {nao_arquivados}
+                    EXCEPT SELECT {colunas} FROM temp.totais_recalculados)
+                UNION
+                SELECT email_usuario, dia FROM (
+                    SELECT {colunas} FROM temp.totais_recalculados
+                    EXCEPT SELECT {colunas} FROM totais_diarios {nao_arquivados}))
+        ''').fetchone()[0]
+
+        conn.execute(f"DELETE FROM totais_diarios {nao_arquivados}")
+        conn.execute("INSERT INTO totais_diarios SELECT * FROM temp.totais_recalculados")
+        conn.execute("DROP TABLE temp.totais_recalculados")
+    return divergentes
+
+
+# Janelas do ranking de alimentos, em dias (0 = histórico todo)
+JANELAS_RANKING = (0, 7, 30, 365)
+
+# Uma refeição conta na janela j se o dia dela é posterior a referência - j dias;
+# o usuário '' acumula o ranking geral (todos os usuários). {janelas} nos modelos
+# abaixo é esta consulta (ver _sql_ranking)
+_SQL_JANELAS_DA_REFEICAO = '''
+    SELECT j.janela FROM janelas_ranking j, referencia_ranking r
+    WHERE j.janela = 0 OR substr({linha}.data, 1, 10) > date(r.dia, '-' || j.janela || ' days')
+'''
+
+_SQL_SOMAR_RANKING = '''
+    INSERT INTO consumo_diario_alimentos (dia, email_usuario, alimento, gramas, calorias, refeicoes)
+    SELECT substr({linha}.data, 1, 10), {linha}.email_usuario, {linha}.alimento,
+           {linha}.quantidade_gramas, {linha}.calorias, 1
+    FROM referencia_ranking r
+    WHERE substr({linha}.data, 1, 10) > date(r.dia, '-' || (SELECT MAX(janela) FROM janelas_ranking) || ' days')
+    ON CONFLICT (dia, email_usuario, alimento) DO UPDATE SET
+        gramas = gramas + excluded.gramas,
+        calorias = calorias + excluded.calorias,
+        refeicoes = refeicoes + 1;
+    INSERT INTO ranking_consumo (janela, email_usuario, alimento, gramas, calorias, refeicoes)
+    SELECT janelas.janela, usuarios.email, {linha}.alimento, {linha}.quantidade_gramas, {linha}.calorias, 1
+    FROM ({janelas}) AS janelas,
+         (SELECT {linha}.email_usuario AS email UNION ALL SELECT '') AS usuarios
+    WHERE true
+    ON CONFLICT (janela, email_usuario, alimento) DO UPDATE SET
+        gramas = gramas + excluded.gramas,
+        calorias = calorias + excluded.calorias,
+        refeicoes = refeicoes + 1;
+'''
+
+_SQL_SUBTRAIR_RANKING = '''
+    UPDATE consumo_diario_alimentos SET
+        gramas = gramas - {linha}.quantidade_gramas,
+        calorias = calorias - {linha}.calorias,
+        refeicoes = refeicoes - 1
+    WHERE dia = substr({linha}.data, 1, 10) AND email_usuario = {linha}.email_usuario AND alimento = {linha}.alimento;
+    DELETE FROM consumo_diario_alimentos
+    WHERE dia = substr({linha}.data, 1, 10) AND email_usuario = {linha}.email_usuario AND alimento = {linha}.alimento
+          AND refeicoes <= 0;
+    UPDATE ranking_consumo SET
+        gramas = gramas - {linha}.quantidade_gramas,
+        calorias = calorias - {linha}.calorias,
+        refeicoes = refeicoes - 1
+    WHERE janela IN ({janelas})
+          AND email_usuario IN ({linha}.email_usuario, '') AND alimento = {linha}.alimento;
+    DELETE FROM ranking_consumo
+    WHERE janela IN (SELECT janela FROM janelas_ranking)
+          AND email_usuario IN ({linha}.email_usuario, '') AND alimento = {linha}.alimento AND refeicoes <= 0;
+'''
+
+
+def _sql_ranking(modelo, linha):
+    """Preenche um dos modelos de SQL do ranking para a linha NEW ou OLD de um trigger."""
+    return modelo.format(linha=linha, janelas=_SQL_JANELAS_DA_REFEICAO.format(linha=linha))
+
+
+def criar_triggers_ranking(cursor):
+    """
+    Cria os triggers que mantêm ranking_consumo e consumo_diario_alimentos em dia com refeicoes.
+
+    Como em totais_diarios, a exclusão feita pelo arquivamento não desconta
+    nada: o ranking continua contando as refeições arquivadas.
+
+    Args:
+        cursor (sqlite3.Cursor): Cursor dentro de uma transação aberta
+    """
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_ranking_refeicao_inserida
+        AFTER INSERT ON refeicoes
+        BEGIN
+            {_sql_ranking(_SQL_SOMAR_RANKING, 'NEW')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_ranking_refeicao_excluida
+        AFTER DELETE ON refeicoes
+        WHEN NOT EXISTS (SELECT 1 FROM arquivamento_em_curso)
+        BEGIN
+            {_sql_ranking(_SQL_SUBTRAIR_RANKING, 'OLD')}
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_ranking_refeicao_alterada
+        AFTER UPDATE OF email_usuario, alimento, quantidade_gramas, calorias, data ON refeicoes
+        BEGIN
+            {_sql_ranking(_SQL_SUBTRAIR_RANKING, 'OLD')}
+            {_sql_ranking(_SQL_SOMAR_RANKING, 'NEW')}
+        END
+    ''')
+
+
+def reconstruir_ranking_consumo(hoje=None):
+    """
+    Recalcula do zero os contadores do ranking a partir de refeicoes e do arquivo de refeições antigas.
+
+    Args:
+        hoje (date, opcional): Novo dia de referência das janelas. Padrão: hoje
+
+    Returns:
+        int: Número de linhas em ranking_consumo
+    """
+    from arquivamento import lotes_arquivados
+
+    hoje = (hoje or date.today()).isoformat()
+    with transacao() as conn:
+        conn.execute("DROP TABLE IF EXISTS temp.refeicoes_arquivadas")
+        conn.execute("CREATE TEMP TABLE refeicoes_arquivadas "
+                     "(email_usuario TEXT, alimento TEXT, gramas REAL, calorias REAL, dia TEXT)")
+        for linhas in lotes_arquivados(pool_para(), 'refeicoes',
+                                       "id, email_usuario, alimento, quantidade_gramas, calorias, substr(data, 1, 10)"):
+            conn.executemany("INSERT INTO temp.refeicoes_arquivadas VALUES (?, ?, ?, ?, ?)",
+                             [linha[1:] for linha in linhas])
+        todas = '''
+            SELECT email_usuario, alimento, quantidade_gramas AS gramas, calorias, substr(data, 1, 10) AS dia
+            FROM refeicoes
+            UNION ALL SELECT * FROM temp.refeicoes_arquivadas
+        '''
+
+        conn.execute("DELETE FROM consumo_diario_alimentos")
+        conn.execute("DELETE FROM ranking_consumo")
+        conn.execute("UPDATE referencia_ranking SET dia = ?", (hoje,))
+        conn.execute(f'''
+            INSERT INTO consumo_diario_alimentos (dia, email_usuario, alimento, gramas, calorias, refeicoes)
+            SELECT dia, email_usuario, alimento, SUM(gramas), SUM(calorias), COUNT(*) FROM ({todas})
+            WHERE dia > date(?, '-' || (SELECT MAX(janela) FROM janelas_ranking) || ' days')
+            GROUP BY dia, email_usuario, alimento
+        ''', (hoje,))
+        conn.execute(f'''
+            INSERT INTO ranking_consumo (janela, email_usuario, alimento, gramas, calorias, refeicoes)
+            SELECT 0, email_usuario, alimento, SUM(gramas), SUM(calorias), COUNT(*) FROM ({todas})
+            GROUP BY email_usuario, alimento
+        ''')
+        conn.execute('''
+            INSERT INTO ranking_consumo (janela, email_usuario, alimento, gramas, calorias, refeicoes)
+            SELECT j.janela, d.email_usuario, d.alimento, SUM(d.gramas), SUM(d.calorias), SUM(d.refeicoes)
+            FROM consumo_diario_alimentos d
+            JOIN janelas_ranking j ON j.janela > 0 AND d.dia > date(?, '-' || j.janela || ' days')
+            GROUP BY j.janela, d.email_usuario, d.alimento
+        ''', (hoje,))
+        conn.execute('''
+            INSERT INTO ranking_consumo (janela, email_usuario, alimento, gramas, calorias, refeicoes)
+            SELECT janela, '', alimento, SUM(gramas), SUM(calorias), SUM(refeicoes)
+            FROM ranking_consumo GROUP BY janela, alimento
+        ''')
+        conn.execute("DROP TABLE temp.refeicoes_arquivadas")
+        return conn.execute("SELECT COUNT(*) FROM ranking_consumo").fetchone()[0]
+
+def intervalo_do_dia(dia=None):
+    """
+    Retorna o intervalo semiaberto [início, fim) de um dia para filtrar timestamps.
+
+    As datas são gravadas como texto ISO ("AAAA-MM-DD HH:MM:SS"), então comparar
+    ``data >= inicio AND data < fim`` seleciona o dia inteiro e, ao contrário de
+    ``date(data) = ?`` ou ``data LIKE ?``, permite que o SQLite use o índice.
+
+    Args:
+        dia (date, opcional): Dia desejado. Padrão: hoje
+
+    Returns:
+        tuple: (inicio, fim) como strings "AAAA-MM-DD"
+    """
+    dia = dia or date.today()
+    return dia.strftime("%Y-%m-%d"), (dia + timedelta(days=1)).strftime("%Y-%m-%d")
 
 def mostrar_estrutura():
     """
@@ -127,19 +1376,37 @@ def mostrar_estrutura():
     Útil para verificação e depuração.
     """
     print("\nESTRUTURA DO BANCO DE DADOS:")
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-    tabelas = cursor.fetchall()
-    
-    for tabela in tabelas:
-        print(f"\nTabela: {tabela[0]}")
-        cursor.execute(f"PRAGMA table_info({tabela[0]})")
-        for coluna in cursor.fetchall():
-            print(f"  {coluna[1]} ({coluna[2]})")
+    with conexao() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        tabelas = cursor.fetchall()
 
-# Executa a criação das tabelas e migração
-criar_tabelas()
-migrar_dados()
+        for tabela in tabelas:
+            print(f"\nTabela: {tabela[0]}")
+            cursor.execute(f"PRAGMA table_info({tabela[0]})")
+            for coluna in cursor.fetchall():
+                print(f"  {coluna[1]} ({coluna[2]})")
 
 # Mostra a estrutura ao executar 
+# (python database.py migrar aplica as migrações pendentes;
+#  python database.py reconstruir_totais recalcula totais_diarios e informa divergências;
+#  python database.py checkpoint copia o WAL para o banco e zera o arquivo -wal)
 if __name__ == "__main__":
-    mostrar_estrutura()
\ No newline at end of file
+    import sys
+
+    if sys.argv[1:] == ["migrar"]:
+        anterior = versao_esquema()
+        atual = migrar()
+        print(f"Esquema na versão {atual} (antes: {anterior}).")
+    elif sys.argv[1:] == ["checkpoint"]:
+        resultado = checkpoint()
+        if resultado is None:
+            print(f"O banco não está em modo WAL ({pool_atual().perfil.journal_mode}).")
+        else:
+            print(f"Checkpoint concluído: {resultado[2]} de {resultado[1]} página(s) copiada(s).")
+    elif sys.argv[1:] == ["reconstruir_totais"]:
+        divergentes = reconstruir_totais_diarios()
+        print(f"Totais diários reconstruídos ({divergentes} dia(s) divergente(s) corrigido(s)).")
+    else:
+        verificar_esquema()
+        mostrar_estrutura()
@@ -0,0 +1,294 @@
+# Importações necessárias para o código
+import ast
+import json
+import math
+import os
+import sys
+from array import array
+
+import database
+from arquivamento import lotes_arquivados
+
+# Pasta padrão da exportação
+DIRETORIO_EXPORTACAO = 'exportacao'
+# Refeições lidas do banco por vez (a memória usada não depende do tamanho da tabela)
+TAMANHO_LOTE_EXPORTACAO = 50000
+# Partições (meses) com arquivos abertos ao mesmo tempo
+MAX_PARTICOES_ABERTAS = 12
+# Tamanho fixo do cabeçalho .npy: permite reescrever o número de linhas no lugar
+TAMANHO_CABECALHO_NPY = 128
+
+# Colunas de refeicoes exportadas: (nome, dtype do NumPy, typecode do array do Python).
+# usuario e alimento são códigos de dicionário: a linha i de usuarios/ e alimentos/ descreve o código i.
+COLUNAS_REFEICOES = (
+    ('id', '<i8', 'q'),
+    ('data', '<M8[s]', 'q'),
+    ('usuario', '<i4', 'i'),
+    ('alimento', '<i4', 'i'),
+    ('quantidade_gramas', '<f8', 'd'),
+    ('calorias', '<f8', 'd'),
+)
+
+# Mesma ordem de COLUNAS_REFEICOES, com a data já convertida em segundos pelo SQLite, mais o mês
+_SQL_COLUNAS = ("id, CAST(strftime('%s', data) AS INTEGER), email_usuario, alimento, "
+                "quantidade_gramas, calorias, substr(data, 1, 7)")
+
+_COLUNAS_ALIMENTOS = ('calorias', 'proteinas', 'carboidratos', 'gorduras')
+_COLUNAS_USUARIOS = ('peso', 'altura', 'sexo', 'dieta', 'imc')
+
+
+class ColunaNpy:
+    """Arquivo .npy de uma dimensão aberto para acréscimo.
+
+    Grava o formato .npy (versão 1.0) sem depender do NumPy: ``np.load``
+    lê os arquivos direto. O cabeçalho tem tamanho fixo e só recebe o
+    número final de linhas em ``gravar_cabecalho``; reabrir um arquivo
+    existente continua a partir das ``linhas`` informadas, descartando o que
+    uma exportação interrompida tenha deixado depois delas.
+    """
+
+    def __init__(self, caminho, descr, typecode, linhas=0):
+        """
+        Args:
+            caminho (str): Caminho do arquivo .npy
+            descr (str): dtype do NumPy (ex.: '<i8', '<f8', '<M8[s]')
+            typecode (str): Typecode do ``array`` com o mesmo tamanho de item
+            linhas (int): Linhas já gravadas (0 cria o arquivo do zero)
+        """
+        self.descr = descr
+        self.typecode = typecode
+        self.linhas = linhas
+        self.tamanho_item = array(typecode).itemsize
+        self._arquivo = open(caminho, 'r+b' if linhas else 'w+b')
+        self._arquivo.truncate(TAMANHO_CABECALHO_NPY + linhas * self.tamanho_item)
+        self.gravar_cabecalho()
+        self._arquivo.seek(0, os.SEEK_END)
+
+    def acrescentar(self, valores):
+        """Grava ``valores`` (sequência de números) no fim do arquivo."""
+        dados = array(self.typecode, valores)
+        if sys.byteorder == 'big':
+            dados.byteswap()
+        dados.tofile(self._arquivo)
+        self.linhas += len(dados)
+
+    def gravar_cabecalho(self):
+        """Reescreve o cabeçalho com o número atual de linhas."""
+        posicao = self._arquivo.tell()
+        self._arquivo.seek(0)
+        self._arquivo.write(cabecalho_npy(self.descr, self.linhas))
+        self._arquivo.seek(posicao)
+
+    def fechar(self):
+        self.gravar_cabecalho()
+        self._arquivo.close()
+
+
+def cabecalho_npy(descr, linhas):
+    """Cabeçalho .npy (versão 1.0) de ``TAMANHO_CABECALHO_NPY`` bytes para um vetor de ``linhas`` itens."""
+    dicionario = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({linhas},), }}"
+    dicionario = dicionario.ljust(TAMANHO_CABECALHO_NPY - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + len(dicionario).to_bytes(2, 'little') + dicionario.encode('latin-1')
+
+
+def ler_npy(caminho):
+    """
+    Lê um vetor .npy gravado por esta exportação sem precisar do NumPy.
+
+    Returns:
+        tuple: (descr, lista de valores)
+    """
+    with open(caminho, 'rb') as arquivo:
+        prefixo = arquivo.read(10)
+        cabecalho = ast.literal_eval(arquivo.read(int.from_bytes(prefixo[8:10], 'little')).decode('latin-1'))
+        dados = arquivo.read()
+    descr, linhas = cabecalho['descr'], cabecalho['shape'][0]
+    if descr.startswith('<U'):
+        largura = int(descr[2:])
+        return descr, [dados[i * largura * 4:(i + 1) * largura * 4].decode('utf-32-le').rstrip('\0')
+                       for i in range(linhas)]
+    typecode = {'<i8': 'q', '<M8[s]': 'q', '<i4': 'i', '<f8': 'd'}[descr]
+    valores = array(typecode)
+    valores.frombytes(dados[:linhas * valores.itemsize])
+    if sys.byteorder == 'big':
+        valores.byteswap()
+    return descr, valores.tolist()
+
+
+def _gravar_vetor(caminho, valores):
+    """Grava uma lista pequena (tabela de dimensão) como .npy: texto vira '<U', números '<f8'."""
+    if any(isinstance(valor, str) for valor in valores):
+        largura = max([len(valor or '') for valor in valores] + [1])
+        with open(caminho, 'wb') as arquivo:
+            arquivo.write(cabecalho_npy(f'<U{largura}', len(valores)))
+            for valor in valores:
+                arquivo.write((valor or '').ljust(largura, '\0').encode('utf-32-le'))
+    else:
+        coluna = ColunaNpy(caminho, '<f8', 'd')
+        coluna.acrescentar(math.nan if valor is None else valor for valor in valores)
+        coluna.fechar()
+
+
+class _Particoes:
+    """Arquivos de coluna de cada mês, com no máximo ``MAX_PARTICOES_ABERTAS`` meses abertos."""
+
+    def __init__(self, diretorio, linhas_por_mes):
+        self.diretorio = diretorio
+        self.linhas_por_mes = linhas_por_mes
+        self._abertas = {}
+
+    def colunas(self, mes):
+        colunas = self._abertas.pop(mes, None)
+        if colunas is None:
+            if len(self._abertas) >= MAX_PARTICOES_ABERTAS:
+                self._fechar(next(iter(self._abertas)))
+            pasta = os.path.join(self.diretorio, 'refeicoes', f'mes={mes}')
+            os.makedirs(pasta, exist_ok=True)
+            linhas = self.linhas_por_mes.get(mes, 0)
+            colunas = [ColunaNpy(os.path.join(pasta, f'{nome}.npy'), descr, typecode, linhas)
+                       for nome, descr, typecode in COLUNAS_REFEICOES]
+        # Reinsere no fim: o mês usado há mais tempo é o primeiro a ser fechado
+        self._abertas[mes] = colunas
+        return colunas
+
+    def _fechar(self, mes):
+        colunas = self._abertas.pop(mes)
+        for coluna in colunas:
+            coluna.fechar()
+        self.linhas_por_mes[mes] = colunas[0].linhas
+
+    def fechar_todas(self):
+        for mes in list(self._abertas):
+            self._fechar(mes)
+
+
+def _ler_estado(diretorio):
+    caminho = os.path.join(diretorio, 'estado.json')
+    if not os.path.exists(caminho):
+        return {'ultimo_id': {}, 'linhas_por_mes': {}, 'usuarios': [], 'alimentos': []}
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _gravar_estado(diretorio, estado):
+    temporario = os.path.join(diretorio, 'estado.json.tmp')
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(estado, arquivo, ensure_ascii=False)
+    os.replace(temporario, os.path.join(diretorio, 'estado.json'))
+
+
+def _lotes(pool, apos_id, tamanho_lote):
+    """Lotes de refeições de um banco com id maior que ``apos_id``: primeiro as arquivadas, depois as atuais."""
+    yield from lotes_arquivados(pool, 'refeicoes', _SQL_COLUNAS, apos_id, tamanho_lote)
+    ultimo_id = apos_id
+    while True:
+        with pool.conexao() as conn:
+            linhas = conn.execute(f"SELECT {_SQL_COLUNAS} FROM refeicoes WHERE id > ? ORDER BY id LIMIT ?",
+                                  (ultimo_id, tamanho_lote)).fetchall()
+        if not linhas:
+            return
+        yield linhas
+        ultimo_id = linhas[-1][0]
+
+
+def exportar_refeicoes(diretorio=DIRETORIO_EXPORTACAO, tamanho_lote=TAMANHO_LOTE_EXPORTACAO, completo=False):
+    """
+    Exporta refeicoes (com alimentos e usuarios) em formato colunar .npy, particionado por mês.
+
+    Estrutura gerada em ``diretorio``:
+        refeicoes/mes=AAAA-MM/<coluna>.npy   uma coluna por arquivo (ver COLUNAS_REFEICOES)
+        alimentos/<coluna>.npy               linha i = alimento de código i (nome e macros)
+        usuarios/<coluna>.npy                linha i = usuário de código i (email, peso, ...)
+        estado.json                          último id exportado e dicionários de códigos
+
+    As refeições são lidas em lotes de ``tamanho_lote`` linhas, e os e-mails e
+    nomes de alimentos viram códigos inteiros (dicionário), então a memória
+    usada depende do tamanho do lote e do número de usuários e alimentos,
+    não do tamanho do histórico. Cada execução exporta só as refeições com id
+    maior que o da execução anterior (incluindo as que já foram arquivadas)
+    e as acrescenta às partições dos meses; ``estado.json`` só é gravado no
+    fim, então uma exportação interrompida é refeita por inteiro na próxima.
+    Não deve rodar junto com ``arquivamento.arquivar``.
+
+    No NumPy: ``np.load('exportacao/refeicoes/mes=2024-01/calorias.npy')``.
+
+    Args:
+        diretorio (str): Pasta de saída
+        tamanho_lote (int): Refeições lidas do banco por vez
+        completo (bool): Descarta a exportação anterior e começa do zero
+
+    Returns:
+        dict: Linhas exportadas nesta execução, total de linhas e meses atualizados
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    estado = _ler_estado(diretorio)
+    if completo:
+        estado = {'ultimo_id': {}, 'linhas_por_mes': {}, 'usuarios': [], 'alimentos': []}
+
+    codigos_usuarios = {email: codigo for codigo, email in enumerate(estado['usuarios'])}
+    codigos_alimentos = {nome: codigo for codigo, nome in enumerate(estado['alimentos'])}
+
+    def codigo(dicionario, lista, chave):
+        valor = dicionario.get(chave)
+        if valor is None:
+            valor = dicionario[chave] = len(lista)
+            lista.append(chave)
+        return valor
+
+    particoes = _Particoes(diretorio, dict(estado['linhas_por_mes']))
+    exportadas, meses = 0, set()
+    try:
+        for pool in database.pools_de_dados():
+            ultimo_id = estado['ultimo_id'].get(pool.caminho, 0)
+            for linhas in _lotes(pool, ultimo_id, tamanho_lote):
+                por_mes = {}
+                for linha in linhas:
+                    por_mes.setdefault(linha[6], []).append(linha)
+                for mes, do_mes in por_mes.items():
+                    colunas = particoes.colunas(mes)
+                    colunas[0].acrescentar(linha[0] for linha in do_mes)
+                    colunas[1].acrescentar(linha[1] for linha in do_mes)
+                    colunas[2].acrescentar(codigo(codigos_usuarios, estado['usuarios'], linha[2]) for linha in do_mes)
+                    colunas[3].acrescentar(codigo(codigos_alimentos, estado['alimentos'], linha[3]) for linha in do_mes)
+                    colunas[4].acrescentar(linha[4] for linha in do_mes)
+                    colunas[5].acrescentar(linha[5] for linha in do_mes)
+                meses.update(por_mes)
+                exportadas += len(linhas)
+                ultimo_id = max(ultimo_id, max(linha[0] for linha in linhas))
+            estado['ultimo_id'][pool.caminho] = ultimo_id
+    finally:
+        particoes.fechar_todas()
+    estado['linhas_por_mes'] = particoes.linhas_por_mes
+
+    _exportar_dimensoes(diretorio, estado)
+    _gravar_estado(diretorio, estado)
+    return {'exportadas': exportadas, 'total': sum(estado['linhas_por_mes'].values()), 'meses': sorted(meses)}
+
+
+def _exportar_dimensoes(diretorio, estado):
+    """Grava alimentos/ e usuarios/ na ordem dos códigos do dicionário."""
+    with database.conexao() as conn:
+        alimentos = {linha[0]: linha[1:] for linha in conn.execute(
+            f"SELECT nome, {', '.join(_COLUNAS_ALIMENTOS)} FROM alimentos")}
+    usuarios = {linha[0]: linha[1:] for linha in database.consultar_todos(
+        f"SELECT email, {', '.join(_COLUNAS_USUARIOS)} FROM usuarios")}
+
+    for pasta, chaves, nome_chave, colunas, dados in (
+            ('alimentos', estado['alimentos'], 'nome', _COLUNAS_ALIMENTOS, alimentos),
+            ('usuarios', estado['usuarios'], 'email', _COLUNAS_USUARIOS, usuarios)):
+        os.makedirs(os.path.join(diretorio, pasta), exist_ok=True)
+        _gravar_vetor(os.path.join(diretorio, pasta, f'{nome_chave}.npy'), chaves)
+        vazio = (None,) * len(colunas)
+        for i, coluna in enumerate(colunas):
+            _gravar_vetor(os.path.join(diretorio, pasta, f'{coluna}.npy'),
+                          [dados.get(chave, vazio)[i] for chave in chaves])
+
+
+# Uso: python exportacao.py [pasta] [--completo]
+if __name__ == "__main__":
+    argumentos = [argumento for argumento in sys.argv[1:] if argumento != '--completo']
+    database.verificar_esquema()
+    resultado = exportar_refeicoes(argumentos[0] if argumentos else DIRETORIO_EXPORTACAO,
+                                   completo='--completo' in sys.argv[1:])
+    print(f"{resultado['exportadas']} refeição(ões) exportada(s) em {len(resultado['meses'])} mês(es); "
+          f"{resultado['total']} no total.")
@@ -0,0 +1,185 @@
+# Importações necessárias para o código
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, timedelta
+
+import database
+from database import conexao, consultar_todos, pools_de_dados, transacao, usando_pool
+from alimentacao import meta_calorica, situacao_calorica
+
+# Usuários resumidos por tarefa; cada tarefa vira uma transação de gravação
+USUARIOS_POR_TAREFA = 5000
+
+# Tarefas em andamento por processo: limita a memória com milhões de usuários
+TAREFAS_POR_PROCESSO = 2
+
+# Próxima faixa de usuários sem resumo do dia, em ordem de e-mail
+_SQL_PENDENTES = '''
+    SELECT email FROM usuarios u
+    WHERE email > ?
+      AND NOT EXISTS (SELECT 1 FROM resumos_diarios r WHERE r.email_usuario = u.email AND r.dia = ?)
+    ORDER BY email
+    LIMIT ?
+'''
+
+# Dados do dia dos usuários pendentes de uma faixa (lida pelos processos do pool)
+_SQL_DADOS_DO_DIA = '''
+    SELECT u.email, u.dieta, u.peso, t.calorias, t.proteinas, t.carboidratos, t.gorduras, t.refeicoes
+    FROM usuarios u
+    LEFT JOIN totais_diarios t ON t.email_usuario = u.email AND t.dia = ?
+    WHERE u.email BETWEEN ? AND ?
+      AND NOT EXISTS (SELECT 1 FROM resumos_diarios r WHERE r.email_usuario = u.email AND r.dia = ?)
+'''
+
+_SQL_GRAVAR_RESUMO = '''
+    INSERT OR REPLACE INTO resumos_diarios
+        (email_usuario, dia, dieta, meta_calorias, calorias, proteinas, carboidratos, gorduras, refeicoes, situacao)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Conexões somente leitura de cada processo do pool, por caminho de banco
+_conexoes_leitura = {}
+
+
+def _resumir_faixa(caminho, dia, primeiro, ultimo):
+    """
+    Resumos do dia dos usuários pendentes entre ``primeiro`` e ``ultimo`` (roda nos processos do pool).
+
+    Cada processo abre uma conexão somente leitura por banco e a reaproveita
+    nas tarefas seguintes; quem grava é só o processo principal.
+    """
+    con = _conexoes_leitura.get(caminho)
+    if con is None:
+        con = _conexoes_leitura[caminho] = sqlite3.connect(f"file:{caminho}?mode=ro", uri=True, timeout=30)
+    resumos = []
+    for email, dieta, peso, calorias, proteinas, carboidratos, gorduras, refeicoes in con.execute(
+            _SQL_DADOS_DO_DIA, (dia, primeiro, ultimo, dia)):
+        meta = meta_calorica(dieta, peso)
+        situacao = situacao_calorica(round(calorias, 2), meta) if refeicoes else None
+        resumos.append((email, dia, dieta, meta, calorias or 0, proteinas or 0, carboidratos or 0,
+                        gorduras or 0, refeicoes or 0, situacao))
+    return resumos
+
+
+def _fechar_banco(executor, caminho, dia, em_andamento, usuarios_por_tarefa, ao_progredir, gravados):
+    """Distribui os usuários pendentes do banco atual entre os processos e grava os resumos que voltam."""
+    pendentes = set()
+    ultimo = ''
+    while True:
+        # Mantém até ``em_andamento`` tarefas na fila dos processos
+        if ultimo is not None and len(pendentes) < em_andamento:
+            with conexao() as conn:
+                emails = conn.execute(_SQL_PENDENTES, (ultimo, dia, usuarios_por_tarefa)).fetchall()
+            if emails:
+                ultimo = emails[-1][0]
+                pendentes.add(executor.submit(_resumir_faixa, caminho, dia, emails[0][0], ultimo))
+                continue
+            ultimo = None
+        if not pendentes:
+            return gravados
+        prontos, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+        for tarefa in prontos:
+            resumos = tarefa.result()
+            with transacao() as conn:
+                conn.executemany(_SQL_GRAVAR_RESUMO, resumos)
+            gravados += len(resumos)
+            if ao_progredir:
+                ao_progredir(gravados)
+
+
+def fechar_dia(dia=None, processos=None, refazer=False, usuarios_por_tarefa=USUARIOS_POR_TAREFA,
+               ao_progredir=None):
+    """
+    Calcula o resumo do dia (o mesmo de ``Registros.encerrar_dia``) de todos os usuários.
+
+    Os usuários de cada banco são divididos em faixas de e-mail, resumidas
+    por um pool de processos com conexões somente leitura; o processo
+    principal grava cada faixa em resumos_diarios numa transação. Se o
+    fechamento for interrompido, basta rodá-lo de novo: usuários que já têm
+    resumo do dia são pulados.
+
+    Args:
+        dia (date, opcional): Dia a fechar. Padrão: ontem (o job roda depois da meia-noite)
+        processos (int, opcional): Processos do pool. Padrão: número de CPUs
+        refazer (bool): Apaga os resumos do dia antes de começar, para recalculá-los
+        usuarios_por_tarefa (int): Usuários por tarefa (e por transação de gravação)
+        ao_progredir (callable, opcional): Chamada com o total de resumos gravados após cada transação
+
+    Returns:
+        dict: Chaves dia, resumos (gravados nesta execução) e segundos
+    """
+    dia = (dia or date.today() - timedelta(days=1)).isoformat()
+    processos = processos or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    gravados = 0
+    with ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn')) as executor:
+        for pool in pools_de_dados():
+            with usando_pool(pool):
+                if refazer:
+                    with transacao() as conn:
+                        conn.execute("DELETE FROM resumos_diarios WHERE dia = ?", (dia,))
+                gravados = _fechar_banco(executor, pool.caminho, dia, processos * TAREFAS_POR_PROCESSO,
+                                         usuarios_por_tarefa, ao_progredir, gravados)
+    return {'dia': dia, 'resumos': gravados, 'segundos': time.perf_counter() - inicio}
+
+
+def relatorio_fechamento(dia=None):
+    """
+    Quantos usuários ficaram abaixo, dentro e acima da meta num dia já fechado.
+
+    Args:
+        dia (date, opcional): Dia desejado. Padrão: ontem
+
+    Returns:
+        Counter: situacao ('abaixo', 'dentro', 'acima' ou None sem refeições) -> usuários
+    """
+    dia = (dia or date.today() - timedelta(days=1)).isoformat()
+    contagem = Counter()
+    for situacao, usuarios in consultar_todos(
+            "SELECT situacao, COUNT(*) FROM resumos_diarios WHERE dia = ? GROUP BY situacao", (dia,)):
+        contagem[situacao] += usuarios
+    return contagem
+
+
+def resumo_fechamento(dia=None):
+    """Texto com a contagem de usuários por situação num dia já fechado."""
+    contagem = relatorio_fechamento(dia)
+    return (f"{sum(contagem.values())} usuário(s): {contagem['abaixo']} abaixo, {contagem['dentro']} dentro "
+            f"e {contagem['acima']} acima da meta; {contagem[None]} sem refeições")
+
+
+def fechar_dia_interativo():
+    """Fechamento pelo menu do administrador: pergunta o dia, fecha e mostra o relatório."""
+    print("\n=== Fechamento do dia (todos os usuários) ===")
+    texto = input("Dia (AAAA-MM-DD, Enter para ontem): ").strip()
+    try:
+        dia = date.fromisoformat(texto) if texto else None
+    except ValueError:
+        print("❌ Data inválida.")
+        return
+    resultado = fechar_dia(dia, ao_progredir=lambda total: print(f"\r{total} resumo(s) gravado(s)...", end=''))
+    print(f"\n✅ Dia {resultado['dia']} fechado em {resultado['segundos']:.1f} s "
+          f"({resultado['resumos']} resumo(s) novo(s)).")
+    print(resumo_fechamento(date.fromisoformat(resultado['dia'])))
+
+
+# Uso: python fechamento.py [AAAA-MM-DD] [--processos N] [--refazer]  (agende no cron logo após a meia-noite)
+if __name__ == "__main__":
+    database.verificar_esquema()
+    argumentos = sys.argv[1:]
+    refazer = '--refazer' in argumentos
+    processos = None
+    if '--processos' in argumentos:
+        posicao = argumentos.index('--processos')
+        processos = int(argumentos[posicao + 1])
+        del argumentos[posicao:posicao + 2]
+    datas = [argumento for argumento in argumentos if not argumento.startswith('--')]
+    dia = date.fromisoformat(datas[0]) if datas else None
+    resultado = fechar_dia(dia, processos=processos, refazer=refazer)
+    print(f"Dia {resultado['dia']}: {resultado['resumos']} resumo(s) gravado(s) em {resultado['segundos']:.1f} s.")
+    print(resumo_fechamento(date.fromisoformat(resultado['dia'])))
@@ -0,0 +1,240 @@
+# Importações necessárias para o código
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+import database
+
+# Limites padrão de um grupo: grava ao juntar tantas escritas ou ao passar tanto tempo
+MAX_ESCRITAS_POR_GRUPO = 200
+MAX_ESPERA_GRUPO_MS = 50
+
+# Variável de ambiente lida na inicialização (main.py, interface.py, api.py e servico.py):
+# "1" ativa a gravação em grupo com os limites padrão; "<max_escritas>:<max_espera_ms>"
+# escolhe os limites; vazia ou "0" mantém o commit individual
+VARIAVEL_GRAVACAO_EM_GRUPO = 'NUTRISMART_GRAVACAO_EM_GRUPO'
+
+
+class GravadorEmGrupo:
+    """Grava as escritas do sistema em grupos, com um único commit por grupo.
+
+    As escritas enviadas por ``enviar`` entram numa fila; uma thread própria
+    junta até ``max_escritas`` delas (ou o que chegar em ``max_espera_ms``
+    depois da primeira) e as executa numa só transação. Cada escrita roda
+    dentro de um SAVEPOINT, então uma escrita inválida falha sozinha sem
+    desfazer as demais do grupo.
+
+    Com armazenamento fragmentado, cada grupo vira uma transação por
+    fragmento envolvido, na mesma passagem.
+
+    Cada envio devolve um ``concurrent.futures.Future`` de durabilidade: ele só
+    é resolvido depois do commit do grupo, com o número de linhas afetadas, ou
+    com a exceção da escrita (ou do commit). O que ainda está na fila quando o
+    processo morre se perde, mas nunca pela metade: o SQLite aplica cada grupo
+    inteiro ou nada, e nenhum futuro pendente terá sido dado como gravado.
+    """
+
+    def __init__(self, max_escritas=MAX_ESCRITAS_POR_GRUPO, max_espera_ms=MAX_ESPERA_GRUPO_MS):
+        """
+        Args:
+            max_escritas (int): Escritas por grupo que disparam o commit imediato
+            max_espera_ms (float): Espera máxima, a partir da primeira escrita, antes do commit
+        """
+        self.max_escritas = max_escritas
+        self.max_espera_ms = max_espera_ms
+        self.grupos_gravados = 0
+        self._fila = queue.Queue()
+        self._encerrado = False
+        self._thread = threading.Thread(target=self._trabalhar, name="nutrismart-gravacao", daemon=True)
+        self._thread.start()
+
+    def enviar(self, sql, parametros=(), pool=None):
+        """
+        Coloca uma escrita na fila do próximo grupo.
+
+        Args:
+            sql (str): Comando SQL
+            parametros (tuple): Parâmetros do comando
+            pool (PoolConexoes, opcional): Banco onde gravar; o padrão é o banco principal
+
+        Returns:
+            Future: Resolvido com o número de linhas afetadas depois do commit
+        """
+        if self._encerrado:
+            raise RuntimeError("O gravador em grupo já foi encerrado")
+        futuro = Future()
+        self._fila.put((futuro, sql, parametros, pool or database.pool_para()))
+        return futuro
+
+    def descarregar(self, timeout=None):
+        """Grava imediatamente o que estiver na fila e espera o commit."""
+        marcador = Future()
+        self._fila.put((marcador, None, None, None))
+        marcador.result(timeout)
+
+    def encerrar(self):
+        """Grava tudo o que ainda está na fila e termina a thread de gravação."""
+        if self._encerrado:
+            return
+        self._encerrado = True
+        self._fila.put(None)
+        self._thread.join()
+
+    def _trabalhar(self):
+        """Laço da thread de gravação: monta os grupos e os grava até receber None."""
+        while True:
+            item = self._fila.get()
+            if item is None:
+                return
+            grupo = [item]
+            limite = time.monotonic() + self.max_espera_ms / 1000
+            encerrar = False
+            while len(grupo) < self.max_escritas and grupo[-1][1] is not None:
+                try:
+                    item = self._fila.get(timeout=max(0.0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    encerrar = True
+                    break
+                grupo.append(item)
+            self._gravar(grupo)
+            if encerrar:
+                return
+
+    def _gravar(self, grupo):
+        """Separa o grupo por banco de destino e grava cada parte numa transação."""
+        por_pool = {}
+        for item in grupo:
+            if item[1] is not None and item[0].set_running_or_notify_cancel():
+                por_pool.setdefault(item[3], []).append(item[:3])
+        for pool, escritas in por_pool.items():
+            self._gravar_no_pool(pool, escritas)
+        for item in grupo:
+            if item[1] is None:
+                item[0].set_result(None)
+
+    def _gravar_no_pool(self, pool, escritas):
+        """Executa as escritas de um banco numa transação e resolve os futuros."""
+        resultados = []
+        try:
+            with pool.transacao() as conn:
+                for futuro, sql, parametros in escritas:
+                    conn.execute("SAVEPOINT escrita")
+                    try:
+                        linhas = conn.execute(sql, parametros).rowcount
+                    except sqlite3.Error as erro:
+                        conn.execute("ROLLBACK TO escrita")
+                        resultados.append((futuro, None, erro))
+                    else:
+                        resultados.append((futuro, linhas, None))
+                    conn.execute("RELEASE escrita")
+        except Exception as erro:
+            # O commit falhou: nenhuma escrita do grupo foi gravada
+            print(f"Erro ao gravar grupo de {len(escritas)} escrita(s): {erro}")
+            for futuro, _, _ in escritas:
+                futuro.set_exception(erro)
+        else:
+            self.grupos_gravados += 1
+            for futuro, linhas, erro in resultados:
+                if erro is not None:
+                    futuro.set_exception(erro)
+                else:
+                    futuro.set_result(linhas)
+
+
+# Gravador global; None significa que cada escrita faz o próprio commit (padrão)
+_gravador = None
+
+
+def ativar_gravacao_em_grupo(max_escritas=MAX_ESCRITAS_POR_GRUPO, max_espera_ms=MAX_ESPERA_GRUPO_MS):
+    """
+    Passa as escritas do sistema (refeições, suporte, perfil) a serem gravadas em grupo.
+
+    Returns:
+        GravadorEmGrupo: O gravador ativo
+    """
+    global _gravador
+    desativar_gravacao_em_grupo()
+    _gravador = GravadorEmGrupo(max_escritas, max_espera_ms)
+    return _gravador
+
+
+def desativar_gravacao_em_grupo():
+    """Grava o que estiver pendente e volta às escritas com commit individual."""
+    global _gravador
+    gravador, _gravador = _gravador, None
+    if gravador is not None:
+        gravador.encerrar()
+
+
+def ativar_pelo_ambiente(ambiente=None):
+    """
+    Ativa a gravação em grupo se NUTRISMART_GRAVACAO_EM_GRUPO pedir; chamada na inicialização dos programas.
+
+    Se já houver um gravador ativo, ele é mantido.
+
+    Args:
+        ambiente (dict, opcional): Variáveis de ambiente. Padrão: os.environ
+
+    Returns:
+        GravadorEmGrupo: O gravador ativo, ou None se a gravação em grupo não foi pedida
+
+    Raises:
+        ValueError: Se o valor da variável não for "0", "1" ou "<max_escritas>:<max_espera_ms>"
+    """
+    if _gravador is not None:
+        return _gravador
+    valor = (ambiente if ambiente is not None else os.environ).get(VARIAVEL_GRAVACAO_EM_GRUPO, '').strip()
+    if valor in ('', '0'):
+        return None
+    if valor == '1':
+        return ativar_gravacao_em_grupo()
+    max_escritas, _, max_espera_ms = valor.partition(':')
+    try:
+        return ativar_gravacao_em_grupo(int(max_escritas), float(max_espera_ms or MAX_ESPERA_GRUPO_MS))
+    except ValueError:
+        raise ValueError(f"{VARIAVEL_GRAVACAO_EM_GRUPO}={valor!r} inválida "
+                         f"(use 0, 1 ou <max_escritas>:<max_espera_ms>)") from None
+
+
+def gravador_atual():
+    """Retorna o gravador em grupo ativo, ou None."""
+    return _gravador
+
+
+def escrever(sql, parametros=(), usuario=None, id_registro=None):
+    """
+    Executa uma escrita (INSERT/UPDATE/DELETE) pelo caminho de gravação ativo.
+
+    Sem gravação em grupo, a escrita é feita e confirmada na hora (e um erro é
+    levantado aqui mesmo). Com ela ativa, a escrita só entra na fila e o erro,
+    se houver, aparece no futuro. Não deve ser chamada dentro de ``transacao()``:
+    no modo em grupo a escrita sairia da transação de quem chamou.
+
+    Args:
+        sql (str): Comando SQL
+        parametros (tuple): Parâmetros do comando
+        usuario (str, opcional): E-mail dono dos dados (escolhe o fragmento)
+        id_registro (int, opcional): Id da refeição ou mensagem alterada (escolhe o fragmento)
+
+    Returns:
+        Future: Resolvido com o número de linhas afetadas quando a escrita estiver no disco
+    """
+    pool = database.pool_para(usuario, id_registro)
+    gravador = _gravador
+    if gravador is not None:
+        return gravador.enviar(sql, parametros, pool)
+    futuro = Future()
+    with pool.transacao() as conn:
+        linhas = conn.execute(sql, parametros).rowcount
+    futuro.set_result(linhas)
+    return futuro
+
+
+# Ao sair normalmente, nada que ainda está na fila é perdido
+atexit.register(desativar_gravacao_em_grupo)
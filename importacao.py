@@ -0,0 +1,397 @@
+# Importações necessárias para o código
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+from busca import normalizar_busca
+from catalogo import catalogo, normalizar_nome
+from database import transacao, replicar_catalogo
+
+# Alimentos gravados por transação
+TAMANHO_LOTE_IMPORTACAO = 1000
+# Trecho do CSV usado para descobrir o separador
+AMOSTRA_SEPARADOR = 64 * 1024
+# Limites por 100 g: nada passa de gordura pura, e os macronutrientes não somam mais que 100 g
+MAX_CALORIAS = 900
+MAX_SOMA_MACROS = 100.5
+
+CAMPOS = ('nome', 'calorias', 'proteinas', 'carboidratos', 'gorduras')
+
+# Nomes de coluna reconhecidos em cada campo (já sem acentos e em minúsculas), de tabelas
+# como a TACO ("Energia (kcal)", "Lipídeos (g)") e a USDA ("Energy (KCAL)", "Total lipid (fat) (G)")
+SINONIMOS = {
+    'nome': ('nome', 'alimento', 'nome do alimento', 'descricao', 'descricao do alimento', 'descricao dos alimentos',
+             'name', 'description', 'food', 'food name', 'food description'),
+    'calorias': ('calorias', 'energia', 'energia total', 'valor energetico', 'kcal', 'energy', 'calories'),
+    'proteinas': ('proteina', 'proteinas', 'proteina bruta', 'protein', 'proteins'),
+    'carboidratos': ('carboidrato', 'carboidratos', 'carboidrato total', 'carboidratos totais',
+                     'carboidrato disponivel', 'carbohydrate', 'carbohydrates', 'carbohydrate by difference'),
+    'gorduras': ('gordura', 'gorduras', 'gordura total', 'gorduras totais', 'lipideos', 'lipideos totais',
+                 'lipidios', 'fat', 'total fat', 'total lipid', 'total lipid fat'),
+}
+_CAMPO_DO_SINONIMO = {sinonimo: campo for campo, sinonimos in SINONIMOS.items() for sinonimo in sinonimos}
+
+# Unidades aceitas e o fator que converte para a unidade do banco (kcal e gramas por 100 g)
+UNIDADES = {
+    'calorias': {'kcal': 1.0, 'cal': 1.0, 'kj': 1 / 4.184},
+    'proteinas': {'g': 1.0, 'mg': 0.001},
+    'carboidratos': {'g': 1.0, 'mg': 0.001},
+    'gorduras': {'g': 1.0, 'mg': 0.001},
+}
+
+# Valores que as tabelas usam para "não medido" e para "traços"
+_AUSENTE = {'', 'na', 'n/a', 'nd', '-', '*', '--'}
+_TRACOS = {'tr', 'traco', 'tracos'}
+
+# Unidade entre parênteses/colchetes ("Energia (kcal)") ou como última palavra ("Energy, kJ"); sem
+# parênteses só valem unidades conhecidas, para que "Lipídeos totais" não vire a unidade "totais"
+_UNIDADE_NO_NOME = re.compile(r'^(.*?)[\s,]*[(\[]\s*([a-z]+)\s*[)\]]$|^(.*?)[\s,]+(%s)$' % '|'.join(
+    sorted({unidade for unidades in UNIDADES.values() for unidade in unidades}, key=len, reverse=True)))
+
+
+def interpretar_coluna(cabecalho):
+    """
+    Identifica o campo de alimentos e a unidade de uma coluna pelo cabeçalho.
+
+    Ex.: "Energia (kcal)" -> ('calorias', 1.0); "Energy, kJ" -> ('calorias', 0.239);
+    "Proteína (mg)" -> ('proteinas', 0.001); "Umidade (%)" -> None.
+
+    Args:
+        cabecalho (str): Nome da coluna no arquivo
+
+    Returns:
+        tuple: (campo, fator de conversão) ou None se a coluna não for usada
+
+    Raises:
+        ValueError: Se a coluna é de um campo conhecido, mas numa unidade que não sabemos converter
+    """
+    texto = re.sub(r'\s*(?:/|por|per)\s*100\s*g\b', '', normalizar_busca(cabecalho))
+    texto = " ".join(re.sub(r'[^\w()\[\],]+', ' ', texto).split())
+    texto_sem_pontuacao = " ".join(re.sub(r'[^\w]+', ' ', texto).split())
+    campo = _CAMPO_DO_SINONIMO.get(texto_sem_pontuacao)
+    if campo is not None:
+        return campo, 1.0
+
+    achado = _UNIDADE_NO_NOME.match(texto)
+    if not achado:
+        return None
+    base, unidade = (achado.group(1), achado.group(2)) if achado.group(2) else (achado.group(3), achado.group(4))
+    campo = _CAMPO_DO_SINONIMO.get(" ".join(re.sub(r'[^\w]+', ' ', base).split()))
+    if campo is None or campo == 'nome':
+        return None
+    if unidade not in UNIDADES[campo]:
+        raise ValueError(f"Unidade '{unidade}' da coluna '{cabecalho}' não é aceita para {campo} "
+                         f"(use {', '.join(UNIDADES[campo])})")
+    return campo, UNIDADES[campo][unidade]
+
+
+def mapear_colunas(cabecalhos, colunas=None):
+    """
+    Escolhe, para cada campo de alimentos, a coluna do arquivo e o fator de conversão.
+
+    Quando há mais de uma coluna para o mesmo campo vale a primeira, exceto
+    que energia em kcal tem preferência sobre energia em kJ (a TACO traz as duas).
+
+    Args:
+        cabecalhos (list): Nomes das colunas do arquivo
+        colunas (dict, opcional): Campo -> nome da coluna, para tabelas com cabeçalhos não reconhecidos
+
+    Returns:
+        dict: Campo -> (coluna, fator)
+
+    Raises:
+        ValueError: Se faltar a coluna de nome ou de calorias, ou se uma unidade não for aceita
+    """
+    mapeamento = {}
+    for cabecalho in cabecalhos:
+        interpretado = interpretar_coluna(cabecalho)
+        if interpretado is None:
+            continue
+        campo, fator = interpretado
+        if campo not in mapeamento or (campo == 'calorias' and mapeamento[campo][1] != 1.0 and fator == 1.0):
+            mapeamento[campo] = (cabecalho, fator)
+
+    for campo, coluna in (colunas or {}).items():
+        if campo not in CAMPOS:
+            raise ValueError(f"Campo desconhecido: {campo}")
+        if coluna not in cabecalhos:
+            raise ValueError(f"Coluna '{coluna}' não existe no arquivo")
+        interpretado = interpretar_coluna(coluna)
+        mapeamento[campo] = (coluna, interpretado[1] if interpretado and interpretado[0] == campo else 1.0)
+
+    for campo in ('nome', 'calorias'):
+        if campo not in mapeamento:
+            raise ValueError(f"Coluna de {campo} não encontrada (cabeçalhos: {', '.join(cabecalhos)})")
+    return mapeamento
+
+
+def _numero(valor):
+    """Converte o valor de uma célula em float; None se não foi medido, 0 para traços."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return float(valor)
+    texto = str(valor if valor is not None else '').strip().lower()
+    if texto in _AUSENTE:
+        return None
+    if texto in _TRACOS:
+        return 0.0
+    if ',' in texto:
+        # Decimal com vírgula ("1,5" ou "1.234,5")
+        texto = texto.replace('.', '').replace(',', '.')
+    return float(texto)
+
+
+def validar_linha(registro, mapeamento):
+    """
+    Converte uma linha do arquivo num alimento pronto para gravar.
+
+    Args:
+        registro (dict): Linha do arquivo (coluna -> valor)
+        mapeamento (dict): Resultado de ``mapear_colunas``
+
+    Returns:
+        tuple: ((nome, calorias, proteinas, carboidratos, gorduras), None) ou (None, motivo da rejeição)
+    """
+    nome = normalizar_nome(str(registro.get(mapeamento['nome'][0]) or ''))
+    if not nome:
+        return None, "nome vazio"
+
+    valores = []
+    for campo in CAMPOS[1:]:
+        if campo not in mapeamento:
+            valores.append(0.0)
+            continue
+        coluna, fator = mapeamento[campo]
+        try:
+            valor = _numero(registro.get(coluna))
+        except ValueError:
+            return None, f"{campo} não numérico: {registro.get(coluna)!r}"
+        if valor is None:
+            if campo == 'calorias':
+                return None, "calorias não informadas"
+            valor = 0.0
+        valor = round(valor * fator, 2)
+        if valor < 0:
+            return None, f"{campo} negativo: {valor}"
+        valores.append(valor)
+
+    calorias, proteinas, carboidratos, gorduras = valores
+    if not 0 < calorias <= MAX_CALORIAS:
+        return None, f"calorias fora de 0-{MAX_CALORIAS} kcal por 100 g: {calorias}"
+    if proteinas + carboidratos + gorduras > MAX_SOMA_MACROS:
+        return None, f"macronutrientes somam mais de 100 g por 100 g: {proteinas + carboidratos + gorduras:.1f}"
+    return (nome, calorias, proteinas, carboidratos, gorduras), None
+
+
+def ler_csv(caminho, codificacao='utf-8-sig'):
+    """
+    Lê um CSV linha a linha, descobrindo o separador (vírgula, ponto e vírgula ou tabulação).
+
+    Returns:
+        tuple: (lista de cabeçalhos, gerador de dicts)
+    """
+    arquivo = open(caminho, newline='', encoding=codificacao)
+    amostra = arquivo.read(AMOSTRA_SEPARADOR)
+    arquivo.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=';,\t')
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.DictReader(arquivo, dialect=dialeto)
+    cabecalhos = leitor.fieldnames or []
+
+    def linhas():
+        with arquivo:
+            yield from leitor
+    return cabecalhos, linhas()
+
+
+def _objetos_json(arquivo, tamanho_bloco=AMOSTRA_SEPARADOR):
+    """Gera os objetos de um array JSON ("[{...}, {...}]") sem carregar o arquivo inteiro."""
+    decodificador = json.JSONDecoder()
+    buffer, posicao, fim_arquivo = arquivo.read(tamanho_bloco).lstrip(), 0, False
+    if not buffer.startswith('['):
+        raise ValueError("O JSON deve ser uma lista de objetos ou ter um objeto por linha")
+    posicao = 1
+    while True:
+        while posicao < len(buffer) and buffer[posicao] in ' \t\r\n,':
+            posicao += 1
+        if posicao < len(buffer) and buffer[posicao] == ']':
+            return
+        try:
+            objeto, fim = decodificador.raw_decode(buffer, posicao)
+        except json.JSONDecodeError:
+            if fim_arquivo:
+                raise
+            bloco = arquivo.read(tamanho_bloco)
+            fim_arquivo = not bloco
+            buffer, posicao = buffer[posicao:] + bloco, 0
+            continue
+        if fim == len(buffer) and not fim_arquivo:
+            # Um número pode ter sido cortado no fim do bloco: lê mais antes de aceitar
+            bloco = arquivo.read(tamanho_bloco)
+            fim_arquivo = not bloco
+            buffer, posicao = buffer[posicao:] + bloco, 0
+            continue
+        yield objeto
+        posicao = fim
+
+
+def ler_json(caminho, codificacao='utf-8-sig'):
+    """
+    Lê um JSON com uma lista de objetos ou um objeto por linha (JSON Lines), em fluxo.
+
+    Os cabeçalhos são as chaves do primeiro objeto.
+
+    Returns:
+        tuple: (lista de cabeçalhos, gerador de dicts)
+    """
+    arquivo = open(caminho, encoding=codificacao)
+    primeiro = arquivo.read(1)
+    while primeiro.isspace():
+        primeiro = arquivo.read(1)
+    arquivo.seek(0)
+    if primeiro == '[':
+        objetos = _objetos_json(arquivo)
+    else:
+        objetos = (json.loads(linha) for linha in arquivo if linha.strip())
+    primeiro_objeto = next(objetos, None)
+
+    def linhas():
+        with arquivo:
+            if primeiro_objeto is not None:
+                yield primeiro_objeto
+            yield from objetos
+    return list(primeiro_objeto or {}), linhas()
+
+
+def _gravar_lote(lote):
+    """
+    Insere os alimentos novos e atualiza os que mudaram; os iguais não são tocados.
+
+    Returns:
+        tuple: (inseridos, atualizados)
+    """
+    with transacao() as conn:
+        existentes = {linha[0]: linha[1:] for linha in conn.execute(
+            f"SELECT nome, calorias, proteinas, carboidratos, gorduras FROM alimentos "
+            f"WHERE nome IN ({', '.join('?' * len(lote))})", [alimento[0] for alimento in lote])}
+        novos = [alimento for alimento in lote if alimento[0] not in existentes]
+        alterados = [alimento[1:] + alimento[:1] for alimento in lote
+                     if alimento[0] in existentes and tuple(existentes[alimento[0]]) != alimento[1:]]
+        conn.executemany("INSERT INTO alimentos (nome, calorias, proteinas, carboidratos, gorduras) "
+                         "VALUES (?, ?, ?, ?, ?)", novos)
+        conn.executemany("UPDATE alimentos SET calorias = ?, proteinas = ?, carboidratos = ?, gorduras = ? "
+                         "WHERE nome = ?", alterados)
+    return len(novos), len(alterados)
+
+
+def importar_alimentos(caminho, rejeitados=None, colunas=None, codificacao='utf-8-sig',
+                       tamanho_lote=TAMANHO_LOTE_IMPORTACAO):
+    """
+    Importa uma tabela de composição de alimentos (CSV ou JSON) para a tabela alimentos.
+
+    O arquivo é lido em fluxo e gravado em transações de ``tamanho_lote``
+    alimentos. Os nomes são normalizados como no cadastro e as colunas são
+    reconhecidas pelo cabeçalho (ver ``SINONIMOS``), convertendo kJ para kcal
+    e mg para g. Alimentos novos são inseridos e os já cadastrados só são
+    atualizados se algum valor mudou, então reimportar uma versão nova da
+    mesma tabela grava apenas as diferenças. Alimentos que não estão no
+    arquivo não são apagados.
+
+    Linhas inválidas (sem nome, sem calorias, valores fora da faixa, nome
+    repetido no arquivo) não interrompem a importação: vão para o arquivo
+    ``rejeitados`` (CSV com número da linha, motivo e dados originais).
+
+    Args:
+        caminho (str): Arquivo .csv, .json ou .jsonl
+        rejeitados (str, opcional): CSV de rejeitados; o padrão é ``<arquivo>.rejeitados.csv``
+        colunas (dict, opcional): Campo -> coluna, para cabeçalhos não reconhecidos
+        codificacao (str): Codificação do arquivo (ex.: 'latin-1' para algumas versões da TACO)
+        tamanho_lote (int): Alimentos por transação
+
+    Returns:
+        dict: Contagens (lidas, inseridas, atualizadas, inalteradas, rejeitadas),
+        segundos, linhas_por_segundo e o caminho do arquivo de rejeitados (ou None)
+
+    Raises:
+        ValueError: Se o arquivo não tiver colunas de nome e calorias ou usar uma unidade não aceita
+    """
+    inicio = time.perf_counter()
+    if os.path.splitext(caminho)[1].lower() in ('.json', '.jsonl'):
+        cabecalhos, registros = ler_json(caminho, codificacao)
+        primeira_linha = 1
+    else:
+        cabecalhos, registros = ler_csv(caminho, codificacao)
+        primeira_linha = 2  # a linha 1 é o cabeçalho
+    mapeamento = mapear_colunas(cabecalhos, colunas)
+
+    rejeitados = rejeitados or f"{caminho}.rejeitados.csv"
+    if os.path.exists(rejeitados):
+        os.remove(rejeitados)
+    arquivo_rejeitados, escritor_rejeitados = None, None
+    resultado = {'lidas': 0, 'inseridas': 0, 'atualizadas': 0, 'inalteradas': 0, 'rejeitadas': 0}
+    vistos, lote = set(), []
+
+    def gravar():
+        inseridos, atualizados = _gravar_lote(lote)
+        resultado['inseridas'] += inseridos
+        resultado['atualizadas'] += atualizados
+        resultado['inalteradas'] += len(lote) - inseridos - atualizados
+        lote.clear()
+
+    try:
+        for numero, registro in enumerate(registros, start=primeira_linha):
+            resultado['lidas'] += 1
+            alimento, motivo = validar_linha(registro, mapeamento)
+            if alimento is not None and alimento[0] in vistos:
+                alimento, motivo = None, "nome repetido no arquivo"
+            if alimento is None:
+                if escritor_rejeitados is None:
+                    arquivo_rejeitados = open(rejeitados, 'w', newline='', encoding='utf-8')
+                    escritor_rejeitados = csv.writer(arquivo_rejeitados)
+                    escritor_rejeitados.writerow(['linha', 'motivo', 'dados'])
+                escritor_rejeitados.writerow([numero, motivo, json.dumps(registro, ensure_ascii=False)])
+                resultado['rejeitadas'] += 1
+                continue
+            vistos.add(alimento[0])
+            lote.append(alimento)
+            if len(lote) >= tamanho_lote:
+                gravar()
+        if lote:
+            gravar()
+    finally:
+        if arquivo_rejeitados is not None:
+            arquivo_rejeitados.close()
+        if resultado['inseridas'] or resultado['atualizadas']:
+            replicar_catalogo()
+            catalogo.invalidar()
+
+    resultado['segundos'] = time.perf_counter() - inicio
+    resultado['linhas_por_segundo'] = resultado['lidas'] / resultado['segundos'] if resultado['segundos'] else 0.0
+    resultado['rejeitados'] = rejeitados if arquivo_rejeitados is not None else None
+    return resultado
+
+
+def resumo_importacao(resultado):
+    """Texto de uma linha com o resultado de ``importar_alimentos``."""
+    texto = (f"{resultado['lidas']} linha(s) em {resultado['segundos']:.1f}s "
+             f"({resultado['linhas_por_segundo']:,.0f} linhas/s): {resultado['inseridas']} nova(s), "
+             f"{resultado['atualizadas']} atualizada(s), {resultado['inalteradas']} sem mudança, "
+             f"{resultado['rejeitadas']} rejeitada(s)")
+    if resultado['rejeitados']:
+        texto += f" (ver {resultado['rejeitados']})"
+    return texto
+
+
+# Uso: python importacao.py <tabela.csv|tabela.json> [codificacao]
+if __name__ == "__main__":
+    from database import verificar_esquema
+
+    if len(sys.argv) < 2:
+        print("Uso: python importacao.py <tabela.csv|tabela.json> [codificacao]")
+        sys.exit(1)
+    verificar_esquema()
+    print(resumo_importacao(importar_alimentos(sys.argv[1], codificacao=sys.argv[2] if len(sys.argv) > 2 else 'utf-8-sig')))
@@ -1,11 +1,52 @@
+import os
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-from datetime import datetime, date
-from database import cursor, conn
-from alimentacao import Comida
+from datetime import datetime
+from collections import deque
+from database import conexao, transacao, verificar_esquema, consultar_todos, replicar_catalogo
+from alimentacao import Comida, Registros, REFEICOES_POR_PAGINA, PERIODOS_RANKING, CRITERIOS_RANKING
+from ranking import CRITERIOS, ranking_geral, ranking_usuario
+from catalogo import catalogo
+from busca import buscar_alimentos
+from recomendacao import alimentos_recomendados
 from suportinho import Suporte
+from tarefas import TarefasInterface, MonitorLatencia
+from gravacao import escrever, ativar_pelo_ambiente
+
+# Mensagens de suporte carregadas por página na tela do administrador
+MENSAGENS_POR_PAGINA_ADMIN = 50
+# Páginas do histórico de refeições mantidas na tabela ao mesmo tempo
+PAGINAS_HISTORICO_EM_TELA = 3
+
+
+def atualizar_linhas(tabela, linhas):
+    """
+    Sincroniza as linhas de um Treeview com ``linhas``, mexendo só no que mudou.
+    
+    Linhas que sumiram são removidas, novas são inseridas e as demais só são
+    reescritas ou movidas se o conteúdo ou a posição mudou.
+    
+    Args:
+        tabela (ttk.Treeview): Tabela a atualizar
+        linhas (list): Pares (iid, valores), na ordem em que devem aparecer
+    """
+    novas = dict(linhas)
+    for iid in tabela.get_children():
+        if iid not in novas:
+            tabela.delete(iid)
+    
+    for posicao, (iid, valores) in enumerate(linhas):
+        if not tabela.exists(iid):
+            tabela.insert("", posicao, iid=iid, values=valores)
+            continue
+        if tuple(map(str, tabela.item(iid, "values"))) != tuple(map(str, valores)):
+            tabela.item(iid, values=valores)
+        if tabela.index(iid) != posicao:
+            tabela.move(iid, "", posicao)
+
 
 class InterfaceNutrismart:
+
     def __init__(self, root):
         """Inicializa a aplicação principal com configurações básicas"""
         self.root = root
@@ -14,6 +55,14 @@ class InterfaceNutrismart:
         self.root.configure(bg='#f0f0f0')
         
         self.usuario_atual = None
+        
+        # Todo acesso ao banco roda fora da thread do Tk; os resultados voltam por root.after
+        self.tarefas = TarefasInterface(self.root)
+        self.monitor_latencia = None
+        if os.environ.get("NUTRISMART_TRACE_LATENCIA"):
+            self.monitor_latencia = MonitorLatencia(self.root)
+            self.monitor_latencia.iniciar()
+        
         self.style = ttk.Style()
         self.style.theme_use('clam')
         
@@ -35,6 +84,17 @@ class InterfaceNutrismart:
         }
         
         self.configurar_estilos()
+        
+        # As telas mais visitadas são construídas uma vez e depois só reexibidas (ver exibir_tela);
+        # as demais são montadas em uma tela temporária, destruída na navegação seguinte
+        self.container = ttk.Frame(self.root)
+        self.container.pack(expand=True, fill=tk.BOTH)
+        self.container.grid_rowconfigure(0, weight=1)
+        self.container.grid_columnconfigure(0, weight=1)
+        self.telas = {}
+        self.tela_temporaria = None
+        self.indicadores = []
+        
         self.criar_menu_principal()
 
     def configurar_estilos(self):
@@ -49,15 +109,70 @@ class InterfaceNutrismart:
                     background=[('active', self.cores['secundaria']), ('!disabled', self.cores['primaria'])])
         
     def limpar_tela(self):
-        """Remove todos os widgets da tela atual"""
-        for widget in self.root.winfo_children():
-            widget.destroy()
+        """Sai da tela atual e cria a tela temporária onde a próxima será montada"""
+        self.sair_da_tela()
+        self.tela_temporaria = ttk.Frame(self.container)
+        self.tela_temporaria.grid(row=0, column=0, sticky='nsew')
+        self.tela_temporaria.tkraise()
+
+    def sair_da_tela(self):
+        """Descarta as consultas pendentes, os indicadores de carregamento e a tela temporária"""
+        self.tarefas.trocar_tela()
+        for indicador in self.indicadores:
+            indicador.destroy()
+        self.indicadores = []
+        if self.tela_temporaria is not None:
+            self.tela_temporaria.destroy()
+            self.tela_temporaria = None
+
+    def exibir_tela(self, nome, construir):
+        """
+        Exibe uma tela em cache, construindo-a apenas na primeira visita
+        
+        Args:
+            nome (str): Chave da tela no cache
+            construir (callable): Recebe o frame da tela, monta os widgets e retorna
+                a função de atualização (ou None), chamada a cada exibição
+        """
+        self.sair_da_tela()
+        if nome not in self.telas:
+            tela = ttk.Frame(self.container)
+            tela.grid(row=0, column=0, sticky='nsew')
+            self.telas[nome] = (tela, construir(tela))
+        
+        tela, atualizar = self.telas[nome]
+        tela.tkraise()
+        if atualizar:
+            atualizar()
+
+    def descartar_telas(self):
+        """Destrói as telas em cache (ex.: ao trocar de usuário)"""
+        for tela, _ in self.telas.values():
+            tela.destroy()
+        self.telas = {}
+
+    def mostrar_carregando(self, pai):
+        """Exibe um indicador de carregamento em ``pai`` e o retorna para ser removido ao final"""
+        indicador = ttk.Frame(pai)
+        indicador.pack(pady=5)
+        ttk.Label(indicador, text="Carregando...", font=self.fontes['pequena']).pack()
+        barra = ttk.Progressbar(indicador, mode='indeterminate', length=150)
+        barra.pack(pady=2)
+        barra.start(15)
+        self.indicadores.append(indicador)
+        return indicador
+
+    def falha(self, mensagem):
+        """Retorna um tratador que exibe ``mensagem`` e o erro de uma tarefa de banco"""
+        return lambda erro: messagebox.showerror("Erro", f"{mensagem}: {str(erro)}")
 
     def criar_menu_principal(self):
+        """Exibe o menu principal com opções baseadas no estado de login"""
+        self.exibir_tela('menu_usuario' if self.usuario_atual else 'menu_visitante', self.construir_menu_principal)
+
+    def construir_menu_principal(self, tela):
         """Cria o menu principal com opções baseadas no estado de login"""
-        self.limpar_tela()
-        
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(tela)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         # Cabeçalho
@@ -119,32 +234,64 @@ class InterfaceNutrismart:
         """Exibe a tela para registro de novas refeições"""
         self.limpar_tela()
         
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(self.tela_temporaria)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=30, pady=20)
         
         ttk.Label(frame_principal, text="Registrar Refeição", style='Titulo.TLabel').pack(pady=10)
         
         frame_form = ttk.Frame(frame_principal, style='Card.TFrame')
         frame_form.pack(pady=20, padx=10, fill=tk.X)
+        self.frame_registro = frame_principal
+        self.busca_sugestoes = None
         
-        # Campo Alimento
+        # Campo Alimento (com sugestões enquanto o usuário digita)
         ttk.Label(frame_form, text="Alimento:").grid(row=0, column=0, padx=10, pady=10, sticky=tk.W)
         self.entrada_alimento = ttk.Entry(frame_form)
         self.entrada_alimento.grid(row=0, column=1, padx=10, pady=10, sticky=tk.EW)
+        self.entrada_alimento.bind("<KeyRelease>", self.atualizar_sugestoes_alimento)
+        
+        self.lista_sugestoes = tk.Listbox(frame_form, height=5, font=self.fontes['pequena'])
+        self.lista_sugestoes.grid(row=1, column=1, padx=10, sticky=tk.EW)
+        self.lista_sugestoes.bind("<<ListboxSelect>>", self.selecionar_sugestao_alimento)
         
         # Campo Quantidade
-        ttk.Label(frame_form, text="Quantidade (gramas):").grid(row=1, column=0, padx=10, pady=10, sticky=tk.W)
+        ttk.Label(frame_form, text="Quantidade (gramas):").grid(row=2, column=0, padx=10, pady=10, sticky=tk.W)
         self.entrada_quantidade = ttk.Entry(frame_form)
-        self.entrada_quantidade.grid(row=1, column=1, padx=10, pady=10, sticky=tk.EW)
+        self.entrada_quantidade.grid(row=2, column=1, padx=10, pady=10, sticky=tk.EW)
+        frame_form.grid_columnconfigure(1, weight=1)
         
         # Botões
         frame_botoes = ttk.Frame(frame_principal)
         frame_botoes.pack(pady=20)
         
-        ttk.Button(frame_botoes, text="Registrar", style='BotaoPrimario.TButton',
-                command=self.registrar_refeicao).pack(side=tk.LEFT, padx=10)
+        self.botao_registrar = ttk.Button(frame_botoes, text="Registrar", style='BotaoPrimario.TButton',
+                command=self.registrar_refeicao)
+        self.botao_registrar.pack(side=tk.LEFT, padx=10)
         ttk.Button(frame_botoes, text="Voltar", command=self.criar_menu_principal).pack(side=tk.LEFT, padx=10)
 
+    def atualizar_sugestoes_alimento(self, event=None):
+        """Atualiza a lista de sugestões com os alimentos que combinam com o texto digitado"""
+        # Só a última tecla interessa: a busca anterior é cancelada se ainda não rodou
+        if self.busca_sugestoes:
+            self.busca_sugestoes.cancel()
+        self.busca_sugestoes = self.tarefas.executar(buscar_alimentos, self.entrada_alimento.get(), k=5,
+                                                     ao_concluir=self.exibir_sugestoes_alimento)
+
+    def exibir_sugestoes_alimento(self, nomes):
+        """Preenche a lista de sugestões com o resultado da busca"""
+        self.lista_sugestoes.delete(0, tk.END)
+        for nome in nomes:
+            self.lista_sugestoes.insert(tk.END, nome)
+
+    def selecionar_sugestao_alimento(self, event=None):
+        """Preenche o campo Alimento com a sugestão escolhida na lista"""
+        selecao = self.lista_sugestoes.curselection()
+        if selecao:
+            self.entrada_alimento.delete(0, tk.END)
+            self.entrada_alimento.insert(0, self.lista_sugestoes.get(selecao[0]))
+            self.lista_sugestoes.delete(0, tk.END)
+            self.entrada_quantidade.focus_set()
+
     def registrar_refeicao(self):
         """Processa o registro de uma nova refeição no banco de dados"""
         alimento = self.entrada_alimento.get().strip().lower()
@@ -164,23 +311,33 @@ class InterfaceNutrismart:
             return
         
         # Registra a refeição
-        try:
-            comida = Comida(self.usuario_atual)
-            sucesso, mensagem = comida.registrar_refeicao(alimento, quantidade)
-            
+        def concluir(resultado):
+            sucesso, mensagem = resultado
             if sucesso:
                 messagebox.showinfo("Sucesso", mensagem)
                 self.criar_menu_principal()
             else:
                 messagebox.showerror("Erro", mensagem)
-        except Exception as e:
-            messagebox.showerror("Erro", f"Ocorreu um erro ao registrar a refeição: {str(e)}")
+        
+        def terminar():
+            carregando.destroy()
+            self.botao_registrar.state(['!disabled'])
+        
+        comida = Comida(self.usuario_atual)
+        carregando = self.mostrar_carregando(self.frame_registro)
+        self.botao_registrar.state(['disabled'])
+        self.tarefas.executar(comida.registrar_refeicao, alimento, quantidade, cancelavel=False,
+                              ao_concluir=concluir,
+                              ao_falhar=self.falha("Ocorreu um erro ao registrar a refeição"),
+                              ao_terminar=terminar)
 
     def mostrar_historico_refeicoes(self):
         """Exibe o histórico de refeições do usuário em formato de tabela"""
-        self.limpar_tela()
-        
-        frame_principal = ttk.Frame(self.root)
+        self.exibir_tela('historico', self.construir_historico_refeicoes)
+
+    def construir_historico_refeicoes(self, tela):
+        """Monta a tela do histórico de refeições"""
+        frame_principal = ttk.Frame(tela)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Histórico de Refeições", style='Titulo.TLabel').pack(pady=10)
@@ -199,34 +356,69 @@ class InterfaceNutrismart:
         tabela.column("Alimento", width=200, anchor=tk.W)
         tabela.column("Data", width=200)
         
-        # Barra de rolagem
+        # Barra de rolagem: a tabela só guarda algumas páginas por vez e busca as
+        # vizinhas no banco conforme o usuário se aproxima das bordas
         scroll = ttk.Scrollbar(frame_tabela, orient=tk.VERTICAL, command=tabela.yview)
-        tabela.configure(yscroll=scroll.set)
+        tabela.configure(yscroll=self.rolagem_historico)
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
         tabela.pack(expand=True, fill=tk.BOTH)
         
-        # Carregar dados
-        comida = Comida(self.usuario_atual)
-        refeicoes = comida.ver_refeicoes()
-        
-        if refeicoes:
-            for refeicao in refeicoes:
-                tabela.insert("", tk.END, values=refeicao)
-        else:
-            ttk.Label(frame_principal, text="Nenhuma refeição registrada ainda.").pack()
+        rotulo_vazio = ttk.Label(frame_principal, text="")
+        rotulo_vazio.pack()
+        
+        self.historico = {
+            'comida': Comida(self.usuario_atual),
+            'tabela': tabela,
+            'scroll': scroll,
+            'vazio': rotulo_vazio,
+            'paginas': deque(),   # listas de (iid, chave) de cada página exibida
+            'no_inicio': True,    # a primeira página exibida é a mais recente
+            'no_fim': False,      # a última página exibida é a mais antiga
+            'carregando': False,
+        }
         
         # Botões
         frame_botoes = ttk.Frame(frame_principal)
         frame_botoes.pack(pady=10)
         
-        ttk.Button(frame_botoes, text="Atualizar", command=self.mostrar_historico_refeicoes).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_botoes, text="Atualizar", command=self.atualizar_historico_refeicoes).pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_botoes, text="Voltar", command=self.criar_menu_principal).pack(side=tk.LEFT, padx=5)
+        
+        return self.atualizar_historico_refeicoes
+
+    def atualizar_historico_refeicoes(self):
+        """Recarrega a primeira página do histórico, alterando só as linhas que mudaram"""
+        estado = self.historico
+        tabela = estado['tabela']
+        
+        def exibir(refeicoes):
+            # Volta a janela para a primeira página e sincroniza só as linhas dela
+            while len(estado['paginas']) > 1:
+                tabela.delete(*(iid for iid, _ in estado['paginas'].pop()))
+            atualizar_linhas(tabela, [(str(refeicao[0]), refeicao) for refeicao in refeicoes])
+            
+            estado['paginas'] = deque([[(str(refeicao[0]), Comida.chave_refeicao(refeicao))
+                                        for refeicao in refeicoes]] if refeicoes else [])
+            estado['no_inicio'] = True
+            estado['no_fim'] = len(refeicoes) < REFEICOES_POR_PAGINA
+            estado['vazio'].configure(text="" if refeicoes else "Nenhuma refeição registrada ainda.")
+            tabela.yview_moveto(0)
+            estado['carregando'] = False
+        
+        def falhar(erro):
+            estado['carregando'] = False
+            self.falha("Não foi possível carregar o histórico")(erro)
+        
+        estado['carregando'] = True
+        carregando = self.mostrar_carregando(estado['vazio'].master)
+        self.tarefas.executar(estado['comida'].pagina_refeicoes, limite=REFEICOES_POR_PAGINA,
+                              ao_concluir=exibir, ao_falhar=falhar, ao_terminar=carregando.destroy)
 
     def mostrar_alimentos_recomendados(self):
         """Exibe alimentos recomendados baseados na dieta do usuário"""
         self.limpar_tela()
         
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(self.tela_temporaria)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Alimentos Recomendados", style='Titulo.TLabel').pack(pady=10)
@@ -234,17 +426,21 @@ class InterfaceNutrismart:
         frame_card = ttk.Frame(frame_principal, style='Card.TFrame')
         frame_card.pack(pady=20, padx=50, fill=tk.X)
         
-        # Obter recomendações
-        comida = Comida(self.usuario_atual)
+        ttk.Button(frame_principal, text="Voltar", command=self.criar_menu_principal).pack(pady=20)
         
-        # Obter dieta do usuário
-        cursor.execute("SELECT dieta FROM usuarios WHERE email = ?", (self.usuario_atual,))
-        resultado = cursor.fetchone()
+        carregando = self.mostrar_carregando(frame_card)
+        self.tarefas.executar(alimentos_recomendados, self.usuario_atual,
+                              ao_concluir=lambda resultado: self.exibir_alimentos_recomendados(frame_card, resultado),
+                              ao_falhar=self.falha("Não foi possível carregar as recomendações"),
+                              ao_terminar=carregando.destroy)
+
+    def exibir_alimentos_recomendados(self, frame_card, resultado):
+        """Preenche a tela de alimentos recomendados com as sugestões para a dieta do usuário"""
         if not resultado:
             ttk.Label(frame_card, text="Usuário não encontrado.").pack()
             return
         
-        dieta_usuario = resultado[0]
+        dieta_usuario, recomendados = resultado
         
         # Mostrar dieta atual
         ttk.Label(frame_card, text=f"Dieta atual: {dieta_usuario}", font=self.fontes['subtitulo']).pack(pady=10)
@@ -252,62 +448,17 @@ class InterfaceNutrismart:
         # Mostrar alimentos recomendados
         ttk.Label(frame_card, text="\nAlimentos recomendados:", font=self.fontes['subtitulo']).pack(pady=5, anchor=tk.W)
         
-        recomendacoes = {
-            "Low carb": [
-                "Ovos", "Abacate", "Peixes", "Nozes", "Couve-flor", "Espinafre", "Brócolis", "Azeite de oliva",
-                "Amêndoas", "Queijo", "Cogumelos", "Carne bovina", "Salmão", "Aspargos", "Alface", "Cenoura",
-                "Tomate", "Pepino", "Pimentão", "Berinjela", "Abobrinha", "Castanha-do-pará", "Aipo", "Azeitona",
-                "Sementes de chia", "Sementes de linhaça", "Coco", "Framboesa", "Morango", "Repolho", "Alcachofra",
-                "Cebola", "Alho", "Rúcula", "Manjericão", "Salsinha", "Endívia", "Alcaparras", "Pimenta", "Ervilha-torta",
-                "Limão", "Laranja", "Carne de porco", "Frango", "Iogurte natural", "Ricota", "Chá verde", "Água com gás",
-                "Vinagre de maçã", "Café"
-            ],
-            "Cetogênica": [
-                "Bacon", "Queijo cheddar", "Carne de cordeiro", "Manteiga", "Nata", "Óleo de coco", "Salmão selvagem",
-                "Ovos caipiras", "Espinafre", "Couve", "Brócolis", "Couve-flor", "Abacate", "Nozes", "Castanhas",
-                "Sementes de abóbora", "Azeitonas", "Chá de hortelã", "Café sem açúcar", "Queijo parmesão",
-                "Frango caipira", "Carne moída", "Camarão", "Atum", "Aspargos", "Abobrinha", "Cogumelos", "Alho",
-                "Cebola", "Pimenta", "Ervas frescas", "Alface", "Rúcula", "Salsa", "Manjericão", "Nata fresca",
-                "Creme de leite", "Óleo MCT", "Chá de camomila", "Queijo mozzarella", "Carne bovina", "Carne de porco",
-                "Peixes gordurosos", "Sementes de chia", "Sementes de linhaça", "Abacate", "Limão", "Vinagre de maçã",
-                "Água mineral"
-            ],
-            "Hiperproteica": [
-                "Peito de frango", "Clara de ovo", "Carne magra", "Peixes", "Queijo cottage", "Iogurte grego",
-                "Atum", "Carne bovina magra", "Salmão", "Ovos inteiros", "Tofu", "Tempeh", "Lentilhas", "Feijão",
-                "Quinoa", "Amêndoas", "Nozes", "Sementes de abóbora", "Camarão", "Proteína isolada", "Leite desnatado",
-                "Ricota", "Brócolis", "Couve-flor", "Espinafre", "Cenoura", "Abobrinha", "Alface", "Tomate",
-                "Pepino", "Pimentão", "Azeite de oliva", "Chá verde", "Água"
-            ],
-            "Bulking": [
-                "Arroz integral", "Batata doce", "Aveia", "Massas integrais", "Carne vermelha", "Peito de frango",
-                "Ovos", "Salmão", "Atum", "Quinoa", "Feijão", "Grão-de-bico", "Lentilha", "Leite integral",
-                "Iogurte natural", "Queijo", "Nozes", "Amêndoas", "Castanha-do-pará", "Abacate", "Banana",
-                "Morangos", "Espinafre", "Brócolis", "Cenoura", "Abobrinha", "Tomate", "Pepino", "Pimentão",
-                "Azeite de oliva", "Manteiga de amendoim", "Chá verde", "Água", "Mel", "Chocolate amargo",
-                "Batata inglesa", "Milho", "Pão integral", "Sementes de chia", "Sementes de linhaça", "Ervilha"
-            ]
-        }
-        
-        alimentos_recomendados = recomendacoes.get(dieta_usuario, [])
-        
-        if alimentos_recomendados:
-            # Selecionar 4 aleatórios
-            import random
-            aleatorios = random.sample(alimentos_recomendados, k=min(4, len(alimentos_recomendados)))
-            
-            for alimento in aleatorios:
-                ttk.Label(frame_card, text=f"- {alimento}").pack(anchor=tk.W, pady=2)
+        if recomendados:
+            for nome, calorias, *_ in recomendados:
+                ttk.Label(frame_card, text=f"- {nome.capitalize()} ({calorias:.0f} kcal/100 g)").pack(anchor=tk.W, pady=2)
         else:
             ttk.Label(frame_card, text="Nenhuma recomendação disponível para esta dieta.").pack()
-        
-        ttk.Button(frame_principal, text="Voltar", command=self.criar_menu_principal).pack(pady=20)
 
     def mostrar_encerramento_dia(self):
         """Exibe um resumo nutricional do dia atual"""
         self.limpar_tela()
         
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(self.tela_temporaria)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Resumo Diário", style='Titulo.TLabel').pack(pady=10)
@@ -315,56 +466,35 @@ class InterfaceNutrismart:
         frame_card = ttk.Frame(frame_principal, style='Card.TFrame')
         frame_card.pack(pady=20, padx=50, fill=tk.X)
         
-        # Obter dados do usuário
-        cursor.execute("SELECT dieta, peso, altura FROM usuarios WHERE email = ?", (self.usuario_atual,))
-        resultado = cursor.fetchone()
-        if not resultado:
+        ttk.Button(frame_principal, text="Voltar", command=self.criar_menu_principal).pack(pady=20)
+        
+        # Mesmo resumo do encerramento no terminal, da API e do fechamento noturno
+        carregando = self.mostrar_carregando(frame_card)
+        self.tarefas.executar(Registros(self.usuario_atual).resumo_do_dia,
+                              ao_concluir=lambda resumo: self.exibir_encerramento_dia(frame_card, resumo),
+                              ao_falhar=self.falha("Não foi possível carregar o resumo do dia"),
+                              ao_terminar=carregando.destroy)
+
+    def exibir_encerramento_dia(self, frame_card, resumo):
+        """Preenche o resumo diário com o resultado de Registros.resumo_do_dia"""
+        if not resumo:
             ttk.Label(frame_card, text="Usuário não encontrado.").pack()
-            ttk.Button(frame_principal, text="Voltar", command=self.criar_menu_principal).pack(pady=20)
             return
         
-        dieta_usuario, peso, altura = resultado
-        
-        # Obter refeições do dia
-        hoje = date.today().strftime("%Y-%m-%d")
-        cursor.execute('''
-            SELECT r.alimento, r.quantidade_gramas, a.calorias
-            FROM refeicoes r
-            JOIN alimentos a ON r.alimento = a.nome
-            WHERE r.email_usuario = ? AND date(r.data) = ?
-        ''', (self.usuario_atual, hoje))
-        refeicoes_hoje = cursor.fetchall()
-        
-        if not refeicoes_hoje:
+        if resumo['situacao'] is None:
             ttk.Label(frame_card, text="Nenhuma refeição registrada para hoje.").pack()
-            ttk.Button(frame_principal, text="Voltar", command=self.criar_menu_principal).pack(pady=20)
             return
         
-        # Calcular calorias totais
-        calorias_totais = 0
-        for alimento, quantidade, cal_100g in refeicoes_hoje:
-            calorias_totais += (cal_100g * quantidade) / 100
-        calorias_totais = round(calorias_totais, 2)
-        
-        # Calcular meta calórica
-        metas = {
-            "Low carb": 25 * peso,
-            "Cetogênica": 27 * peso,
-            "Hiperproteica": 30 * peso,
-            "Bulking": 35 * peso
-        }
-        meta_calorias = metas.get(dieta_usuario, 30 * peso)
-        
         # Exibir resultados
-        ttk.Label(frame_card, text=f"Dieta: {dieta_usuario}").pack(anchor=tk.W, pady=5)
-        ttk.Label(frame_card, text=f"Calorias consumidas hoje: {calorias_totais} kcal").pack(anchor=tk.W, pady=5)
-        ttk.Label(frame_card, text=f"Meta calórica diária: {meta_calorias} kcal").pack(anchor=tk.W, pady=5)
+        ttk.Label(frame_card, text=f"Dieta: {resumo['dieta']}").pack(anchor=tk.W, pady=5)
+        ttk.Label(frame_card, text=f"Calorias consumidas hoje: {resumo['calorias']} kcal").pack(anchor=tk.W, pady=5)
+        ttk.Label(frame_card, text=f"Meta calórica diária: {resumo['meta_calorias']} kcal").pack(anchor=tk.W, pady=5)
         
         # Avaliação
-        if calorias_totais < meta_calorias * 0.9:
+        if resumo['situacao'] == 'abaixo':
             status = "⚠️ Você consumiu menos calorias que o recomendado para sua dieta hoje."
             cor = 'red'
-        elif calorias_totais > meta_calorias * 1.1:
+        elif resumo['situacao'] == 'acima':
             status = "⚠️ Você consumiu mais calorias que o recomendado para sua dieta hoje."
             cor = 'red'
         else:
@@ -372,18 +502,99 @@ class InterfaceNutrismart:
             cor = 'green'
         
         ttk.Label(frame_card, text=status, foreground=cor).pack(anchor=tk.W, pady=10)
+
+    def anexar_pagina_historico(self, refeicoes):
+        """Adiciona uma página de refeições mais antigas ao fim da tabela do histórico"""
+        estado = self.historico
+        tabela = estado['tabela']
+        pagina = [(tabela.insert("", tk.END, iid=str(refeicao[0]), values=refeicao), Comida.chave_refeicao(refeicao))
+                  for refeicao in refeicoes]
+        estado['paginas'].append(pagina)
+        estado['no_fim'] = len(refeicoes) < REFEICOES_POR_PAGINA
+        
+        if len(estado['paginas']) > PAGINAS_HISTORICO_EM_TELA:
+            tabela.delete(*(iid for iid, _ in estado['paginas'].popleft()))
+            estado['no_inicio'] = False
+
+    def preceder_pagina_historico(self, refeicoes):
+        """Adiciona uma página de refeições mais recentes ao início da tabela do histórico"""
+        estado = self.historico
+        tabela = estado['tabela']
+        pagina = [(tabela.insert("", posicao, iid=str(refeicao[0]), values=refeicao), Comida.chave_refeicao(refeicao))
+                  for posicao, refeicao in enumerate(refeicoes)]
+        estado['paginas'].appendleft(pagina)
+        estado['no_inicio'] = len(refeicoes) < REFEICOES_POR_PAGINA
+        
+        if len(estado['paginas']) > PAGINAS_HISTORICO_EM_TELA:
+            tabela.delete(*(iid for iid, _ in estado['paginas'].pop()))
+            estado['no_fim'] = False
+
+    def rolagem_historico(self, primeiro, ultimo):
+        """Atualiza a barra de rolagem e carrega a página vizinha quando a tabela chega perto de uma borda"""
+        estado = self.historico
+        estado['scroll'].set(primeiro, ultimo)
+        if estado['carregando'] or not estado['paginas']:
+            return
         
-        ttk.Button(frame_principal, text="Voltar", command=self.criar_menu_principal).pack(pady=20)
+        tabela = estado['tabela']
+        comida = estado['comida']
+        if float(ultimo) > 0.95 and not estado['no_fim']:
+            parametros = {'apos': estado['paginas'][-1][-1][1]}
+            adicionar, borda = self.anexar_pagina_historico, 'no_fim'
+        elif float(primeiro) < 0.05 and not estado['no_inicio']:
+            parametros = {'antes': estado['paginas'][0][0][1]}
+            adicionar, borda = self.preceder_pagina_historico, 'no_inicio'
+        else:
+            return
+        
+        def exibir(refeicoes):
+            # Linha de referência para manter a mesma posição na tela após a troca de páginas
+            referencia = tabela.identify_row(1)
+            if refeicoes:
+                adicionar(refeicoes)
+            else:
+                estado[borda] = True
+            if referencia and tabela.exists(referencia):
+                tabela.yview_moveto(tabela.index(referencia) / max(len(tabela.get_children()), 1))
+            estado['carregando'] = False
+        
+        def falhar(erro):
+            estado['carregando'] = False
+            self.falha("Não foi possível carregar o histórico")(erro)
+        
+        # A página vizinha é buscada em segundo plano; até ela chegar, novas rolagens não disparam outra busca
+        estado['carregando'] = True
+        self.tarefas.executar(comida.pagina_refeicoes, limite=REFEICOES_POR_PAGINA, **parametros,
+                              ao_concluir=exibir, ao_falhar=falhar)
 
     def mostrar_ranking_alimentos(self):
         """Exibe ranking dos alimentos mais consumidos pelo usuário"""
-        self.limpar_tela()
-        
-        frame_principal = ttk.Frame(self.root)
+        self.exibir_tela('ranking', self.construir_ranking_alimentos)
+
+    def construir_ranking_alimentos(self, tela):
+        """Monta a tela do ranking de alimentos"""
+        frame_principal = ttk.Frame(tela)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Ranking de Alimentos", style='Titulo.TLabel').pack(pady=10)
         
+        # Filtros: período, critério e ranking geral (todos os usuários)
+        frame_filtros = ttk.Frame(frame_principal)
+        frame_filtros.pack(fill=tk.X, padx=10)
+        
+        ttk.Label(frame_filtros, text="Período:").pack(side=tk.LEFT, padx=5)
+        periodo = ttk.Combobox(frame_filtros, state="readonly", width=16, values=list(PERIODOS_RANKING))
+        periodo.set(next(iter(PERIODOS_RANKING)))
+        periodo.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(frame_filtros, text="Ordenar por:").pack(side=tk.LEFT, padx=5)
+        criterio = ttk.Combobox(frame_filtros, state="readonly", width=16, values=list(CRITERIOS_RANKING))
+        criterio.set(next(iter(CRITERIOS_RANKING)))
+        criterio.pack(side=tk.LEFT, padx=5)
+        
+        todos = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame_filtros, text="Todos os usuários", variable=todos).pack(side=tk.LEFT, padx=5)
+        
         frame_tabela = ttk.Frame(frame_principal, style='Card.TFrame')
         frame_tabela.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
         
@@ -404,35 +615,54 @@ class InterfaceNutrismart:
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
         tabela.pack(expand=True, fill=tk.BOTH)
         
-        # Carregar dados
-        cursor.execute('''
-            SELECT alimento, SUM(quantidade_gramas) as total_gramas
-            FROM refeicoes
-            WHERE email_usuario = ?
-            GROUP BY alimento
-            ORDER BY total_gramas DESC
-            LIMIT 10
-        ''', (self.usuario_atual,))
-        ranking = cursor.fetchall()
-        
-        if ranking:
-            for i, (alimento, total) in enumerate(ranking, 1):
-                tabela.insert("", tk.END, values=(i, alimento.capitalize(), f"{total:.2f}"))
-        else:
-            ttk.Label(frame_principal, text="Nenhuma refeição registrada para gerar ranking.").pack()
+        rotulo_vazio = ttk.Label(frame_principal, text="")
+        rotulo_vazio.pack()
+        
+        # Carregar dados (contadores mantidos a cada refeição, sem agregar o histórico)
+        def buscar_ranking(janela, nome_criterio, geral):
+            if geral:
+                linhas = ranking_geral(janela=janela, criterio=nome_criterio)
+            else:
+                linhas = ranking_usuario(self.usuario_atual, janela=janela, criterio=nome_criterio)
+            coluna = 1 + list(CRITERIOS).index(nome_criterio)
+            return [(linha[0], linha[coluna]) for linha in linhas]
+        
+        def exibir(ranking, rotulo_criterio):
+            tabela.heading("Quantidade", text=rotulo_criterio)
+            formato = "{:.0f}" if CRITERIOS_RANKING[rotulo_criterio] == 'frequencia' else "{:.2f}"
+            atualizar_linhas(tabela, [(alimento, (i, alimento.capitalize(), formato.format(total)))
+                                      for i, (alimento, total) in enumerate(ranking, 1)])
+            rotulo_vazio.configure(text="" if ranking else "Nenhuma refeição registrada para gerar ranking.")
+        
+        def atualizar(event=None):
+            rotulo_criterio = criterio.get()
+            carregando = self.mostrar_carregando(frame_tabela)
+            self.tarefas.executar(buscar_ranking, PERIODOS_RANKING[periodo.get()],
+                                  CRITERIOS_RANKING[rotulo_criterio], todos.get(),
+                                  ao_concluir=lambda ranking: exibir(ranking, rotulo_criterio),
+                                  ao_falhar=self.falha("Não foi possível carregar o ranking"),
+                                  ao_terminar=carregando.destroy)
+        
+        periodo.bind("<<ComboboxSelected>>", atualizar)
+        criterio.bind("<<ComboboxSelected>>", atualizar)
+        todos.trace_add("write", lambda *args: atualizar())
         
         # Botões
         frame_botoes = ttk.Frame(frame_principal)
         frame_botoes.pack(pady=10)
         
-        ttk.Button(frame_botoes, text="Atualizar", command=self.mostrar_ranking_alimentos).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_botoes, text="Atualizar", command=atualizar).pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_botoes, text="Voltar", command=self.criar_menu_principal).pack(side=tk.LEFT, padx=5)
+        
+        return atualizar
 
     def mostrar_lembretes(self):
         """Exibe lembretes e alertas para o usuário"""
-        self.limpar_tela()
-        
-        frame_principal = ttk.Frame(self.root)
+        self.exibir_tela('lembretes', self.construir_lembretes)
+
+    def construir_lembretes(self, tela):
+        """Monta a tela de lembretes"""
+        frame_principal = ttk.Frame(tela)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Lembretes", style='Titulo.TLabel').pack(pady=10)
@@ -441,25 +671,34 @@ class InterfaceNutrismart:
         frame_card.pack(pady=20, padx=50, fill=tk.X)
         
         # Obter registros do dia
-        hoje = date.today()
-        cursor.execute("SELECT * FROM refeicoes WHERE email_usuario = ? AND date(data) = ?", 
-                      (self.usuario_atual, str(hoje)))
-        registros = cursor.fetchall()
+        rotulo_registros = ttk.Label(frame_card, text="")
+        rotulo_registros.pack(pady=10)
         
-        if not registros:
-            ttk.Label(frame_card, text="Você ainda não registrou refeições hoje!").pack(pady=10)
-        else:
-            ttk.Label(frame_card, text=f"Você registrou {len(registros)} refeições hoje").pack(pady=10)
+        def exibir(total_registros):
+            if not total_registros:
+                rotulo_registros.configure(text="Você ainda não registrou refeições hoje!")
+            else:
+                rotulo_registros.configure(text=f"Você registrou {total_registros} refeições hoje")
+        
+        def atualizar():
+            carregando = self.mostrar_carregando(frame_card)
+            self.tarefas.executar(Comida(self.usuario_atual).contar_refeicoes_do_dia, ao_concluir=exibir,
+                                  ao_falhar=self.falha("Não foi possível carregar os lembretes"),
+                                  ao_terminar=carregando.destroy)
         
         ttk.Label(frame_card, text="Lembrete: Beba pelo menos 2 litros de água ao longo do dia!").pack(pady=10)
         
         ttk.Button(frame_principal, text="Voltar", command=self.criar_menu_principal).pack(pady=20)
+        
+        return atualizar
 
     def mostrar_suporte(self):
         """Exibe a interface de suporte para o usuário"""
-        self.limpar_tela()
-        
-        frame_principal = ttk.Frame(self.root)
+        self.exibir_tela('suporte', self.construir_suporte)
+
+    def construir_suporte(self, tela):
+        """Monta a tela de suporte do usuário"""
+        frame_principal = ttk.Frame(tela)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Ajuda e Suporte", style='Titulo.TLabel').pack(pady=10)
@@ -502,9 +741,9 @@ class InterfaceNutrismart:
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.tabela_mensagens.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
         
-        self.carregar_mensagens_suporte()
-        
         ttk.Button(frame_principal, text="Voltar", command=self.criar_menu_principal).pack(pady=10)
+        
+        return self.carregar_mensagens_suporte
 
     def enviar_mensagem_suporte(self):
         """Envia uma mensagem de suporte para o administrador"""
@@ -514,48 +753,62 @@ class InterfaceNutrismart:
             messagebox.showerror("Erro", "Digite uma mensagem antes de enviar!")
             return
             
-        try:
-            data_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            cursor.execute("""
+        data_hora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        def gravar():
+            escrever("""
                 INSERT INTO suporte (email, mensagem, data_hora) 
                 VALUES (?, ?, ?)
-            """, (self.usuario_atual, mensagem, data_hora))
-            conn.commit()
-            
+            """, (self.usuario_atual, mensagem, data_hora), usuario=self.usuario_atual).result()
+        
+        def concluir(_):
             messagebox.showinfo("Sucesso", "Mensagem enviada com sucesso!")
             self.texto_mensagem.delete("1.0", tk.END)
             self.carregar_mensagens_suporte()
-        except Exception as e:
-            messagebox.showerror("Erro", f"Ocorreu um erro ao enviar a mensagem: {str(e)}")
+        
+        self.tarefas.executar(gravar, cancelavel=False, ao_concluir=concluir,
+                              ao_falhar=self.falha("Ocorreu um erro ao enviar a mensagem"))
 
     def carregar_mensagens_suporte(self):
         """Carrega as mensagens de suporte do usuário"""
-        for item in self.tabela_mensagens.get_children():
-            self.tabela_mensagens.delete(item)
-            
-        cursor.execute("""
-            SELECT data_hora, mensagem, resposta 
-            FROM suporte 
-            WHERE email = ?
-            ORDER BY data_hora DESC
-        """, (self.usuario_atual,))
-        
-        for linha in cursor.fetchall():
-            self.tabela_mensagens.insert("", tk.END, values=linha)
+        def buscar_mensagens():
+            with conexao(self.usuario_atual) as conn:
+                return conn.execute("""
+                    SELECT id, data_hora, mensagem, resposta 
+                    FROM suporte 
+                    WHERE email = ?
+                    ORDER BY data_hora DESC
+                """, (self.usuario_atual,)).fetchall()
+        
+        def exibir(linhas):
+            atualizar_linhas(self.tabela_mensagens, [(str(id_suporte), linha) for id_suporte, *linha in linhas])
+        
+        self.tarefas.executar(buscar_mensagens, ao_concluir=exibir,
+                              ao_falhar=self.falha("Não foi possível carregar suas mensagens"))
 
     def mostrar_edicao_perfil(self):
         """Exibe a tela para edição dos dados do perfil"""
         self.limpar_tela()
         
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(self.tela_temporaria)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Editar Perfil", style='Titulo.TLabel').pack(pady=10)
         
         # Obter dados atuais do usuário
-        cursor.execute("SELECT peso, altura, dieta FROM usuarios WHERE email = ?", (self.usuario_atual,))
-        resultado = cursor.fetchone()
+        def buscar_perfil():
+            with conexao(self.usuario_atual) as conn:
+                return conn.execute("SELECT peso, altura, dieta FROM usuarios WHERE email = ?",
+                                    (self.usuario_atual,)).fetchone()
+        
+        carregando = self.mostrar_carregando(frame_principal)
+        self.tarefas.executar(buscar_perfil,
+                              ao_concluir=lambda resultado: self.exibir_edicao_perfil(frame_principal, resultado),
+                              ao_falhar=self.falha("Não foi possível carregar o perfil"),
+                              ao_terminar=carregando.destroy)
+
+    def exibir_edicao_perfil(self, frame_principal, resultado):
+        """Monta o formulário de edição com os dados atuais do usuário"""
         if not resultado:
             messagebox.showerror("Erro", "Usuário não encontrado!")
             self.criar_menu_principal()
@@ -604,25 +857,30 @@ class InterfaceNutrismart:
                 return
                 
             novo_imc = novo_peso / (nova_altura ** 2)
-            
-            cursor.execute("""
+        except ValueError:
+            messagebox.showerror("Erro", "Digite valores numéricos válidos!")
+            return
+        
+        def gravar():
+            escrever("""
                 UPDATE usuarios 
                 SET peso = ?, altura = ?, dieta = ?, imc = ?
                 WHERE email = ?
-            """, (novo_peso, nova_altura, nova_dieta, novo_imc, self.usuario_atual))
-            conn.commit()
-            
+            """, (novo_peso, nova_altura, nova_dieta, novo_imc, self.usuario_atual),
+               usuario=self.usuario_atual).result()
+        
+        def concluir(_):
             messagebox.showinfo("Sucesso", "Dados atualizados com sucesso!")
             self.criar_menu_principal()
-            
-        except ValueError:
-            messagebox.showerror("Erro", "Digite valores numéricos válidos!")
+        
+        self.tarefas.executar(gravar, cancelavel=False, ao_concluir=concluir,
+                              ao_falhar=self.falha("Não foi possível salvar o perfil"))
 
     def mostrar_tela_cadastro(self):
         """Exibe a tela de cadastro de novos usuários"""
         self.limpar_tela()
         
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(self.tela_temporaria)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=50, pady=30)
         
         ttk.Label(frame_principal, text="Cadastro de Usuário", style='Titulo.TLabel').pack(pady=20)
@@ -681,8 +939,17 @@ class InterfaceNutrismart:
             return
         
         # Verificar se email já existe
-        cursor.execute("SELECT email FROM usuarios WHERE email = ?", (email,))
-        if cursor.fetchone():
+        def verificar_email():
+            with conexao(email) as conn:
+                return conn.execute("SELECT email FROM usuarios WHERE email = ?", (email,)).fetchone()
+        
+        self.tarefas.executar(verificar_email,
+                              ao_concluir=lambda existe: self.concluir_cadastro_usuario(email, senha, peso, altura, sexo, existe),
+                              ao_falhar=self.falha("Não foi possível cadastrar"))
+
+    def concluir_cadastro_usuario(self, email, senha, peso, altura, sexo, existe):
+        """Pede dieta e pergunta de segurança e grava o novo usuário"""
+        if existe:
             messagebox.showerror("Erro", "E-mail já cadastrado!")
             return
         
@@ -700,17 +967,19 @@ class InterfaceNutrismart:
         imc = peso / (altura ** 2)
         
         # Inserir no banco
-        try:
-            cursor.execute("""
-                INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, resposta_seguranca)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (email, senha, peso, altura, sexo, dieta, imc, pergunta, resposta))
-            conn.commit()
-            
+        def gravar():
+            with transacao(email) as conn:
+                conn.execute("""
+                    INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, resposta_seguranca)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (email, senha, peso, altura, sexo, dieta, imc, pergunta, resposta))
+        
+        def concluir(_):
             messagebox.showinfo("Sucesso", "Usuário cadastrado com sucesso!")
             self.criar_menu_principal()
-        except Exception as e:
-            messagebox.showerror("Erro", f"Não foi possível cadastrar: {str(e)}")
+        
+        self.tarefas.executar(gravar, cancelavel=False, ao_concluir=concluir,
+                              ao_falhar=self.falha("Não foi possível cadastrar"))
 
     def selecionar_dieta(self):
         """Abre uma janela para seleção da dieta"""
@@ -786,7 +1055,7 @@ class InterfaceNutrismart:
         """Exibe a tela de login"""
         self.limpar_tela()
         
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(self.tela_temporaria)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=50, pady=50)
         
         ttk.Label(frame_principal, text="Login", style='Titulo.TLabel').pack(pady=20)
@@ -820,15 +1089,20 @@ class InterfaceNutrismart:
             messagebox.showerror("Erro", "Preencha todos os campos!")
             return
             
-        cursor.execute("SELECT senha FROM usuarios WHERE email = ?", (email,))
-        resultado = cursor.fetchone()
+        def buscar_senha():
+            with conexao(email) as conn:
+                return conn.execute("SELECT senha FROM usuarios WHERE email = ?", (email,)).fetchone()
+        
+        def concluir(resultado):
+            if resultado and resultado[0] == senha:
+                self.usuario_atual = email
+                self.descartar_telas()
+                messagebox.showinfo("Sucesso", "Login realizado com sucesso!")
+                self.criar_menu_principal()
+            else:
+                messagebox.showerror("Erro", "E-mail ou senha incorretos!")
         
-        if resultado and resultado[0] == senha:
-            self.usuario_atual = email
-            messagebox.showinfo("Sucesso", "Login realizado com sucesso!")
-            self.criar_menu_principal()
-        else:
-            messagebox.showerror("Erro", "E-mail ou senha incorretos!")
+        self.tarefas.executar(buscar_senha, ao_concluir=concluir, ao_falhar=self.falha("Não foi possível entrar"))
 
     def mostrar_recuperacao_senha(self):
         """Exibe a tela de recuperação de senha"""
@@ -852,13 +1126,20 @@ class InterfaceNutrismart:
                 messagebox.showerror("Erro", "Digite seu e-mail!")
                 return
                 
-            cursor.execute("""
-                SELECT pergunta_seguranca, resposta_seguranca, senha 
-                FROM usuarios 
-                WHERE email = ?
-            """, (email,))
-            resultado = cursor.fetchone()
+            def buscar_pergunta():
+                with conexao(email) as conn:
+                    return conn.execute("""
+                        SELECT pergunta_seguranca, resposta_seguranca, senha 
+                        FROM usuarios 
+                        WHERE email = ?
+                    """, (email,)).fetchone()
             
+            self.tarefas.executar(buscar_pergunta, ao_concluir=perguntar,
+                                  ao_falhar=self.falha("Não foi possível recuperar a senha"))
+        
+        def perguntar(resultado):
+            if not janela.winfo_exists():
+                return
             if not resultado:
                 messagebox.showerror("Erro", "E-mail não encontrado!")
                 return
@@ -897,7 +1178,7 @@ class InterfaceNutrismart:
         """Exibe a tela de login administrativo"""
         self.limpar_tela()
         
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(self.tela_temporaria)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=50, pady=50)
         
         ttk.Label(frame_principal, text="Acesso Administrador", style='Titulo.TLabel').pack(pady=20)
@@ -925,9 +1206,11 @@ class InterfaceNutrismart:
 
     def mostrar_menu_admin(self):
         """Exibe o menu administrativo"""
-        self.limpar_tela()
-        
-        frame_principal = ttk.Frame(self.root)
+        self.exibir_tela('menu_admin', self.construir_menu_admin)
+
+    def construir_menu_admin(self, tela):
+        """Cria o menu administrativo"""
+        frame_principal = ttk.Frame(tela)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Menu Administrador", style='Titulo.TLabel').pack(pady=10)
@@ -965,7 +1248,7 @@ class InterfaceNutrismart:
         """Exibe a tela de cadastro de alimentos (admin)"""
         self.limpar_tela()
         
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(self.tela_temporaria)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Cadastrar Alimento", style='Titulo.TLabel').pack(pady=10)
@@ -1007,25 +1290,31 @@ class InterfaceNutrismart:
             return
         
         # Verificar se alimento já existe
-        cursor.execute("SELECT nome FROM alimentos WHERE nome = ?", (nome,))
-        if cursor.fetchone():
+        if catalogo.obter(nome):
             messagebox.showerror("Erro", "Alimento já cadastrado!")
             return
         
         # Inserir no banco
-        try:
-            cursor.execute("INSERT INTO alimentos (nome, calorias) VALUES (?, ?)", (nome, calorias))
-            conn.commit()
+        def gravar():
+            with transacao() as conn:
+                conn.execute("INSERT INTO alimentos (nome, calorias) VALUES (?, ?)", (nome, calorias))
+            replicar_catalogo()
+            catalogo.invalidar()
+        
+        def concluir(_):
             messagebox.showinfo("Sucesso", "Alimento cadastrado com sucesso!")
             self.mostrar_menu_admin()
-        except Exception as e:
-            messagebox.showerror("Erro", f"Não foi possível cadastrar: {str(e)}")
+        
+        self.tarefas.executar(gravar, cancelavel=False, ao_concluir=concluir,
+                              ao_falhar=self.falha("Não foi possível cadastrar"))
 
     def mostrar_lista_alimentos_admin(self):
         """Exibe a lista de alimentos cadastrados (admin)"""
-        self.limpar_tela()
-        
-        frame_principal = ttk.Frame(self.root)
+        self.exibir_tela('lista_alimentos_admin', self.construir_lista_alimentos_admin)
+
+    def construir_lista_alimentos_admin(self, tela):
+        """Monta a tela com a lista de alimentos (admin)"""
+        frame_principal = ttk.Frame(tela)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Lista de Alimentos", style='Titulo.TLabel').pack(pady=10)
@@ -1046,21 +1335,31 @@ class InterfaceNutrismart:
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
         tabela.pack(expand=True, fill=tk.BOTH)
         
-        cursor.execute("SELECT nome, calorias FROM alimentos ORDER BY nome")
-        for linha in cursor.fetchall():
-            tabela.insert("", tk.END, values=linha)
+        def exibir(alimentos):
+            atualizar_linhas(tabela, [(nome, (nome, calorias)) for nome, calorias, *_ in alimentos])
+        
+        def atualizar():
+            # Na primeira vez o catálogo ainda precisa ser lido do banco
+            carregando = self.mostrar_carregando(frame_tabela)
+            self.tarefas.executar(catalogo.listar, ao_concluir=exibir,
+                                  ao_falhar=self.falha("Não foi possível carregar os alimentos"),
+                                  ao_terminar=carregando.destroy)
         
         frame_botoes = ttk.Frame(frame_principal)
         frame_botoes.pack(pady=10)
         
-        ttk.Button(frame_botoes, text="Atualizar", command=self.mostrar_lista_alimentos_admin).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_botoes, text="Atualizar", command=atualizar).pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_botoes, text="Voltar", command=self.mostrar_menu_admin).pack(side=tk.LEFT, padx=5)
+        
+        return atualizar
 
     def mostrar_lista_usuarios_admin(self):
         """Exibe a lista de usuários cadastrados (admin)"""
-        self.limpar_tela()
-        
-        frame_principal = ttk.Frame(self.root)
+        self.exibir_tela('lista_usuarios_admin', self.construir_lista_usuarios_admin)
+
+    def construir_lista_usuarios_admin(self, tela):
+        """Monta a tela com a lista de usuários (admin)"""
+        frame_principal = ttk.Frame(tela)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Lista de Usuários", style='Titulo.TLabel').pack(pady=10)
@@ -1083,21 +1382,32 @@ class InterfaceNutrismart:
         scroll.pack(side=tk.RIGHT, fill=tk.Y)
         tabela.pack(expand=True, fill=tk.BOTH)
         
-        cursor.execute("SELECT email, peso, altura, sexo, dieta, imc FROM usuarios")
-        for linha in cursor.fetchall():
-            tabela.insert("", tk.END, values=linha)
+        def buscar_usuarios():
+            return consultar_todos("SELECT email, peso, altura, sexo, dieta, imc FROM usuarios",
+                                   chave=lambda usuario: usuario[0])
+        
+        def exibir(usuarios):
+            atualizar_linhas(tabela, [(linha[0], linha) for linha in usuarios])
+        
+        def atualizar():
+            carregando = self.mostrar_carregando(frame_tabela)
+            self.tarefas.executar(buscar_usuarios, ao_concluir=exibir,
+                                  ao_falhar=self.falha("Não foi possível carregar os usuários"),
+                                  ao_terminar=carregando.destroy)
         
         frame_botoes = ttk.Frame(frame_principal)
         frame_botoes.pack(pady=10)
         
-        ttk.Button(frame_botoes, text="Atualizar", command=self.mostrar_lista_usuarios_admin).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_botoes, text="Atualizar", command=atualizar).pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_botoes, text="Voltar", command=self.mostrar_menu_admin).pack(side=tk.LEFT, padx=5)
+        
+        return atualizar
 
     def mostrar_exclusao_alimento(self):
         """Exibe a tela de exclusão de alimentos (admin)"""
         self.limpar_tela()
         
-        frame_principal = ttk.Frame(self.root)
+        frame_principal = ttk.Frame(self.tela_temporaria)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Excluir Alimento", style='Titulo.TLabel').pack(pady=10)
@@ -1124,29 +1434,55 @@ class InterfaceNutrismart:
             messagebox.showerror("Erro", "Digite o nome do alimento!")
             return
             
-        cursor.execute("SELECT nome FROM alimentos WHERE nome = ?", (nome,))
-        if not cursor.fetchone():
+        if not catalogo.obter(nome):
             messagebox.showerror("Erro", "Alimento não encontrado!")
             return
             
         if messagebox.askyesno("Confirmar", f"Tem certeza que deseja excluir o alimento '{nome}'?"):
-            try:
-                cursor.execute("DELETE FROM alimentos WHERE nome = ?", (nome,))
-                conn.commit()
+            def apagar():
+                with transacao() as conn:
+                    conn.execute("DELETE FROM alimentos WHERE nome = ?", (nome,))
+                replicar_catalogo()
+                catalogo.invalidar()
+            
+            def concluir(_):
                 messagebox.showinfo("Sucesso", "Alimento excluído com sucesso!")
                 self.mostrar_menu_admin()
-            except Exception as e:
-                messagebox.showerror("Erro", f"Não foi possível excluir: {str(e)}")
+            
+            self.tarefas.executar(apagar, cancelavel=False, ao_concluir=concluir,
+                                  ao_falhar=self.falha("Não foi possível excluir"))
 
     def mostrar_suporte_admin(self):
         """Exibe a interface de suporte para administradores"""
-        self.limpar_tela()
-        
-        frame_principal = ttk.Frame(self.root)
+        self.exibir_tela('suporte_admin', self.construir_suporte_admin)
+
+    def construir_suporte_admin(self, tela):
+        """Monta a tela de suporte do administrador"""
+        frame_principal = ttk.Frame(tela)
         frame_principal.pack(expand=True, fill=tk.BOTH, padx=20, pady=20)
         
         ttk.Label(frame_principal, text="Gerenciar Suporte", style='Titulo.TLabel').pack(pady=10)
         
+        # Busca e filtros
+        frame_busca = ttk.Frame(frame_principal)
+        frame_busca.pack(fill=tk.X, padx=10)
+        
+        ttk.Label(frame_busca, text="Buscar:").pack(side=tk.LEFT, padx=5)
+        self.busca_suporte_admin = ttk.Entry(frame_busca, width=30)
+        self.busca_suporte_admin.pack(side=tk.LEFT, padx=5)
+        self.busca_suporte_admin.bind("<Return>", lambda event: self.buscar_suporte_admin())
+        
+        self.filtro_suporte_admin = ttk.Combobox(frame_busca, state="readonly", width=16,
+                                                 values=["Todas", "Respondidas", "Não respondidas"])
+        self.filtro_suporte_admin.set("Todas")
+        self.filtro_suporte_admin.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(frame_busca, text="Buscar", command=self.buscar_suporte_admin).pack(side=tk.LEFT, padx=5)
+        ttk.Button(frame_busca, text="Próxima", command=lambda: self.mudar_pagina_suporte_admin(1)).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(frame_busca, text="Anterior", command=lambda: self.mudar_pagina_suporte_admin(-1)).pack(side=tk.RIGHT, padx=5)
+        self.rotulo_pagina_suporte_admin = ttk.Label(frame_busca, text="")
+        self.rotulo_pagina_suporte_admin.pack(side=tk.RIGHT, padx=5)
+        
         frame_tabela = ttk.Frame(frame_principal, style='Card.TFrame')
         frame_tabela.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
         
@@ -1180,22 +1516,51 @@ class InterfaceNutrismart:
         ttk.Button(frame_botoes, text="Atualizar", command=self.carregar_suporte_admin).pack(side=tk.LEFT, padx=5)
         ttk.Button(frame_botoes, text="Voltar", command=self.mostrar_menu_admin).pack(side=tk.LEFT, padx=5)
         
-        self.carregar_suporte_admin()
+        self.pagina_suporte_admin = 0
+        self.busca_suporte_pendente = None
         self.tabela_suporte_admin.bind("<<TreeviewSelect>>", self.selecionar_mensagem_suporte)
+        
+        return self.carregar_suporte_admin
+
+    def buscar_suporte_admin(self):
+        """Aplica a busca e os filtros, voltando para a primeira página"""
+        self.pagina_suporte_admin = 0
+        self.carregar_suporte_admin()
+
+    def mudar_pagina_suporte_admin(self, passo):
+        """Avança ou volta uma página nos resultados de suporte"""
+        if passo > 0 and len(self.tabela_suporte_admin.get_children()) < MENSAGENS_POR_PAGINA_ADMIN:
+            return
+        self.pagina_suporte_admin = max(0, self.pagina_suporte_admin + passo)
+        self.carregar_suporte_admin()
 
     def carregar_suporte_admin(self):
-        """Carrega as mensagens de suporte para o administrador"""
-        for item in self.tabela_suporte_admin.get_children():
-            self.tabela_suporte_admin.delete(item)
-            
-        cursor.execute("""
-            SELECT id, email, mensagem, resposta 
-            FROM suporte 
-            ORDER BY data_hora DESC
-        """)
+        """Carrega uma página de mensagens de suporte para o administrador"""
+        # Uma busca nova torna a anterior obsoleta
+        if self.busca_suporte_pendente:
+            self.busca_suporte_pendente.cancel()
+        
+        respondidas = {"Respondidas": True, "Não respondidas": False}.get(self.filtro_suporte_admin.get())
+        pagina = self.pagina_suporte_admin
         
-        for linha in cursor.fetchall():
-            self.tabela_suporte_admin.insert("", tk.END, values=linha)
+        def exibir(linhas):
+            if self.pagina_suporte_admin != pagina:
+                return
+            atualizar_linhas(self.tabela_suporte_admin,
+                             [(str(id_suporte), (id_suporte, email, mensagem, resposta or ""))
+                              for id_suporte, email, mensagem, resposta, _, _ in linhas])
+            self.rotulo_pagina_suporte_admin.configure(text=f"Página {pagina + 1}")
+        
+        self.rotulo_pagina_suporte_admin.configure(text="Carregando...")
+        self.busca_suporte_pendente = self.tarefas.executar(
+            Suporte.buscar_mensagens,
+            termo=self.busca_suporte_admin.get().strip() or None,
+            respondidas=respondidas,
+            limite=MENSAGENS_POR_PAGINA_ADMIN,
+            deslocamento=pagina * MENSAGENS_POR_PAGINA_ADMIN,
+            ao_concluir=exibir,
+            ao_falhar=self.falha("Não foi possível carregar as mensagens"),
+        )
 
     def selecionar_mensagem_suporte(self, event):
         """Seleciona uma mensagem de suporte para resposta"""
@@ -1219,24 +1584,33 @@ class InterfaceNutrismart:
             messagebox.showerror("Erro", "Digite uma resposta!")
             return
             
-        try:
-            cursor.execute("""
+        id_mensagem = self.id_mensagem_selecionada
+        
+        def gravar():
+            escrever("""
                 UPDATE suporte 
                 SET resposta = ? 
                 WHERE id = ?
-            """, (resposta, self.id_mensagem_selecionada))
-            conn.commit()
+            """, (resposta, id_mensagem), id_registro=id_mensagem).result()
+        
+        def concluir(_):
             messagebox.showinfo("Sucesso", "Resposta enviada com sucesso!")
             self.carregar_suporte_admin()
-        except Exception as e:
-            messagebox.showerror("Erro", f"Não foi possível enviar a resposta: {str(e)}")
+        
+        self.tarefas.executar(gravar, cancelavel=False, ao_concluir=concluir,
+                              ao_falhar=self.falha("Não foi possível enviar a resposta"))
 
     def fazer_logout(self):
         """Realiza o logout do usuário atual"""
         self.usuario_atual = None
+        self.descartar_telas()
         self.criar_menu_principal()
 
 if __name__ == "__main__":
+    verificar_esquema()
+    ativar_pelo_ambiente()
     root = tk.Tk()
     app = InterfaceNutrismart(root)
-    root.mainloop()
\ No newline at end of file
+    root.mainloop()
+    if app.monitor_latencia:
+        print(f"Latência do laço de eventos: {app.monitor_latencia.relatorio()}")
\ No newline at end of file
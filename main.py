@@ -1,4 +1,8 @@
+from database import verificar_esquema
+from gravacao import ativar_pelo_ambiente
 from sistema import menu_principal
 
 if __name__ == "__main__":
+    verificar_esquema()
+    ativar_pelo_ambiente()
     menu_principal()
@@ -1,6 +1,7 @@
 # Importações necessárias para o código
 import re  
-from database import cursor, conn  
+from database import conexao, transacao, consultar_todos
+from gravacao import escrever
 
 class Usuario:
     """Classe que representa um usuário do sistema de saúde e nutrição."""
@@ -80,8 +81,9 @@ class Usuario:
                 print("❌ E-mail inválido!")
                 continue
             # Verifica se e-mail já existe
-            cursor.execute("SELECT * FROM usuarios WHERE email = ?", (email,))
-            if cursor.fetchone():
+            with conexao(email) as conn:
+                existe = conn.execute("SELECT * FROM usuarios WHERE email = ?", (email,)).fetchone()
+            if existe:
                 print("❌ E-mail já está cadastrado!")
                 continue
             break
@@ -119,11 +121,11 @@ class Usuario:
         pergunta, resposta = escolher_pergunta_seguranca()
 
         # Insere todos os dados no banco de dados
-        cursor.execute('''
-            INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, resposta_seguranca)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (email, senha, peso, altura, sexo, dieta, imc, pergunta, resposta))
-        conn.commit()
+        with transacao(email) as conn:
+            conn.execute('''
+                INSERT INTO usuarios (email, senha, peso, altura, sexo, dieta, imc, pergunta_seguranca, resposta_seguranca)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (email, senha, peso, altura, sexo, dieta, imc, pergunta, resposta))
         print(f"✅ Usuário cadastrado com sucesso!")
         explicar_imc(imc)
 
@@ -145,8 +147,9 @@ class Usuario:
         """Permite ao usuário recuperar sua senha respondendo à pergunta de segurança."""
         print("\n🔐 Recuperação de Senha")
         email = input("Digite seu e-mail cadastrado: ").strip()
-        cursor.execute("SELECT pergunta_seguranca, resposta_seguranca, senha FROM usuarios WHERE email = ?", (email,))
-        resultado = cursor.fetchone()
+        with conexao(email) as conn:
+            resultado = conn.execute("SELECT pergunta_seguranca, resposta_seguranca, senha FROM usuarios WHERE email = ?",
+                                     (email,)).fetchone()
         if not resultado:
             print("❌ E-mail não encontrado!")
             return
@@ -159,6 +162,23 @@ class Usuario:
         else:
             print("❌ Resposta incorreta!")
 
+    @staticmethod
+    def autenticar(email, senha):
+        """Confere e-mail e senha sem interação com o terminal.
+
+        Args:
+            email (str): E-mail cadastrado
+            senha (str): Senha informada
+
+        Returns:
+            Usuario: Instância do usuário se as credenciais conferem, None caso contrário.
+        """
+        with conexao(email.strip()) as conn:
+            resultado = conn.execute("SELECT senha FROM usuarios WHERE email = ?", (email.strip(),)).fetchone()
+        if not resultado or resultado[0] != senha.strip():
+            return None
+        return Usuario(email.strip())
+
     @staticmethod
     def login():
         """Realiza o login do usuário no sistema.
@@ -169,8 +189,8 @@ class Usuario:
         print("\n=== Login ===")
         while True:
             email = input("E-mail: ").strip()
-            cursor.execute("SELECT senha FROM usuarios WHERE email = ?", (email,))
-            resultado = cursor.fetchone()
+            with conexao(email) as conn:
+                resultado = conn.execute("SELECT senha FROM usuarios WHERE email = ?", (email,)).fetchone()
             if not resultado:
                 print("❌ E-mail não encontrado. Tente novamente.")
                 return None
@@ -189,7 +209,11 @@ class Usuario:
             return Usuario(email)  # Retorna uma instância do usuário
 
     def editar_meus_dados(self):
-        """Permite ao usuário editar seus dados pessoais (peso, altura, dieta) e recalcula o IMC."""
+        """Permite ao usuário editar seus dados pessoais (peso, altura, dieta) e recalcula o IMC.
+
+        Returns:
+            Future: Resolvido quando os novos dados estiverem gravados (None se a edição for cancelada)
+        """
         print("\n=== Editar Meus Dados ===")
         try:
             novo_peso = float(input("Novo peso (kg): "))
@@ -205,15 +229,15 @@ class Usuario:
         novo_imc = Usuario.calcular_imc(novo_peso, nova_altura)
 
         # Atualiza os dados no banco de dados
-        cursor.execute('''
+        gravacao = escrever('''
             UPDATE usuarios
             SET peso = ?, altura = ?, dieta = ?, imc = ?
             WHERE email = ?
-        ''', (novo_peso, nova_altura, nova_dieta, novo_imc, self.email))
-        conn.commit()
+        ''', (novo_peso, nova_altura, nova_dieta, novo_imc, self.email), usuario=self.email)
 
         print("✅ Dados atualizados com sucesso!")
         print(f"📊 Novo IMC: {novo_imc}")
+        return gravacao
 
 class Adm(Usuario):
     """Classe que representa um administrador do sistema, com funcionalidades adicionais."""
@@ -222,11 +246,11 @@ class Adm(Usuario):
     def ver_usuarios():
         """Exibe todos os usuários cadastrados no sistema com seus dados principais."""
         print("\n=== Usuários Cadastrados ===")
-        cursor.execute("SELECT email, peso, altura, sexo, conhecimento, dieta, imc FROM usuarios")
-        usuarios = cursor.fetchall()
+        # Com armazenamento fragmentado, consulta todos os fragmentos em paralelo
+        usuarios = consultar_todos("SELECT email, peso, altura, sexo, dieta, imc FROM usuarios", chave=lambda u: u[0])
         if usuarios:
             for u in usuarios:
-                print(f"- Email: {u[0]} | Peso: {u[1]} kg | Altura: {u[2]} m | Sexo: {u[3]} | Conhecimento: {u[4]} | Dieta: {u[5]} | IMC: {u[6]}")
+                print(f"- Email: {u[0]} | Peso: {u[1]} kg | Altura: {u[2]} m | Sexo: {u[3]} | Dieta: {u[4]} | IMC: {u[5]}")
         else:
             print("❌ Nenhum usuário cadastrado.")
 
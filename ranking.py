@@ -0,0 +1,194 @@
+# Importações necessárias para o código
+import heapq
+import sys
+import threading
+from collections import defaultdict
+from datetime import date
+
+import database
+from database import JANELAS_RANKING, conexao, consultar_todos, fragmentado, pools_de_dados, transacao, usando_pool
+
+# Critérios de ordenação -> coluna de ranking_consumo
+CRITERIOS = {
+    'gramas': 'gramas',
+    'calorias': 'calorias',
+    'frequencia': 'refeicoes',
+}
+
+# Tamanho padrão dos rankings
+TOP_PADRAO = 10
+
+# Usuário que acumula o ranking geral em ranking_consumo
+_TODOS_OS_USUARIOS = ''
+
+_SQL_TOP = '''
+    SELECT alimento, gramas, calorias, refeicoes FROM ranking_consumo
+    WHERE janela = ? AND email_usuario = ?
+    ORDER BY {coluna} DESC, alimento
+    LIMIT ?
+'''
+
+# Último dia para o qual cada banco já teve as janelas avançadas neste processo
+_dias_rolados = {}
+_lock_rolagem = threading.Lock()
+
+
+def _validar(janela, criterio):
+    if janela not in JANELAS_RANKING:
+        raise ValueError(f"Janela inválida: {janela} (use {', '.join(map(str, JANELAS_RANKING))})")
+    if criterio not in CRITERIOS:
+        raise ValueError(f"Critério inválido: {criterio} (use {', '.join(CRITERIOS)})")
+    return CRITERIOS[criterio]
+
+
+def rolar_janelas(hoje=None):
+    """
+    Avança o dia de referência das janelas do ranking até ``hoje``.
+
+    Os triggers só somam cada refeição às janelas que a contêm no momento do
+    registro; com a virada do dia, os contadores diários dos dias que
+    ficaram para trás são descontados de cada janela, e os que saíram da
+    maior janela são apagados. Cada banco é avançado no máximo uma vez por
+    dia: as consultas chamam esta função e, depois da primeira, ela só
+    compara datas.
+
+    Args:
+        hoje (date, opcional): Dia de referência. Padrão: hoje
+
+    Returns:
+        int: Número de bancos que precisaram ser avançados
+    """
+    hoje = (hoje or date.today()).isoformat()
+    avancados = 0
+    for pool in pools_de_dados():
+        if _dias_rolados.get(pool.caminho) == hoje:
+            continue
+        with _lock_rolagem, usando_pool(pool), transacao() as conn:
+            referencia = conn.execute("SELECT dia FROM referencia_ranking WHERE id = 1").fetchone()[0]
+            if referencia < hoje:
+                _descontar_dias_vencidos(conn, referencia, hoje)
+                avancados += 1
+            _dias_rolados[pool.caminho] = max(referencia, hoje)
+    return avancados
+
+
+def _descontar_dias_vencidos(conn, referencia, hoje):
+    """Tira de cada janela os dias entre a referência antiga e a nova, na transação de ``conn``."""
+    janelas = [janela for (janela,) in conn.execute("SELECT janela FROM janelas_ranking WHERE janela > 0")]
+    for janela in janelas:
+        vencidos = conn.execute('''
+            SELECT email_usuario, alimento, SUM(gramas), SUM(calorias), SUM(refeicoes)
+            FROM consumo_diario_alimentos
+            WHERE dia > date(?, ?) AND dia <= date(?, ?)
+            GROUP BY email_usuario, alimento
+        ''', (referencia, f'-{janela} days', hoje, f'-{janela} days')).fetchall()
+        gerais = defaultdict(lambda: [0.0, 0.0, 0])
+        for _, alimento, gramas, calorias, refeicoes in vencidos:
+            geral = gerais[alimento]
+            geral[0] += gramas
+            geral[1] += calorias
+            geral[2] += refeicoes
+        conn.executemany('''
+            UPDATE ranking_consumo SET gramas = gramas - ?, calorias = calorias - ?, refeicoes = refeicoes - ?
+            WHERE janela = ? AND email_usuario = ? AND alimento = ?
+        ''', [(gramas, calorias, refeicoes, janela, email, alimento)
+              for email, alimento, gramas, calorias, refeicoes in vencidos] +
+             [(gramas, calorias, refeicoes, janela, _TODOS_OS_USUARIOS, alimento)
+              for alimento, (gramas, calorias, refeicoes) in gerais.items()])
+        conn.execute("DELETE FROM ranking_consumo WHERE janela = ? AND refeicoes <= 0", (janela,))
+    if janelas:
+        conn.execute("DELETE FROM consumo_diario_alimentos WHERE dia <= date(?, ?)",
+                     (hoje, f'-{max(janelas)} days'))
+    conn.execute("UPDATE referencia_ranking SET dia = ? WHERE id = 1", (hoje,))
+
+
+def ranking_usuario(email, k=TOP_PADRAO, janela=0, criterio='gramas'):
+    """
+    Os ``k`` alimentos mais consumidos por um usuário.
+
+    Lê ``k`` linhas do índice do critério em ranking_consumo, sem agregar o
+    histórico. Inclui as refeições já arquivadas.
+
+    Args:
+        email (str): E-mail do usuário
+        k (int): Tamanho do ranking
+        janela (int): Últimos 7, 30 ou 365 dias, ou 0 para o histórico todo
+        criterio (str): 'gramas', 'calorias' ou 'frequencia' (número de refeições)
+
+    Returns:
+        list: Tuplas (alimento, gramas, calorias, refeicoes), da maior para a menor no critério
+
+    Raises:
+        ValueError: Se a janela ou o critério não existirem
+    """
+    coluna = _validar(janela, criterio)
+    if janela:
+        rolar_janelas()
+    with conexao(email) as conn:
+        return conn.execute(_SQL_TOP.format(coluna=coluna), (janela, email, k)).fetchall()
+
+
+def ranking_geral(k=TOP_PADRAO, janela=0, criterio='frequencia'):
+    """
+    Os ``k`` alimentos mais registrados por todos os usuários.
+
+    Sem fragmentação, lê ``k`` linhas dos contadores gerais. Com ela, cada
+    fragmento tem os seus, e o ranking soma os contadores de cada alimento
+    (limitado ao tamanho do catálogo) antes de escolher os ``k`` maiores.
+
+    Args:
+        k (int): Tamanho do ranking
+        janela (int): Últimos 7, 30 ou 365 dias, ou 0 para o histórico todo
+        criterio (str): 'gramas', 'calorias' ou 'frequencia' (número de refeições)
+
+    Returns:
+        list: Tuplas (alimento, gramas, calorias, refeicoes), da maior para a menor no critério
+
+    Raises:
+        ValueError: Se a janela ou o critério não existirem
+    """
+    coluna = _validar(janela, criterio)
+    if janela:
+        rolar_janelas()
+    if not fragmentado():
+        with conexao() as conn:
+            return conn.execute(_SQL_TOP.format(coluna=coluna), (janela, _TODOS_OS_USUARIOS, k)).fetchall()
+
+    somas = defaultdict(lambda: [0.0, 0.0, 0])
+    for alimento, gramas, calorias, refeicoes in consultar_todos(
+            "SELECT alimento, gramas, calorias, refeicoes FROM ranking_consumo WHERE janela = ? AND email_usuario = ?",
+            (janela, _TODOS_OS_USUARIOS)):
+        soma = somas[alimento]
+        soma[0] += gramas
+        soma[1] += calorias
+        soma[2] += refeicoes
+    indice = ('gramas', 'calorias', 'refeicoes').index(coluna)
+    maiores = heapq.nsmallest(k, somas.items(), key=lambda item: (-item[1][indice], item[0]))
+    return [(alimento, *soma) for alimento, soma in maiores]
+
+
+def reconstruir():
+    """Recalcula os contadores do ranking de todos os bancos a partir do histórico (e do arquivo)."""
+    linhas = 0
+    for pool in pools_de_dados():
+        with usando_pool(pool):
+            linhas += database.reconstruir_ranking_consumo()
+        _dias_rolados.pop(pool.caminho, None)
+    return linhas
+
+
+# Uso: python ranking.py [email] [janela] [criterio] | python ranking.py reconstruir
+if __name__ == "__main__":
+    database.verificar_esquema()
+    argumentos = sys.argv[1:]
+    if argumentos[:1] == ['reconstruir']:
+        print(f"{reconstruir()} contador(es) recalculado(s).")
+        sys.exit(0)
+    email = argumentos[0] if argumentos and '@' in argumentos[0] else None
+    argumentos = argumentos[1:] if email else argumentos
+    janela = int(argumentos[0]) if argumentos else 0
+    criterio = argumentos[1] if len(argumentos) > 1 else ('gramas' if email else 'frequencia')
+    linhas = ranking_usuario(email, janela=janela, criterio=criterio) if email else \
+        ranking_geral(janela=janela, criterio=criterio)
+    for posicao, (alimento, gramas, calorias, refeicoes) in enumerate(linhas, 1):
+        print(f"{posicao:>2}. {alimento:<30} {gramas:>10.1f} g {calorias:>10.1f} kcal {refeicoes:>6} refeição(ões)")
@@ -0,0 +1,214 @@
+# Importações necessárias para o código
+import random
+import sys
+from datetime import date, timedelta
+
+import database
+from database import conexao, transacao
+from catalogo import catalogo, normalizar_nome
+
+# Alimentos sugeridos por vez no menu e na interface
+RECOMENDACOES_POR_VEZ = 4
+
+# Alimentos consumidos nos últimos dias ficam fora das sugestões
+DIAS_SEM_REPETIR = 3
+
+# Sorteios tentados por item antes de filtrar a lista inteira
+TENTATIVAS_POR_ITEM = 8
+
+# Combinações de filtros (por dieta) cujas listas filtradas ficam guardadas
+MAX_FILTROS_EM_CACHE = 64
+
+_SQL_CONSUMIDOS_RECENTEMENTE = '''
+    SELECT DISTINCT alimento FROM refeicoes
+    WHERE email_usuario = ? AND data >= ?
+'''
+
+
+class IndiceRecomendacoes:
+    """Índice em memória dieta -> alimentos recomendados que existem no catálogo.
+
+    Montado a partir de dieta_alimentos e do catálogo em cache, então só
+    contém alimentos que podem ser registrados. Cada entrada é a tupla do
+    catálogo (nome, calorias, proteinas, carboidratos, gorduras), por 100 g.
+    """
+
+    def __init__(self, relacao, obter_alimento):
+        """
+        Args:
+            relacao (iterable): Pares (dieta, nome do alimento) de dieta_alimentos
+            obter_alimento (callable): Busca a tupla de um alimento pelo nome (None se não existir)
+        """
+        self._por_dieta = {}
+        for dieta, nome in relacao:
+            alimento = obter_alimento(nome)
+            if alimento is not None:
+                self._por_dieta.setdefault(dieta, []).append(alimento)
+        self._filtrados = {}
+
+    def alimentos(self, dieta):
+        """Lista dos alimentos recomendados para a dieta (vazia se não houver)."""
+        return self._por_dieta.get(dieta, [])
+
+    def _lista(self, dieta, filtros):
+        """Alimentos da dieta que passam nos filtros; listas filtradas ficam em cache."""
+        if not any(valor is not None for valor in filtros):
+            return self.alimentos(dieta)
+        chave = (dieta, filtros)
+        lista = self._filtrados.get(chave)
+        if lista is None:
+            lista = [alimento for alimento in self.alimentos(dieta) if _passa(alimento, filtros)]
+            if len(self._filtrados) >= MAX_FILTROS_EM_CACHE:
+                self._filtrados.clear()
+            self._filtrados[chave] = lista
+        return lista
+
+    def sortear(self, dieta, k, excluir=frozenset(), filtros=(None, None, None, None), gerador=random):
+        """
+        Sorteia até ``k`` alimentos distintos da dieta, fora de ``excluir``.
+
+        Sorteia posições da lista e descarta as excluídas, então o custo é
+        O(k) quando os excluídos são poucos perto do tamanho da lista; se os
+        sorteios acabarem antes de juntar ``k`` itens, o restante sai da lista
+        filtrada inteira.
+
+        Args:
+            dieta (str): Dieta do usuário
+            k (int): Quantidade desejada
+            excluir (set): Nomes normalizados que não podem ser sugeridos
+            filtros (tuple): (max_calorias, min_proteinas, max_carboidratos, max_gorduras) por 100 g
+            gerador (random.Random): Fonte dos sorteios
+
+        Returns:
+            list: Tuplas (nome, calorias, proteinas, carboidratos, gorduras)
+        """
+        lista = self._lista(dieta, tuple(filtros))
+        escolhidos = {}
+        for _ in range(TENTATIVAS_POR_ITEM * k if lista else 0):
+            if len(escolhidos) == k:
+                break
+            posicao = gerador.randrange(len(lista))
+            if posicao not in escolhidos and normalizar_nome(lista[posicao][0]) not in excluir:
+                escolhidos[posicao] = lista[posicao]
+        if len(escolhidos) < k:
+            restantes = [posicao for posicao, alimento in enumerate(lista)
+                         if posicao not in escolhidos and normalizar_nome(alimento[0]) not in excluir]
+            for posicao in gerador.sample(restantes, min(k - len(escolhidos), len(restantes))):
+                escolhidos[posicao] = lista[posicao]
+        return list(escolhidos.values())
+
+
+def _passa(alimento, filtros):
+    """Indica se um alimento respeita os limites de calorias e macronutrientes."""
+    _, calorias, proteinas, carboidratos, gorduras = alimento
+    max_calorias, min_proteinas, max_carboidratos, max_gorduras = filtros
+    return ((max_calorias is None or calorias <= max_calorias)
+            and (min_proteinas is None or (proteinas or 0) >= min_proteinas)
+            and (max_carboidratos is None or (carboidratos or 0) <= max_carboidratos)
+            and (max_gorduras is None or (gorduras or 0) <= max_gorduras))
+
+
+# Índice compartilhado pelo processo, reconstruído quando o catálogo muda
+_indice = None
+_geracao_indice = None
+
+
+def indice_recomendacoes():
+    """Retorna o índice de recomendações, montando-o de novo se o catálogo (ou dieta_alimentos) mudou."""
+    global _indice, _geracao_indice
+    geracao = catalogo.geracao()
+    if _indice is None or _geracao_indice != geracao:
+        with conexao() as conn:
+            relacao = conn.execute("SELECT dieta, alimento FROM dieta_alimentos ORDER BY dieta, alimento").fetchall()
+        _indice = IndiceRecomendacoes(relacao, catalogo.obter)
+        _geracao_indice = geracao
+    return _indice
+
+
+def consumidos_recentemente(email, dias=DIAS_SEM_REPETIR, hoje=None):
+    """Nomes normalizados dos alimentos que o usuário registrou nos últimos ``dias`` dias (incluindo hoje)."""
+    inicio = ((hoje or date.today()) - timedelta(days=dias - 1)).strftime("%Y-%m-%d")
+    with conexao(email) as conn:
+        return {normalizar_nome(alimento) for (alimento,) in
+                conn.execute(_SQL_CONSUMIDOS_RECENTEMENTE, (email, inicio))}
+
+
+def alimentos_recomendados(email, k=RECOMENDACOES_POR_VEZ, max_calorias=None, min_proteinas=None,
+                           max_carboidratos=None, max_gorduras=None):
+    """
+    Sugestões de alimentos para a dieta do usuário, usadas pelo menu e pela interface.
+
+    Os alimentos vêm do índice de dieta_alimentos e ficam de fora os que o
+    usuário registrou nos últimos DIAS_SEM_REPETIR dias.
+
+    Args:
+        email (str): E-mail do usuário
+        k (int): Quantidade de sugestões
+        max_calorias, min_proteinas, max_carboidratos, max_gorduras (float, opcional):
+            Limites por 100 g
+
+    Returns:
+        tuple: (dieta, lista de tuplas (nome, calorias, proteinas, carboidratos, gorduras)),
+            ou None se o usuário não existir
+    """
+    with conexao(email) as conn:
+        usuario = conn.execute("SELECT dieta FROM usuarios WHERE email = ?", (email,)).fetchone()
+    if not usuario:
+        return None
+    dieta = usuario[0]
+    return dieta, indice_recomendacoes().sortear(
+        dieta, k, consumidos_recentemente(email), (max_calorias, min_proteinas, max_carboidratos, max_gorduras))
+
+
+def associar_alimentos(dieta, nomes):
+    """
+    Acrescenta alimentos às recomendações de uma dieta.
+
+    Returns:
+        int: Quantos pares (dieta, alimento) foram incluídos
+    """
+    with transacao() as conn:
+        incluidos = conn.executemany("INSERT OR IGNORE INTO dieta_alimentos (dieta, alimento) VALUES (?, ?)",
+                                     [(dieta, normalizar_nome(nome)) for nome in nomes]).rowcount
+    catalogo.invalidar()
+    return incluidos
+
+
+def remover_alimentos(dieta, nomes):
+    """
+    Retira alimentos das recomendações de uma dieta.
+
+    Returns:
+        int: Quantos pares (dieta, alimento) foram removidos
+    """
+    with transacao() as conn:
+        removidos = sum(conn.execute("DELETE FROM dieta_alimentos WHERE dieta = ? AND alimento = ?",
+                                     (dieta, normalizar_nome(nome))).rowcount for nome in nomes)
+    catalogo.invalidar()
+    return removidos
+
+
+# Uso: python recomendacao.py <email> [k]
+#      python recomendacao.py associar|remover <dieta> <alimento> [alimento ...]
+if __name__ == "__main__":
+    database.verificar_esquema()
+    argumentos = sys.argv[1:]
+    if len(argumentos) >= 3 and argumentos[0] in ('associar', 'remover'):
+        acao, dieta, nomes = argumentos[0], argumentos[1], argumentos[2:]
+        if acao == 'associar':
+            print(f"{associar_alimentos(dieta, nomes)} alimento(s) associado(s) à dieta {dieta}.")
+        else:
+            print(f"{remover_alimentos(dieta, nomes)} alimento(s) removido(s) da dieta {dieta}.")
+        sys.exit(0)
+    if not argumentos:
+        sys.exit("Uso: python recomendacao.py <email> [k] | associar|remover <dieta> <alimento> [...]")
+    resultado = alimentos_recomendados(argumentos[0], int(argumentos[1]) if len(argumentos) > 1 else
+                                       RECOMENDACOES_POR_VEZ)
+    if resultado is None:
+        sys.exit(f"Usuário não encontrado: {argumentos[0]}")
+    dieta, alimentos = resultado
+    if not alimentos:
+        sys.exit(f"Nenhum alimento cadastrado está associado à dieta {dieta}.")
+    print(f"Dieta {dieta}:")
+    for nome, calorias, *_ in alimentos:
+        print(f"- {nome} ({calorias:.0f} kcal/100 g)")
@@ -0,0 +1,161 @@
+# Importações necessárias para o código
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+from alimentacao import Comida, Registros
+from gravacao import ativar_pelo_ambiente
+from membros import Usuario
+from suportinho import Suporte, MENSAGENS_POR_PAGINA
+
+# Limites padrão do serviço
+MAX_REQUISICOES_SIMULTANEAS = 64
+MAX_REQUISICOES_EM_ESPERA = 512
+
+
+class ServicoSobrecarregado(Exception):
+    """Levantada quando a fila de espera do serviço está cheia (o cliente deve tentar mais tarde)."""
+
+
+class ServicoNutrismart:
+    """Fachada assíncrona (asyncio) sobre Comida, Usuario e Suporte.
+
+    Pensada para atender muitos clientes num único processo: cada operação é
+    uma corrotina, e o trabalho de banco roda num ThreadPoolExecutor com
+    tantas threads quanto o pool de conexões, para que nenhuma thread fique
+    parada esperando conexão.
+
+    Controle de carga em dois níveis:
+    - no máximo ``max_simultaneas`` requisições usam o executor ao mesmo tempo;
+      as demais esperam a vez (em ordem de chegada) no semáforo;
+    - se já houver ``max_em_espera`` requisições aguardando, a nova é recusada
+      na hora com ServicoSobrecarregado, em vez de aumentar a fila (e a
+      latência de todo mundo) sem limite.
+
+    Deve ser criado e usado dentro de um laço de eventos em execução.
+    """
+
+    def __init__(self, trabalhadores=None, max_simultaneas=MAX_REQUISICOES_SIMULTANEAS,
+                 max_em_espera=MAX_REQUISICOES_EM_ESPERA):
+        """
+        Args:
+            trabalhadores (int, opcional): Threads do executor; o padrão é o tamanho do pool de conexões
+            max_simultaneas (int): Requisições atendidas ao mesmo tempo
+            max_em_espera (int): Requisições que podem aguardar vez antes de o serviço recusar novas
+
+        Ativa a gravação em grupo se NUTRISMART_GRAVACAO_EM_GRUPO pedir (ver gravacao.py).
+        """
+        ativar_pelo_ambiente()
+        self.executor = ThreadPoolExecutor(max_workers=trabalhadores or database.pool_atual().tamanho,
+                                           thread_name_prefix="nutrismart-servico")
+        self.max_em_espera = max_em_espera
+        self._limite = asyncio.Semaphore(max_simultaneas)
+        self._em_espera = 0
+        self.recusadas = 0
+
+    async def _executar(self, funcao, *args, **kwargs):
+        """Roda ``funcao`` no executor respeitando os limites de concorrência."""
+        if self._em_espera >= self.max_em_espera:
+            self.recusadas += 1
+            raise ServicoSobrecarregado(f"{self._em_espera} requisições já aguardam atendimento")
+        self._em_espera += 1
+        try:
+            await self._limite.acquire()
+        finally:
+            self._em_espera -= 1
+        try:
+            laco = asyncio.get_running_loop()
+            return await laco.run_in_executor(self.executor, lambda: funcao(*args, **kwargs))
+        finally:
+            self._limite.release()
+
+    # --- Usuários --- #
+    async def login(self, email, senha):
+        """
+        Confere as credenciais de um usuário.
+
+        Returns:
+            bool: True se e-mail e senha conferem
+        """
+        return await self._executar(Usuario.autenticar, email, senha) is not None
+
+    # --- Refeições --- #
+    async def registrar_refeicao(self, email, alimento, quantidade):
+        """
+        Registra uma refeição e espera ela estar gravada no disco.
+
+        Com a gravação em grupo ativa, várias requisições compartilham o mesmo commit.
+
+        Returns:
+            tuple: (bool, str) como Comida.registrar_refeicao
+        """
+        comida = Comida(email)
+        sucesso, mensagem = await self._executar(comida.registrar_refeicao, alimento, quantidade)
+        if sucesso:
+            try:
+                await asyncio.wrap_future(comida.ultima_gravacao)
+            except Exception as erro:
+                return False, f"Erro ao registrar: {erro}"
+        return sucesso, mensagem
+
+    async def encerrar_dia(self, email, dia=None):
+        """
+        Resumo nutricional do dia.
+
+        Returns:
+            dict: Como Registros.resumo_do_dia (None se o usuário não existir)
+        """
+        return await self._executar(Registros(email).resumo_do_dia, dia)
+
+    async def ranking_alimentos(self, email, janela=0, criterio='gramas'):
+        """
+        Os 10 alimentos mais consumidos pelo usuário.
+
+        Args:
+            janela (int): Últimos 7, 30 ou 365 dias, ou 0 para o histórico todo
+            criterio (str): 'gramas', 'calorias' ou 'frequencia'
+
+        Returns:
+            list: Tuplas (alimento, total no critério)
+        """
+        return await self._executar(Comida(email).ranking_alimentos, janela, criterio)
+
+    # --- Suporte --- #
+    async def enviar_mensagem_suporte(self, email, mensagem):
+        """Grava uma mensagem de suporte e espera o commit."""
+        gravacao = await self._executar(Suporte.enviar_mensagem, email, mensagem)
+        await asyncio.wrap_future(gravacao)
+
+    async def mensagens_suporte(self, email):
+        """
+        Mensagens de um usuário e suas respostas.
+
+        Returns:
+            list: Tuplas (id, mensagem, resposta, data_hora)
+        """
+        return await self._executar(Suporte.mensagens_do_usuario, email)
+
+    async def buscar_mensagens_suporte(self, termo=None, respondidas=None, email=None,
+                                       limite=MENSAGENS_POR_PAGINA, deslocamento=0):
+        """
+        Busca mensagens de suporte (para o administrador).
+
+        Returns:
+            list: Tuplas (id, email, mensagem, resposta, data_hora, trecho)
+        """
+        return await self._executar(Suporte.buscar_mensagens, termo=termo, respondidas=respondidas,
+                                    email=email, limite=limite, deslocamento=deslocamento)
+
+    async def responder_suporte(self, id_mensagem, resposta):
+        """
+        Grava a resposta do administrador e espera o commit.
+
+        Returns:
+            bool: False se a mensagem não existir
+        """
+        gravacao = await self._executar(Suporte.responder, id_mensagem, resposta)
+        return await asyncio.wrap_future(gravacao) > 0
+
+    def fechar(self):
+        """Espera as requisições em andamento e encerra o executor."""
+        self.executor.shutdown(wait=True)
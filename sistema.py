@@ -2,6 +2,8 @@
 from membros import Usuario
 from alimentacao import Comida, ver_agenda, agenda_alimentar, feedback_usuario, dicas_nutricionais, desafio_semanal_aleatorio
 from suportinho import Suporte
+from fechamento import fechar_dia_interativo
+from cardapio import mostrar_plano_semanal
 
 # ----------------- Menu do Administrador ----------------- #
 def menu_administrador():
@@ -18,8 +20,10 @@ def menu_administrador():
         print("2. Ver alimentos")
         print("3. Ver usuários")
         print("4. Excluir alimento")
-        print("5. Suporte")  
-        print("6. Sair")
+        print("5. Importar tabela de alimentos (CSV/JSON)")
+        print("6. Fechar o dia de todos os usuários")
+        print("7. Suporte")
+        print("8. Sair")
         escolha = input("Escolha uma opção: ")
 
         if escolha == "1":
@@ -31,8 +35,12 @@ def menu_administrador():
         elif escolha == "4":
             Comida.excluir_alimento()
         elif escolha == "5":
-            Comida.submenu_suporte_administrador()
+            Comida.importar_tabela_alimentos()
         elif escolha == "6":
+            fechar_dia_interativo()
+        elif escolha == "7":
+            Suporte.submenu_suporte_administrador()
+        elif escolha == "8":
             print("Saindo do menu administrador...")
             break
         else:
@@ -61,10 +69,11 @@ def menu_usuario_logado(usuario):
         print("12. Editar meus dados")
         print("13. Logout")
         print("14. Feedback do usuário")
+        print("15. Plano alimentar da semana")
         escolha = input("Escolha uma opção: ")
 
         if escolha == "1":
-            comida.registrar_refeicao()
+            comida.registrar_refeicao_interativa()
         elif escolha == "2":
             comida.ver_refeicoes()
         elif escolha == "3":
@@ -92,6 +101,8 @@ def menu_usuario_logado(usuario):
         elif escolha == "14":
             feedback_usuario()
             break
+        elif escolha == "15":
+            mostrar_plano_semanal(email_usuario)
         else:
             print("❌ Opção inválida!")
 
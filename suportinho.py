@@ -1,5 +1,12 @@
 # Importações necessárias para o código
-from database import cursor, conn
+import re
+from datetime import timedelta
+
+from database import conexao, consultar_todos, fragmentado
+from gravacao import escrever
+
+# Quantidade de mensagens exibidas por página nas telas de suporte
+MENSAGENS_POR_PAGINA = 10
 
 class Suporte:
     @staticmethod
@@ -10,6 +17,9 @@ class Suporte:
         Parâmetros:
             email_usuario (str): E-mail do usuário que está enviando a mensagem
             mensagem (str, opcional): Mensagem pré-definida (usada para chamadas programáticas)
+
+        Retorna:
+            Future: Resolvido quando a mensagem estiver gravada (None se a mensagem for vazia)
         """
         if mensagem is None:
             print("\n--- Contato com o Administrador ---")
@@ -21,11 +31,57 @@ class Suporte:
             return
 
         # Insere a mensagem no banco de dados
-        cursor.execute("INSERT INTO suporte (email, mensagem) VALUES (?, ?)", 
-                        (email_usuario, mensagem))
-        conn.commit()
+        gravacao = Suporte.enviar_mensagem(email_usuario, mensagem)
 
         print("✅ Mensagem enviada com sucesso! O administrador responderá em breve.")
+        return gravacao
+
+    @staticmethod
+    def enviar_mensagem(email_usuario, mensagem):
+        """
+        Grava uma mensagem de suporte, sem interação com o terminal.
+
+        Parâmetros:
+            email_usuario (str): E-mail do usuário que está enviando a mensagem
+            mensagem (str): Texto da mensagem (não pode ser vazio)
+
+        Retorna:
+            Future: Resolvido quando a mensagem estiver gravada
+        """
+        if not mensagem.strip():
+            raise ValueError("Mensagem vazia não pode ser enviada")
+        return escrever("INSERT INTO suporte (email, mensagem) VALUES (?, ?)", (email_usuario, mensagem),
+                        usuario=email_usuario)
+
+    @staticmethod
+    def mensagens_do_usuario(email_usuario):
+        """
+        Lista as mensagens enviadas por um usuário e suas respostas.
+
+        Parâmetros:
+            email_usuario (str): E-mail do usuário
+
+        Retorna:
+            list: Tuplas (id, mensagem, resposta, data_hora), das mais antigas para as mais recentes
+        """
+        with conexao(email_usuario) as conn:
+            return conn.execute("SELECT id, mensagem, resposta, data_hora FROM suporte WHERE email = ? ORDER BY id",
+                                (email_usuario,)).fetchall()
+
+    @staticmethod
+    def responder(id_mensagem, resposta):
+        """
+        Grava a resposta do administrador para uma mensagem.
+
+        Parâmetros:
+            id_mensagem (int): ID da mensagem respondida
+            resposta (str): Texto da resposta
+
+        Retorna:
+            Future: Resolvido com o número de mensagens atualizadas (0 se o ID não existir)
+        """
+        return escrever("UPDATE suporte SET resposta = ? WHERE id = ?", (resposta, id_mensagem),
+                        id_registro=id_mensagem)
 
     @staticmethod
     def visualizar_respostas(email_usuario):
@@ -38,9 +94,7 @@ class Suporte:
         print("\n--- Respostas do Administrador ---")
         
         # Busca todas as interações do usuário com o suporte
-        cursor.execute("SELECT mensagem, resposta FROM suporte WHERE email = ?", 
-                        (email_usuario,))
-        registros = cursor.fetchall()
+        registros = [(mensagem, resposta) for _, mensagem, resposta, _ in Suporte.mensagens_do_usuario(email_usuario)]
 
         if not registros:
             print("📭 Você ainda não enviou nenhuma mensagem ao administrador.")
@@ -86,41 +140,152 @@ class Suporte:
         while True:
             print("\n--- Suporte ---")
             print("1. Visualizar contatos de usuários")
-            print("2. Responder usuário")
-            print("3. Voltar ao menu anterior")
+            print("2. Buscar mensagens")
+            print("3. Responder usuário")
+            print("4. Voltar ao menu anterior")
             escolha = input("Escolha uma opção: ")
 
             if escolha == "1":
                 Suporte.visualizar_contatos_usuarios()
             elif escolha == "2":
-                Suporte.responder_usuario()
+                Suporte.buscar_contatos_usuarios()
             elif escolha == "3":
+                Suporte.responder_usuario()
+            elif escolha == "4":
                 break
             else:
                 print("❌ Opção inválida!")
 
     @staticmethod
-    def visualizar_contatos_usuarios():
-        """Exibe todas as mensagens de suporte recebidas dos usuários."""
-        # Busca todas as interações de suporte registradas
-        cursor.execute("SELECT id, email, mensagem, resposta FROM suporte")
-        contatos = cursor.fetchall()
+    def buscar_mensagens(termo=None, respondidas=None, email=None, data_inicio=None, data_fim=None,
+                         limite=MENSAGENS_POR_PAGINA, deslocamento=0):
+        """
+        Busca mensagens de suporte com texto livre e filtros.
 
-        if not contatos:
-            print("\nNenhuma mensagem de usuários no momento.")
-            return
+        Com ``termo``, usa o índice FTS5 (suporte_fts) sobre mensagem e resposta,
+        ordena por relevância (bm25) e devolve um trecho com os termos
+        destacados entre colchetes. Sem ``termo``, lista as mais recentes.
 
-        print("\n--- Mensagens dos usuários ---")
-        # Exibe cada mensagem com informações completas
-        for contato in contatos:
-            id_suporte, email, mensagem, resposta = contato
-            print(f"\nID: {id_suporte}")
-            print(f"Usuário: {email}")
-            print(f"Mensagem: {mensagem}")
-            if resposta:
-                print(f"Resposta: {resposta}")
-            else:
-                print("Resposta: (ainda não respondida)")
+        Parâmetros:
+            termo (str, opcional): Palavras buscadas (todas precisam aparecer; aceita início de palavra)
+            respondidas (bool, opcional): True só respondidas, False só pendentes, None todas
+            email (str, opcional): Filtra por e-mail do usuário
+            data_inicio (date, opcional): Primeiro dia do período (inclusive)
+            data_fim (date, opcional): Último dia do período (inclusive)
+            limite (int): Tamanho da página
+            deslocamento (int): Quantas mensagens pular (página * limite)
+
+        Retorna:
+            list: Tuplas (id, email, mensagem, resposta, data_hora, trecho)
+        """
+        filtros, parametros = [], []
+        if respondidas is True:
+            filtros.append("s.resposta IS NOT NULL AND s.resposta != ''")
+        elif respondidas is False:
+            filtros.append("(s.resposta IS NULL OR s.resposta = '')")
+        if email:
+            filtros.append("s.email = ?")
+            parametros.append(email)
+        if data_inicio:
+            filtros.append("s.data_hora >= ?")
+            parametros.append(data_inicio.strftime("%Y-%m-%d"))
+        if data_fim:
+            filtros.append("s.data_hora < ?")
+            parametros.append((data_fim + timedelta(days=1)).strftime("%Y-%m-%d"))
+
+        palavras = re.findall(r"\w+", termo or "")
+        with conexao(email) as conn:
+            tem_fts = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'suporte_fts'").fetchone()
+
+        # A última coluna (relevância ou data) só serve para ordenar e é removida no fim
+        if palavras and tem_fts:
+            consulta = " ".join(f'"{palavra}"*' for palavra in palavras)
+            onde = " AND ".join(["suporte_fts MATCH ?"] + filtros)
+            sql = f'''
+                SELECT s.id, s.email, s.mensagem, s.resposta, s.data_hora,
+                       snippet(suporte_fts, -1, '[', ']', '…', 12), bm25(suporte_fts)
+                FROM suporte_fts
+                JOIN suporte s ON s.id = suporte_fts.rowid
+                WHERE {onde}
+                ORDER BY bm25(suporte_fts)
+                LIMIT ? OFFSET ?
+            '''
+            parametros = [consulta] + parametros
+            chave, decrescente = (lambda linha: linha[6]), False
+        else:
+            # Sem termo (ou sem FTS5 disponível): filtra por LIKE e ordena por data
+            for palavra in palavras:
+                filtros.append("(s.mensagem LIKE ? OR IFNULL(s.resposta, '') LIKE ?)")
+                parametros += [f"%{palavra}%", f"%{palavra}%"]
+            onde = " AND ".join(filtros) or "1"
+            sql = f'''
+                SELECT s.id, s.email, s.mensagem, s.resposta, s.data_hora, s.mensagem, s.data_hora
+                FROM suporte s
+                WHERE {onde}
+                ORDER BY s.data_hora DESC, s.id DESC
+                LIMIT ? OFFSET ?
+            '''
+            chave, decrescente = (lambda linha: (linha[4], linha[0])), True
+
+        if email or not fragmentado():
+            with conexao(email) as conn:
+                linhas = conn.execute(sql, parametros + [limite, deslocamento]).fetchall()
+        else:
+            # Caixa de entrada global: cada fragmento devolve as primeiras linhas e a página sai da junção
+            linhas = consultar_todos(sql, parametros + [deslocamento + limite, 0], chave=chave,
+                                     decrescente=decrescente)[deslocamento:deslocamento + limite]
+        return [linha[:6] for linha in linhas]
+
+    @staticmethod
+    def exibir_paginas(**filtros):
+        """
+        Exibe mensagens de suporte página por página no terminal.
+
+        Parâmetros:
+            **filtros: Mesmos filtros aceitos por ``buscar_mensagens``
+        """
+        pagina = 0
+        while True:
+            contatos = Suporte.buscar_mensagens(deslocamento=pagina * MENSAGENS_POR_PAGINA, **filtros)
+
+            if not contatos:
+                if pagina == 0:
+                    print("\nNenhuma mensagem de usuários no momento.")
+                return
+
+            print(f"\n--- Mensagens dos usuários (página {pagina + 1}) ---")
+            # Exibe cada mensagem com informações completas
+            for id_suporte, email, mensagem, resposta, data_hora, trecho in contatos:
+                print(f"\nID: {id_suporte} ({data_hora})")
+                print(f"Usuário: {email}")
+                print(f"Mensagem: {mensagem}")
+                if filtros.get("termo") and trecho != mensagem:
+                    print(f"Trecho: {trecho}")
+                if resposta:
+                    print(f"Resposta: {resposta}")
+                else:
+                    print("Resposta: (ainda não respondida)")
+
+            if len(contatos) < MENSAGENS_POR_PAGINA:
+                return
+            if input("\nEnter para a próxima página ou 's' para parar: ").strip().lower() == 's':
+                return
+            pagina += 1
+
+    @staticmethod
+    def visualizar_contatos_usuarios():
+        """Exibe as mensagens de suporte recebidas dos usuários, das mais recentes para as mais antigas."""
+        Suporte.exibir_paginas()
+
+    @staticmethod
+    def buscar_contatos_usuarios():
+        """Pede termos e filtros ao administrador e exibe as mensagens encontradas."""
+        print("\n--- Buscar mensagens ---")
+        termo = input("Palavras a buscar (Enter para todas): ").strip()
+        status = input("Status (1 - todas, 2 - respondidas, 3 - não respondidas): ").strip()
+        email = input("E-mail do usuário (Enter para todos): ").strip()
+        respondidas = {"2": True, "3": False}.get(status)
+        Suporte.exibir_paginas(termo=termo or None, respondidas=respondidas, email=email or None)
 
     @staticmethod
     def responder_usuario():
@@ -138,14 +303,13 @@ class Suporte:
             return
         
         # Valida se o ID existe
-        cursor.execute("SELECT id FROM suporte WHERE id = ?", (id_resposta,))
-        if not cursor.fetchone():
+        with conexao(id_registro=id_resposta) as conn:
+            existe = conn.execute("SELECT id FROM suporte WHERE id = ?", (id_resposta,)).fetchone()
+        if not existe:
             print("ID inválido.")
             return
 
         # Coleta e registra a resposta
         resposta = input("Digite a resposta para o usuário: ")
-        cursor.execute("UPDATE suporte SET resposta = ? WHERE id = ?", 
-                        (resposta, id_resposta))
-        conn.commit()
+        Suporte.responder(id_resposta, resposta)
         print("Resposta enviada com sucesso.")
\ No newline at end of file
@@ -0,0 +1,210 @@
+# Importações necessárias para o código
+import queue
+import threading
+import time
+from concurrent.futures import Future, CancelledError
+
+# Intervalo (ms) entre as verificações de tarefas concluídas pela interface
+INTERVALO_VERIFICACAO_MS = 15
+
+
+class ExecutorBanco:
+    """Executa o trabalho de banco de dados em threads próprias.
+
+    As funções enviadas entram numa fila e são processadas, na ordem de
+    chegada, por ``trabalhadores`` threads. Cada envio devolve um
+    ``concurrent.futures.Future``; um futuro cancelado antes de sair da fila
+    nunca chega a ser executado.
+
+    Com um único trabalhador (o padrão) as escritas da interface ficam
+    naturalmente em série, na mesma ordem em que o usuário as fez.
+    """
+
+    def __init__(self, trabalhadores=1):
+        """
+        Args:
+            trabalhadores (int): Quantidade de threads consumindo a fila
+        """
+        self._fila = queue.Queue()
+        self._threads = []
+        for numero in range(trabalhadores):
+            thread = threading.Thread(target=self._trabalhar, name=f"nutrismart-banco-{numero}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _trabalhar(self):
+        """Laço de cada trabalhador: executa as funções da fila até receber None."""
+        while True:
+            item = self._fila.get()
+            if item is None:
+                return
+            futuro, funcao, args, kwargs = item
+            if not futuro.set_running_or_notify_cancel():
+                continue
+            try:
+                resultado = funcao(*args, **kwargs)
+            except BaseException as erro:
+                futuro.set_exception(erro)
+            else:
+                futuro.set_result(resultado)
+
+    def enviar(self, funcao, *args, **kwargs):
+        """
+        Coloca ``funcao(*args, **kwargs)`` na fila de execução.
+
+        Returns:
+            Future: Futuro com o resultado (ou a exceção) da função
+        """
+        futuro = Future()
+        self._fila.put((futuro, funcao, args, kwargs))
+        return futuro
+
+    def pendentes(self):
+        """Quantidade aproximada de tarefas esperando na fila."""
+        return self._fila.qsize()
+
+    def encerrar(self, esperar=True):
+        """Termina os trabalhadores depois das tarefas já enfileiradas."""
+        for _ in self._threads:
+            self._fila.put(None)
+        if esperar:
+            for thread in self._threads:
+                thread.join()
+
+
+class TarefasInterface:
+    """Liga o ExecutorBanco ao laço de eventos do Tk.
+
+    O Tk não pode ser usado fora da sua própria thread, então os resultados
+    não voltam por callbacks do trabalhador: enquanto houver tarefas em
+    andamento, ``root.after`` verifica periodicamente os futuros concluídos e
+    chama ``ao_concluir``/``ao_falhar`` já na thread da interface.
+
+    Cada tarefa pertence à tela em que foi criada. ``trocar_tela()`` cancela as
+    consultas que ainda não começaram e descarta o resultado das que já estão
+    rodando, para que uma resposta atrasada nunca desenhe numa tela que o
+    usuário já deixou. Gravações (``cancelavel=False``) nunca são canceladas:
+    ao trocar de tela só os seus callbacks são descartados.
+    """
+
+    def __init__(self, root, executor=None, intervalo_ms=INTERVALO_VERIFICACAO_MS):
+        """
+        Args:
+            root: Janela principal (qualquer objeto com ``after``)
+            executor (ExecutorBanco, opcional): Executor usado; cria um se omitido
+            intervalo_ms (int): Intervalo entre verificações dos futuros
+        """
+        self.root = root
+        self.executor = executor or ExecutorBanco()
+        self.intervalo_ms = intervalo_ms
+        self._tela = 0
+        self._em_andamento = []
+        self._verificando = False
+
+    def executar(self, funcao, *args, ao_concluir=None, ao_falhar=None, ao_terminar=None, cancelavel=True,
+                 **kwargs):
+        """
+        Executa ``funcao`` fora da thread da interface.
+
+        Args:
+            funcao (callable): Trabalho a executar (consultas, gravações)
+            ao_concluir (callable, opcional): Recebe o resultado, na thread da interface
+            ao_falhar (callable, opcional): Recebe a exceção, na thread da interface
+            ao_terminar (callable, opcional): Chamado sem argumentos antes de
+                ``ao_concluir``/``ao_falhar`` (ex.: esconder o indicador de carregamento)
+            cancelavel (bool): Se ``trocar_tela()`` pode cancelar a tarefa antes de
+                ela começar; use False em gravações, que precisam sempre rodar
+
+        Returns:
+            Future: Futuro da tarefa; ``cancel()`` descarta a tarefa se ela ainda não começou
+        """
+        futuro = self.executor.enviar(funcao, *args, **kwargs)
+        self._em_andamento.append((futuro, self._tela, cancelavel, ao_concluir, ao_falhar, ao_terminar))
+        if not self._verificando:
+            self._verificando = True
+            self.root.after(self.intervalo_ms, self._verificar)
+        return futuro
+
+    def trocar_tela(self):
+        """Invalida as tarefas da tela atual; chamado sempre que a tela é trocada."""
+        self._tela += 1
+        for futuro, _, cancelavel, *_ in self._em_andamento:
+            if cancelavel:
+                futuro.cancel()
+
+    def _verificar(self):
+        """Entrega os resultados prontos e reagenda a verificação se ainda houver tarefas."""
+        prontos, restantes = [], []
+        for tarefa in self._em_andamento:
+            (prontos if tarefa[0].done() else restantes).append(tarefa)
+        self._em_andamento = restantes
+
+        for futuro, tela, _, ao_concluir, ao_falhar, ao_terminar in prontos:
+            if tela != self._tela or futuro.cancelled():
+                continue
+            if ao_terminar:
+                ao_terminar()
+            try:
+                resultado = futuro.result()
+            except CancelledError:
+                continue
+            except Exception as erro:
+                if ao_falhar:
+                    ao_falhar(erro)
+            else:
+                if ao_concluir:
+                    ao_concluir(resultado)
+
+        if self._em_andamento:
+            self.root.after(self.intervalo_ms, self._verificar)
+        else:
+            self._verificando = False
+
+
+class MonitorLatencia:
+    """Mede travamentos do laço de eventos.
+
+    Agenda um ``root.after`` a cada ``intervalo_ms`` e registra quanto cada
+    chamada atrasou em relação ao previsto. Um atraso acima de um quadro
+    (16 ms) significa que algum tratador bloqueou a interface.
+    """
+
+    def __init__(self, root, intervalo_ms=5):
+        self.root = root
+        self.intervalo_ms = intervalo_ms
+        self.atrasos = []
+        self._previsto = None
+        self._ativo = False
+
+    def iniciar(self):
+        """Começa a medir."""
+        self._ativo = True
+        self._previsto = time.perf_counter() + self.intervalo_ms / 1000
+        self.root.after(self.intervalo_ms, self._tique)
+
+    def parar(self):
+        """Para de medir; as medições feitas continuam em ``atrasos``."""
+        self._ativo = False
+
+    def _tique(self):
+        if not self._ativo:
+            return
+        agora = time.perf_counter()
+        self.atrasos.append(max(0.0, agora - self._previsto))
+        self._previsto = agora + self.intervalo_ms / 1000
+        self.root.after(self.intervalo_ms, self._tique)
+
+    def relatorio(self, limite_ms=16):
+        """
+        Resume as medições.
+
+        Returns:
+            str: Quantidade de amostras, p50, p99, máximo e travamentos acima de ``limite_ms``
+        """
+        if not self.atrasos:
+            return "nenhuma amostra de latência"
+        atrasos = sorted(self.atrasos)
+        travamentos = sum(1 for atraso in atrasos if atraso * 1000 > limite_ms)
+        return (f"{len(atrasos)} amostras | p50 {atrasos[len(atrasos) // 2] * 1000:.1f} ms | "
+                f"p99 {atrasos[int(len(atrasos) * 0.99)] * 1000:.1f} ms | "
+                f"máx {atrasos[-1] * 1000:.1f} ms | {travamentos} travamento(s) > {limite_ms} ms")